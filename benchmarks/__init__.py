@@ -0,0 +1 @@
+"""Benchmarks for the aind-data-transfer-service"""
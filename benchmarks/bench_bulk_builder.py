@@ -0,0 +1,80 @@
+"""
+Compare building submit requests for many upload jobs one job at a time
+with the columnar UploadJobsBuilder.
+
+Run with ``python -m benchmarks.bench_bulk_builder``.
+"""
+
+import argparse
+import timeit
+from itertools import islice
+from typing import Any, Dict, List
+
+from aind_data_transfer_service.bulk_builder import UploadJobsBuilder
+from aind_data_transfer_service.models.core import (
+    SubmitJobRequestV2,
+    UploadJobConfigsV2,
+    validation_context,
+)
+from benchmarks.bench_model_variants import CONTEXT, example_job
+from benchmarks.utils import emit
+
+
+def columns(n_jobs: int) -> Dict[str, List[Any]]:
+    """Varying fields of n_jobs jobs as columns."""
+    return {
+        "subject_id": [str(i) for i in range(n_jobs)],
+        "acq_datetime": ["2020-10-13T13:10:10"] * n_jobs,
+        "input_source": [f"dir/data_set_{i}" for i in range(n_jobs)],
+    }
+
+
+def build_in_loop(data: Dict[str, List[Any]]) -> List[SubmitJobRequestV2]:
+    """Build every job from its full configs, then chunk them."""
+    jobs = []
+    for subject_id, acq_datetime, input_source in zip(*data.values()):
+        configs = example_job(subject_id)
+        configs["acq_datetime"] = acq_datetime
+        configs["tasks"]["modality_transformation_settings"][
+            "behavior-videos"
+        ]["job_settings"]["input_source"] = input_source
+        jobs.append(UploadJobConfigsV2(**configs))
+    jobs = iter(jobs)
+    return [
+        SubmitJobRequestV2(upload_jobs=chunk)
+        for chunk in iter(lambda: list(islice(jobs, 50)), [])
+    ]
+
+
+def build_with_builder(
+    data: Dict[str, List[Any]],
+) -> List[SubmitJobRequestV2]:
+    """Validate the shared fields once and stamp out the jobs."""
+    shared_fields = {
+        k: v
+        for k, v in example_job("").items()
+        if k not in ("subject_id", "acq_datetime")
+    }
+    return UploadJobsBuilder(**shared_fields).build_requests(data)
+
+
+def main() -> None:
+    """Run the benchmark and print the results as json."""
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--jobs", type=int, default=500)
+    args = parser.parse_args()
+    data = columns(args.jobs)
+    results = {"jobs": args.jobs}
+    with validation_context(CONTEXT):
+        assert build_in_loop(data) == build_with_builder(data)
+        for name, func in [
+            ("loop", build_in_loop),
+            ("builder", build_with_builder),
+        ]:
+            seconds = min(timeit.repeat(lambda: func(data), number=1))
+            results[name] = {"jobs_per_second": args.jobs / seconds}
+    emit(results)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,156 @@
+"""
+Compare mapping wide job sheets with the compiled CsvRowMapper against the
+previous map_csv_row_to_job, which parsed every header for every cell and
+deep copied the modality configs.
+
+Run with ``python -m benchmarks.bench_csv_row_mapper``.
+"""
+
+import argparse
+import time
+from copy import deepcopy
+from typing import Callable, Dict, List
+
+from aind_data_transfer_service.configs.csv_handler import (
+    CsvRowMapper,
+    _build_upload_job_configs,
+    create_nested_dict,
+    nested_update,
+)
+from aind_data_transfer_service.models.core import Task, UploadJobConfigsV2
+from benchmarks.utils import emit
+
+MODALITIES = [
+    "behavior",
+    "behavior-videos",
+    "confocal",
+    "ecephys",
+    "EMG",
+    "fib",
+    "icephys",
+    "ISI",
+    "MRI",
+    "pophys",
+    "slap2",
+    "SPIM",
+]
+
+
+def wide_rows(n_rows: int, n_modalities: int) -> List[Dict[str, str]]:
+    """Build rows with n_modalities modality slots of five columns each."""
+    rows = []
+    for i in range(n_rows):
+        row = {
+            "project_name": "Ephys Platform",
+            "s3-bucket": "private",
+            "platform": "ecephys",
+            "subject-id": str(100000 + i),
+            "acq-datetime": "2020-10-10 14:10:10",
+            "job_type": "ecephys",
+            "metadata_dir": f"dir/metadata_{i}",
+        }
+        for n in range(n_modalities):
+            m = MODALITIES[n % len(MODALITIES)]
+            row[f"modality{n}"] = m
+            row[f"modality{n}.source"] = f"dir/data_set_{i}/{m}"
+            row[f"modality{n}.compress_raw_data"] = "True"
+            row[f"modality{n}.chunker.chunk_size"] = "64"
+            row[f"modality{n}.chunker.num_workers"] = "4"
+        rows.append(row)
+    return rows
+
+
+def legacy_map_row(row: dict) -> UploadJobConfigsV2:
+    """The column loop of map_csv_row_to_job before the header plan."""
+    modality_configs = dict()
+    job_configs = dict()
+    check_s3_folder_exists_task = None
+    codeocean_tasks = dict()
+    for key, value in row.items():
+        clean_key = str(key).strip(" ").replace("-", "_")
+        clean_val = str(value).strip(" ")
+        if clean_val is None or clean_val == "":
+            continue
+        if clean_key.startswith("modality"):
+            modality_parts = clean_key.split(".")
+            modality_key = modality_parts[0]
+            sub_key = (
+                "modality"
+                if len(modality_parts) == 1
+                else ".".join(modality_parts[1:])
+            )
+            modality_configs.setdefault(modality_key, dict())
+            if sub_key == "source":
+                sub_key = "input_source"
+            if sub_key in ["process_capsule_id", "capsule_id", "pipeline_id"]:
+                run_param = (
+                    "pipeline_id" if sub_key == "pipeline_id" else "capsule_id"
+                )
+                codeocean_tasks[modality_key] = Task(
+                    skip_task=False,
+                    job_settings={
+                        "pipeline_monitor_settings": {
+                            "run_params": {run_param: clean_val}
+                        }
+                    },
+                )
+            else:
+                nested_val = dict()
+                create_nested_dict(
+                    dict_to_update=nested_val,
+                    key_string=sub_key,
+                    value=clean_val,
+                )
+                current_dict = deepcopy(
+                    modality_configs.get(modality_key, dict())
+                )
+                nested_update(current_dict, nested_val)
+                modality_configs[modality_key] = current_dict
+        elif clean_key == "force_cloud_sync" and clean_val.upper() in [
+            "TRUE",
+            "T",
+        ]:
+            check_s3_folder_exists_task = {"skip_task": True}
+        else:
+            job_configs[clean_key] = clean_val
+    return _build_upload_job_configs(
+        job_configs=job_configs,
+        modality_configs=modality_configs,
+        codeocean_tasks=codeocean_tasks,
+        check_s3_folder_exists_task=check_s3_folder_exists_task,
+    )
+
+
+def time_mapping(
+    rows: List[dict], map_row: Callable[[dict], UploadJobConfigsV2]
+) -> Dict[str, float]:
+    """Map all rows and return the elapsed and per row times."""
+    start = time.perf_counter()
+    for row in rows:
+        map_row(row)
+    elapsed = time.perf_counter() - start
+    return {"seconds": elapsed, "us_per_row": 1e6 * elapsed / len(rows)}
+
+
+def main() -> None:
+    """Run the benchmark and print the results as json."""
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--rows", type=int, default=10000)
+    parser.add_argument("--modalities", type=int, default=12)
+    args = parser.parse_args()
+    rows = wide_rows(args.rows, args.modalities)
+    row_mapper = CsvRowMapper(headers=rows[0].keys())
+    if legacy_map_row(rows[0]) != row_mapper.map_row(rows[0]):
+        raise AssertionError("Compiled mapper does not match legacy mapper")
+    emit(
+        {
+            "rows": len(rows),
+            "columns": len(rows[0]),
+            "legacy": time_mapping(rows, legacy_map_row),
+            "compiled": time_mapping(rows, row_mapper.map_row),
+        }
+    )
+
+
+if __name__ == "__main__":
+    main()
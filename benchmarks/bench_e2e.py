@@ -0,0 +1,153 @@
+"""
+End to end benchmark of the main endpoints. The server is served with
+uvicorn and calls local stand-ins for Airflow, SSM and the metadata service,
+which can add latency and fail a fraction of requests. Reports throughput
+and p50/p95/p99 latency of each endpoint.
+
+The client, server and stand-ins share a process, so absolute numbers are
+lower than in a deployment. Compare results from the same machine.
+
+Run with ``python -m benchmarks.bench_e2e --requests 200 --concurrency 8``.
+"""
+
+import argparse
+import asyncio
+import time
+from typing import Any, Callable, Dict, List
+
+import httpx
+
+from benchmarks.soak_memory import make_workload
+from benchmarks.standins import (
+    Faults,
+    StandIns,
+    airflow_app,
+    serve_server,
+    ssm_app,
+)
+from benchmarks.utils import emit, percentiles, run_metadata
+
+
+async def run_scenario(
+    client: httpx.AsyncClient,
+    send: Callable[[Any], Any],
+    expected_status: int,
+    n_requests: int,
+    concurrency: int,
+) -> Dict[str, Any]:
+    """
+    Send n_requests requests, at most concurrency at a time.
+
+    Returns
+    -------
+    Dict[str, Any]
+      Throughput, latency percentiles in ms, and the number of responses
+      that didn't have the expected status.
+
+    """
+    semaphore = asyncio.Semaphore(concurrency)
+    latencies: List[float] = []
+    statuses: Dict[str, int] = dict()
+
+    async def send_one() -> None:
+        """Send a request and record its latency and status."""
+        async with semaphore:
+            start = time.perf_counter()
+            try:
+                status = str((await send(client)).status_code)
+            except httpx.HTTPError as e:
+                status = e.__class__.__name__
+            latencies.append(time.perf_counter() - start)
+            statuses[status] = statuses.get(status, 0) + 1
+
+    start = time.perf_counter()
+    await asyncio.gather(*(send_one() for _ in range(n_requests)))
+    elapsed = time.perf_counter() - start
+    latencies_ms = [latency * 1000 for latency in latencies]
+    return {
+        "requests": n_requests,
+        "errors": n_requests - statuses.get(str(expected_status), 0),
+        "statuses": statuses,
+        "seconds": elapsed,
+        "throughput_rps": n_requests / elapsed,
+        "latency_ms": {
+            **percentiles(latencies_ms),
+            "mean": sum(latencies_ms) / len(latencies_ms),
+            "max": max(latencies_ms),
+        },
+    }
+
+
+async def run_benchmark(url: str, args: argparse.Namespace) -> dict:
+    """Run every selected scenario against the server at url."""
+    workload = make_workload(csv_rows=args.csv_rows)
+    results = dict()
+    async with httpx.AsyncClient(base_url=url, timeout=120) as client:
+        for name, expected_status, send in workload:
+            if args.scenarios and name not in args.scenarios:
+                continue
+            await run_scenario(
+                client, send, expected_status, args.warmup, args.concurrency
+            )
+            results[name] = await run_scenario(
+                client,
+                send,
+                expected_status,
+                args.requests,
+                args.concurrency,
+            )
+    return results
+
+
+def main() -> None:
+    """Run the benchmark and print the results as json."""
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--requests", type=int, default=200)
+    parser.add_argument("--warmup", type=int, default=10)
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--scenarios", nargs="*", default=[])
+    parser.add_argument("--csv-rows", type=int, default=50)
+    parser.add_argument("--dag-runs", type=int, default=250)
+    parser.add_argument("--ssm-page-size", type=int, default=10)
+    parser.add_argument("--airflow-latency-ms", type=float, default=20)
+    parser.add_argument("--ssm-latency-ms", type=float, default=10)
+    parser.add_argument("--metadata-latency-ms", type=float, default=10)
+    parser.add_argument("--jitter-ms", type=float, default=0)
+    parser.add_argument("--failure-rate", type=float, default=0)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", help="Also write the results here")
+    args = parser.parse_args()
+    faults = {
+        name: Faults(
+            latency=latency_ms / 1000,
+            jitter=args.jitter_ms / 1000,
+            failure_rate=args.failure_rate,
+            seed=args.seed,
+        )
+        for name, latency_ms in (
+            ("airflow", args.airflow_latency_ms),
+            ("ssm", args.ssm_latency_ms),
+            ("metadata", args.metadata_latency_ms),
+        )
+    }
+    stand_ins = StandIns(
+        airflow=airflow_app(n_dag_runs=args.dag_runs),
+        ssm=ssm_app(page_size=args.ssm_page_size),
+        faults=faults,
+    )
+    with stand_ins, serve_server(stand_ins) as url:
+        results = asyncio.run(run_benchmark(url, args))
+    config = {
+        key: value for key, value in vars(args).items() if key != "output"
+    }
+    emit(
+        {
+            "meta": run_metadata("bench_e2e", config),
+            "results": results,
+        },
+        path=args.output,
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,94 @@
+"""
+Measure how long importing the client models takes in a fresh interpreter
+with ``python -X importtime`` and list the modules that are deferred until
+first use but were imported anyway.
+
+Run with ``python -m benchmarks.bench_import_time``.
+"""
+
+import argparse
+import re
+import statistics
+import subprocess
+import sys
+from typing import Dict, List, Tuple
+
+from benchmarks.utils import emit
+
+# Modules that importing the client models should not pull in
+DEFERRED_MODULES = (
+    "yaml",
+    "pythonjsonlogger",
+    "logging.config",
+    "email_validator",
+)
+
+_IMPORT_TIME_LINE = re.compile(
+    r"^import time:\s+(\d+) \|\s+(\d+) \| (\s*)(\S+)$"
+)
+
+
+def import_times(module: str) -> Dict[str, Tuple[int, int]]:
+    """
+    Import a module in a fresh interpreter.
+
+    Parameters
+    ----------
+    module : str
+
+    Returns
+    -------
+    Dict[str, Tuple[int, int]]
+      The self and cumulative import time in microseconds of every module
+      that was imported.
+
+    """
+    output = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        capture_output=True,
+        text=True,
+        check=True,
+    ).stderr
+    times = dict()
+    for line in output.splitlines():
+        match = _IMPORT_TIME_LINE.match(line)
+        if match is not None:
+            times[match.group(4)] = (int(match.group(1)), int(match.group(2)))
+    return times
+
+
+def run(module: str, runs: int, top: int) -> Dict[str, object]:
+    """Import the module several times and summarize the runs."""
+    samples: List[Dict[str, Tuple[int, int]]] = [
+        import_times(module) for _ in range(runs)
+    ]
+    cumulative_ms = [s[module][1] / 1000 for s in samples]
+    fastest = samples[cumulative_ms.index(min(cumulative_ms))]
+    slowest_modules = sorted(
+        fastest.items(), key=lambda item: item[1][0], reverse=True
+    )[:top]
+    return {
+        "module": module,
+        "min_ms": min(cumulative_ms),
+        "median_ms": statistics.median(cumulative_ms),
+        "self_ms_by_module": {k: v[0] / 1000 for k, v in slowest_modules},
+        "deferred_modules_imported": [
+            m for m in DEFERRED_MODULES if m in fastest
+        ],
+    }
+
+
+def main() -> None:
+    """Run the benchmark and print the results as json."""
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument(
+        "--module", default="aind_data_transfer_service.models.core"
+    )
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--top", type=int, default=10)
+    args = parser.parse_args()
+    emit(run(args.module, args.runs, args.top))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,101 @@
+"""
+Measure memory kept alive and validation throughput when batches of jobs
+are validated from json with and without interned platform and modality
+instances.
+
+Run with ``python -m benchmarks.bench_interning``.
+"""
+
+import argparse
+import gc
+import json
+import time
+import tracemalloc
+from typing import Any, Dict, List
+from unittest.mock import patch
+
+from aind_data_transfer_service.models.core import (
+    UploadJobConfigsV2Model,
+    validation_context,
+)
+from benchmarks.bench_model_variants import CONTEXT, example_job
+from benchmarks.utils import emit
+
+
+def legacy_intern_platform(v: Any) -> Any:
+    """Platform handling before interning."""
+    if type(v).__module__ == "aind_data_schema_models.platforms":
+        return v.model_dump()
+    return v
+
+
+def validate_batch(job_dicts: List[dict]) -> List[UploadJobConfigsV2Model]:
+    """Validate job configs as parsed from a request body."""
+    with validation_context(CONTEXT):
+        return [UploadJobConfigsV2Model.model_validate(j) for j in job_dicts]
+
+
+def run(job_dicts: List[dict]) -> Dict[str, float]:
+    """Measure a batch: memory of the jobs, distinct platform and modality
+    objects, and jobs validated per second."""
+    gc.collect()
+    tracemalloc.start()
+    try:
+        before, _ = tracemalloc.get_traced_memory()
+        jobs = validate_batch(job_dicts)
+        after, _ = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    distinct = len(
+        {id(j.platform) for j in jobs}
+        | {id(m) for j in jobs for m in j.modalities}
+    )
+    del jobs
+    start = time.perf_counter()
+    validate_batch(job_dicts)
+    elapsed = time.perf_counter() - start
+    return {
+        "retained_bytes": after - before,
+        "distinct_platform_and_modality_objects": distinct,
+        "jobs_per_second": len(job_dicts) / elapsed,
+    }
+
+
+def main() -> None:
+    """Run the benchmark and print the results as json."""
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--batches", type=int, nargs="+", default=[50, 5000])
+    args = parser.parse_args()
+    results = {}
+    for n_jobs in args.batches:
+        job_dicts = json.loads(
+            json.dumps(
+                [
+                    UploadJobConfigsV2Model(**example_job(str(i))).model_dump(
+                        mode="json", exclude={"s3_prefix"}
+                    )
+                    for i in range(n_jobs)
+                ]
+            )
+        )
+        interned = run(job_dicts)
+        with (
+            patch(
+                "aind_data_transfer_service.models.core.intern_platform",
+                legacy_intern_platform,
+            ),
+            patch(
+                "aind_data_transfer_service.models.core.intern_modality",
+                lambda v: v,
+            ),
+        ):
+            not_interned = run(job_dicts)
+        results[str(n_jobs)] = {
+            "interned": interned,
+            "not_interned": not_interned,
+        }
+    emit(results)
+
+
+if __name__ == "__main__":
+    main()
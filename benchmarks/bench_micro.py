@@ -0,0 +1,317 @@
+"""
+Microbenchmarks of the library hot paths: request validation, the duplicate
+job check, csv row mapping, nested dict helpers, job status mapping and the
+job upload template.
+
+``run`` times every benchmark and prints the results as json. Save them
+with ``--output`` to use as a baseline. ``compare`` flags benchmarks that
+got slower than a baseline by more than a tolerance, and exits with status
+1 if there are any. Baselines are machine specific, so only compare runs
+from the same machine.
+
+Run with ``python -m benchmarks.bench_micro run --output current.json`` and
+``python -m benchmarks.bench_micro compare benchmarks/baselines/micro.json
+current.json --tolerance 0.2``.
+"""
+
+import argparse
+import json
+import re
+import sys
+import timeit
+from types import SimpleNamespace
+from typing import Any, Callable, Dict, Iterator, Tuple
+
+from aind_data_transfer_service.configs.csv_handler import (
+    create_nested_dict,
+    map_csv_row_to_job,
+    nested_update,
+)
+from aind_data_transfer_service.configs.job_upload_template import (
+    JobUploadTemplate,
+)
+from aind_data_transfer_service.models.core import (
+    SubmitJobRequestV2,
+    UploadJobConfigsV2,
+    validation_context,
+)
+from aind_data_transfer_service.models.internal import (
+    AirflowDagRunSummariesResponse,
+    JobStatus,
+)
+from benchmarks.bench_csv_row_mapper import wide_rows
+from benchmarks.bench_model_variants import example_job
+from benchmarks.standins import make_dag_run
+from benchmarks.utils import emit, run_metadata
+
+CONTEXT = {
+    "job_types": ["default", "ecephys"],
+    "project_names": ["Behavior Platform", "Ephys Platform"],
+    "current_jobs": [],
+}
+
+# Name and a function that sets up the benchmark and returns the callable
+# that is timed
+Benchmark = Tuple[str, Callable[[], Callable[[], Any]]]
+
+
+def request_json(n_jobs: int) -> str:
+    """Submit request json with n_jobs upload jobs."""
+    with validation_context(CONTEXT):
+        upload_jobs = [
+            UploadJobConfigsV2(**example_job(str(100000 + i))).model_dump(
+                mode="json"
+            )
+            for i in range(n_jobs)
+        ]
+    return json.dumps(
+        {"upload_jobs": upload_jobs, "user_email": "test@example.com"}
+    )
+
+
+def validate_request(n_jobs: int) -> Callable[[], Any]:
+    """Validate a submit request with n_jobs jobs."""
+    content = request_json(n_jobs)
+
+    def run() -> Any:
+        """Validate the request"""
+        with validation_context(CONTEXT):
+            return SubmitJobRequestV2.model_validate_json(content)
+
+    return run
+
+
+def check_duplicates(n_current_jobs: int, legacy: bool) -> Callable:
+    """Check a 50 job request against n_current_jobs running jobs. Legacy
+    current jobs have no fingerprint and share an s3_prefix with a new job,
+    so they have to be hashed."""
+    with validation_context(CONTEXT):
+        model = SubmitJobRequestV2.model_validate_json(request_json(50))
+    current_jobs = []
+    for i in range(n_current_jobs):
+        job = model.upload_jobs[i % 50]
+        conf = job.model_dump(mode="json", exclude_none=True)
+        if legacy:
+            conf.pop("fingerprint", None)
+            conf["user_email"] = f"other_{i}@example.com"
+        else:
+            conf["fingerprint"] = f"{i:064x}"
+        current_jobs.append({"upload_jobs": [conf]})
+    info = SimpleNamespace(context={**CONTEXT, "current_jobs": current_jobs})
+    return lambda: model.check_duplicate_upload_jobs(info)
+
+
+def map_row(n_modalities: int) -> Callable[[], Any]:
+    """Map a csv row with n_modalities modality slots to a job."""
+    row = wide_rows(1, n_modalities)[0]
+
+    def run() -> Any:
+        """Map the row"""
+        with validation_context(CONTEXT):
+            return map_csv_row_to_job(row)
+
+    return run
+
+
+def nested_update_setup() -> Callable[[], Any]:
+    """Merge job settings into a modality config."""
+    config = {
+        "job_settings": {
+            "input_source": "dir/data_set_1",
+            "chunker": {"chunk_size": 64, "num_workers": 4},
+        },
+        "skip_task": False,
+    }
+    updates = {
+        "job_settings": {
+            "output_directory": "dir/output",
+            "chunker": {"chunk_size": 128},
+        },
+        "image": {"tag": "latest"},
+    }
+    return lambda: nested_update(config, updates)
+
+
+def create_nested_dict_setup() -> Callable[[], Any]:
+    """Build a nested dict from a period delimited csv header."""
+    return lambda: create_nested_dict(
+        dict(), "job_settings.chunker.chunk_size", "64"
+    )
+
+
+def job_status_setup(n_runs: int) -> Callable[[], Any]:
+    """Map n_runs dag runs to job statuses."""
+    dag_runs = AirflowDagRunSummariesResponse.model_validate(
+        {
+            "dag_runs": [make_dag_run(i) for i in range(n_runs)],
+            "total_entries": n_runs,
+        }
+    ).dag_runs
+    return lambda: [JobStatus.from_airflow_dag_run(d) for d in dag_runs]
+
+
+BENCHMARKS: Tuple[Benchmark, ...] = (
+    ("validate_request:1_job", lambda: validate_request(1)),
+    ("validate_request:10_jobs", lambda: validate_request(10)),
+    ("validate_request:50_jobs", lambda: validate_request(50)),
+    (
+        "check_duplicate_upload_jobs:1000_current_jobs",
+        lambda: check_duplicates(1000, legacy=False),
+    ),
+    (
+        "check_duplicate_upload_jobs:10000_current_jobs",
+        lambda: check_duplicates(10000, legacy=False),
+    ),
+    (
+        "check_duplicate_upload_jobs:1000_legacy_current_jobs",
+        lambda: check_duplicates(1000, legacy=True),
+    ),
+    ("map_csv_row_to_job:narrow", lambda: map_row(1)),
+    ("map_csv_row_to_job:wide", lambda: map_row(12)),
+    ("nested_update", nested_update_setup),
+    ("create_nested_dict", create_nested_dict_setup),
+    (
+        "job_status_from_airflow_dag_run:10000_runs",
+        lambda: job_status_setup(10000),
+    ),
+    (
+        "create_excel_sheet_filestream",
+        lambda: JobUploadTemplate.create_excel_sheet_filestream,
+    ),
+)
+
+
+def time_call(func: Callable[[], Any], repeat: int) -> Dict[str, float]:
+    """
+    Time func with timeit. The number of calls per run is chosen so that a
+    run takes at least 0.2 seconds.
+
+    Parameters
+    ----------
+    func : Callable[[], Any]
+    repeat : int
+      Number of runs. The fastest run is reported.
+
+    Returns
+    -------
+    Dict[str, float]
+      seconds_per_call, calls_per_second, number of calls per run, and
+      repeat.
+
+    """
+    timer = timeit.Timer(func)
+    number, _ = timer.autorange()
+    seconds = min(timer.repeat(repeat=repeat, number=number)) / number
+    return {
+        "seconds_per_call": seconds,
+        "calls_per_second": 1 / seconds,
+        "number": number,
+        "repeat": repeat,
+    }
+
+
+def run(args: argparse.Namespace) -> None:
+    """Run the benchmarks that match the filter."""
+    pattern = re.compile(args.filter)
+    results = dict()
+    for name, setup in BENCHMARKS:
+        if pattern.search(name):
+            results[name] = time_call(setup(), args.repeat)
+    config = {"filter": args.filter, "repeat": args.repeat}
+    emit(
+        {"meta": run_metadata("bench_micro", config), "results": results},
+        path=args.output,
+    )
+
+
+def compare_results(
+    baseline: Dict[str, Any], current: Dict[str, Any], tolerance: float
+) -> Iterator[Dict[str, Any]]:
+    """
+    Compare the seconds per call of each benchmark.
+
+    Parameters
+    ----------
+    baseline : Dict[str, Any]
+      Results saved by run.
+    current : Dict[str, Any]
+      Results saved by run.
+    tolerance : float
+      Fractional change in seconds per call that is not flagged.
+
+    Returns
+    -------
+    Iterator[Dict[str, Any]]
+      The name, ratio of current to baseline time, and status of each
+      benchmark, which is regression, improvement, unchanged, or missing if
+      only one of the results has it.
+
+    """
+    baseline_results = baseline["results"]
+    current_results = current["results"]
+    for name in sorted(set(baseline_results) | set(current_results)):
+        if name not in baseline_results or name not in current_results:
+            yield {"name": name, "ratio": None, "status": "missing"}
+            continue
+        ratio = (
+            current_results[name]["seconds_per_call"]
+            / baseline_results[name]["seconds_per_call"]
+        )
+        if ratio > 1 + tolerance:
+            status = "regression"
+        elif ratio < 1 - tolerance:
+            status = "improvement"
+        else:
+            status = "unchanged"
+        yield {"name": name, "ratio": round(ratio, 3), "status": status}
+
+
+def compare(args: argparse.Namespace) -> None:
+    """Compare two result files and exit with status 1 on regressions."""
+    with open(args.baseline) as f:
+        baseline = json.load(f)
+    with open(args.current) as f:
+        current = json.load(f)
+    comparisons = list(compare_results(baseline, current, args.tolerance))
+    regressions = [
+        c["name"] for c in comparisons if c["status"] == "regression"
+    ]
+    emit(
+        {
+            "baseline_commit": baseline["meta"].get("commit"),
+            "current_commit": current["meta"].get("commit"),
+            "tolerance": args.tolerance,
+            "comparisons": comparisons,
+            "regressions": regressions,
+        }
+    )
+    if regressions:
+        sys.exit(1)
+
+
+def main() -> None:
+    """Parse the command and run it."""
+    parser = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawTextHelpFormatter
+    )
+    commands = parser.add_subparsers(dest="command", required=True)
+    run_parser = commands.add_parser("run", help="Run the benchmarks")
+    run_parser.add_argument(
+        "--filter", default="", help="Regex of benchmark names to run"
+    )
+    run_parser.add_argument("--repeat", type=int, default=5)
+    run_parser.add_argument("--output", help="Also write the results here")
+    run_parser.set_defaults(func=run)
+    compare_parser = commands.add_parser(
+        "compare", help="Flag regressions against a baseline"
+    )
+    compare_parser.add_argument("baseline")
+    compare_parser.add_argument("current")
+    compare_parser.add_argument("--tolerance", type=float, default=0.2)
+    compare_parser.set_defaults(func=compare)
+    args = parser.parse_args()
+    args.func(args)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,97 @@
+"""
+Compare construction and validation throughput of the settings based
+UploadJobConfigsV2 and SubmitJobRequestV2 with their plain BaseModel
+variants.
+
+Run with ``python -m benchmarks.bench_model_variants``.
+"""
+
+import argparse
+import json
+import timeit
+from typing import Any, Callable, Dict
+
+from aind_data_schema_models.modalities import Modality
+
+from aind_data_transfer_service.configs.platforms_v1 import Platform
+from aind_data_transfer_service.models.core import (
+    SubmitJobRequestV2,
+    SubmitJobRequestV2Model,
+    UploadJobConfigsV2,
+    UploadJobConfigsV2Model,
+    validation_context,
+)
+from benchmarks.utils import emit
+
+CONTEXT = {
+    "job_types": ["default"],
+    "project_names": ["Behavior Platform"],
+    "current_jobs": [],
+}
+
+
+def example_job(subject_id: str) -> Dict[str, Any]:
+    """Job configs as a client script would build them."""
+    return {
+        "job_type": "default",
+        "user_email": "test@example.com",
+        "project_name": "Behavior Platform",
+        "platform": Platform.BEHAVIOR,
+        "modalities": [Modality.BEHAVIOR_VIDEOS],
+        "subject_id": subject_id,
+        "acq_datetime": "2020-10-13T13:10:10",
+        "tasks": {
+            "modality_transformation_settings": {
+                "behavior-videos": {
+                    "job_settings": {"input_source": "dir/data_set_1"}
+                }
+            }
+        },
+    }
+
+
+def per_second(func: Callable[[], Any], number: int) -> float:
+    """Calls of func per second, best of 3 runs."""
+    with validation_context(CONTEXT):
+        best = min(timeit.repeat(func, number=number, repeat=3))
+    return number / best
+
+
+def main() -> None:
+    """Run the benchmark and print the results as json."""
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--number", type=int, default=2000)
+    args = parser.parse_args()
+    job = example_job("123456")
+    request_json = json.dumps(
+        {
+            "upload_jobs": [
+                UploadJobConfigsV2(**example_job(str(i))).model_dump(
+                    mode="json"
+                )
+                for i in range(50)
+            ]
+        }
+    )
+    results = {}
+    for name, job_model, request_model in [
+        ("settings", UploadJobConfigsV2, SubmitJobRequestV2),
+        ("base_model", UploadJobConfigsV2Model, SubmitJobRequestV2Model),
+    ]:
+        results[name] = {
+            "job_init_per_second": per_second(
+                lambda: job_model(**job), args.number
+            ),
+            "job_validate_per_second": per_second(
+                lambda: job_model.model_validate(job), args.number
+            ),
+            "request_50_jobs_validate_json_per_second": per_second(
+                lambda: request_model.model_validate_json(request_json),
+                max(1, args.number // 50),
+            ),
+        }
+    emit(results)
+
+
+if __name__ == "__main__":
+    main()
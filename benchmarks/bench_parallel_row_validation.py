@@ -0,0 +1,57 @@
+"""
+Measure how row validation throughput of ParallelRowValidator scales with
+the number of worker processes. Zero workers validates every row in the
+calling process.
+
+Run with ``python -m benchmarks.bench_parallel_row_validation``.
+"""
+
+import argparse
+import os
+import time
+
+from aind_data_transfer_service.row_validation import ParallelRowValidator
+from benchmarks.bench_csv_row_mapper import wide_rows
+from benchmarks.utils import emit
+
+CONTEXT = {
+    "job_types": ["default", "ecephys"],
+    "project_names": ["Ephys Platform"],
+    "current_jobs": [],
+}
+
+
+def main() -> None:
+    """Run the benchmark and print the results as json."""
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--rows", type=int, default=10000)
+    parser.add_argument("--modalities", type=int, default=2)
+    parser.add_argument("--chunk-size", type=int, default=250)
+    parser.add_argument("--max-workers", type=int, default=os.cpu_count() or 1)
+    args = parser.parse_args()
+    rows = wide_rows(args.rows, args.modalities)
+    worker_counts = [0] + [
+        n for n in (1, 2, 4, 8, 16, 32) if n <= args.max_workers
+    ]
+    results = {}
+    for workers in worker_counts:
+        validator = ParallelRowValidator(
+            max_workers=workers, chunk_size=args.chunk_size
+        )
+        try:
+            # Start the worker processes before timing
+            validator.validate(rows[: args.chunk_size * workers], CONTEXT)
+            start = time.perf_counter()
+            validator.validate(rows, CONTEXT)
+            elapsed = time.perf_counter() - start
+        finally:
+            validator.shutdown()
+        results[str(workers)] = {
+            "seconds": elapsed,
+            "rows_per_second": len(rows) / elapsed,
+        }
+    emit({"rows": len(rows), "cpu_count": os.cpu_count(), "workers": results})
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,94 @@
+"""
+Count build_data_name calls and time a 50 job submit request with and
+without the memoized s3_prefix. The submit path validates the request,
+checks for duplicates, dumps the jobs to json and logs each s3_prefix.
+
+Run with ``python -m benchmarks.bench_s3_prefix``.
+"""
+
+import argparse
+import json
+import logging
+import time
+from typing import Dict
+from unittest.mock import patch
+
+from aind_data_transfer_service.models import core
+from aind_data_transfer_service.models.core import (
+    SubmitJobRequestV2Model,
+    UploadJobConfigsV2Model,
+    validation_context,
+)
+from benchmarks.bench_model_variants import CONTEXT, example_job
+from benchmarks.utils import emit
+
+
+def submit(request_json: str) -> None:
+    """Do the model work of the submit_jobs endpoint."""
+    with validation_context(CONTEXT):
+        model = SubmitJobRequestV2Model.model_validate_json(request_json)
+    model.model_dump_json(warnings=False, exclude_none=True)
+    for job in model.upload_jobs:
+        logging.debug(f"{job.job_type}, {job.s3_prefix} sending to airflow.")
+
+
+def clear_cache() -> None:
+    """Clear the s3_prefix cache if it is enabled."""
+    getattr(core._build_s3_prefix, "cache_clear", lambda: None)()
+
+
+def run(request_json: str, repeat: int) -> Dict[str, float]:
+    """Count build_data_name calls per submit and time the submits."""
+    with patch(
+        "aind_data_transfer_service.models.core.build_data_name",
+        wraps=core.build_data_name,
+    ) as mock_build_data_name:
+        clear_cache()
+        submit(request_json)
+        calls = mock_build_data_name.call_count
+    start = time.perf_counter()
+    for _ in range(repeat):
+        # Each request has new jobs, so start with an empty cache
+        clear_cache()
+        submit(request_json)
+    elapsed = time.perf_counter() - start
+    return {
+        "build_data_name_calls": calls,
+        "ms_per_submit": 1000 * elapsed / repeat,
+    }
+
+
+def main() -> None:
+    """Run the benchmark and print the results as json."""
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--jobs", type=int, default=50)
+    parser.add_argument("--repeat", type=int, default=50)
+    args = parser.parse_args()
+    request_json = json.dumps(
+        {
+            "user_email": "test@example.com",
+            "upload_jobs": [
+                UploadJobConfigsV2Model(**example_job(str(i))).model_dump(
+                    mode="json"
+                )
+                for i in range(args.jobs)
+            ],
+        }
+    )
+    memoized = run(request_json, args.repeat)
+    with patch(
+        "aind_data_transfer_service.models.core._build_s3_prefix",
+        core._build_s3_prefix.__wrapped__,
+    ):
+        not_memoized = run(request_json, args.repeat)
+    emit(
+        {
+            "jobs": args.jobs,
+            "memoized": memoized,
+            "not_memoized": not_memoized,
+        }
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,137 @@
+"""
+Compare peak memory of reading a job sheet the way validate_csv used to
+(whole file decoded into one string and xlsx converted to csv text) with
+the streaming readers in configs.csv_handler.
+
+Run with ``python -m benchmarks.bench_validate_csv_ingestion``.
+"""
+
+import argparse
+import csv
+import io
+from tempfile import SpooledTemporaryFile
+from typing import BinaryIO, Iterator
+
+from openpyxl import Workbook, load_workbook
+
+from aind_data_transfer_service.configs.csv_handler import (
+    read_csv_rows,
+    read_xlsx_rows,
+)
+from benchmarks.utils import emit, measure
+
+HEADERS = [
+    "project_name",
+    "modality0.capsule_id",
+    "modality0",
+    "modality0.input_source",
+    "modality1",
+    "modality1.input_source",
+    "s3-bucket",
+    "subject-id",
+    "platform",
+    "acq-datetime",
+    "job_type",
+]
+
+
+def example_rows(n_rows: int) -> Iterator[list]:
+    """Generate n_rows rows of a realistic job sheet."""
+    for i in range(n_rows):
+        yield [
+            "Ephys Platform",
+            "",
+            "ecephys",
+            f"dir/data_set_{i}",
+            "behavior-videos",
+            f"dir/data_set_{i}/videos",
+            "private",
+            str(100000 + i),
+            "ecephys",
+            "2020-10-10 14:10:10",
+            "ecephys",
+        ]
+
+
+def make_csv(n_rows: int) -> bytes:
+    """Build a csv sheet with n_rows data rows."""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(HEADERS)
+    writer.writerows(example_rows(n_rows))
+    return buffer.getvalue().encode("utf-8")
+
+
+def make_xlsx(n_rows: int) -> bytes:
+    """Build an xlsx sheet with n_rows data rows."""
+    workbook = Workbook(write_only=True)
+    sheet = workbook.create_sheet()
+    sheet.append(HEADERS)
+    for row in example_rows(n_rows):
+        sheet.append(row)
+    buffer = io.BytesIO()
+    workbook.save(buffer)
+    return buffer.getvalue()
+
+
+def spool(content: bytes) -> BinaryIO:
+    """Mimic the spooled temporary file starlette stores uploads in."""
+    file = SpooledTemporaryFile(max_size=1024 * 1024)
+    file.write(content)
+    file.seek(0)
+    return file
+
+
+def legacy_read(filename: str, file: BinaryIO) -> int:
+    """Read rows the way validate_csv did before streaming ingestion."""
+    content = file.read()
+    if filename.endswith(".csv"):
+        data = content.decode("utf-8-sig")
+    else:
+        xlsx_book = load_workbook(io.BytesIO(content), read_only=True)
+        csv_io = io.StringIO()
+        csv_writer = csv.writer(csv_io)
+        for r in xlsx_book.active.iter_rows(values_only=True):
+            if any(r):
+                csv_writer.writerow(r)
+        xlsx_book.close()
+        data = csv_io.getvalue()
+    return sum(1 for _ in csv.DictReader(io.StringIO(data)))
+
+
+def streaming_read(filename: str, file: BinaryIO) -> int:
+    """Read rows with the streaming readers."""
+    if filename.endswith(".csv"):
+        rows = read_csv_rows(file)
+    else:
+        rows = read_xlsx_rows(file)
+    return sum(1 for _ in rows)
+
+
+def main() -> None:
+    """Run the benchmark and print the results as json."""
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--rows", type=int, default=10000)
+    args = parser.parse_args()
+    sheets = {
+        "sheet.csv": make_csv(args.rows),
+        "sheet.xlsx": make_xlsx(args.rows),
+    }
+    results = {}
+    for filename, content in sheets.items():
+        for name, reader in (
+            ("legacy", legacy_read),
+            ("streaming", streaming_read),
+        ):
+            with spool(content) as file:
+                n_rows, stats = measure(lambda: reader(filename, file))
+            results[f"{filename}:{name}"] = {
+                "rows": n_rows,
+                "file_bytes": len(content),
+                **stats,
+            }
+    emit(results)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,220 @@
+"""
+Replays request payloads captured in the server logs. Set
+AIND_PAYLOAD_CAPTURE_RATE on a deployment to log a sanitized copy of a
+fraction of the validate_json and submit_jobs requests, export the json log
+lines, and replay a window of them with their original spacing divided by
+--speedup.
+
+By default the requests are sent to a server started in this process and
+pointed at local stand-ins for Airflow, SSM and the metadata service, so
+nothing is submitted anywhere. Pass --url to replay against another local
+server instead. Reports the status counts, latency percentiles and the lag
+behind the schedule for each endpoint.
+
+Run with ``python -m benchmarks.replay service.log --speedup 10``.
+"""
+
+import argparse
+import asyncio
+import json
+import sys
+import time
+from datetime import datetime
+from typing import Any, Dict, Iterable, List, Optional
+
+import httpx
+
+from aind_data_transfer_service.log_handler import EventType
+from benchmarks.standins import Faults, StandIns, serve_server
+from benchmarks.utils import emit, percentiles, run_metadata
+
+
+def parse_timestamp(value: str) -> datetime:
+    """Parse an ISO-8601 timestamp as written by CustomJsonFormatter."""
+    return datetime.fromisoformat(value.replace("Z", "+00:00"))
+
+
+def read_captures(
+    lines: Iterable[str],
+    start: Optional[datetime] = None,
+    end: Optional[datetime] = None,
+) -> List[Dict[str, Any]]:
+    """
+    Captured payloads in the log lines, oldest first. Lines that aren't
+    json, or that have a prefix before the json like some log exports, are
+    handled.
+
+    Parameters
+    ----------
+    lines : Iterable[str]
+    start : Optional[datetime]
+      Only keep captures at or after this time.
+    end : Optional[datetime]
+      Only keep captures before this time.
+
+    Returns
+    -------
+    List[Dict[str, Any]]
+      The time, endpoint and payload of each capture.
+
+    """
+    captures = []
+    for line in lines:
+        brace = line.find("{")
+        if brace < 0:
+            continue
+        try:
+            record = json.loads(line[brace:])
+        except json.JSONDecodeError:
+            continue
+        if (
+            not isinstance(record, dict)
+            or record.get("event_type") != EventType.PAYLOAD_CAPTURED.value
+        ):
+            continue
+        timestamp = parse_timestamp(record["timestamp"])
+        if (start is not None and timestamp < start) or (
+            end is not None and timestamp >= end
+        ):
+            continue
+        captures.append(
+            {
+                "time": timestamp,
+                "endpoint": record["endpoint"],
+                "payload": record["payload"],
+            }
+        )
+    captures.sort(key=lambda capture: capture["time"])
+    return captures
+
+
+def summarize(records: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """Status counts, latency and schedule lag percentiles in ms."""
+    statuses: Dict[str, int] = dict()
+    for record in records:
+        statuses[record["status"]] = statuses.get(record["status"], 0) + 1
+    latencies_ms = [record["latency"] * 1000 for record in records]
+    lags_ms = [record["lag"] * 1000 for record in records]
+    return {
+        "requests": len(records),
+        "statuses": statuses,
+        "latency_ms": {
+            **percentiles(latencies_ms),
+            "mean": sum(latencies_ms) / len(latencies_ms),
+            "max": max(latencies_ms),
+        },
+        "lag_ms": {**percentiles(lags_ms), "max": max(lags_ms)},
+    }
+
+
+async def replay(
+    url: str, captures: List[Dict[str, Any]], speedup: float
+) -> Dict[str, Any]:
+    """
+    Send every capture to the server at url at its original offset from
+    the first capture divided by speedup.
+
+    Returns
+    -------
+    Dict[str, Any]
+      Duration of the replay and summarize results for each endpoint.
+
+    """
+    origin = captures[0]["time"]
+    records: List[Dict[str, Any]] = []
+
+    async def send(client: httpx.AsyncClient, capture: dict, due: float):
+        """Send a capture and record its status, latency and lag."""
+        sent = time.perf_counter()
+        try:
+            response = await client.post(
+                capture["endpoint"], json=capture["payload"]
+            )
+            status = str(response.status_code)
+        except httpx.HTTPError as e:
+            status = e.__class__.__name__
+        records.append(
+            {
+                "endpoint": capture["endpoint"],
+                "status": status,
+                "latency": time.perf_counter() - sent,
+                "lag": sent - due,
+            }
+        )
+
+    async with httpx.AsyncClient(base_url=url, timeout=120) as client:
+        start = time.perf_counter()
+        tasks = []
+        for capture in captures:
+            offset = (capture["time"] - origin).total_seconds() / speedup
+            due = start + offset
+            await asyncio.sleep(max(0.0, due - time.perf_counter()))
+            tasks.append(asyncio.create_task(send(client, capture, due)))
+        await asyncio.gather(*tasks)
+        elapsed = time.perf_counter() - start
+    endpoints = sorted({record["endpoint"] for record in records})
+    return {
+        "seconds": elapsed,
+        "captured_seconds": (captures[-1]["time"] - origin).total_seconds(),
+        "endpoints": {
+            endpoint: summarize(
+                [r for r in records if r["endpoint"] == endpoint]
+            )
+            for endpoint in endpoints
+        },
+    }
+
+
+def main() -> None:
+    """Replay the captures and print the results as json."""
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument(
+        "logs", nargs="+", help="Json log files, or - to read stdin"
+    )
+    parser.add_argument("--start", type=parse_timestamp)
+    parser.add_argument("--end", type=parse_timestamp)
+    parser.add_argument("--speedup", type=float, default=1)
+    parser.add_argument("--url", help="Replay against this server instead")
+    parser.add_argument("--airflow-latency-ms", type=float, default=20)
+    parser.add_argument("--ssm-latency-ms", type=float, default=10)
+    parser.add_argument("--metadata-latency-ms", type=float, default=10)
+    parser.add_argument("--output", help="Also write the results here")
+    args = parser.parse_args()
+    captures = []
+    for path in args.logs:
+        if path == "-":
+            captures.extend(read_captures(sys.stdin, args.start, args.end))
+        else:
+            with open(path) as f:
+                captures.extend(read_captures(f, args.start, args.end))
+    if not captures:
+        sys.exit("No captured payloads in the logs and window")
+    captures.sort(key=lambda capture: capture["time"])
+    if args.url is not None:
+        results = asyncio.run(replay(args.url, captures, args.speedup))
+    else:
+        stand_ins = StandIns(
+            faults={
+                name: Faults(latency=latency_ms / 1000)
+                for name, latency_ms in (
+                    ("airflow", args.airflow_latency_ms),
+                    ("ssm", args.ssm_latency_ms),
+                    ("metadata", args.metadata_latency_ms),
+                )
+            }
+        )
+        with stand_ins, serve_server(stand_ins) as url:
+            results = asyncio.run(replay(url, captures, args.speedup))
+    config = {
+        key: (value.isoformat() if isinstance(value, datetime) else value)
+        for key, value in vars(args).items()
+        if key != "output"
+    }
+    emit(
+        {"meta": run_metadata("replay", config), "results": results},
+        path=args.output,
+    )
+
+
+if __name__ == "__main__":
+    main()
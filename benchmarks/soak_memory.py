@@ -0,0 +1,192 @@
+"""
+Soak test that drives the submit, validate, job status and task log
+endpoints against local stand-ins for Airflow, SSM and the metadata service,
+and checks that traced memory stays bounded. Exits with status 1 if memory
+grew by more than --max-growth-mb after the warmup, or if any request
+failed.
+
+Run with ``python -m benchmarks.soak_memory --iterations 5000``.
+"""
+
+import argparse
+import gc
+import logging
+import os
+import sys
+from collections import Counter
+from typing import Any, Callable, Dict, List, Tuple
+
+from benchmarks.bench_model_variants import CONTEXT, example_job
+from benchmarks.bench_validate_csv_ingestion import make_csv, make_xlsx
+from benchmarks.standins import StandIns, make_dag_run
+from benchmarks.utils import emit
+
+XLSX_MEDIA_TYPE = (
+    "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
+)
+
+# Name, expected status, and function that sends the request with a
+# TestClient or an httpx client
+Workload = List[Tuple[str, int, Callable[[Any], Any]]]
+
+
+def submit_request_content() -> dict:
+    """Json body of a submit or validate request with one upload job."""
+    from aind_data_transfer_service.models.core import (
+        SubmitJobRequestV2,
+        UploadJobConfigsV2,
+        validation_context,
+    )
+
+    with validation_context(CONTEXT):
+        request = SubmitJobRequestV2(
+            upload_jobs=[UploadJobConfigsV2(**example_job("123456"))],
+            user_email="test@example.com",
+        )
+    return request.model_dump(mode="json")
+
+
+def make_workload(csv_rows: int = 10) -> Workload:
+    """
+    Requests sent in each iteration.
+
+    Parameters
+    ----------
+    csv_rows : int
+      Rows in the job sheets sent to validate_csv.
+
+    Returns
+    -------
+    Workload
+
+    """
+    content = submit_request_content()
+    sheet = make_csv(csv_rows)
+    workbook = make_xlsx(csv_rows)
+    dag_run = make_dag_run(0)
+    task_params = {
+        "dag_id": dag_run["dag_id"],
+        "dag_run_id": dag_run["dag_run_id"],
+    }
+    log_params = {
+        **task_params,
+        "task_id": "make_modality_list",
+        "try_number": 1,
+        "map_index": -1,
+    }
+    return [
+        (
+            "validate_json",
+            200,
+            lambda c: c.post("/api/v2/validate_json", json=content),
+        ),
+        (
+            "submit_jobs",
+            200,
+            lambda c: c.post("/api/v2/submit_jobs", json=content),
+        ),
+        (
+            "validate_csv",
+            200,
+            lambda c: c.post(
+                "/api/v2/validate_csv",
+                files={"file": ("jobs.csv", sheet, "text/csv")},
+            ),
+        ),
+        (
+            "validate_csv_xlsx",
+            200,
+            lambda c: c.post(
+                "/api/v2/validate_csv",
+                files={"file": ("jobs.xlsx", workbook, XLSX_MEDIA_TYPE)},
+            ),
+        ),
+        (
+            "get_job_status_list",
+            200,
+            lambda c: c.get("/api/v1/get_job_status_list"),
+        ),
+        (
+            "get_tasks_list",
+            200,
+            lambda c: c.get("/api/v1/get_tasks_list", params=task_params),
+        ),
+        (
+            "get_task_logs",
+            200,
+            lambda c: c.get("/api/v1/get_task_logs", params=log_params),
+        ),
+    ]
+
+
+def run_workload(client: Any, workload: Workload, failures: Counter) -> None:
+    """Send every request once and count unexpected statuses."""
+    for name, expected_status, send in workload:
+        response = send(client)
+        if response.status_code != expected_status:
+            failures[f"{name}:{response.status_code}"] += 1
+
+
+def main() -> None:
+    """Run the soak test and print the results as json."""
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--iterations", type=int, default=2000)
+    parser.add_argument("--warmup", type=int, default=200)
+    parser.add_argument("--sample-every", type=int, default=500)
+    parser.add_argument("--max-growth-mb", type=float, default=10)
+    parser.add_argument("--top", type=int, default=10)
+    args = parser.parse_args()
+    with StandIns() as stand_ins:
+        # The server reads some settings when it is imported
+        os.environ.update(stand_ins.env)
+        from fastapi.testclient import TestClient
+
+        from aind_data_transfer_service.memory import MemoryTracer
+        from aind_data_transfer_service.server import app
+
+        logging.disable(logging.WARNING)
+        workload = make_workload()
+        failures: Counter = Counter()
+        tracer = MemoryTracer(max_snapshots=2)
+        samples: List[Dict[str, int]] = []
+        with TestClient(app) as client:
+            for _ in range(args.warmup):
+                run_workload(client, workload, failures)
+            gc.collect()
+            tracer.start()
+            baseline = tracer.take_snapshot()
+            samples.append(
+                {"iteration": 0, "traced_bytes": baseline["traced_bytes"]}
+            )
+            for i in range(1, args.iterations + 1):
+                run_workload(client, workload, failures)
+                if i % args.sample_every == 0 or i == args.iterations:
+                    gc.collect()
+                    traced_bytes = tracer.status()["traced_bytes"]
+                    samples.append(
+                        {"iteration": i, "traced_bytes": traced_bytes}
+                    )
+            final = tracer.take_snapshot()
+            tracer.stop()
+    growth = final["traced_bytes"] - baseline["traced_bytes"]
+    bounded = growth <= args.max_growth_mb * 1024 * 1024
+    emit(
+        {
+            "iterations": args.iterations,
+            "requests": args.iterations * len(workload),
+            "failures": dict(failures),
+            "growth_bytes": growth,
+            "max_growth_bytes": int(args.max_growth_mb * 1024 * 1024),
+            "bounded": bounded,
+            "samples": samples,
+            "top_growth": tracer.diff(
+                baseline["id"], final["id"], limit=args.top
+            ),
+        }
+    )
+    if not bounded or failures:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,514 @@
+"""
+Local stand-ins for the services the server calls: the Airflow REST API,
+AWS SSM parameter store, and the metadata service project names endpoint.
+Each stand-in is a small ASGI app served by uvicorn on a background thread,
+so the server under test makes real http calls with its usual clients.
+
+Point the server at the stand-ins with the env vars from ``StandIns.env``
+before importing ``aind_data_transfer_service.server``. Latency and errors
+can be injected into any stand-in with ``Faults``.
+"""
+
+import asyncio
+import json
+import logging
+import os
+import random
+import socket
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime, timedelta, timezone
+from typing import Dict, Iterator, List, Optional
+
+import uvicorn
+from starlette.applications import Starlette
+from starlette.requests import Request
+from starlette.responses import JSONResponse, PlainTextResponse, Response
+from starlette.routing import Route
+from starlette.types import ASGIApp, Receive, Scope, Send
+
+PARAM_PREFIX = "/aind/dts"
+PROJECT_NAMES = ["Ephys Platform", "Behavior Platform", "MSMA Platform"]
+JOB_TYPES = ["ecephys", "behavior", "default"]
+TASK_IDS = [
+    "make_modality_list",
+    "gather_preliminary_metadata",
+    "send_codeocean",
+]
+_START = datetime(2025, 1, 1, tzinfo=timezone.utc)
+
+
+def make_dag_run(i: int) -> dict:
+    """A v2 dag run with an upload job that won't clash with submitted
+    jobs."""
+    created = (_START + timedelta(minutes=i)).isoformat()
+    return {
+        "conf": {
+            "job_type": JOB_TYPES[i % len(JOB_TYPES)],
+            "s3_prefix": f"ecephys_{100000 + i}_2025-01-01_00-00-00",
+            "upload_jobs": [
+                {
+                    "job_type": JOB_TYPES[i % len(JOB_TYPES)],
+                    "s3_prefix": f"ecephys_{100000 + i}_2025-01-01_00-00-00",
+                    "fingerprint": f"{i:064x}",
+                }
+            ],
+        },
+        "dag_id": "transform_and_upload_v2",
+        "dag_run_id": f"manual__{created}",
+        "data_interval_end": created,
+        "data_interval_start": created,
+        "end_date": None,
+        "execution_date": created,
+        "external_trigger": True,
+        "last_scheduling_decision": created,
+        "logical_date": created,
+        "note": None,
+        "run_type": "manual",
+        "start_date": created,
+        "state": "running",
+    }
+
+
+def make_task_instance(dag_id: str, dag_run_id: str, i: int) -> dict:
+    """A finished task instance of a dag run."""
+    start = _START + timedelta(seconds=i)
+    return {
+        "dag_id": dag_id,
+        "dag_run_id": dag_run_id,
+        "duration": 1.0,
+        "end_date": (start + timedelta(seconds=1)).isoformat(),
+        "execution_date": _START.isoformat(),
+        "executor_config": "{}",
+        "hostname": "stand-in",
+        "map_index": -1,
+        "max_tries": 0,
+        "note": None,
+        "operator": "_PythonDecoratedOperator",
+        "pid": 1,
+        "pool": "default_pool",
+        "pool_slots": 1,
+        "priority_weight": len(TASK_IDS) - i,
+        "queue": "default",
+        "queued_when": start.isoformat(),
+        "rendered_fields": {},
+        "sla_miss": None,
+        "start_date": start.isoformat(),
+        "state": "success",
+        "task_id": TASK_IDS[i % len(TASK_IDS)],
+        "trigger": None,
+        "triggerer_job": None,
+        "try_number": 1,
+        "unixname": "airflow",
+    }
+
+
+def airflow_app(n_dag_runs: int = 100, log_lines: int = 200) -> Starlette:
+    """
+    Stand-in for the Airflow REST API.
+
+    Parameters
+    ----------
+    n_dag_runs : int
+      Number of dag runs returned by ListDagRuns, split into pages of the
+      requested page_limit.
+    log_lines : int
+      Number of lines in each task log.
+
+    Returns
+    -------
+    Starlette
+
+    """
+    dag_runs = [make_dag_run(i) for i in range(n_dag_runs)]
+    log = "".join(
+        f"[2025-01-01, 00:00:{i % 60:02d} UTC] INFO - Line {i}\n"
+        for i in range(log_lines)
+    )
+
+    async def list_dag_runs(request: Request) -> Response:
+        """ListDagRuns batch endpoint"""
+        body = await request.json()
+        offset = body.get("page_offset", 0)
+        end = offset + body.get("page_limit", 100)
+        return JSONResponse(
+            {
+                "dag_runs": dag_runs[offset:end],
+                "total_entries": len(dag_runs),
+            }
+        )
+
+    async def trigger_dag_run(request: Request) -> Response:
+        """TriggerDagRun endpoint"""
+        body = await request.json()
+        dag_run = make_dag_run(0)
+        dag_run["conf"] = body.get("conf")
+        dag_run["dag_id"] = request.path_params["dag_id"]
+        dag_run["state"] = "queued"
+        return JSONResponse(dag_run)
+
+    async def patch_dag_run(request: Request) -> Response:
+        """UpdateDagRunState endpoint"""
+        body = await request.json()
+        dag_run = make_dag_run(0)
+        dag_run["dag_id"] = request.path_params["dag_id"]
+        dag_run["dag_run_id"] = request.path_params["dag_run_id"]
+        dag_run["state"] = body.get("state")
+        return JSONResponse(dag_run)
+
+    async def list_task_instances(request: Request) -> Response:
+        """ListTaskInstances endpoint"""
+        task_instances = [
+            make_task_instance(
+                request.path_params["dag_id"],
+                request.path_params["dag_run_id"],
+                i,
+            )
+            for i in range(len(TASK_IDS))
+        ]
+        return JSONResponse(
+            {
+                "task_instances": task_instances,
+                "total_entries": len(task_instances),
+            }
+        )
+
+    async def get_log(_: Request) -> Response:
+        """GetLog endpoint"""
+        return PlainTextResponse(log)
+
+    dag_run_path = "/api/v1/dags/{dag_id}/dagRuns/{dag_run_id}"
+    return Starlette(
+        routes=[
+            Route(
+                "/api/v1/dags/~/dagRuns/list",
+                list_dag_runs,
+                methods=["POST"],
+            ),
+            Route(
+                "/api/v1/dags/{dag_id}/dagRuns",
+                trigger_dag_run,
+                methods=["POST"],
+            ),
+            Route(dag_run_path, patch_dag_run, methods=["PATCH"]),
+            Route(
+                f"{dag_run_path}/taskInstances",
+                list_task_instances,
+                methods=["GET"],
+            ),
+            Route(
+                f"{dag_run_path}/taskInstances/{{task_id}}/logs/"
+                "{try_number:int}",
+                get_log,
+                methods=["GET"],
+            ),
+        ]
+    )
+
+
+def ssm_app(
+    job_types: Optional[List[str]] = None, page_size: int = 10
+) -> Starlette:
+    """
+    Stand-in for the AWS SSM api, which uses the AWS json 1.1 protocol.
+    Supports DescribeParameters and GetParameter.
+
+    Parameters
+    ----------
+    job_types : Optional[List[str]]
+      Job types that have v2 task parameters. Defaults to JOB_TYPES.
+    page_size : int
+      Parameters in each DescribeParameters page. The real api returns at
+      most 50.
+
+    Returns
+    -------
+    Starlette
+
+    """
+    names = [
+        f"{PARAM_PREFIX}/v2/{job_type}/tasks/{task_id}"
+        for job_type in (JOB_TYPES if job_types is None else job_types)
+        for task_id in TASK_IDS
+    ]
+
+    def describe_parameters(body: dict) -> dict:
+        """DescribeParameters action"""
+        start = int(body.get("NextToken", 0))
+        end = start + page_size
+        page = {
+            "Parameters": [
+                {
+                    "Name": name,
+                    "Type": "String",
+                    "LastModifiedDate": _START.timestamp(),
+                    "Version": 1,
+                    "Tier": "Standard",
+                    "DataType": "text",
+                }
+                for name in names[start:end]
+            ]
+        }
+        if end < len(names):
+            page["NextToken"] = str(end)
+        return page
+
+    def get_parameter(body: dict) -> dict:
+        """GetParameter action"""
+        return {
+            "Parameter": {
+                "Name": body["Name"],
+                "Type": "String",
+                "Value": json.dumps({"skip_task": False}),
+                "Version": 1,
+                "LastModifiedDate": _START.timestamp(),
+                "DataType": "text",
+            }
+        }
+
+    actions = {
+        "AmazonSSM.DescribeParameters": describe_parameters,
+        "AmazonSSM.GetParameter": get_parameter,
+    }
+
+    async def dispatch(request: Request) -> Response:
+        """Run the action named in the X-Amz-Target header"""
+        action = actions.get(request.headers.get("x-amz-target"))
+        if action is None:
+            return JSONResponse(
+                {"__type": "InvalidAction", "message": "Not supported"},
+                status_code=400,
+            )
+        return Response(
+            json.dumps(action(await request.json())),
+            media_type="application/x-amz-json-1.1",
+        )
+
+    return Starlette(routes=[Route("/", dispatch, methods=["POST"])])
+
+
+def metadata_app(project_names: Optional[List[str]] = None) -> Starlette:
+    """
+    Stand-in for the metadata service project names endpoint.
+
+    Parameters
+    ----------
+    project_names : Optional[List[str]]
+      Defaults to PROJECT_NAMES.
+
+    Returns
+    -------
+    Starlette
+
+    """
+    names = PROJECT_NAMES if project_names is None else project_names
+
+    async def get_project_names(_: Request) -> Response:
+        """Project names endpoint"""
+        return JSONResponse({"data": names})
+
+    return Starlette(
+        routes=[Route("/project_names", get_project_names, methods=["GET"])]
+    )
+
+
+class Faults:
+    """Latency and errors to inject into a stand-in"""
+
+    def __init__(
+        self,
+        latency: float = 0.0,
+        jitter: float = 0.0,
+        failure_rate: float = 0.0,
+        failure_status: int = 503,
+        seed: Optional[int] = None,
+    ) -> None:
+        """
+        Parameters
+        ----------
+        latency : float
+          Seconds added to every response.
+        jitter : float
+          Up to this many more seconds are added at random.
+        failure_rate : float
+          Fraction of requests that fail with failure_status.
+        failure_status : int
+          Status of failed requests.
+        seed : Optional[int]
+          Seed for the random jitter and failures.
+        """
+        self.latency = latency
+        self.jitter = jitter
+        self.failure_rate = failure_rate
+        self.failure_status = failure_status
+        self.random = random.Random(seed)
+
+
+class FaultInjectionMiddleware:
+    """Delays and fails requests to a stand-in as set by its Faults"""
+
+    def __init__(self, app: ASGIApp, faults: Faults) -> None:
+        """
+        Parameters
+        ----------
+        app : ASGIApp
+          The stand-in app.
+        faults : Faults
+          What to inject.
+        """
+        self.app = app
+        self.faults = faults
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        """Delay the request, then fail it or pass it to the app."""
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        faults = self.faults
+        delay = faults.latency + faults.jitter * faults.random.random()
+        if delay > 0:
+            await asyncio.sleep(delay)
+        if faults.random.random() < faults.failure_rate:
+            response = JSONResponse(
+                {"__type": "InjectedFault", "message": "Injected fault"},
+                status_code=faults.failure_status,
+            )
+            await response(scope, receive, send)
+            return
+        await self.app(scope, receive, send)
+
+
+class StandInServer:
+    """Serves an ASGI app with uvicorn on a background thread on a free
+    local port"""
+
+    def __init__(self, app: ASGIApp, faults: Optional[Faults] = None):
+        """
+        Parameters
+        ----------
+        app : ASGIApp
+          The app to serve, which can also be the server under test.
+        faults : Optional[Faults]
+          Latency and errors to inject into every request.
+        """
+        if faults is not None:
+            app = FaultInjectionMiddleware(app, faults)
+        self.socket = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        self.socket.bind(("127.0.0.1", 0))
+        self.url = f"http://127.0.0.1:{self.socket.getsockname()[1]}"
+        self.server = uvicorn.Server(
+            uvicorn.Config(app, log_level="warning", access_log=False)
+        )
+        self._thread = threading.Thread(
+            target=self.server.run,
+            kwargs={"sockets": [self.socket]},
+            daemon=True,
+        )
+
+    def start(self, timeout: float = 10) -> None:
+        """Start serving and wait until the server is ready."""
+        self._thread.start()
+        deadline = time.monotonic() + timeout
+        while not self.server.started:
+            if time.monotonic() > deadline or not self._thread.is_alive():
+                raise RuntimeError(f"Stand-in at {self.url} did not start")
+            time.sleep(0.01)
+
+    def stop(self) -> None:
+        """Stop serving and wait for the thread."""
+        self.server.should_exit = True
+        self._thread.join()
+        self.socket.close()
+
+
+class StandIns:
+    """Starts and stops every stand-in. Use as a context manager."""
+
+    def __init__(
+        self,
+        airflow: Optional[Starlette] = None,
+        ssm: Optional[Starlette] = None,
+        metadata: Optional[Starlette] = None,
+        faults: Optional[Dict[str, Faults]] = None,
+    ) -> None:
+        """
+        Parameters
+        ----------
+        airflow : Optional[Starlette]
+          Defaults to airflow_app().
+        ssm : Optional[Starlette]
+          Defaults to ssm_app().
+        metadata : Optional[Starlette]
+          Defaults to metadata_app().
+        faults : Optional[Dict[str, Faults]]
+          Faults to inject keyed by "airflow", "ssm" or "metadata".
+        """
+        faults = faults or dict()
+        self.airflow = StandInServer(
+            airflow or airflow_app(), faults.get("airflow")
+        )
+        self.ssm = StandInServer(ssm or ssm_app(), faults.get("ssm"))
+        self.metadata = StandInServer(
+            metadata or metadata_app(), faults.get("metadata")
+        )
+
+    @property
+    def env(self) -> Dict[str, str]:
+        """Env vars that point the server at the stand-ins."""
+        return {
+            "AIND_AIRFLOW_SERVICE_URL": (
+                f"{self.airflow.url}/api/v1/dags/transform_and_upload_v2"
+                "/dagRuns"
+            ),
+            "AIND_AIRFLOW_SERVICE_JOBS_URL": f"{self.airflow.url}/api/v1/dags",
+            "AIND_AIRFLOW_SERVICE_USER": "user",
+            "AIND_AIRFLOW_SERVICE_PASSWORD": "password",
+            "AIND_AIRFLOW_PARAM_PREFIX": PARAM_PREFIX,
+            "AIND_METADATA_SERVICE_PROJECT_NAMES_URL": (
+                f"{self.metadata.url}/project_names"
+            ),
+            "AWS_ENDPOINT_URL_SSM": self.ssm.url,
+            "AWS_ACCESS_KEY_ID": "stand-in",
+            "AWS_SECRET_ACCESS_KEY": "stand-in",
+            "AWS_DEFAULT_REGION": "us-west-2",
+        }
+
+    def __enter__(self) -> "StandIns":
+        """Start every stand-in."""
+        for server in (self.airflow, self.ssm, self.metadata):
+            server.start()
+        return self
+
+    def __exit__(self, *_) -> None:
+        """Stop every stand-in."""
+        for server in (self.airflow, self.ssm, self.metadata):
+            server.stop()
+
+
+@contextmanager
+def serve_server(stand_ins: StandIns) -> Iterator[str]:
+    """
+    Serve the server under test, pointed at running stand-ins.
+
+    Parameters
+    ----------
+    stand_ins : StandIns
+
+    Returns
+    -------
+    Iterator[str]
+      Url of the server.
+
+    """
+    # The server reads some settings when it is imported
+    os.environ.update(stand_ins.env)
+    from aind_data_transfer_service.server import app
+
+    logging.disable(logging.WARNING)
+    server = StandInServer(app)
+    server.start()
+    try:
+        yield server.url
+    finally:
+        server.stop()
@@ -0,0 +1,100 @@
+"""Helpers shared by the benchmark scripts"""
+
+import json
+import math
+import os
+import platform
+import subprocess
+import sys
+import time
+import tracemalloc
+from datetime import datetime, timezone
+from typing import Any, Callable, Dict, Optional, Sequence, Tuple
+
+
+def measure(func: Callable[[], Any]) -> Tuple[Any, Dict[str, float]]:
+    """
+    Run func once while tracing allocations.
+
+    Parameters
+    ----------
+    func : Callable[[], Any]
+
+    Returns
+    -------
+    Tuple[Any, Dict[str, float]]
+      The return value of func and a dict with the elapsed seconds and the
+      peak traced memory in bytes.
+
+    """
+    tracemalloc.start()
+    try:
+        start = time.perf_counter()
+        result = func()
+        elapsed = time.perf_counter() - start
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return result, {"seconds": elapsed, "peak_bytes": peak}
+
+
+def percentiles(
+    values: Sequence[float], ranks: Sequence[int] = (50, 95, 99)
+) -> Dict[str, float]:
+    """
+    Nearest-rank percentiles of values.
+
+    Parameters
+    ----------
+    values : Sequence[float]
+      Must not be empty.
+    ranks : Sequence[int]
+      Percentiles to compute.
+
+    Returns
+    -------
+    Dict[str, float]
+      Percentiles keyed by p50, p95, etc.
+
+    """
+    ordered = sorted(values)
+    return {
+        f"p{rank}": ordered[max(0, math.ceil(rank / 100 * len(ordered)) - 1)]
+        for rank in ranks
+    }
+
+
+def emit(results: Dict[str, Any], path: Optional[str] = None) -> None:
+    """Write benchmark results to stdout as json, and to path if set."""
+    json.dump(results, sys.stdout, indent=2, sort_keys=True)
+    sys.stdout.write("\n")
+    if path is not None:
+        with open(path, "w") as f:
+            json.dump(results, f, indent=2, sort_keys=True)
+            f.write("\n")
+
+
+def git_commit() -> Optional[str]:
+    """Commit of the working tree or None if it isn't a git checkout."""
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "HEAD"],
+            capture_output=True,
+            check=True,
+            text=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def run_metadata(benchmark: str, config: Dict[str, Any]) -> Dict[str, Any]:
+    """Where and how results were measured, so runs can be compared."""
+    return {
+        "benchmark": benchmark,
+        "commit": git_commit(),
+        "python": platform.python_version(),
+        "machine": platform.machine(),
+        "cpu_count": os.cpu_count(),
+        "time": datetime.now(timezone.utc).isoformat(),
+        "config": config,
+    }
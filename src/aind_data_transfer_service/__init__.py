@@ -1,43 +1,41 @@
 """Package for data transfer service api"""
 
-import logging.config
 import os
-from datetime import datetime, timezone
-from logging import LogRecord
-
-import yaml
-from pythonjsonlogger import json as log_json
+from typing import Any
 
 __version__ = "2.1.2"
 
+_logging_configured = False
 
-# We want to standardize the timestamp format to UTC and ISO-8601, which
-# requires a custom formatter and can't be done through configuration only.
-class CustomJsonFormatter(log_json.JsonFormatter):
-    """Custom class to format log timestamps as ISO-8601 UTC"""
 
-    def formatTime(self, record: LogRecord, datefmt=None) -> str:
-        """
-        Format timestamp as ISO-8601 UTC
+def configure_logging() -> None:
+    """
+    Configure logging from the yaml file at LOGGING_CONFIG_FILE, which
+    defaults to log_config.yaml, if the file exists. Only the first call
+    reads the file, so clients that never log through the service do not
+    import yaml or the json formatter.
+    """
+    global _logging_configured
+    if _logging_configured:
+        return
+    _logging_configured = True
+    config_path = os.getenv("LOGGING_CONFIG_FILE", "log_config.yaml")
+    if os.path.isfile(config_path):
+        import logging.config
 
-        Parameters
-        ----------
-        record : LogRecord
-        datefmt : str, optional
-          Default is None. Unused parameter, kept for signature compatibility.
+        import yaml
 
-        Returns
-        -------
-        str
+        with open(config_path, "rt") as f:
+            config = yaml.safe_load(f.read())
+        logging.config.dictConfig(config)
+        logging.info(f"Found logging file at: {config_path}")
 
-        """
-        dt = datetime.fromtimestamp(record.created, tz=timezone.utc)
-        return dt.strftime("%Y-%m-%dT%H:%M:%S.%fZ")
 
+def __getattr__(name: str) -> Any:
+    """Import CustomJsonFormatter on first access. Logging configs refer to
+    it as aind_data_transfer_service.CustomJsonFormatter."""
+    if name == "CustomJsonFormatter":
+        from aind_data_transfer_service.log_handler import CustomJsonFormatter
 
-if os.path.isfile(os.getenv("LOGGING_CONFIG_FILE", "log_config.yaml")):
-    config_path = os.getenv("LOGGING_CONFIG_FILE", "log_config.yaml")
-    with open(config_path, "rt") as f:
-        config = yaml.safe_load(f.read())
-    logging.config.dictConfig(config)
-    logging.info(f"Found logging file at: {config_path}")
+        return CustomJsonFormatter
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -0,0 +1,273 @@
+"""Module to build many upload jobs from tabular data"""
+
+from datetime import datetime
+from itertools import islice
+from typing import (
+    Any,
+    Dict,
+    Iterable,
+    Iterator,
+    List,
+    Mapping,
+    Optional,
+    Type,
+    Union,
+)
+
+from pydantic import ValidationError, create_model
+
+from aind_data_transfer_service.models.core import (
+    MAX_JOBS_PER_REQUEST,
+    SubmitJobRequestV2,
+    SubmitJobRequestV2Model,
+    Task,
+    UploadJobConfigsV2,
+    UploadJobConfigsV2Model,
+)
+
+# Stand-ins for the varying fields while the shared fields are validated
+_TEMPLATE_SUBJECT_ID = "000000"
+_TEMPLATE_ACQ_DATETIME = datetime(2000, 1, 1)
+
+_REQUEST_CLASSES = {
+    UploadJobConfigsV2: SubmitJobRequestV2,
+    UploadJobConfigsV2Model: SubmitJobRequestV2Model,
+}
+
+# Validates only the fields that vary between rows, with the same types as
+# the upload job model
+_VaryingFields = create_model(
+    "_VaryingFields",
+    subject_id=(str, UploadJobConfigsV2Model.model_fields["subject_id"]),
+    acq_datetime=(
+        datetime,
+        UploadJobConfigsV2Model.model_fields["acq_datetime"],
+    ),
+    input_source=(Optional[Union[str, Dict[str, str]]], None),
+)
+
+VARYING_FIELDS = tuple(_VaryingFields.model_fields.keys())
+
+
+class UploadJobRowsError(ValueError):
+    """Raised when rows can't be built into upload jobs."""
+
+    def __init__(self, errors: Dict[int, str]) -> None:
+        """
+        Parameters
+        ----------
+        errors : Dict[int, str]
+          Json validation errors keyed by row index.
+        """
+        super().__init__(
+            f"{len(errors)} rows failed validation: {sorted(errors.keys())}"
+        )
+        self.errors = errors
+
+
+def iter_records(
+    data: Union[Mapping[str, Iterable[Any]], Iterable[Mapping[str, Any]]],
+) -> Iterator[Mapping[str, Any]]:
+    """
+    Iterate over columnar data or records as records.
+
+    Parameters
+    ----------
+    data : Union[Mapping[str, Iterable[Any]], Iterable[Mapping[str, Any]]]
+      A dict of columns of equal length, or any iterable of records.
+
+    Returns
+    -------
+    Iterator[Mapping[str, Any]]
+
+    """
+    if not isinstance(data, Mapping):
+        return iter(data)
+    columns = {k: list(v) for k, v in data.items()}
+    lengths = {len(v) for v in columns.values()}
+    if len(lengths) > 1:
+        raise ValueError(f"Columns have different lengths: {sorted(lengths)}")
+    keys = list(columns.keys())
+    return (dict(zip(keys, values)) for values in zip(*columns.values()))
+
+
+class UploadJobsBuilder:
+    """Builds upload jobs that share everything except subject_id,
+    acq_datetime, and input_source. The shared fields, such as job_type,
+    project_name, platform, modalities, and the tasks template, are
+    validated once. Each row only has its varying fields validated before it
+    is stamped onto a copy of the template job. Jobs are shallow copies, so
+    they share the template's tasks unless an input_source is set and should
+    not be modified."""
+
+    def __init__(
+        self,
+        model_class: Type[UploadJobConfigsV2Model] = UploadJobConfigsV2,
+        **shared_fields: Any,
+    ) -> None:
+        """
+        Parameters
+        ----------
+        model_class : Type[UploadJobConfigsV2Model]
+          UploadJobConfigsV2 or UploadJobConfigsV2Model.
+        shared_fields : Any
+          Fields of UploadJobConfigsV2 shared by every job. They are
+          validated within the current validation context.
+
+        Raises
+        ------
+        ValidationError
+          If the shared fields are not valid.
+
+        """
+        unexpected = set(shared_fields.keys()).intersection(VARYING_FIELDS)
+        if unexpected:
+            raise ValueError(f"Fields set per row: {sorted(unexpected)}")
+        self.model_class = model_class
+        self.request_class = _REQUEST_CLASSES[model_class]
+        self.template = model_class(
+            subject_id=_TEMPLATE_SUBJECT_ID,
+            acq_datetime=_TEMPLATE_ACQ_DATETIME,
+            **shared_fields,
+        )
+        self._modalities = [m.abbreviation for m in self.template.modalities]
+
+    def _stamp_input_source(
+        self, input_source: Union[str, Dict[str, str]]
+    ) -> Dict[str, Any]:
+        """Copy the template tasks with the input_source set on each
+        modality_transformation_settings task. Raises a ValueError if the
+        template has a single skip task instead of a task per modality."""
+        if isinstance(input_source, str):
+            input_source = {m: input_source for m in self._modalities}
+        unknown = set(input_source.keys()).difference(self._modalities)
+        if unknown:
+            raise ValueError(
+                f"input_source modalities {sorted(unknown)} must be one of "
+                f"{self._modalities}"
+            )
+        modality_tasks = self.template.tasks.get(
+            "modality_transformation_settings", dict()
+        )
+        if not isinstance(modality_tasks, dict):
+            raise ValueError(
+                "input_source can't be set when "
+                "modality_transformation_settings is skipped"
+            )
+        modality_tasks = dict(modality_tasks)
+        for modality, source in input_source.items():
+            task = modality_tasks.get(modality, Task())
+            modality_tasks[modality] = task.model_copy(
+                update={
+                    "job_settings": {
+                        **(task.job_settings or dict()),
+                        "input_source": source,
+                    }
+                }
+            )
+        return {
+            **self.template.tasks,
+            "modality_transformation_settings": modality_tasks,
+        }
+
+    def build_job(self, row: Mapping[str, Any]) -> UploadJobConfigsV2Model:
+        """
+        Build a single upload job.
+
+        Parameters
+        ----------
+        row : Mapping[str, Any]
+          subject_id, acq_datetime and optionally input_source. The
+          input_source can be a string for every modality or a dict keyed by
+          modality abbreviation.
+
+        Returns
+        -------
+        UploadJobConfigsV2Model
+          An instance of model_class.
+
+        """
+        unexpected = set(row.keys()).difference(VARYING_FIELDS)
+        if unexpected:
+            raise ValueError(
+                f"Unexpected columns {sorted(unexpected)}. Only "
+                f"{list(VARYING_FIELDS)} can vary between jobs."
+            )
+        fields = _VaryingFields.model_validate(row)
+        update = {
+            "subject_id": fields.subject_id,
+            "acq_datetime": fields.acq_datetime,
+        }
+        if fields.input_source is not None:
+            update["tasks"] = self._stamp_input_source(fields.input_source)
+        return self.template.model_copy(update=update)
+
+    def build_jobs(
+        self,
+        data: Union[Mapping[str, Iterable[Any]], Iterable[Mapping[str, Any]]],
+    ) -> List[UploadJobConfigsV2Model]:
+        """
+        Build an upload job for every row.
+
+        Parameters
+        ----------
+        data : Union[Mapping[str, Iterable[Any]], Iterable[Mapping[str, Any]]]
+          A dict of columns of equal length, or any iterable of records.
+
+        Returns
+        -------
+        List[UploadJobConfigsV2Model]
+
+        Raises
+        ------
+        UploadJobRowsError
+          With the errors of every invalid row.
+
+        """
+        jobs = []
+        errors = dict()
+        for index, row in enumerate(iter_records(data)):
+            try:
+                jobs.append(self.build_job(row))
+            except ValidationError as e:
+                errors[index] = e.json()
+            except ValueError as e:
+                errors[index] = str(e)
+        if errors:
+            raise UploadJobRowsError(errors)
+        return jobs
+
+    def build_requests(
+        self,
+        data: Union[Mapping[str, Iterable[Any]], Iterable[Mapping[str, Any]]],
+        chunk_size: int = MAX_JOBS_PER_REQUEST,
+        **request_fields: Any,
+    ) -> List[SubmitJobRequestV2Model]:
+        """
+        Build upload jobs for every row and bundle them into requests.
+
+        Parameters
+        ----------
+        data : Union[Mapping[str, Iterable[Any]], Iterable[Mapping[str, Any]]]
+          A dict of columns of equal length, or any iterable of records.
+        chunk_size : int
+          Jobs per request. Can't be more than MAX_JOBS_PER_REQUEST.
+        request_fields : Any
+          Other SubmitJobRequestV2 fields, such as user_email.
+
+        Returns
+        -------
+        List[SubmitJobRequestV2Model]
+          SubmitJobRequestV2 requests, or SubmitJobRequestV2Model requests if
+          model_class is UploadJobConfigsV2Model.
+
+        """
+        if not 1 <= chunk_size <= MAX_JOBS_PER_REQUEST:
+            raise ValueError(
+                f"chunk_size must be between 1 and {MAX_JOBS_PER_REQUEST}"
+            )
+        jobs = iter(self.build_jobs(data))
+        return [
+            self.request_class(upload_jobs=chunk, **request_fields)
+            for chunk in iter(lambda: list(islice(jobs, chunk_size)), [])
+        ]
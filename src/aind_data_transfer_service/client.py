@@ -0,0 +1,533 @@
+"""Module for async and sync python clients of the service's REST API.
+Requires the client extra: pip install aind-data-transfer-service[client]"""
+
+import asyncio
+import random
+from itertools import islice
+from typing import (
+    Any,
+    AsyncIterator,
+    Dict,
+    Iterable,
+    Iterator,
+    List,
+    Optional,
+    Set,
+    Union,
+)
+
+import httpx
+from pydantic import BaseModel, Field
+
+from aind_data_transfer_service.models.core import MAX_JOBS_PER_REQUEST
+from aind_data_transfer_service.models.internal import JobStatus
+
+DEFAULT_URL = "http://aind-data-transfer-service"
+TERMINAL_JOB_STATES = frozenset({"success", "failed"})
+# Responses sent before the request was processed, so they are safe to retry
+RETRY_STATUS_CODES = frozenset({429, 503})
+# Responses that are only safe to retry for requests without side effects
+IDEMPOTENT_RETRY_STATUS_CODES = RETRY_STATUS_CODES | {502, 504}
+
+
+class SubmitResponse(BaseModel):
+    """Outcome of posting one chunk of upload jobs"""
+
+    s3_prefixes: List[str] = Field(
+        ..., description="s3_prefix of each upload job in the chunk"
+    )
+    status_code: Optional[int] = Field(
+        None, description="None if the service could not be reached"
+    )
+    message: Optional[str] = Field(None)
+    dag_run_id: Optional[str] = Field(None)
+    execution_date: Optional[str] = Field(None)
+    errors: Any = Field(None)
+
+    @property
+    def ok(self) -> bool:
+        """Whether the service accepted the chunk."""
+        return self.status_code == 200
+
+
+def _job_to_dict(job: Union[BaseModel, Dict[str, Any]]) -> Dict[str, Any]:
+    """Dump an upload job model to json serializable dict."""
+    if isinstance(job, BaseModel):
+        return job.model_dump(mode="json", exclude_none=True)
+    return job
+
+
+def chunk_upload_jobs(
+    upload_jobs: Iterable[Union[BaseModel, Dict[str, Any]]],
+    chunk_size: int = MAX_JOBS_PER_REQUEST,
+) -> Iterator[List[Dict[str, Any]]]:
+    """
+    Split upload jobs into chunks that fit in a single request.
+
+    Parameters
+    ----------
+    upload_jobs : Iterable[Union[BaseModel, Dict[str, Any]]]
+      UploadJobConfigsV2 models or dicts.
+    chunk_size : int
+      Jobs per chunk. Can't be more than MAX_JOBS_PER_REQUEST.
+
+    Returns
+    -------
+    Iterator[List[Dict[str, Any]]]
+
+    """
+    if not 1 <= chunk_size <= MAX_JOBS_PER_REQUEST:
+        raise ValueError(
+            f"chunk_size must be between 1 and {MAX_JOBS_PER_REQUEST}"
+        )
+    jobs = map(_job_to_dict, upload_jobs)
+    return iter(lambda: list(islice(jobs, chunk_size)), [])
+
+
+class AsyncDataTransferServiceClient:
+    """Async client that reuses pooled connections to the service. At most
+    max_concurrency requests are in flight at a time. Requests rejected
+    because the service is busy, or that fail to connect, are retried with
+    jittered exponential backoff."""
+
+    def __init__(
+        self,
+        url: str = DEFAULT_URL,
+        max_concurrency: int = 4,
+        max_retries: int = 3,
+        backoff: float = 0.5,
+        max_backoff: float = 30.0,
+        timeout: float = 60.0,
+        transport: Optional[httpx.AsyncBaseTransport] = None,
+    ) -> None:
+        """
+        Parameters
+        ----------
+        url : str
+          Base url of the service.
+        max_concurrency : int
+          Maximum number of requests in flight at a time.
+        max_retries : int
+          Number of times a failed request is retried.
+        backoff : float
+          Seconds to wait before the first retry. The wait doubles for every
+          retry, up to max_backoff, and a random fraction of it is used.
+        max_backoff : float
+          Maximum seconds to wait between retries.
+        timeout : float
+          Seconds to wait for a response.
+        transport : Optional[httpx.AsyncBaseTransport]
+          Transport to send requests with. Defaults to the httpx transport.
+        """
+        self.url = url.rstrip("/")
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self._semaphore = asyncio.Semaphore(max_concurrency)
+        self._client = httpx.AsyncClient(
+            base_url=self.url,
+            timeout=timeout,
+            limits=httpx.Limits(max_connections=max_concurrency),
+            transport=transport,
+        )
+
+    async def __aenter__(self) -> "AsyncDataTransferServiceClient":
+        """Use the client as an async context manager."""
+        return self
+
+    async def __aexit__(self, *exc_info) -> None:
+        """Close the client when leaving the context."""
+        await self.aclose()
+
+    async def aclose(self) -> None:
+        """Close the pooled connections."""
+        await self._client.aclose()
+
+    def _retry_delay(self, attempt: int, response: Optional[httpx.Response]):
+        """Seconds to wait before a retry. The service's Retry-After header
+        is the minimum wait."""
+        delay = random.uniform(
+            0, min(self.max_backoff, self.backoff * 2**attempt)
+        )
+        retry_after = (
+            None if response is None else response.headers.get("Retry-After")
+        )
+        if retry_after is not None and retry_after.isdigit():
+            delay = max(delay, float(retry_after))
+        return delay
+
+    async def request(
+        self, method: str, path: str, idempotent: bool = True, **kwargs
+    ) -> httpx.Response:
+        """
+        Send a request, retrying if the service is busy or can't be reached.
+
+        Parameters
+        ----------
+        method : str
+        path : str
+          Path relative to the service url.
+        idempotent : bool
+          Whether the request can safely be repeated after it may have been
+          processed, such as after a gateway timeout.
+        kwargs : Any
+          Passed to httpx.AsyncClient.request.
+
+        Returns
+        -------
+        httpx.Response
+          The last response. Error status codes are not raised.
+
+        """
+        retry_codes = (
+            IDEMPOTENT_RETRY_STATUS_CODES if idempotent else RETRY_STATUS_CODES
+        )
+        retry_errors = (
+            (httpx.TransportError,)
+            if idempotent
+            else (httpx.ConnectError, httpx.ConnectTimeout, httpx.PoolTimeout)
+        )
+        attempt = 0
+        while True:
+            response = None
+            try:
+                async with self._semaphore:
+                    response = await self._client.request(
+                        method, path, **kwargs
+                    )
+                if (
+                    response.status_code not in retry_codes
+                    or attempt >= self.max_retries
+                ):
+                    return response
+            except retry_errors:
+                if attempt >= self.max_retries:
+                    raise
+            await asyncio.sleep(self._retry_delay(attempt, response))
+            attempt += 1
+
+    async def _post_chunk(
+        self, path: str, request_body: Dict[str, Any], idempotent: bool
+    ) -> SubmitResponse:
+        """Post a chunk of upload jobs and summarize the response."""
+        s3_prefixes = [
+            j.get("s3_prefix", "") for j in request_body["upload_jobs"]
+        ]
+        try:
+            response = await self.request(
+                "POST", path, idempotent=idempotent, json=request_body
+            )
+        except httpx.HTTPError as e:
+            return SubmitResponse(
+                s3_prefixes=s3_prefixes,
+                errors=f"{e.__class__.__name__}{e.args}",
+            )
+        try:
+            content = response.json()
+        except ValueError:
+            content = None
+        if not isinstance(content, dict):
+            # Such as an html error page from a proxy
+            return SubmitResponse(
+                s3_prefixes=s3_prefixes,
+                status_code=response.status_code,
+                errors=response.text,
+            )
+        data = content.get("data") or dict()
+        dag_run = next(iter(data.get("responses") or []), dict())
+        return SubmitResponse(
+            s3_prefixes=s3_prefixes,
+            status_code=response.status_code,
+            message=content.get("message"),
+            dag_run_id=dag_run.get("dag_run_id"),
+            execution_date=dag_run.get("execution_date"),
+            errors=data.get("errors") or None,
+        )
+
+    async def _post_jobs(
+        self,
+        path: str,
+        upload_jobs: Iterable[Union[BaseModel, Dict[str, Any]]],
+        chunk_size: int,
+        idempotent: bool,
+        **request_fields: Any,
+    ) -> List[SubmitResponse]:
+        """Post upload jobs in chunks, concurrently."""
+        request_fields = {
+            k: (sorted(v) if isinstance(v, set) else v)
+            for k, v in request_fields.items()
+            if v is not None
+        }
+        return list(
+            await asyncio.gather(
+                *[
+                    self._post_chunk(
+                        path,
+                        {**request_fields, "upload_jobs": chunk},
+                        idempotent,
+                    )
+                    for chunk in chunk_upload_jobs(upload_jobs, chunk_size)
+                ]
+            )
+        )
+
+    async def validate_jobs(
+        self,
+        upload_jobs: Iterable[Union[BaseModel, Dict[str, Any]]],
+        user_email: Optional[str] = None,
+        email_notification_types: Optional[Set[str]] = None,
+        chunk_size: int = MAX_JOBS_PER_REQUEST,
+    ) -> List[SubmitResponse]:
+        """
+        Validate upload jobs with the service without submitting them.
+
+        Parameters
+        ----------
+        upload_jobs : Iterable[Union[BaseModel, Dict[str, Any]]]
+          UploadJobConfigsV2 models or dicts. Any number of jobs can be sent,
+          they are split into chunks of chunk_size jobs.
+        user_email : Optional[str]
+          Email used for jobs that don't set one.
+        email_notification_types : Optional[Set[str]]
+          Notifications used for jobs that don't set them.
+        chunk_size : int
+          Jobs per request.
+
+        Returns
+        -------
+        List[SubmitResponse]
+          One response per chunk, in order.
+
+        """
+        return await self._post_jobs(
+            "/api/v2/validate_json",
+            upload_jobs,
+            chunk_size,
+            idempotent=True,
+            user_email=user_email,
+            email_notification_types=email_notification_types,
+        )
+
+    async def submit_jobs(
+        self,
+        upload_jobs: Iterable[Union[BaseModel, Dict[str, Any]]],
+        user_email: Optional[str] = None,
+        email_notification_types: Optional[Set[str]] = None,
+        chunk_size: int = MAX_JOBS_PER_REQUEST,
+    ) -> List[SubmitResponse]:
+        """
+        Submit upload jobs. Chunks are submitted concurrently, and each one is
+        accepted or rejected on its own.
+
+        Parameters
+        ----------
+        upload_jobs : Iterable[Union[BaseModel, Dict[str, Any]]]
+          UploadJobConfigsV2 models or dicts. Any number of jobs can be sent,
+          they are split into chunks of chunk_size jobs.
+        user_email : Optional[str]
+          Email used for jobs that don't set one.
+        email_notification_types : Optional[Set[str]]
+          Notifications used for jobs that don't set them.
+        chunk_size : int
+          Jobs per request.
+
+        Returns
+        -------
+        List[SubmitResponse]
+          One response per chunk, in order.
+
+        """
+        return await self._post_jobs(
+            "/api/v2/submit_jobs",
+            upload_jobs,
+            chunk_size,
+            idempotent=False,
+            user_email=user_email,
+            email_notification_types=email_notification_types,
+        )
+
+    async def get_job_status_list(self, **params: Any) -> List[JobStatus]:
+        """
+        Get the status of jobs submitted in the last two weeks.
+
+        Parameters
+        ----------
+        params : Any
+          Query parameters, such as execution_date_gte or states.
+
+        Returns
+        -------
+        List[JobStatus]
+
+        """
+        if "states" in params:
+            params["states"] = str(list(params["states"]))
+        response = await self.request(
+            "GET", "/api/v1/get_job_status_list", params=params
+        )
+        response.raise_for_status()
+        return [
+            JobStatus.model_validate(j)
+            for j in response.json()["data"]["job_status_list"]
+        ]
+
+    async def stream_job_status(
+        self,
+        submit_responses: List[SubmitResponse],
+        poll_interval: float = 30.0,
+    ) -> AsyncIterator[JobStatus]:
+        """
+        Yield the status of submitted jobs whenever it changes, until every
+        job has finished. Each poll is a single request for all the jobs,
+        limited to jobs submitted since the earliest of them.
+
+        Parameters
+        ----------
+        submit_responses : List[SubmitResponse]
+          Responses of accepted submissions.
+        poll_interval : float
+          Seconds between polls.
+
+        Returns
+        -------
+        AsyncIterator[JobStatus]
+
+        """
+        pending = {r.dag_run_id for r in submit_responses if r.dag_run_id}
+        execution_dates = [
+            r.execution_date for r in submit_responses if r.execution_date
+        ]
+        params = (
+            {"execution_date_gte": min(execution_dates)}
+            if execution_dates
+            else dict()
+        )
+        last_states: Dict[str, Optional[str]] = dict()
+        while pending:
+            for job in await self.get_job_status_list(**params):
+                if job.job_id not in pending:
+                    continue
+                if last_states.get(job.job_id) != job.job_state:
+                    last_states[job.job_id] = job.job_state
+                    yield job
+                if job.job_state in TERMINAL_JOB_STATES:
+                    pending.discard(job.job_id)
+            if pending:
+                await asyncio.sleep(poll_interval)
+
+    async def wait_for_completion(
+        self,
+        submit_responses: List[SubmitResponse],
+        poll_interval: float = 30.0,
+        timeout: Optional[float] = None,
+    ) -> Dict[str, JobStatus]:
+        """
+        Wait until every submitted job has finished.
+
+        Parameters
+        ----------
+        submit_responses : List[SubmitResponse]
+          Responses of accepted submissions.
+        poll_interval : float
+          Seconds between polls.
+        timeout : Optional[float]
+          Maximum seconds to wait. Waits forever if None.
+
+        Returns
+        -------
+        Dict[str, JobStatus]
+          Final status of each job keyed by job_id.
+
+        Raises
+        ------
+        TimeoutError
+          If the jobs have not finished within timeout seconds.
+
+        """
+
+        async def collect() -> Dict[str, JobStatus]:
+            """Keep the latest status of each job."""
+            statuses = dict()
+            async for job in self.stream_job_status(
+                submit_responses, poll_interval=poll_interval
+            ):
+                statuses[job.job_id] = job
+            return statuses
+
+        return await asyncio.wait_for(collect(), timeout=timeout)
+
+
+class DataTransferServiceClient:
+    """Blocking client with the same methods as
+    AsyncDataTransferServiceClient. It runs the async client on a private
+    event loop, so chunks are still submitted concurrently over pooled
+    connections. It can't be used from a running event loop."""
+
+    def __init__(self, url: str = DEFAULT_URL, **kwargs: Any) -> None:
+        """
+        Parameters
+        ----------
+        url : str
+          Base url of the service.
+        kwargs : Any
+          Passed to AsyncDataTransferServiceClient.
+        """
+        self._loop = asyncio.new_event_loop()
+        self._async_client = self._run(
+            self._create_async_client(url, **kwargs)
+        )
+
+    @staticmethod
+    async def _create_async_client(
+        url: str, **kwargs: Any
+    ) -> AsyncDataTransferServiceClient:
+        """Create the async client on the private event loop."""
+        return AsyncDataTransferServiceClient(url, **kwargs)
+
+    def _run(self, coroutine: Any) -> Any:
+        """Run a coroutine on the private event loop."""
+        return self._loop.run_until_complete(coroutine)
+
+    def __enter__(self) -> "DataTransferServiceClient":
+        """Use the client as a context manager."""
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        """Close the client when leaving the context."""
+        self.close()
+
+    def close(self) -> None:
+        """Close the pooled connections and the event loop."""
+        if not self._loop.is_closed():
+            self._run(self._async_client.aclose())
+            self._loop.close()
+
+    def validate_jobs(self, *args, **kwargs) -> List[SubmitResponse]:
+        """See AsyncDataTransferServiceClient.validate_jobs."""
+        return self._run(self._async_client.validate_jobs(*args, **kwargs))
+
+    def submit_jobs(self, *args, **kwargs) -> List[SubmitResponse]:
+        """See AsyncDataTransferServiceClient.submit_jobs."""
+        return self._run(self._async_client.submit_jobs(*args, **kwargs))
+
+    def get_job_status_list(self, **params: Any) -> List[JobStatus]:
+        """See AsyncDataTransferServiceClient.get_job_status_list."""
+        return self._run(self._async_client.get_job_status_list(**params))
+
+    def stream_job_status(self, *args, **kwargs) -> Iterator[JobStatus]:
+        """See AsyncDataTransferServiceClient.stream_job_status."""
+        stream = self._async_client.stream_job_status(*args, **kwargs)
+        try:
+            while True:
+                try:
+                    yield self._run(stream.__anext__())
+                except StopAsyncIteration:
+                    return
+        finally:
+            self._run(stream.aclose())
+
+    def wait_for_completion(self, *args, **kwargs) -> Dict[str, JobStatus]:
+        """See AsyncDataTransferServiceClient.wait_for_completion."""
+        return self._run(
+            self._async_client.wait_for_completion(*args, **kwargs)
+        )
@@ -1,21 +1,122 @@
 """Module to handle processing legacy csv files"""
 
+import codecs
+import csv
 import re
 from collections.abc import Mapping
-from copy import deepcopy
 from datetime import datetime
-from typing import Any, Dict
+from enum import IntEnum
+from typing import (
+    Any,
+    BinaryIO,
+    Dict,
+    Iterable,
+    Iterator,
+    NamedTuple,
+    Optional,
+    Tuple,
+    Type,
+)
 
 from aind_data_schema_models.modalities import Modality
+from openpyxl import load_workbook
 
 from aind_data_transfer_service.configs.platforms_v1 import Platform
-from aind_data_transfer_service.models.core import Task, UploadJobConfigsV2
+from aind_data_transfer_service.models.core import (
+    Task,
+    UploadJobConfigsV2,
+    UploadJobConfigsV2Model,
+)
 
 DATETIME_PATTERN2 = re.compile(
     r"^\d{1,2}/\d{1,2}/\d{4} \d{1,2}:\d{2}:\d{2} [APap][Mm]$"
 )
 
 
+class JobSheetSizeError(ValueError):
+    """Raised when an uploaded job sheet has too many rows or bytes."""
+
+
+def _check_row_count(row_count: int, max_rows: Optional[int]) -> None:
+    """Raise an error if row_count exceeds max_rows."""
+    if max_rows is not None and row_count > max_rows:
+        raise JobSheetSizeError(
+            f"Job sheet has more than the maximum of {max_rows} rows"
+        )
+
+
+def read_csv_rows(
+    file: BinaryIO, max_rows: Optional[int] = None
+) -> Iterator[Dict[str, str]]:
+    """
+    Incrementally read rows from a csv file. The file is decoded line by
+    line, so it is never held in memory as a single string. Empty rows are
+    skipped.
+
+    Parameters
+    ----------
+    file : BinaryIO
+      Binary file object, such as an uploaded SpooledTemporaryFile
+    max_rows : Optional[int]
+      If set, raise a JobSheetSizeError after this many non-empty rows.
+
+    Returns
+    -------
+    Iterator[Dict[str, str]]
+
+    """
+    # A few csv files created from excel have extra unicode
+    # byte chars. Adding "utf-8-sig" should remove them.
+    csv_reader = csv.DictReader(codecs.iterdecode(file, "utf-8-sig"))
+    row_count = 0
+    for row in csv_reader:
+        if not any(row.values()):
+            continue
+        row_count += 1
+        _check_row_count(row_count, max_rows)
+        yield row
+
+
+def read_xlsx_rows(
+    file: BinaryIO, max_rows: Optional[int] = None
+) -> Iterator[Dict[str, str]]:
+    """
+    Incrementally read rows from the active sheet of an xlsx file. Cell
+    values are converted to strings the same way a csv export would, so the
+    rows can be mapped like csv rows. Empty rows are skipped and the first
+    non-empty row is used as the header.
+
+    Parameters
+    ----------
+    file : BinaryIO
+      Binary file object, such as an uploaded SpooledTemporaryFile
+    max_rows : Optional[int]
+      If set, raise a JobSheetSizeError after this many non-empty rows.
+
+    Returns
+    -------
+    Iterator[Dict[str, str]]
+
+    """
+    xlsx_book = load_workbook(file, read_only=True)
+    try:
+        headers = None
+        row_count = 0
+        for r in xlsx_book.active.iter_rows(values_only=True):
+            if not any(r):
+                continue
+            values = ["" if v is None else str(v) for v in r]
+            if headers is None:
+                headers = values
+                continue
+            row_count += 1
+            _check_row_count(row_count, max_rows)
+            values.extend([""] * (len(headers) - len(values)))
+            yield dict(zip(headers, values))
+    finally:
+        xlsx_book.close()
+
+
 def nested_update(
     dict_to_update: Dict[str, Any], updates: Mapping
 ) -> Dict[str, Any]:
@@ -63,78 +164,168 @@ def create_nested_dict(
         create_nested_dict(dict_to_update[current_key], keys[1], value)
 
 
-def map_csv_row_to_job(row: dict) -> UploadJobConfigsV2:
+class _ColumnKind(IntEnum):
+    """How the values of a column are mapped"""
+
+    JOB_CONFIG = 0
+    MODALITY_CONFIG = 1
+    CODEOCEAN_RUN_PARAM = 2
+    FORCE_CLOUD_SYNC = 3
+
+
+class _ColumnPlan(NamedTuple):
+    """Precomputed mapping for a single column header"""
+
+    kind: _ColumnKind
+    # Cleaned job config key or modality key, such as modality0
+    key: str
+    # Nested key path inside the modality config or the run param name
+    path: Tuple[str, ...] = ()
+
+
+def compile_column_plan(header: Any) -> _ColumnPlan:
     """
-    Maps csv row into a UploadJobConfigsV2 model. This attempts to be somewhat
-    backwards compatible with previous csv files.
+    Parse a column header once into a plan describing where the values of
+    that column go in the job configs.
+
     Parameters
     ----------
-    row : dict
+    header : Any
+      Raw header from the sheet.
 
     Returns
     -------
-    UploadJobConfigsV2
+    _ColumnPlan
 
     """
-    modality_configs = dict()
-    job_configs = dict()
-    check_s3_folder_exists_task = None
-    codeocean_tasks = dict()
-    for key, value in row.items():
-        # Strip white spaces and replace dashes with underscores
-        clean_key = str(key).strip(" ").replace("-", "_")
-        clean_val = str(value).strip(" ")
-        # Check empty strings or None values
-        if clean_val is None or clean_val == "":
-            continue
-        if clean_key.startswith("modality"):
-            modality_parts = clean_key.split(".")
-            modality_key = modality_parts[0]
-            sub_key = (
-                "modality"
-                if len(modality_parts) == 1
-                else ".".join(modality_parts[1:])
+    # Strip white spaces and replace dashes with underscores
+    clean_key = str(header).strip(" ").replace("-", "_")
+    if clean_key.startswith("modality"):
+        modality_parts = clean_key.split(".")
+        modality_key = modality_parts[0]
+        sub_key = (
+            "modality"
+            if len(modality_parts) == 1
+            else ".".join(modality_parts[1:])
+        )
+        # Temp backwards compatibility check
+        if sub_key == "source":
+            sub_key = "input_source"
+        if sub_key in ["process_capsule_id", "capsule_id", "pipeline_id"]:
+            run_param = (
+                "pipeline_id" if sub_key == "pipeline_id" else "capsule_id"
             )
-            modality_configs.setdefault(modality_key, dict())
-            # Temp backwards compatibility check
-            if sub_key == "source":
-                sub_key = "input_source"
-            if sub_key in ["process_capsule_id", "capsule_id", "pipeline_id"]:
-                if sub_key == "pipeline_id":
-                    codeocean_pipeline_monitor_settings = {
-                        "pipeline_monitor_settings": {
-                            "run_params": {"pipeline_id": clean_val}
-                        }
-                    }
-                else:
-                    codeocean_pipeline_monitor_settings = {
+            return _ColumnPlan(
+                _ColumnKind.CODEOCEAN_RUN_PARAM, modality_key, (run_param,)
+            )
+        return _ColumnPlan(
+            _ColumnKind.MODALITY_CONFIG,
+            modality_key,
+            tuple(sub_key.split(".")),
+        )
+    elif clean_key == "force_cloud_sync":
+        return _ColumnPlan(_ColumnKind.FORCE_CLOUD_SYNC, clean_key)
+    else:
+        return _ColumnPlan(_ColumnKind.JOB_CONFIG, clean_key)
+
+
+class CsvRowMapper:
+    """
+    Maps csv rows into UploadJobConfigsV2 models. Each column header is only
+    parsed the first time it is seen, so a single mapper should be used for
+    all the rows of a sheet.
+    """
+
+    def __init__(
+        self,
+        headers: Optional[Iterable[Any]] = None,
+        model_class: Type[UploadJobConfigsV2Model] = UploadJobConfigsV2,
+    ) -> None:
+        """
+        Parameters
+        ----------
+        headers : Optional[Iterable[Any]]
+          Column headers to compile up front. Headers that are not known in
+          advance are compiled when first seen.
+        model_class : Type[UploadJobConfigsV2Model]
+          Model the rows are mapped into. UploadJobConfigsV2Model is cheaper
+          to build than the default UploadJobConfigsV2.
+        """
+        self.model_class = model_class
+        self._plans: Dict[Any, _ColumnPlan] = dict()
+        for header in headers or []:
+            self._plans[header] = compile_column_plan(header)
+
+    def _get_plan(self, header: Any) -> _ColumnPlan:
+        """Look up the plan for a header, compiling it if needed."""
+        plan = self._plans.get(header)
+        if plan is None:
+            plan = compile_column_plan(header)
+            self._plans[header] = plan
+        return plan
+
+    def map_row(self, row: dict) -> UploadJobConfigsV2Model:
+        """
+        Maps csv row into a UploadJobConfigsV2 model. This attempts to be
+        somewhat backwards compatible with previous csv files.
+        Parameters
+        ----------
+        row : dict
+
+        Returns
+        -------
+        UploadJobConfigsV2Model
+          An instance of model_class.
+
+        """
+        modality_configs = dict()
+        job_configs = dict()
+        check_s3_folder_exists_task = None
+        codeocean_tasks = dict()
+        for key, value in row.items():
+            clean_val = str(value).strip(" ")
+            # Check empty strings
+            if clean_val == "":
+                continue
+            plan = self._get_plan(key)
+            if plan.kind == _ColumnKind.MODALITY_CONFIG:
+                current_dict = modality_configs.setdefault(plan.key, dict())
+                for k in plan.path[:-1]:
+                    current_dict = current_dict.setdefault(k, dict())
+                current_dict[plan.path[-1]] = clean_val
+            elif plan.kind == _ColumnKind.CODEOCEAN_RUN_PARAM:
+                modality_configs.setdefault(plan.key, dict())
+                codeocean_tasks[plan.key] = Task(
+                    skip_task=False,
+                    job_settings={
                         "pipeline_monitor_settings": {
-                            "run_params": {"capsule_id": clean_val}
+                            "run_params": {plan.path[0]: clean_val}
                         }
-                    }
-                codeocean_tasks[modality_key] = Task(
-                    skip_task=False,
-                    job_settings=codeocean_pipeline_monitor_settings,
+                    },
                 )
+            elif plan.kind == _ColumnKind.FORCE_CLOUD_SYNC and (
+                clean_val.upper() in ["TRUE", "T"]
+            ):
+                check_s3_folder_exists_task = {"skip_task": True}
             else:
-                nested_val = dict()
-                create_nested_dict(
-                    dict_to_update=nested_val,
-                    key_string=sub_key,
-                    value=clean_val,
-                )
-                current_dict = deepcopy(
-                    modality_configs.get(modality_key, dict())
-                )
-                nested_update(current_dict, nested_val)
-                modality_configs[modality_key] = current_dict
-        elif clean_key == "force_cloud_sync" and clean_val.upper() in [
-            "TRUE",
-            "T",
-        ]:
-            check_s3_folder_exists_task = {"skip_task": True}
-        else:
-            job_configs[clean_key] = clean_val
+                job_configs[plan.key] = clean_val
+        return _build_upload_job_configs(
+            job_configs=job_configs,
+            modality_configs=modality_configs,
+            codeocean_tasks=codeocean_tasks,
+            check_s3_folder_exists_task=check_s3_folder_exists_task,
+            model_class=self.model_class,
+        )
+
+
+def _build_upload_job_configs(
+    job_configs: Dict[str, Any],
+    modality_configs: Dict[str, Dict[str, Any]],
+    codeocean_tasks: Dict[str, Task],
+    check_s3_folder_exists_task: Optional[dict],
+    model_class: Type[UploadJobConfigsV2Model] = UploadJobConfigsV2,
+) -> UploadJobConfigsV2Model:
+    """Build the model from the configs parsed out of a csv row."""
     # Rename codeocean config keys with correct modality
     keys = list(codeocean_tasks.keys())
     for key in keys:
@@ -185,4 +376,21 @@ def map_csv_row_to_job(row: dict) -> UploadJobConfigsV2:
             acq_dt, "%m/%d/%Y %I:%M:%S %p"
         )
 
-    return UploadJobConfigsV2(**job_configs)
+    return model_class(**job_configs)
+
+
+def map_csv_row_to_job(row: dict) -> UploadJobConfigsV2:
+    """
+    Maps csv row into a UploadJobConfigsV2 model. This attempts to be somewhat
+    backwards compatible with previous csv files. Use a CsvRowMapper to map
+    many rows with the same headers.
+    Parameters
+    ----------
+    row : dict
+
+    Returns
+    -------
+    UploadJobConfigsV2
+
+    """
+    return CsvRowMapper().map_row(row)
@@ -0,0 +1,335 @@
+"""Module to simulate slow and failing upstream services. When
+AIND_UPSTREAM_FAULTS is set, calls made through upstream.call and
+upstream.call_async can be delayed, fail, time out, or return truncated
+pages, so that timeouts, retries and caching can be load tested locally.
+This is meant for development and testing only."""
+
+import asyncio
+import json
+import logging
+import math
+import os
+import random
+import time
+from typing import Any, Awaitable, Callable, Dict, Optional, Tuple, TypeVar
+
+import httpx
+from botocore.exceptions import ClientError, ReadTimeoutError
+
+T = TypeVar("T")
+
+DISTRIBUTIONS = ("constant", "uniform", "normal", "lognormal", "exponential")
+_RULE_KEYS = {
+    "latency_ms",
+    "error_rate",
+    "error_status",
+    "timeout_rate",
+    "timeout_after_ms",
+    "truncate_rate",
+    "truncate_fraction",
+}
+# Used in injected httpx responses and errors when the url isn't known
+_FAULT_URL = "http://upstream-fault-injection"
+
+
+class FaultRule:
+    """Latency and failures to inject into calls to one upstream"""
+
+    def __init__(
+        self,
+        latency_ms: Any = 0,
+        error_rate: float = 0.0,
+        error_status: int = 503,
+        timeout_rate: float = 0.0,
+        timeout_after_ms: float = 0.0,
+        truncate_rate: float = 0.0,
+        truncate_fraction: float = 0.5,
+    ) -> None:
+        """
+        Parameters
+        ----------
+        latency_ms : Any
+          Delay added to every call. Either a number of ms, or a dict with a
+          distribution and its parameters: constant (ms), uniform (min_ms,
+          max_ms), normal (mean_ms, stddev_ms), lognormal (median_ms,
+          sigma), or exponential (mean_ms).
+        error_rate : float
+          Fraction of calls that fail with error_status instead of calling
+          the service.
+        error_status : int
+          Status code of failed calls.
+        timeout_rate : float
+          Fraction of calls that time out after timeout_after_ms instead of
+          calling the service.
+        timeout_after_ms : float
+        truncate_rate : float
+          Fraction of pages that are cut short. The first list in the
+          response, such as dag_runs or Parameters, keeps only
+          truncate_fraction of its items.
+        truncate_fraction : float
+        """
+        if isinstance(latency_ms, (int, float)):
+            latency_ms = {"distribution": "constant", "ms": latency_ms}
+        if latency_ms.get("distribution") not in DISTRIBUTIONS:
+            raise ValueError(
+                f"Unknown latency distribution in {latency_ms}. Use one of "
+                f"{DISTRIBUTIONS}"
+            )
+        for name, rate in (
+            ("error_rate", error_rate),
+            ("timeout_rate", timeout_rate),
+            ("truncate_rate", truncate_rate),
+            ("truncate_fraction", truncate_fraction),
+        ):
+            if not 0 <= rate <= 1:
+                raise ValueError(f"{name} must be between 0 and 1")
+        self.latency_ms = latency_ms
+        self.error_rate = error_rate
+        self.error_status = error_status
+        self.timeout_rate = timeout_rate
+        self.timeout_after_ms = timeout_after_ms
+        self.truncate_rate = truncate_rate
+        self.truncate_fraction = truncate_fraction
+
+    @classmethod
+    def from_dict(cls, config: Dict[str, Any]) -> "FaultRule":
+        """Create a rule from a json object, rejecting unknown keys."""
+        unknown = set(config) - _RULE_KEYS
+        if unknown:
+            raise ValueError(f"Unknown fault settings {sorted(unknown)}")
+        return cls(**config)
+
+    def sample_latency(self, rng: random.Random) -> float:
+        """Seconds to delay a call, drawn from the latency distribution."""
+        spec = self.latency_ms
+        distribution = spec["distribution"]
+        if distribution == "constant":
+            ms = spec.get("ms", 0)
+        elif distribution == "uniform":
+            ms = rng.uniform(spec.get("min_ms", 0), spec["max_ms"])
+        elif distribution == "normal":
+            ms = rng.gauss(spec["mean_ms"], spec.get("stddev_ms", 0))
+        elif distribution == "lognormal":
+            ms = spec["median_ms"] * math.exp(
+                rng.gauss(0, spec.get("sigma", 0))
+            )
+        else:
+            ms = rng.expovariate(1 / spec["mean_ms"])
+        return max(0.0, ms) / 1000
+
+    def choose(self, rng: random.Random) -> Tuple[float, Optional[str]]:
+        """
+        Draw the delay and the fault for a call.
+
+        Returns
+        -------
+        Tuple[float, Optional[str]]
+          Seconds to delay, and "timeout", "error", "truncate", or None.
+
+        """
+        delay = self.sample_latency(rng)
+        draw = rng.random()
+        if draw < self.timeout_rate:
+            return delay + self.timeout_after_ms / 1000, "timeout"
+        if draw < self.timeout_rate + self.error_rate:
+            return delay, "error"
+        if rng.random() < self.truncate_rate:
+            return delay, "truncate"
+        return delay, None
+
+    def truncate(self, result: Any) -> Any:
+        """Cut the first list in an httpx response or boto3 page short."""
+        if isinstance(result, httpx.Response):
+            try:
+                content = result.json()
+            except ValueError:
+                return result
+            truncated = self.truncate(content)
+            if truncated is content:
+                return result
+            headers = {
+                k: v
+                for k, v in result.headers.items()
+                if k.lower() not in ("content-length", "content-encoding")
+            }
+            try:
+                request = result.request
+            except RuntimeError:
+                request = None
+            return httpx.Response(
+                result.status_code,
+                headers=headers,
+                json=truncated,
+                request=request,
+            )
+        if isinstance(result, dict):
+            for key, value in result.items():
+                if isinstance(value, list):
+                    keep = int(len(value) * self.truncate_fraction)
+                    return {**result, key: value[:keep]}
+        return result
+
+
+def _request(func: Callable, args: tuple, kwargs: dict) -> httpx.Request:
+    """Best guess of the request an httpx client method would have sent."""
+    method = getattr(func, "__name__", "get").upper()
+    url = kwargs.get("url", args[0] if args else None)
+    if not isinstance(url, str):
+        url = _FAULT_URL
+    return httpx.Request(method, url)
+
+
+class FaultInjector:
+    """Applies the fault rule of each upstream to calls made through
+    upstream.call and upstream.call_async"""
+
+    def __init__(
+        self,
+        rules: Optional[Dict[str, FaultRule]] = None,
+        seed: Optional[int] = None,
+    ) -> None:
+        """
+        Parameters
+        ----------
+        rules : Optional[Dict[str, FaultRule]]
+          Rules keyed by an upstream dependency such as "ssm_describe", a
+          prefix of dependencies such as "airflow" or "ssm", or "*" for
+          every dependency. The most specific key is used.
+        seed : Optional[int]
+          Seed the random draws to make runs repeatable.
+        """
+        self.rules = rules or dict()
+        self._rng = random.Random(seed)
+
+    @classmethod
+    def from_env(cls) -> "FaultInjector":
+        """
+        Create an injector configured with AIND_UPSTREAM_FAULTS, which is a
+        json object or the path to a json file. It maps dependencies to
+        FaultRule settings, and can have a seed. For example,
+        {"seed": 1, "airflow": {"latency_ms": 200, "error_rate": 0.1}}.
+        No faults are injected if it isn't set.
+
+        Returns
+        -------
+        FaultInjector
+
+        """
+        value = os.getenv("AIND_UPSTREAM_FAULTS", "").strip()
+        if not value:
+            return cls()
+        if not value.startswith("{"):
+            with open(value) as f:
+                value = f.read()
+        config = json.loads(value)
+        seed = config.pop("seed", None)
+        rules = {
+            key: FaultRule.from_dict(rule) for key, rule in config.items()
+        }
+        logging.warning(
+            f"Injecting faults into upstream calls: {sorted(rules)}"
+        )
+        return cls(rules, seed=seed)
+
+    def rule(self, dependency: str) -> Optional[FaultRule]:
+        """Rule for a dependency, or None if it has no faults."""
+        if not self.rules:
+            return None
+        if dependency in self.rules:
+            return self.rules[dependency]
+        for key, rule in self.rules.items():
+            if dependency.startswith(f"{key}_"):
+                return rule
+        return self.rules.get("*")
+
+    def call(
+        self,
+        dependency: str,
+        func: Callable[..., T],
+        *args: Any,
+        **kwargs: Any,
+    ) -> T:
+        """
+        Call a blocking boto3 client method with the dependency's faults.
+        Errors raise a ClientError and timeouts a ReadTimeoutError, like
+        botocore does.
+
+        Parameters
+        ----------
+        dependency : str
+        func : Callable[..., T]
+        args : Any
+        kwargs : Any
+
+        Returns
+        -------
+        T
+
+        """
+        rule = self.rule(dependency)
+        if rule is None:
+            return func(*args, **kwargs)
+        delay, fault = rule.choose(self._rng)
+        time.sleep(delay)
+        if fault == "timeout":
+            raise ReadTimeoutError(endpoint_url=_FAULT_URL)
+        if fault == "error":
+            raise ClientError(
+                {
+                    "Error": {
+                        "Code": "InjectedFault",
+                        "Message": f"Injected {dependency} fault",
+                    },
+                    "ResponseMetadata": {"HTTPStatusCode": rule.error_status},
+                },
+                dependency,
+            )
+        result = func(*args, **kwargs)
+        return rule.truncate(result) if fault == "truncate" else result
+
+    async def call_async(
+        self,
+        dependency: str,
+        func: Callable[..., Awaitable[T]],
+        *args: Any,
+        **kwargs: Any,
+    ) -> T:
+        """
+        Await an httpx client method with the dependency's faults. Errors
+        return a response with the error status and timeouts raise an
+        httpx ReadTimeout, like httpx does.
+
+        Parameters
+        ----------
+        dependency : str
+        func : Callable[..., Awaitable[T]]
+        args : Any
+        kwargs : Any
+
+        Returns
+        -------
+        T
+
+        """
+        rule = self.rule(dependency)
+        if rule is None:
+            return await func(*args, **kwargs)
+        delay, fault = rule.choose(self._rng)
+        await asyncio.sleep(delay)
+        if fault == "timeout":
+            raise httpx.ReadTimeout(
+                f"Injected {dependency} timeout",
+                request=_request(func, args, kwargs),
+            )
+        if fault == "error":
+            return httpx.Response(
+                rule.error_status,
+                json={"detail": f"Injected {dependency} fault"},
+                request=_request(func, args, kwargs),
+            )
+        result = await func(*args, **kwargs)
+        return rule.truncate(result) if fault == "truncate" else result
+
+
+# Faults injected into upstream calls, if AIND_UPSTREAM_FAULTS is set
+fault_injector = FaultInjector.from_env()
@@ -1,11 +1,41 @@
 """Module to handle logging submit job requests"""
 
+import hashlib
 import logging
-from datetime import datetime
+import os
+import random
+import re
+from datetime import datetime, timezone
 from enum import Enum
-from typing import Any
+from logging import LogRecord
+from typing import Any, Optional
 
 from aind_data_schema_models.data_name_patterns import build_data_name
+from pythonjsonlogger import json as log_json
+
+
+# We want to standardize the timestamp format to UTC and ISO-8601, which
+# requires a custom formatter and can't be done through configuration only.
+class CustomJsonFormatter(log_json.JsonFormatter):
+    """Custom class to format log timestamps as ISO-8601 UTC"""
+
+    def formatTime(self, record: LogRecord, datefmt=None) -> str:
+        """
+        Format timestamp as ISO-8601 UTC
+
+        Parameters
+        ----------
+        record : LogRecord
+        datefmt : str, optional
+          Default is None. Unused parameter, kept for signature compatibility.
+
+        Returns
+        -------
+        str
+
+        """
+        dt = datetime.fromtimestamp(record.created, tz=timezone.utc)
+        return dt.strftime("%Y-%m-%dT%H:%M:%S.%fZ")
 
 
 class EventType(str, Enum):
@@ -14,6 +44,81 @@ class EventType(str, Enum):
     STAGE_START = "stage_start"
     STAGE_COMPLETE = "stage_complete"
     STAGE_FAILURE = "stage_failure"
+    PAYLOAD_CAPTURED = "payload_captured"
+
+
+PAYLOAD_CAPTURE_MESSAGE = "Captured request payload"
+REDACTED = "REDACTED"
+# Values of keys that look like credentials are never captured
+_SECRET_KEY_REGEX = re.compile(
+    r"password|secret|token|credential|api_?key|authorization", re.IGNORECASE
+)
+
+
+def pseudonymize_email(email: str) -> str:
+    """Replace an email address with a stable, valid placeholder, so the
+    number of distinct users is kept."""
+    digest = hashlib.sha256(email.strip().lower().encode("utf-8"))
+    return f"user-{digest.hexdigest()[:12]}@example.com"
+
+
+def sanitize_payload(value: Any, key: Optional[str] = None) -> Any:
+    """
+    Copy of request json with credentials redacted and email addresses
+    pseudonymized.
+
+    Parameters
+    ----------
+    value : Any
+      Json value.
+    key : Optional[str]
+      Key the value is stored under, if it is in an object.
+
+    Returns
+    -------
+    Any
+
+    """
+    if isinstance(value, dict):
+        return {k: sanitize_payload(v, k) for k, v in value.items()}
+    if isinstance(value, list):
+        return [sanitize_payload(v, key) for v in value]
+    if key is not None and _SECRET_KEY_REGEX.search(key):
+        return REDACTED
+    if (
+        key is not None
+        and "email" in key.lower()
+        and isinstance(value, str)
+        and "@" in value
+    ):
+        return pseudonymize_email(value)
+    return value
+
+
+def capture_payload(content: Any, endpoint: str) -> None:
+    """
+    Log the sanitized request json for a sample of requests, so traffic
+    can be replayed. The fraction of requests captured is set by
+    AIND_PAYLOAD_CAPTURE_RATE, which defaults to 0.
+
+    Parameters
+    ----------
+    content : Any
+      Request json.
+    endpoint : str
+      Path the request was sent to.
+
+    """
+    rate = float(os.getenv("AIND_PAYLOAD_CAPTURE_RATE", "0"))
+    if rate > 0 and random.random() < rate:
+        logging.info(
+            PAYLOAD_CAPTURE_MESSAGE,
+            extra={
+                "event_type": EventType.PAYLOAD_CAPTURED,
+                "endpoint": endpoint,
+                "payload": sanitize_payload(content),
+            },
+        )
 
 
 def compute_label(upload_job: dict) -> str:
@@ -33,7 +138,10 @@ def compute_label(upload_job: dict) -> str:
 
 
 def log_submit_job_request(
-    content: Any, event_type: EventType | None = None
+    content: Any,
+    event_type: EventType | None = None,
+    phases: dict | None = None,
+    capture_endpoint: str | None = None,
 ) -> None:
     """
     Parses content object to log any lines with a subject_id and
@@ -45,7 +153,15 @@ def log_submit_job_request(
       Pulled from request json, which may or may not return expected dict
     event_type: EventType |  None
       Type of event to log. Default is None.
+    phases: dict | None
+      Durations in milliseconds of the phases of the request so far, such
+      as from timing.current_phases. Default is None.
+    capture_endpoint: str | None
+      If set, the sanitized content may be captured for replay as a request
+      to this path. See capture_payload. Default is None.
     """
+    if capture_endpoint is not None:
+        capture_payload(content, capture_endpoint)
     upload_jobs = content.get("upload_jobs")
     if (
         upload_jobs is not None
@@ -61,4 +177,6 @@ def log_submit_job_request(
             }
             if event_type is not None:
                 extra_info["event_type"] = event_type
+            if phases is not None:
+                extra_info["phases"] = phases
             logging.info("Handling request", extra=extra_info)
@@ -0,0 +1,188 @@
+"""Module to find memory growth in a running server. Allocations are traced
+with tracemalloc, which admins can start and stop at runtime, and snapshots
+can be compared to find the call sites that allocated the most memory
+between them. Only allocations made by the server process are traced, not
+those made in worker processes."""
+
+import os
+import threading
+import tracemalloc
+from collections import OrderedDict
+from datetime import datetime, timezone
+from typing import Any, Dict, List
+
+# Allocations made by tracemalloc itself and by imports are not interesting
+_IGNORED_FILENAMES = (
+    tracemalloc.__file__,
+    "<frozen importlib._bootstrap>",
+    "<frozen importlib._bootstrap_external>",
+    "<unknown>",
+)
+_GROUP_BY = ("lineno", "filename", "traceback")
+
+
+class MemoryTracer:
+    """Starts and stops tracemalloc and keeps a bounded number of snapshots
+    in memory, so they can be compared later."""
+
+    def __init__(self, max_snapshots: int = 10) -> None:
+        """
+        Parameters
+        ----------
+        max_snapshots : int
+          Oldest snapshots are dropped once this many are kept.
+        """
+        self.max_snapshots = max_snapshots
+        self._snapshots: OrderedDict = OrderedDict()
+        self._next_id = 1
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_env(cls) -> "MemoryTracer":
+        """
+        Create a tracer configured with AIND_MEMORY_MAX_SNAPSHOTS.
+
+        Returns
+        -------
+        MemoryTracer
+
+        """
+        return cls(
+            max_snapshots=int(os.getenv("AIND_MEMORY_MAX_SNAPSHOTS", "10"))
+        )
+
+    @staticmethod
+    def is_tracing() -> bool:
+        """Whether allocations are being traced."""
+        return tracemalloc.is_tracing()
+
+    @staticmethod
+    def start(frames: int = 1) -> None:
+        """
+        Start tracing allocations. Does nothing if already tracing.
+
+        Parameters
+        ----------
+        frames : int
+          Number of frames kept for each allocation. More frames make
+          tracebacks more useful, but tracing slower.
+
+        """
+        if not tracemalloc.is_tracing():
+            tracemalloc.start(frames)
+
+    @staticmethod
+    def stop() -> None:
+        """Stop tracing allocations. Snapshots that were taken are kept."""
+        tracemalloc.stop()
+
+    def status(self) -> Dict[str, Any]:
+        """
+        Whether allocations are being traced and the traced memory.
+
+        Returns
+        -------
+        Dict[str, Any]
+          is_tracing, traceback_limit, traced_bytes, peak_bytes and the
+          kept snapshots.
+
+        """
+        traced, peak = tracemalloc.get_traced_memory()
+        return {
+            "is_tracing": self.is_tracing(),
+            "traceback_limit": tracemalloc.get_traceback_limit(),
+            "traced_bytes": traced,
+            "peak_bytes": peak,
+            "snapshots": self.snapshots(),
+        }
+
+    def take_snapshot(self) -> Dict[str, Any]:
+        """
+        Take a snapshot of the traced allocations.
+
+        Returns
+        -------
+        Dict[str, Any]
+          Summary of the snapshot with its id.
+
+        Raises
+        ------
+        RuntimeError
+          If allocations are not being traced.
+
+        """
+        snapshot = tracemalloc.take_snapshot().filter_traces(
+            [tracemalloc.Filter(False, f) for f in _IGNORED_FILENAMES]
+        )
+        summary = {
+            "created": datetime.now(timezone.utc).isoformat(),
+            "traced_bytes": sum(t.size for t in snapshot.traces),
+        }
+        with self._lock:
+            summary["id"] = self._next_id
+            self._next_id += 1
+            self._snapshots[summary["id"]] = (summary, snapshot)
+            while len(self._snapshots) > self.max_snapshots:
+                self._snapshots.popitem(last=False)
+        return summary
+
+    def snapshots(self) -> List[Dict[str, Any]]:
+        """Summaries of the kept snapshots, oldest first."""
+        with self._lock:
+            return [summary for summary, _ in self._snapshots.values()]
+
+    def clear(self) -> None:
+        """Drop every snapshot."""
+        with self._lock:
+            self._snapshots.clear()
+
+    def diff(
+        self,
+        old_id: int,
+        new_id: int,
+        limit: int = 20,
+        group_by: str = "lineno",
+    ) -> List[Dict[str, Any]]:
+        """
+        Compare two snapshots.
+
+        Parameters
+        ----------
+        old_id : int
+          Id of the earlier snapshot.
+        new_id : int
+          Id of the later snapshot.
+        limit : int
+          Number of call sites to return.
+        group_by : str
+          How allocations are grouped: "lineno", "filename" or "traceback".
+
+        Returns
+        -------
+        List[Dict[str, Any]]
+          Call sites sorted by how much their allocated memory grew, with
+          the size and count differences.
+
+        Raises
+        ------
+        KeyError
+          If either snapshot is not kept.
+        ValueError
+          If group_by is not supported.
+
+        """
+        if group_by not in _GROUP_BY:
+            raise ValueError(f"group_by must be one of {_GROUP_BY}")
+        with self._lock:
+            old = self._snapshots[old_id][1]
+            new = self._snapshots[new_id][1]
+        return [
+            {
+                "site": [str(frame) for frame in stat.traceback],
+                "size_diff_bytes": stat.size_diff,
+                "size_bytes": stat.size,
+                "count_diff": stat.count_diff,
+                "count": stat.count,
+            }
+            for stat in new.compare_to(old, group_by)[:limit]
+        ]
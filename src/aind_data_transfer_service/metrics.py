@@ -0,0 +1,367 @@
+"""Module for lightweight in-process metrics collected by the service"""
+
+import asyncio
+import threading
+from bisect import bisect_left
+from typing import Dict, Iterator, List, Optional, Tuple
+
+# Content type of the Prometheus text exposition format
+PROMETHEUS_CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+# A rendered sample: metric name suffix, labels, and value
+Sample = Tuple[str, Tuple[Tuple[str, str], ...], float]
+
+DEFAULT_BUCKETS = (
+    0.005,
+    0.01,
+    0.025,
+    0.05,
+    0.1,
+    0.25,
+    0.5,
+    1.0,
+    2.5,
+    5.0,
+    10.0,
+)
+
+BYTES_BUCKETS = (
+    1024,
+    4096,
+    16384,
+    65536,
+    262144,
+    1048576,
+    4194304,
+    16777216,
+)
+
+
+class _Metric:
+    """Base class for a named metric with optional labels"""
+
+    metric_type = "untyped"
+
+    def __init__(
+        self, name: str, documentation: str, label_names: Tuple[str, ...] = ()
+    ) -> None:
+        """
+        Parameters
+        ----------
+        name : str
+          Metric name. Should be snake_case.
+        documentation : str
+          Short help text describing the metric.
+        label_names : Tuple[str, ...]
+          Names of labels that every sample must be tagged with.
+        """
+        self.name = name
+        self.documentation = documentation
+        self.label_names = tuple(label_names)
+        self._lock = threading.Lock()
+
+    def _label_values(self, labels: Dict[str, str]) -> Tuple[str, ...]:
+        """Check labels and return them in a consistent order."""
+        if set(labels.keys()) != set(self.label_names):
+            raise ValueError(
+                f"{self.name} expects labels {self.label_names}, "
+                f"got {tuple(labels.keys())}"
+            )
+        return tuple(str(labels[k]) for k in self.label_names)
+
+    def samples(self) -> Iterator[Sample]:
+        """Samples of every label set, sorted by label values."""
+        with self._lock:
+            values = sorted(self._values.items())
+        for key, value in values:
+            yield "", tuple(zip(self.label_names, key)), value
+
+
+class Counter(_Metric):
+    """Monotonically increasing value"""
+
+    metric_type = "counter"
+
+    def __init__(
+        self, name: str, documentation: str, label_names: Tuple[str, ...] = ()
+    ) -> None:
+        """Initialize counter with no samples."""
+        super().__init__(name, documentation, label_names)
+        self._values: Dict[Tuple[str, ...], float] = dict()
+
+    def inc(self, amount: float = 1, **labels: str) -> None:
+        """Increment the counter for the given labels."""
+        if amount < 0:
+            raise ValueError("Counters can only be incremented")
+        key = self._label_values(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def get(self, **labels: str) -> float:
+        """Current value for the given labels."""
+        return self._values.get(self._label_values(labels), 0)
+
+
+class Gauge(_Metric):
+    """Value that can go up and down"""
+
+    metric_type = "gauge"
+
+    def __init__(
+        self, name: str, documentation: str, label_names: Tuple[str, ...] = ()
+    ) -> None:
+        """Initialize gauge with no samples."""
+        super().__init__(name, documentation, label_names)
+        self._values: Dict[Tuple[str, ...], float] = dict()
+
+    def set(self, value: float, **labels: str) -> None:
+        """Set the gauge for the given labels."""
+        key = self._label_values(labels)
+        with self._lock:
+            self._values[key] = value
+
+    def get(self, **labels: str) -> Optional[float]:
+        """Current value for the given labels or None if never set."""
+        return self._values.get(self._label_values(labels))
+
+
+class Histogram(_Metric):
+    """Distribution of observed values in cumulative buckets"""
+
+    metric_type = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        label_names: Tuple[str, ...] = (),
+        buckets: Tuple[float, ...] = DEFAULT_BUCKETS,
+    ) -> None:
+        """Initialize histogram with sorted bucket upper bounds."""
+        super().__init__(name, documentation, label_names)
+        self.buckets = tuple(sorted(buckets))
+        # per label set: [bucket counts..., +Inf count], sum
+        self._values: Dict[Tuple[str, ...], Tuple[List[int], float]] = dict()
+
+    def observe(self, value: float, **labels: str) -> None:
+        """Record a single observation for the given labels."""
+        key = self._label_values(labels)
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            counts, total = self._values.get(
+                key, ([0] * (len(self.buckets) + 1), 0.0)
+            )
+            counts[index] += 1
+            self._values[key] = (counts, total + value)
+
+    def get_count(self, **labels: str) -> int:
+        """Number of observations for the given labels."""
+        counts, _ = self._values.get(self._label_values(labels), ([], 0.0))
+        return sum(counts)
+
+    def get_sum(self, **labels: str) -> float:
+        """Sum of observations for the given labels."""
+        _, total = self._values.get(self._label_values(labels), ([], 0.0))
+        return total
+
+    def samples(self) -> Iterator[Sample]:
+        """Cumulative bucket, sum and count samples of every label set."""
+        with self._lock:
+            values = sorted(
+                (k, (list(c), t)) for k, (c, t) in self._values.items()
+            )
+        bounds = [_format_value(b) for b in self.buckets] + ["+Inf"]
+        for key, (counts, total) in values:
+            labels = tuple(zip(self.label_names, key))
+            cumulative = 0
+            for bound, count in zip(bounds, counts):
+                cumulative += count
+                yield "_bucket", labels + (("le", bound),), cumulative
+            yield "_sum", labels, total
+            yield "_count", labels, cumulative
+
+
+class MetricsRegistry:
+    """Collection of metrics exposed by the service"""
+
+    def __init__(self) -> None:
+        """Initialize an empty registry."""
+        self._metrics: Dict[str, _Metric] = dict()
+        self._lock = threading.Lock()
+
+    def register(self, metric: _Metric) -> _Metric:
+        """Add a metric to the registry. Names must be unique."""
+        with self._lock:
+            if metric.name in self._metrics:
+                raise ValueError(f"Metric {metric.name} already registered")
+            self._metrics[metric.name] = metric
+        return metric
+
+    def get(self, name: str) -> Optional[_Metric]:
+        """Look up a registered metric by name."""
+        return self._metrics.get(name)
+
+    def metrics(self) -> List[_Metric]:
+        """All registered metrics sorted by name."""
+        return [self._metrics[k] for k in sorted(self._metrics.keys())]
+
+
+def _format_value(value: float) -> str:
+    """Format a sample value as Prometheus expects."""
+    if value == float("inf"):
+        return "+Inf"
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+def _escape_label_value(value: str) -> str:
+    """Escape backslashes, quotes and newlines in a label value."""
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def render_prometheus(registry: Optional[MetricsRegistry] = None) -> str:
+    """
+    Render every metric in the Prometheus text exposition format.
+
+    Parameters
+    ----------
+    registry : Optional[MetricsRegistry]
+      Registry to render. Defaults to the service registry.
+
+    Returns
+    -------
+    str
+
+    """
+    registry = REGISTRY if registry is None else registry
+    lines = []
+    for metric in registry.metrics():
+        lines.append(f"# HELP {metric.name} {metric.documentation}")
+        lines.append(f"# TYPE {metric.name} {metric.metric_type}")
+        for suffix, labels, value in metric.samples():
+            label_str = ",".join(
+                f'{k}="{_escape_label_value(v)}"' for k, v in labels
+            )
+            if label_str:
+                label_str = "{" + label_str + "}"
+            lines.append(
+                f"{metric.name}{suffix}{label_str} {_format_value(value)}"
+            )
+    return "\n".join(lines) + "\n"
+
+
+async def monitor_event_loop_lag(interval: float = 0.5) -> None:
+    """
+    Measure how late the event loop wakes up from a sleep. Any time beyond
+    the requested interval was spent running blocking code on the loop.
+    Runs until cancelled.
+
+    Parameters
+    ----------
+    interval : float
+      Seconds to sleep between measurements.
+    """
+    loop = asyncio.get_running_loop()
+    while True:
+        start = loop.time()
+        await asyncio.sleep(interval)
+        lag = max(0.0, loop.time() - start - interval)
+        EVENT_LOOP_LAG_SECONDS.observe(lag)
+        EVENT_LOOP_LAG_LAST_SECONDS.set(lag)
+
+
+REGISTRY = MetricsRegistry()
+
+AIRFLOW_DAG_RUNS_PAGE_WIRE_BYTES = REGISTRY.register(
+    Histogram(
+        "airflow_dag_runs_page_wire_bytes",
+        "Bytes received on the wire per ListDagRuns page",
+        label_names=("content_encoding",),
+        buckets=BYTES_BUCKETS,
+    )
+)
+AIRFLOW_DAG_RUNS_PAGE_DECODED_BYTES = REGISTRY.register(
+    Histogram(
+        "airflow_dag_runs_page_decoded_bytes",
+        "Bytes of decoded json per ListDagRuns page",
+        label_names=("content_encoding",),
+        buckets=BYTES_BUCKETS,
+    )
+)
+EVENT_LOOP_LAG_SECONDS = REGISTRY.register(
+    Histogram(
+        "event_loop_lag_seconds",
+        "Delay between a scheduled event loop wake up and the actual one",
+        buckets=(0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 5.0),
+    )
+)
+EVENT_LOOP_LAG_LAST_SECONDS = REGISTRY.register(
+    Gauge(
+        "event_loop_lag_last_seconds",
+        "Most recent event loop lag measurement",
+    )
+)
+WORKER_POOL_PENDING_TASKS = REGISTRY.register(
+    Gauge(
+        "worker_pool_pending_tasks",
+        "Tasks running or queued in the CPU worker pool",
+    )
+)
+WORKER_POOL_REJECTED_TASKS = REGISTRY.register(
+    Counter(
+        "worker_pool_rejected_tasks_total",
+        "Tasks rejected because the CPU worker pool was saturated",
+    )
+)
+ROW_VALIDATION_CACHE_HITS = REGISTRY.register(
+    Counter(
+        "row_validation_cache_hits_total",
+        "Job sheet rows whose validation result was cached",
+    )
+)
+ROW_VALIDATION_CACHE_MISSES = REGISTRY.register(
+    Counter(
+        "row_validation_cache_misses_total",
+        "Job sheet rows that had to be mapped and validated",
+    )
+)
+HTTP_REQUEST_SECONDS = REGISTRY.register(
+    Histogram(
+        "http_request_duration_seconds",
+        "Time to handle a request, by route template and response status",
+        label_names=("method", "route", "status"),
+    )
+)
+UPSTREAM_REQUEST_SECONDS = REGISTRY.register(
+    Histogram(
+        "upstream_request_duration_seconds",
+        "Time spent in calls to upstream services, by dependency and outcome",
+        label_names=("dependency", "outcome"),
+    )
+)
+UPLOAD_JOBS_VALIDATED = REGISTRY.register(
+    Counter(
+        "upload_jobs_validated_total",
+        "Upload jobs that passed validation",
+    )
+)
+UPLOAD_JOBS_SUBMITTED = REGISTRY.register(
+    Counter(
+        "upload_jobs_submitted_total",
+        "Upload jobs sent to Airflow",
+    )
+)
+UPLOAD_JOBS_REJECTED_DUPLICATE = REGISTRY.register(
+    Counter(
+        "upload_jobs_rejected_duplicate_total",
+        "Submit requests rejected because a job was a duplicate",
+        label_names=("reason",),
+    )
+)
+JOBS_CANCELLED = REGISTRY.register(
+    Counter(
+        "jobs_cancelled_total",
+        "Jobs cancelled through the service",
+    )
+)
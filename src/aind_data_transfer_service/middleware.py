@@ -0,0 +1,344 @@
+"""Module for ASGI middleware that instruments requests to the server"""
+
+import logging
+import os
+import threading
+from collections import deque
+from datetime import datetime, timezone
+from time import perf_counter
+from typing import Any, Dict, List, Optional
+
+from starlette.concurrency import run_in_threadpool
+from starlette.datastructures import Headers, MutableHeaders, QueryParams
+from starlette.routing import Match
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from aind_data_transfer_service.metrics import HTTP_REQUEST_SECONDS
+from aind_data_transfer_service.profiling import ProfileStore, SamplingProfiler
+from aind_data_transfer_service.timing import (
+    SpanRecorder,
+    current_recorder,
+    recording,
+)
+from aind_data_transfer_service.tracing import (
+    SpanContext,
+    current_span,
+    tracer,
+)
+
+# Values of the X-Profile header or profile query param that turn the
+# profiler on
+_PROFILE_FLAGS = ("1", "true", "yes")
+
+# Route label of requests that don't match any route, so that unknown paths
+# don't create new label sets
+UNMATCHED_ROUTE = "unmatched"
+
+
+def content_length(headers: Headers) -> Optional[int]:
+    """Request body size from the Content-Length header, or None if the
+    header is missing or isn't a number, such as for chunked uploads."""
+    value = headers.get("content-length")
+    return int(value) if value and value.isdigit() else None
+
+
+def route_template(scope: Scope) -> str:
+    """Path template of the route that will handle the request, such as
+    /api/v2/parameters/job_types/{job_type:str}/tasks/{task_id:str}. A
+    route that only matches the path is used if no route matches the
+    method too."""
+    partial = UNMATCHED_ROUTE
+    for route in getattr(scope.get("app"), "routes", []):
+        match, _ = route.matches(scope)
+        if match == Match.FULL:
+            return route.path
+        if match == Match.PARTIAL and partial == UNMATCHED_ROUTE:
+            partial = route.path
+    return partial
+
+
+class RequestMetricsMiddleware:
+    """Records how long each request took, labelled by method, route
+    template and response status. The time includes streaming the response
+    body."""
+
+    def __init__(self, app: ASGIApp) -> None:
+        """
+        Parameters
+        ----------
+        app : ASGIApp
+          The app to wrap.
+        """
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        """Handle a request and record its duration."""
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        route = route_template(scope)
+        status = 500
+        start = perf_counter()
+
+        async def send_with_status(message: Message) -> None:
+            """Capture the response status before sending it."""
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            HTTP_REQUEST_SECONDS.observe(
+                perf_counter() - start,
+                method=scope["method"],
+                route=route,
+                status=str(status),
+            )
+
+
+class ServerTimingMiddleware:
+    """Records the phases of each request with a span recorder and sends
+    them in a Server-Timing header. Phases that end after the response
+    headers are sent, such as streaming a body, are not included."""
+
+    def __init__(self, app: ASGIApp) -> None:
+        """
+        Parameters
+        ----------
+        app : ASGIApp
+          The app to wrap.
+        """
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        """Handle a request within a new span recorder."""
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        with recording() as recorder:
+
+            async def send_with_timing(message: Message) -> None:
+                """Add the Server-Timing header to the response."""
+                if message["type"] == "http.response.start":
+                    headers = MutableHeaders(scope=message)
+                    headers.append("Server-Timing", recorder.server_timing())
+                await send(message)
+
+            await self.app(scope, receive, send_with_timing)
+
+
+class TracingMiddleware:
+    """Runs each request in a span named after its method and route
+    template. If the request has a W3C traceparent header, the span joins
+    that trace."""
+
+    def __init__(self, app: ASGIApp) -> None:
+        """
+        Parameters
+        ----------
+        app : ASGIApp
+          The app to wrap.
+        """
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        """Handle a request within a new span."""
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        route = route_template(scope)
+        parent = SpanContext.from_traceparent(
+            Headers(scope=scope).get("traceparent")
+        )
+        with tracer.start_span(
+            f"{scope['method']} {route}",
+            parent=parent,
+            attributes={
+                "http.method": scope["method"],
+                "http.route": route,
+            },
+        ) as span:
+
+            async def send_with_status(message: Message) -> None:
+                """Record the response status on the span."""
+                if message["type"] == "http.response.start":
+                    span.set_attribute("http.status_code", message["status"])
+                    if message["status"] >= 500:
+                        span.status = "error"
+                await send(message)
+
+            await self.app(scope, receive, send_with_status)
+
+
+class ProfilerMiddleware:
+    """Profiles a request if it has an X-Profile header or profile query
+    param set to 1 and the session belongs to a signed in user. The profile
+    is saved to the store and its name is returned in an X-Profile-Id
+    header. Only one request is profiled at a time, since the profiler
+    samples every thread. Must run inside the SessionMiddleware."""
+
+    def __init__(
+        self, app: ASGIApp, store: ProfileStore, interval: float = 0.005
+    ) -> None:
+        """
+        Parameters
+        ----------
+        app : ASGIApp
+          The app to wrap.
+        store : ProfileStore
+          Where profiles are saved.
+        interval : float
+          Seconds between samples.
+        """
+        self.app = app
+        self.store = store
+        self.interval = interval
+        self._profiling = False
+
+    @staticmethod
+    def is_requested(scope: Scope) -> bool:
+        """Whether a signed in user asked for the request to be profiled."""
+        flag = Headers(scope=scope).get("x-profile") or QueryParams(
+            scope["query_string"]
+        ).get("profile", "")
+        return (
+            flag.lower() in _PROFILE_FLAGS
+            and scope.get("session", dict()).get("user") is not None
+        )
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        """Handle a request, profiling it if requested."""
+        if (
+            scope["type"] != "http"
+            or self._profiling
+            or not self.is_requested(scope)
+        ):
+            await self.app(scope, receive, send)
+            return
+        name = self.store.new_name(f"{scope['method']} {scope['path']}")
+
+        async def send_with_profile_id(message: Message) -> None:
+            """Add the X-Profile-Id header to the response."""
+            if message["type"] == "http.response.start":
+                MutableHeaders(scope=message).append("X-Profile-Id", name)
+            await send(message)
+
+        self._profiling = True
+        profiler = SamplingProfiler(interval=self.interval)
+        profiler.start()
+        try:
+            await self.app(scope, receive, send_with_profile_id)
+        finally:
+            profiler.stop()
+            self._profiling = False
+            try:
+                await run_in_threadpool(
+                    self.store.save, name, profiler.collapsed()
+                )
+            except OSError as e:
+                logging.warning(f"Unable to save profile {name}: {e}")
+
+
+class SlowRequestLog:
+    """Ring of records of the most recent slow requests"""
+
+    def __init__(self, threshold: float = 5.0, max_records: int = 100):
+        """
+        Parameters
+        ----------
+        threshold : float
+          Requests that take longer than this many seconds are recorded.
+        max_records : int
+          Oldest records are dropped once this many are kept.
+        """
+        self.threshold = threshold
+        self._records: deque = deque(maxlen=max_records)
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_env(cls) -> "SlowRequestLog":
+        """
+        Create a log configured with AIND_SLOW_REQUEST_SECONDS and
+        AIND_SLOW_REQUEST_LOG_SIZE.
+
+        Returns
+        -------
+        SlowRequestLog
+
+        """
+        return cls(
+            threshold=float(os.getenv("AIND_SLOW_REQUEST_SECONDS", "5")),
+            max_records=int(os.getenv("AIND_SLOW_REQUEST_LOG_SIZE", "100")),
+        )
+
+    def add(self, record: Dict[str, Any]) -> None:
+        """Keep a slow request record."""
+        with self._lock:
+            self._records.append(record)
+
+    def records(self) -> List[Dict[str, Any]]:
+        """Records of slow requests, newest first."""
+        with self._lock:
+            return list(reversed(self._records))
+
+
+class SlowRequestMiddleware:
+    """Records requests that take longer than the log threshold, with their
+    route, phases, upstream calls and payload sizes. Must run inside the
+    ServerTimingMiddleware, which sets the span recorder."""
+
+    def __init__(self, app: ASGIApp, log: SlowRequestLog) -> None:
+        """
+        Parameters
+        ----------
+        app : ASGIApp
+          The app to wrap.
+        log : SlowRequestLog
+          Where slow requests are recorded.
+        """
+        self.app = app
+        self.log = log
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        """Handle a request and record it if it was slow."""
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        status = 500
+        start = perf_counter()
+
+        async def send_with_status(message: Message) -> None:
+            """Capture the response status before sending it."""
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            elapsed = perf_counter() - start
+            if elapsed > self.log.threshold:
+                self.log.add(self.build_record(scope, status, elapsed))
+
+    @staticmethod
+    def build_record(scope: Scope, status: int, elapsed: float) -> dict:
+        """Details of a slow request."""
+        recorder = current_recorder() or SpanRecorder()
+        span = current_span()
+        return {
+            "time": datetime.now(timezone.utc).isoformat(),
+            "method": scope["method"],
+            "route": route_template(scope),
+            "path": scope["path"],
+            "status": status,
+            "duration_ms": round(elapsed * 1000, 3),
+            "request_bytes": content_length(Headers(scope=scope)),
+            "trace_id": None if span is None else span.trace_id,
+            "phases": recorder.as_milliseconds(),
+            "upstream_call_count": recorder.upstream_call_count,
+            "upstream_calls": list(recorder.upstream_calls),
+            "attributes": dict(recorder.attributes),
+        }
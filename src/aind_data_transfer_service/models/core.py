@@ -1,9 +1,11 @@
 """Core models for using V2 of aind-data-transfer-service"""
 
+import hashlib
 import json
 from contextlib import contextmanager
 from contextvars import ContextVar
-from datetime import datetime
+from datetime import datetime, timedelta
+from functools import lru_cache
 from typing import Any, Dict, List, Literal, Optional, Set, Union
 
 from aind_data_schema_models.data_name_patterns import build_data_name
@@ -18,7 +20,7 @@ from pydantic import (
     field_validator,
     model_validator,
 )
-from pydantic_settings import BaseSettings
+from pydantic_settings import BaseSettings, SettingsConfigDict
 
 from aind_data_transfer_service.configs.platforms_v1 import Platform
 
@@ -27,6 +29,145 @@ _validation_context: ContextVar[Union[Dict[str, Any], None]] = ContextVar(
 )
 
 
+# Maximum number of upload jobs in a SubmitJobRequestV2
+MAX_JOBS_PER_REQUEST = 50
+
+# Keys the service adds to job confs sent to Airflow. These are ignored when
+# computing a job fingerprint.
+VOLATILE_JOB_CONF_FIELDS = frozenset(
+    {"fingerprint", "trace_id", "traceparent"}
+)
+# Keys of set fields, which are dumped to lists in an arbitrary order. They
+# are sorted when computing a job fingerprint.
+UNORDERED_JOB_CONF_FIELDS = frozenset({"email_notification_types"})
+
+
+def compute_job_fingerprint(job_conf: Dict[str, Any]) -> str:
+    """
+    Compute a stable fingerprint for an upload job conf. The fingerprint is a
+    sha256 hash of the canonical json of the conf, excluding volatile fields.
+    Dict keys and the items of set fields are sorted, so the fingerprint
+    doesn't depend on the hash seed of the process that dumped the conf.
+
+    Parameters
+    ----------
+    job_conf : Dict[str, Any]
+      Json serializable upload job conf, such as the output of
+      UploadJobConfigsV2.model_dump(mode="json", exclude_none=True)
+
+    Returns
+    -------
+    str
+
+    """
+    canonical_conf = {
+        k: (
+            sorted(v)
+            if k in UNORDERED_JOB_CONF_FIELDS and isinstance(v, list)
+            else v
+        )
+        for k, v in job_conf.items()
+        if k not in VOLATILE_JOB_CONF_FIELDS
+    }
+    canonical_json = json.dumps(canonical_conf, sort_keys=True)
+    return hashlib.sha256(canonical_json.encode("utf-8")).hexdigest()
+
+
+# Shared frozen platform and modality instances keyed by abbreviation and by
+# (name, abbreviation)
+_PLATFORMS = dict(Platform.abbreviation_map)
+_PLATFORMS_BY_TAG = {(p.name, p.abbreviation): p for p in _PLATFORMS.values()}
+_MODALITIES = dict(Modality.abbreviation_map)
+_MODALITIES_BY_TAG = {
+    (m.name, m.abbreviation): m for m in _MODALITIES.values()
+}
+
+
+def _intern(
+    v: Any,
+    by_abbreviation: Dict[str, BaseModel],
+    by_tag: Dict[tuple, BaseModel],
+) -> Any:
+    """Look up the shared instance for an abbreviation string, a dict with
+    exactly a name and an abbreviation, or a model with those fields. Any
+    other value is returned as is so that it is validated as before."""
+    if isinstance(v, str):
+        return by_abbreviation.get(v, v)
+    if isinstance(v, dict):
+        tag = (v.get("name"), v.get("abbreviation"))
+        if len(v) == 2 and all(isinstance(t, str) for t in tag):
+            return by_tag.get(tag, v)
+        return v
+    tag = (getattr(v, "name", None), getattr(v, "abbreviation", None))
+    try:
+        return by_tag.get(tag, v)
+    except TypeError:
+        # Unhashable attributes, such as on mocks
+        return v
+
+
+def intern_platform(v: Any) -> Any:
+    """
+    Resolve a platform to the shared instance in Platform.abbreviation_map.
+
+    Parameters
+    ----------
+    v : Any
+      An abbreviation, a dict with a name and an abbreviation, or a
+      platform model, including aind-data-schema-models platforms.
+
+    Returns
+    -------
+    Any
+      The shared platform if one matches, otherwise the input. Unknown
+      aind-data-schema-models platforms are dumped to a dict.
+
+    """
+    interned = _intern(v, _PLATFORMS, _PLATFORMS_BY_TAG)
+    if (
+        interned is v
+        and type(v).__module__ == "aind_data_schema_models.platforms"
+    ):
+        return v.model_dump()
+    return interned
+
+
+def intern_modality(v: Any) -> Any:
+    """
+    Resolve a modality to the shared instance in Modality.abbreviation_map.
+
+    Parameters
+    ----------
+    v : Any
+      An abbreviation, a dict with a name and an abbreviation, or a
+      modality model.
+
+    Returns
+    -------
+    Any
+      The shared modality if one matches, otherwise the input.
+
+    """
+    return _intern(v, _MODALITIES, _MODALITIES_BY_TAG)
+
+
+@lru_cache(maxsize=4096)
+def _build_s3_prefix(
+    platform_abbreviation: Optional[str],
+    subject_id: str,
+    acq_datetime: datetime,
+    utcoffset: Optional[timedelta],
+) -> str:
+    """Build an s3_prefix. Memoized on the fields it is built from, so the
+    prefix is only rebuilt after subject_id, platform or acq_datetime
+    change."""
+    if platform_abbreviation is not None:
+        label = f"{platform_abbreviation}_{subject_id}"
+    else:
+        label = subject_id
+    return build_data_name(label=label, creation_datetime=acq_datetime)
+
+
 @contextmanager
 def validation_context(context: Union[Dict[str, Any], None]) -> None:
     """
@@ -115,8 +256,10 @@ class Task(BaseModel):
         return v
 
 
-class UploadJobConfigsV2(BaseSettings):
-    """Configuration for a data transfer upload job"""
+class UploadJobConfigsV2Model(BaseModel):
+    """Configuration for a data transfer upload job. Same fields, validators
+    and json output as UploadJobConfigsV2, but as a plain BaseModel, so it
+    is cheaper to build when validating many jobs."""
 
     # noinspection PyMissingConstructor
     def __init__(self, /, **data: Any) -> None:
@@ -127,7 +270,14 @@ class UploadJobConfigsV2(BaseSettings):
             context=_validation_context.get(),
         )
 
-    model_config = ConfigDict(use_enum_values=True, extra="ignore")
+    # validate_default matches the BaseSettings default. Validators are built
+    # on first use so that importing the models stays cheap.
+    model_config = ConfigDict(
+        use_enum_values=True,
+        extra="ignore",
+        validate_default=True,
+        defer_build=True,
+    )
 
     job_type: str = Field(
         ...,
@@ -197,23 +347,37 @@ class UploadJobConfigsV2(BaseSettings):
     @computed_field
     def s3_prefix(self) -> str:
         """Construct s3_prefix from configs."""
-        if self.platform is not None:
-            label = f"{self.platform.abbreviation}_{self.subject_id}"
-        else:
-            label = self.subject_id
-        return build_data_name(
-            label=label,
-            creation_datetime=self.acq_datetime,
+        acq_datetime = self.acq_datetime
+        return _build_s3_prefix(
+            None if self.platform is None else self.platform.abbreviation,
+            self.subject_id,
+            acq_datetime,
+            # Equal datetimes in different timezones have different names
+            acq_datetime.utcoffset(),
+        )
+
+    @property
+    def fingerprint(self) -> str:
+        """Stable hash of the job configs. Two jobs with the same fingerprint
+        are duplicates."""
+        return compute_job_fingerprint(
+            self.model_dump(mode="json", exclude_none=True)
         )
 
     @field_validator("platform", mode="before")
     def validate_platform(cls, v):
         """
         For backwards compatibility, allow a user to input an
-        aind-data-schema-model platform and then convert it.
+        aind-data-schema-model platform and then convert it. Known platforms
+        are resolved to shared instances.
         """
-        if type(v).__module__ == "aind_data_schema_models.platforms":
-            return v.model_dump()
+        return intern_platform(v)
+
+    @field_validator("modalities", mode="before")
+    def validate_modalities(cls, v):
+        """Resolve known modalities to shared instances."""
+        if isinstance(v, list):
+            return [intern_modality(m) for m in v]
         else:
             return v
 
@@ -241,6 +405,22 @@ class UploadJobConfigsV2(BaseSettings):
         else:
             return v
 
+    @field_validator("platform", "modalities", mode="after")
+    def validate_abbreviations_with_context(cls, v, info: ValidationInfo):
+        """If a list of accepted platform or modality abbreviations is
+        provided in a context manager, such as a snapshot downloaded from the
+        service, then the abbreviations are validated against the list."""
+        valid_list = (info.context or dict()).get(
+            "platforms" if info.field_name == "platform" else "modalities"
+        )
+        if valid_list is not None:
+            for item in v if isinstance(v, list) else [v]:
+                if item is not None and item.abbreviation not in valid_list:
+                    raise ValueError(
+                        f"{item.abbreviation} must be one of {valid_list}"
+                    )
+        return v
+
     @field_validator("tasks", mode="after")
     def validate_tasks(
         cls, v: Dict[str, Union[Task, Dict[str, Task]]]
@@ -269,9 +449,18 @@ class UploadJobConfigsV2(BaseSettings):
         return v
 
 
-class SubmitJobRequestV2(BaseSettings):
-    """Main request that will be sent to the backend. Bundles jobs into a list
-    and allows a user to add an email address to receive notifications."""
+class UploadJobConfigsV2(UploadJobConfigsV2Model, BaseSettings):
+    """Configuration for a data transfer upload job"""
+
+    model_config = SettingsConfigDict(
+        use_enum_values=True, extra="ignore", defer_build=True
+    )
+
+
+class SubmitJobRequestV2Model(BaseModel):
+    """Main request that will be sent to the backend. Same fields, validators
+    and json output as SubmitJobRequestV2, but as a plain BaseModel with
+    UploadJobConfigsV2Model upload jobs."""
 
     # noinspection PyMissingConstructor
     def __init__(self, /, **data: Any) -> None:
@@ -282,7 +471,14 @@ class SubmitJobRequestV2(BaseSettings):
             context=_validation_context.get(),
         )
 
-    model_config = ConfigDict(use_enum_values=True, extra="ignore")
+    # validate_default matches the BaseSettings default. Validators are built
+    # on first use so that importing the models stays cheap.
+    model_config = ConfigDict(
+        use_enum_values=True,
+        extra="ignore",
+        validate_default=True,
+        defer_build=True,
+    )
 
     dag_id: Literal["transform_and_upload_v2"] = "transform_and_upload_v2"
     user_email: Optional[EmailStr] = Field(
@@ -299,11 +495,14 @@ class SubmitJobRequestV2(BaseSettings):
             "Types of job statuses to receive email notifications about"
         ),
     )
-    upload_jobs: List[UploadJobConfigsV2] = Field(
+    upload_jobs: List[UploadJobConfigsV2Model] = Field(
         ...,
-        description="List of upload jobs to process. Max of 50 at a time.",
+        description=(
+            "List of upload jobs to process. Max of "
+            f"{MAX_JOBS_PER_REQUEST} at a time."
+        ),
         min_length=1,
-        max_length=50,
+        max_length=MAX_JOBS_PER_REQUEST,
     )
 
     @model_validator(mode="after")
@@ -330,30 +529,47 @@ class SubmitJobRequestV2(BaseSettings):
     def check_duplicate_upload_jobs(self, info: ValidationInfo):
         """Validate that there are no duplicate upload jobs. If a list of
         current jobs is provided in a context manager, jobs are also checked
-        against the list."""
-        jobs_map = dict()
-        # check jobs with the same s3_prefix
+        against the list. Current jobs submitted by this service carry a
+        fingerprint. Legacy jobs without one are only hashed if they share
+        an s3_prefix with a new job."""
+        fingerprints = dict()
         for job in self.upload_jobs:
             prefix = job.s3_prefix
-            job_json = json.dumps(
-                job.model_dump(mode="json", exclude_none=True), sort_keys=True
-            )
-            jobs_map.setdefault(prefix, set())
-            if job_json in jobs_map[prefix]:
+            fingerprint = job.fingerprint
+            if fingerprint in fingerprints:
                 raise ValueError(f"Duplicate jobs found for {prefix}")
-            jobs_map[prefix].add(job_json)
+            fingerprints[fingerprint] = prefix
+        prefixes = set(fingerprints.values())
         # check against any jobs in the context
         current_jobs = (info.context or dict()).get("current_jobs", list())
         for job in current_jobs:
             jobs_to_check = job.get("upload_jobs", [job])
             for j in jobs_to_check:
-                prefix = j.get("s3_prefix")
-                if (
-                    prefix is not None
-                    and prefix in jobs_map
-                    and json.dumps(j, sort_keys=True) in jobs_map[prefix]
-                ):
+                fingerprint = j.get("fingerprint")
+                if fingerprint is None and j.get("s3_prefix") in prefixes:
+                    fingerprint = compute_job_fingerprint(j)
+                if fingerprint is not None and fingerprint in fingerprints:
                     raise ValueError(
-                        f"Job is already running/queued for {prefix}"
+                        "Job is already running/queued for "
+                        f"{fingerprints[fingerprint]}"
                     )
         return self
+
+
+class SubmitJobRequestV2(SubmitJobRequestV2Model, BaseSettings):
+    """Main request that will be sent to the backend. Bundles jobs into a list
+    and allows a user to add an email address to receive notifications."""
+
+    model_config = SettingsConfigDict(
+        use_enum_values=True, extra="ignore", defer_build=True
+    )
+
+    upload_jobs: List[UploadJobConfigsV2] = Field(
+        ...,
+        description=(
+            "List of upload jobs to process. Max of "
+            f"{MAX_JOBS_PER_REQUEST} at a time."
+        ),
+        min_length=1,
+        max_length=MAX_JOBS_PER_REQUEST,
+    )
@@ -3,12 +3,16 @@
 import ast
 import os
 from datetime import datetime, timedelta, timezone
-from typing import ClassVar, List, Optional, Union
+from typing import TYPE_CHECKING, ClassVar, List, Optional, Union
 
 from aind_data_schema_models.modalities import Modality
-from mypy_boto3_ssm.type_defs import ParameterMetadataTypeDef
 from pydantic import AwareDatetime, BaseModel, Field, field_validator
-from starlette.datastructures import QueryParams
+
+# Only used in annotations, so the client can use these models without the
+# server dependencies
+if TYPE_CHECKING:
+    from mypy_boto3_ssm.type_defs import ParameterMetadataTypeDef
+    from starlette.datastructures import QueryParams
 
 
 class AirflowDagRun(BaseModel):
@@ -37,6 +41,36 @@ class AirflowDagRunsResponse(BaseModel):
     total_entries: int
 
 
+class AirflowCodeOceanConfigsSummary(BaseModel):
+    """Subset of the v1 codeocean_configs needed to render job status"""
+
+    job_type: Optional[str] = None
+
+
+class AirflowDagRunConfSummary(BaseModel):
+    """Subset of a dag_run conf needed to render job status. Any other keys
+    are skipped while parsing the json so large confs are never
+    materialized."""
+
+    s3_prefix: Optional[str] = None
+    job_type: Optional[str] = None
+    codeocean_configs: Optional[AirflowCodeOceanConfigsSummary] = None
+
+
+class AirflowDagRunSummary(AirflowDagRun):
+    """Data model for dag_run entry with only the conf summary fields"""
+
+    conf: Optional[AirflowDagRunConfSummary]
+
+
+class AirflowDagRunSummariesResponse(BaseModel):
+    """Data model for response from dag_runs endpoint when only the conf
+    summary fields are needed"""
+
+    dag_runs: List[AirflowDagRunSummary]
+    total_entries: int
+
+
 class AirflowDagRunsRequestParameters(BaseModel):
     """Model for parameters when requesting info from dag_runs endpoint"""
 
@@ -63,7 +97,7 @@ class AirflowDagRunsRequestParameters(BaseModel):
         return execution_date_gte
 
     @classmethod
-    def from_query_params(cls, query_params: QueryParams):
+    def from_query_params(cls, query_params: "QueryParams"):
         """Maps the query parameters to the model"""
         params = dict(query_params)
         if "states" in params:
@@ -79,7 +113,7 @@ class AirflowTaskInstancesRequestParameters(BaseModel):
     dag_run_id: str = Field(..., min_length=1)
 
     @classmethod
-    def from_query_params(cls, query_params: QueryParams):
+    def from_query_params(cls, query_params: "QueryParams"):
         """Maps the query parameters to the model"""
         params = dict(query_params)
         return cls.model_validate(params)
@@ -137,7 +171,7 @@ class AirflowTaskInstanceLogsRequestParameters(BaseModel):
     full_content: bool = True
 
     @classmethod
-    def from_query_params(cls, query_params: QueryParams):
+    def from_query_params(cls, query_params: "QueryParams"):
         """Maps the query parameters to the model"""
         params = dict(query_params)
         return cls.model_validate(params)
@@ -157,15 +191,20 @@ class JobStatus(BaseModel):
     submit_time: Optional[datetime] = Field(None)
 
     @classmethod
-    def from_airflow_dag_run(cls, airflow_dag_run: AirflowDagRun):
+    def from_airflow_dag_run(
+        cls, airflow_dag_run: Union[AirflowDagRun, AirflowDagRunSummary]
+    ):
         """Maps the fields from an AirflowDagRun to this model"""
-        name = airflow_dag_run.conf.get("s3_prefix", "")
-        job_type = airflow_dag_run.conf.get("job_type", "")
+        conf = airflow_dag_run.conf
+        if isinstance(conf, AirflowDagRunConfSummary):
+            # Only keys that were in the conf, so null values are kept as in
+            # the full conf
+            conf = conf.model_dump(exclude_unset=True)
+        name = conf.get("s3_prefix", "")
+        job_type = conf.get("job_type", "")
         # v1 job_type is in CO configs
         if job_type == "":
-            job_type = airflow_dag_run.conf.get("codeocean_configs", {}).get(
-                "job_type", ""
-            )
+            job_type = conf.get("codeocean_configs", {}).get("job_type", "")
         return cls(
             dag_id=airflow_dag_run.dag_id,
             end_time=airflow_dag_run.end_date,
@@ -242,7 +281,7 @@ class JobParamInfo(BaseModel):
     @classmethod
     def from_aws_describe_parameter(
         cls,
-        parameter: ParameterMetadataTypeDef,
+        parameter: "ParameterMetadataTypeDef",
         job_type: str,
         task_id: str,
         modality: Optional[str],
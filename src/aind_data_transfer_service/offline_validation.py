@@ -0,0 +1,160 @@
+"""Module to validate submit job requests offline against a cached snapshot
+of the service's validation context"""
+
+import json
+import logging
+import os
+import tempfile
+import time
+from typing import Any, Dict, Optional, Union
+from urllib.error import HTTPError, URLError
+from urllib.request import Request, urlopen
+
+from aind_data_transfer_service.models.core import (
+    SubmitJobRequestV2,
+    validation_context,
+)
+
+DEFAULT_VALIDATION_CONTEXT_URL = (
+    "http://aind-data-transfer-service/api/v2/validation_context"
+)
+DEFAULT_CACHE_PATH = os.path.join(
+    os.path.expanduser("~"),
+    ".cache",
+    "aind_data_transfer_service",
+    "validation_context.json",
+)
+
+
+class OfflineValidator:
+    """Validates submit job requests locally against a snapshot of the
+    job types, project names, modalities, and platforms accepted by the
+    service. The snapshot is cached in a file and only downloaded again once
+    it is older than ttl seconds, with a conditional request that costs the
+    server nothing if the snapshot has not changed. Jobs that are already
+    running are not known offline, so duplicates of those are only caught
+    when the request is submitted."""
+
+    def __init__(
+        self,
+        url: str = DEFAULT_VALIDATION_CONTEXT_URL,
+        cache_path: Optional[str] = DEFAULT_CACHE_PATH,
+        ttl: float = 3600.0,
+        timeout: float = 10.0,
+    ) -> None:
+        """
+        Parameters
+        ----------
+        url : str
+          Url of the service's /api/v2/validation_context endpoint.
+        cache_path : Optional[str]
+          File to cache the snapshot in. Set to None to only keep the
+          snapshot in memory.
+        ttl : float
+          Seconds before a cached snapshot is checked for changes.
+        timeout : float
+          Seconds to wait for the service.
+        """
+        self.url = url
+        self.cache_path = cache_path
+        self.ttl = ttl
+        self.timeout = timeout
+        self._cache: Optional[Dict[str, Any]] = None
+
+    def _read_cache(self) -> Optional[Dict[str, Any]]:
+        """Cached etag, fetch time, and snapshot, if any."""
+        if self._cache is None and self.cache_path is not None:
+            try:
+                with open(self.cache_path, "rt") as f:
+                    self._cache = json.load(f)
+            except (OSError, ValueError):
+                return None
+        return self._cache
+
+    def _write_cache(self, cache: Dict[str, Any]) -> None:
+        """Keep the cache in memory and write it to the cache file."""
+        self._cache = cache
+        if self.cache_path is None:
+            return
+        cache_dir = os.path.dirname(self.cache_path) or "."
+        os.makedirs(cache_dir, exist_ok=True)
+        # Write to a temporary file first so readers never see a partial file
+        with tempfile.NamedTemporaryFile(
+            "wt", dir=cache_dir, delete=False, suffix=".tmp"
+        ) as f:
+            json.dump(cache, f)
+        os.replace(f.name, self.cache_path)
+
+    def _download(self, etag: Optional[str]) -> Optional[Dict[str, Any]]:
+        """Download the snapshot. Returns None if it matches the etag."""
+        request = Request(self.url, headers={"Accept": "application/json"})
+        if etag is not None:
+            request.add_header("If-None-Match", etag)
+        try:
+            with urlopen(request, timeout=self.timeout) as response:
+                return {
+                    "etag": response.headers.get("ETag"),
+                    "fetched_at": time.time(),
+                    "data": json.loads(response.read())["data"],
+                }
+        except HTTPError as e:
+            if e.code == 304:
+                return None
+            raise
+
+    def get_context(self) -> Dict[str, Any]:
+        """
+        Get the validation context, downloading the snapshot if the cached
+        one is missing or expired. If the service can't be reached, an
+        expired snapshot is used.
+
+        Returns
+        -------
+        Dict[str, Any]
+          Validation context with job_types, project_names, modalities, and
+          platforms.
+
+        """
+        cache = self._read_cache()
+        if cache is not None and time.time() - cache["fetched_at"] < self.ttl:
+            return cache["data"]
+        try:
+            new_cache = self._download(
+                None if cache is None else cache["etag"]
+            )
+        except (URLError, OSError) as e:
+            if cache is None:
+                raise
+            logging.warning(f"Using expired validation context: {e}")
+            return cache["data"]
+        if new_cache is None:
+            new_cache = dict(cache, fetched_at=time.time())
+        self._write_cache(new_cache)
+        return new_cache["data"]
+
+    def validate(
+        self, request: Union[Dict[str, Any], str, bytes]
+    ) -> SubmitJobRequestV2:
+        """
+        Validate a submit job request offline.
+
+        Parameters
+        ----------
+        request : Union[Dict[str, Any], str, bytes]
+          Request as a dict or as json.
+
+        Returns
+        -------
+        SubmitJobRequestV2
+
+        Raises
+        ------
+        ValidationError
+          If the request is not valid.
+
+        """
+        with validation_context(self.get_context()):
+            if isinstance(request, (str, bytes)):
+                return SubmitJobRequestV2.model_validate_json(request)
+            else:
+                return SubmitJobRequestV2(**request)
@@ -0,0 +1,200 @@
+"""Module to profile individual requests. A sampling profiler records the
+stacks of every thread, so that work done on the thread worker pool is
+included, and the profiles are kept in a bounded directory on disk."""
+
+import os
+import re
+import sys
+import tempfile
+import threading
+import time
+from collections import Counter
+from datetime import datetime, timezone
+from typing import Dict, List, Optional
+
+DEFAULT_PROFILE_DIR = os.path.join(
+    tempfile.gettempdir(), "aind_data_transfer_service", "profiles"
+)
+PROFILE_SUFFIX = ".folded"
+_PROFILE_NAME_REGEX = re.compile(r"^[0-9]+-[A-Za-z0-9_]+\.folded$")
+
+
+class SamplingProfiler:
+    """Samples the stack of every thread at a fixed interval. The samples
+    are written as collapsed stacks, one line per unique stack with the
+    number of times it was seen, which can be opened with flame graph tools
+    such as speedscope."""
+
+    def __init__(self, interval: float = 0.005, max_depth: int = 128) -> None:
+        """
+        Parameters
+        ----------
+        interval : float
+          Seconds between samples.
+        max_depth : int
+          Frames nearest the root of deeper stacks are dropped.
+        """
+        self.interval = interval
+        self.max_depth = max_depth
+        self.samples: Counter = Counter()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def _fold(self, thread_name: str, frame) -> str:
+        """Collapse a stack into root;...;leaf."""
+        names = []
+        while frame is not None and len(names) < self.max_depth:
+            code = frame.f_code
+            names.append(
+                f"{code.co_name} ({os.path.basename(code.co_filename)}"
+                f":{code.co_firstlineno})"
+            )
+            frame = frame.f_back
+        names.append(thread_name)
+        return ";".join(reversed(names))
+
+    def _run(self) -> None:
+        """Take samples until stopped."""
+        own_id = threading.get_ident()
+        while not self._stop.wait(self.interval):
+            names = {t.ident: t.name for t in threading.enumerate()}
+            for thread_id, frame in sys._current_frames().items():
+                if thread_id != own_id:
+                    name = names.get(thread_id, str(thread_id))
+                    self.samples[self._fold(name, frame)] += 1
+
+    def start(self) -> None:
+        """Start sampling on a background thread."""
+        self._thread = threading.Thread(
+            target=self._run, name="sampling-profiler", daemon=True
+        )
+        self._thread.start()
+
+    def stop(self) -> None:
+        """Stop sampling and wait for the background thread."""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+
+    def collapsed(self) -> str:
+        """Samples as collapsed stacks, most frequent first."""
+        return "".join(
+            f"{stack} {count}\n" for stack, count in self.samples.most_common()
+        )
+
+
+class ProfileStore:
+    """Ring buffer of profiles in a directory. Once there are max_profiles
+    profiles, the oldest ones are deleted."""
+
+    def __init__(self, directory: str, max_profiles: int = 20) -> None:
+        """
+        Parameters
+        ----------
+        directory : str
+          Where profiles are stored. Created when a profile is saved.
+        max_profiles : int
+          Maximum number of profiles to keep.
+        """
+        self.directory = directory
+        self.max_profiles = max_profiles
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_env(cls) -> "ProfileStore":
+        """
+        Create a store configured with AIND_PROFILE_DIR and
+        AIND_PROFILE_MAX_FILES.
+
+        Returns
+        -------
+        ProfileStore
+
+        """
+        return cls(
+            directory=os.getenv("AIND_PROFILE_DIR", DEFAULT_PROFILE_DIR),
+            max_profiles=int(os.getenv("AIND_PROFILE_MAX_FILES", "20")),
+        )
+
+    @staticmethod
+    def new_name(label: str) -> str:
+        """
+        Unique file name for a new profile. Names sort by creation time.
+
+        Parameters
+        ----------
+        label : str
+          Short description, such as the request method and path.
+
+        Returns
+        -------
+        str
+
+        """
+        slug = re.sub(r"[^A-Za-z0-9]+", "_", label).strip("_")[:60]
+        return f"{time.time_ns()}-{slug or 'profile'}{PROFILE_SUFFIX}"
+
+    def _names(self) -> List[str]:
+        """Names of stored profiles, oldest first."""
+        try:
+            names = os.listdir(self.directory)
+        except FileNotFoundError:
+            return []
+        return sorted(n for n in names if _PROFILE_NAME_REGEX.match(n))
+
+    def save(self, name: str, content: str) -> None:
+        """
+        Write a profile and delete the oldest profiles beyond max_profiles.
+
+        Parameters
+        ----------
+        name : str
+          Name from new_name.
+        content : str
+          Profile contents.
+
+        """
+        if not _PROFILE_NAME_REGEX.match(name):
+            raise ValueError(f"Invalid profile name {name}")
+        with self._lock:
+            os.makedirs(self.directory, exist_ok=True)
+            with open(os.path.join(self.directory, name), "w") as f:
+                f.write(content)
+            names = self._names()
+            for old_name in names[: max(0, len(names) - self.max_profiles)]:
+                os.remove(os.path.join(self.directory, old_name))
+
+    def list(self) -> List[Dict[str, object]]:
+        """
+        Stored profiles, newest first.
+
+        Returns
+        -------
+        List[Dict[str, object]]
+          The name, size_bytes, and created time of each profile.
+
+        """
+        profiles = []
+        for name in reversed(self._names()):
+            try:
+                size = os.path.getsize(os.path.join(self.directory, name))
+            except FileNotFoundError:
+                continue
+            created = datetime.fromtimestamp(
+                int(name.split("-", 1)[0]) / 1e9, tz=timezone.utc
+            )
+            profiles.append(
+                {
+                    "name": name,
+                    "size_bytes": size,
+                    "created": created.strftime("%Y-%m-%d %H:%M:%S UTC"),
+                }
+            )
+        return profiles
+
+    def path(self, name: str) -> Optional[str]:
+        """Path of a stored profile or None if there isn't one by that
+        name."""
+        if name not in self._names():
+            return None
+        return os.path.join(self.directory, name)
@@ -0,0 +1,353 @@
+"""Module to validate job sheet rows, optionally in parallel on a process
+pool"""
+
+import hashlib
+import json
+import os
+import pickle
+import tempfile
+import threading
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from itertools import chain, islice, repeat
+from typing import (
+    Any,
+    Callable,
+    Dict,
+    Iterable,
+    Iterator,
+    List,
+    Optional,
+    Tuple,
+)
+
+from pydantic import ValidationError
+
+from aind_data_transfer_service.configs.csv_handler import CsvRowMapper
+from aind_data_transfer_service.metrics import (
+    ROW_VALIDATION_CACHE_HITS,
+    ROW_VALIDATION_CACHE_MISSES,
+)
+from aind_data_transfer_service.models.core import (
+    UploadJobConfigsV2Model,
+    validation_context,
+)
+from aind_data_transfer_service.worker_pool import process_pool_context
+
+# A validated job dumped as json or an error message
+RowResult = Tuple[Optional[dict], Optional[str]]
+
+# Number of context versions each worker process keeps unpickled
+_MAX_WORKER_CONTEXTS = 8
+_worker_contexts: "OrderedDict[str, Any]" = OrderedDict()
+
+
+def map_job_row(row: dict, row_mapper: CsvRowMapper) -> dict:
+    """Map a single sheet row to an upload job and dump it as json."""
+    job = row_mapper.map_row(row)
+    # Construct hpc job setting most of the vars from the env
+    return json.loads(
+        job.model_dump_json(
+            round_trip=True,
+            exclude_none=True,
+            warnings=False,
+        )
+    )
+
+
+def validate_job_rows(rows: Iterable[dict], context: Any) -> List[RowResult]:
+    """
+    Validate sheet rows as upload jobs one after another.
+
+    Parameters
+    ----------
+    rows : Iterable[dict]
+      Rows read from the sheet.
+    context : Any
+      Validation context with job_types, project_names, and current_jobs.
+
+    Returns
+    -------
+    List[RowResult]
+      A (job, None) or (None, error) tuple for each row, in row order.
+
+    """
+    results = []
+    row_mapper = CsvRowMapper(model_class=UploadJobConfigsV2Model)
+    with validation_context(context):
+        for row in rows:
+            try:
+                results.append((map_job_row(row, row_mapper), None))
+            except ValidationError as e:
+                results.append((None, e.json()))
+            except Exception as e:
+                results.append((None, f"{str(e.args)}"))
+    return results
+
+
+def _get_worker_context(version: str, path: str) -> Any:
+    """Load a context version from the file written by the parent process
+    once per worker process."""
+    context = _worker_contexts.get(version)
+    if context is None:
+        with open(path, "rb") as f:
+            context = pickle.load(f)
+        _worker_contexts[version] = context
+        if len(_worker_contexts) > _MAX_WORKER_CONTEXTS:
+            _worker_contexts.popitem(last=False)
+    else:
+        _worker_contexts.move_to_end(version)
+    return context
+
+
+def _validate_chunk(
+    version: str, path: str, rows: List[dict]
+) -> List[RowResult]:
+    """Validate a chunk of rows in a worker process."""
+    return validate_job_rows(rows, _get_worker_context(version, path))
+
+
+class ParallelRowValidator:
+    """Validates the rows of large job sheets in chunks on a process pool.
+    Sheets that fit in a single chunk are validated in the calling thread.
+    The validation context is written to a file once per sheet, and only its
+    version and path are sent with each chunk. Each worker process loads a
+    context version once."""
+
+    def __init__(self, max_workers: int = 0, chunk_size: int = 250) -> None:
+        """
+        Parameters
+        ----------
+        max_workers : int
+          Number of worker processes. Set to 0 to always validate rows in
+          the calling thread.
+        chunk_size : int
+          Number of rows sent to a worker at a time.
+        """
+        if chunk_size < 1:
+            raise ValueError("chunk_size must be at least 1")
+        self.max_workers = max_workers
+        self.chunk_size = chunk_size
+        self._executor: Optional[ProcessPoolExecutor] = None
+
+    @classmethod
+    def from_env(cls) -> "ParallelRowValidator":
+        """Configure the validator from environment variables."""
+        return cls(
+            max_workers=int(
+                os.getenv("AIND_PARALLEL_VALIDATION_WORKERS", "0")
+            ),
+            chunk_size=int(
+                os.getenv("AIND_PARALLEL_VALIDATION_CHUNK_SIZE", "250")
+            ),
+        )
+
+    @property
+    def enabled(self) -> bool:
+        """Whether rows are validated on a process pool."""
+        return self.max_workers > 0
+
+    def _get_executor(self) -> ProcessPoolExecutor:
+        """Lazily create the executor."""
+        if self._executor is None:
+            self._executor = ProcessPoolExecutor(
+                max_workers=self.max_workers,
+                mp_context=process_pool_context(),
+            )
+        return self._executor
+
+    def _chunks(self, rows: Iterator[dict]) -> Iterator[List[dict]]:
+        """Split rows into lists of chunk_size rows."""
+        return iter(lambda: list(islice(rows, self.chunk_size)), [])
+
+    def validate(self, rows: Iterable[dict], context: Any) -> List[RowResult]:
+        """
+        Validate sheet rows as upload jobs. Results are the same as
+        validate_job_rows.
+
+        Parameters
+        ----------
+        rows : Iterable[dict]
+          Rows read from the sheet.
+        context : Any
+          Validation context with job_types, project_names, and
+          current_jobs. It needs to be picklable.
+
+        Returns
+        -------
+        List[RowResult]
+          A (job, None) or (None, error) tuple for each row, in row order.
+
+        """
+        rows = iter(rows)
+        first_chunk = list(islice(rows, self.chunk_size))
+        if not self.enabled or len(first_chunk) < self.chunk_size:
+            return validate_job_rows(chain(first_chunk, rows), context)
+        version = compute_context_version(context)
+        fd, path = tempfile.mkstemp(prefix="aind-row-context-", suffix=".pkl")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                pickle.dump(context, f)
+            results = []
+            # Executor.map yields chunk results in the order they were
+            # submitted
+            for chunk_results in self._get_executor().map(
+                _validate_chunk,
+                repeat(version),
+                repeat(path),
+                chain([first_chunk], self._chunks(rows)),
+            ):
+                results.extend(chunk_results)
+        finally:
+            os.remove(path)
+        return results
+
+    def shutdown(self) -> None:
+        """Shut down the executor. It is recreated on the next validate."""
+        if self._executor is not None:
+            self._executor.shutdown(wait=True)
+            self._executor = None
+
+
+def _hash_json(obj: Any) -> str:
+    """sha256 hash of the json representation of an object."""
+    return hashlib.sha256(
+        json.dumps(obj, default=str, separators=(",", ":")).encode("utf-8")
+    ).hexdigest()
+
+
+def compute_row_hash(row: dict) -> str:
+    """
+    Hash the content of a sheet row. Column order is kept since it
+    determines the order of the modalities in the mapped job.
+
+    Parameters
+    ----------
+    row : dict
+
+    Returns
+    -------
+    str
+
+    """
+    return _hash_json([[k, v] for k, v in row.items()])
+
+
+def compute_context_version(context: Any) -> str:
+    """
+    Hash a validation context. The version changes whenever the job types,
+    project names, or current jobs snapshot changes.
+
+    Parameters
+    ----------
+    context : Any
+
+    Returns
+    -------
+    str
+
+    """
+    if isinstance(context, dict):
+        context = {k: context[k] for k in sorted(context.keys())}
+    return _hash_json(context)
+
+
+class RowValidationCache:
+    """Bounded LRU cache of row validation results keyed by the row content
+    hash and the context version. Cached jobs are shared between requests
+    and should not be modified."""
+
+    def __init__(self, max_size: int = 5000) -> None:
+        """
+        Parameters
+        ----------
+        max_size : int
+          Maximum number of cached rows. Set to 0 to disable the cache.
+        """
+        self.max_size = max_size
+        self._results: "OrderedDict[Tuple[str, str], RowResult]" = (
+            OrderedDict()
+        )
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_env(cls) -> "RowValidationCache":
+        """Configure the cache from environment variables."""
+        return cls(
+            max_size=int(os.getenv("AIND_ROW_VALIDATION_CACHE_SIZE", "5000"))
+        )
+
+    def __len__(self) -> int:
+        """Number of cached rows."""
+        return len(self._results)
+
+    def get(self, key: Tuple[str, str]) -> Optional[RowResult]:
+        """Look up a result and mark it as recently used."""
+        with self._lock:
+            result = self._results.get(key)
+            if result is not None:
+                self._results.move_to_end(key)
+            return result
+
+    def put(self, key: Tuple[str, str], result: RowResult) -> None:
+        """Add a result, evicting the least recently used ones if full."""
+        if self.max_size <= 0:
+            return
+        with self._lock:
+            self._results[key] = result
+            self._results.move_to_end(key)
+            while len(self._results) > self.max_size:
+                self._results.popitem(last=False)
+
+    def clear(self) -> None:
+        """Remove every cached result."""
+        with self._lock:
+            self._results.clear()
+
+    def validate(
+        self,
+        rows: Iterable[dict],
+        context: Any,
+        validate_rows: Callable[
+            [List[dict], Any], List[RowResult]
+        ] = validate_job_rows,
+    ) -> List[RowResult]:
+        """
+        Validate sheet rows, only sending rows that are not cached to
+        validate_rows.
+
+        Parameters
+        ----------
+        rows : Iterable[dict]
+          Rows read from the sheet.
+        context : Any
+          Validation context with job_types, project_names, and current_jobs.
+        validate_rows : Callable[[List[dict], Any], List[RowResult]]
+          Validates the rows that are not cached, such as validate_job_rows
+          or ParallelRowValidator.validate.
+
+        Returns
+        -------
+        List[RowResult]
+          A (job, None) or (None, error) tuple for each row, in row order.
+
+        """
+        version = compute_context_version(context)
+        results: List[Optional[RowResult]] = []
+        missed: Dict[int, Tuple[str, str]] = dict()
+        missed_rows = []
+        for row in rows:
+            key = (compute_row_hash(row), version)
+            result = self.get(key)
+            if result is None:
+                missed[len(results)] = key
+                missed_rows.append(row)
+            results.append(result)
+        ROW_VALIDATION_CACHE_HITS.inc(len(results) - len(missed_rows))
+        ROW_VALIDATION_CACHE_MISSES.inc(len(missed_rows))
+        if missed_rows:
+            new_results = validate_rows(missed_rows, context)
+            for (index, key), result in zip(missed.items(), new_results):
+                results[index] = result
+                self.put(key, result)
+        return results
@@ -1,47 +1,93 @@
 """Starts and Runs Starlette Service"""
 
-import csv
 import io
 import json
 import logging
 import os
 import re
-from asyncio import gather
-from typing import Any, List, Optional, Union
+from asyncio import create_task, gather
+from contextlib import asynccontextmanager
+from itertools import islice
+from typing import (
+    Any,
+    AsyncIterator,
+    BinaryIO,
+    Iterator,
+    List,
+    Optional,
+    Tuple,
+    Union,
+)
 
 import boto3
+from aind_data_schema_models.modalities import Modality
 from authlib.integrations.starlette_client import OAuth
 from botocore.exceptions import ClientError
 from fastapi import Request
-from fastapi.responses import JSONResponse, StreamingResponse
+from fastapi.responses import JSONResponse, Response, StreamingResponse
 from fastapi.templating import Jinja2Templates
 from httpx import AsyncClient
-from openpyxl import load_workbook
 from pydantic import ValidationError
 from starlette.applications import Starlette
+from starlette.background import BackgroundTask
+from starlette.concurrency import run_in_threadpool
 from starlette.config import Config
+from starlette.datastructures import FormData
 from starlette.middleware.sessions import SessionMiddleware
-from starlette.responses import RedirectResponse
+from starlette.responses import FileResponse, RedirectResponse
 from starlette.routing import Route
+from starlette.types import Message
 
 from aind_data_transfer_service import (
     __version__ as aind_data_transfer_service_version,
 )
-from aind_data_transfer_service.configs.csv_handler import map_csv_row_to_job
+from aind_data_transfer_service import configure_logging, upstream
+from aind_data_transfer_service.configs.csv_handler import (
+    CsvRowMapper,
+    JobSheetSizeError,
+    read_csv_rows,
+    read_xlsx_rows,
+)
 from aind_data_transfer_service.configs.job_upload_template import (
     JobUploadTemplate,
 )
+from aind_data_transfer_service.configs.platforms_v1 import Platform
 from aind_data_transfer_service.log_handler import (
     EventType,
     log_submit_job_request,
 )
+from aind_data_transfer_service.memory import MemoryTracer
+from aind_data_transfer_service.metrics import (
+    AIRFLOW_DAG_RUNS_PAGE_DECODED_BYTES,
+    AIRFLOW_DAG_RUNS_PAGE_WIRE_BYTES,
+    EVENT_LOOP_LAG_LAST_SECONDS,
+    JOBS_CANCELLED,
+    PROMETHEUS_CONTENT_TYPE,
+    UPLOAD_JOBS_REJECTED_DUPLICATE,
+    UPLOAD_JOBS_SUBMITTED,
+    UPLOAD_JOBS_VALIDATED,
+    monitor_event_loop_lag,
+    render_prometheus,
+)
+from aind_data_transfer_service.middleware import (
+    ProfilerMiddleware,
+    RequestMetricsMiddleware,
+    ServerTimingMiddleware,
+    SlowRequestLog,
+    SlowRequestMiddleware,
+    TracingMiddleware,
+    content_length,
+)
 from aind_data_transfer_service.models.core import (
-    SubmitJobRequestV2,
+    SubmitJobRequestV2Model,
+    UploadJobConfigsV2Model,
+    compute_job_fingerprint,
     validation_context,
 )
 from aind_data_transfer_service.models.internal import (
     AirflowDagRunsRequestParameters,
     AirflowDagRunsResponse,
+    AirflowDagRunSummariesResponse,
     AirflowTaskInstanceLogsRequestParameters,
     AirflowTaskInstancesRequestParameters,
     AirflowTaskInstancesResponse,
@@ -49,6 +95,29 @@ from aind_data_transfer_service.models.internal import (
     JobStatus,
     JobTasks,
 )
+from aind_data_transfer_service.profiling import ProfileStore
+from aind_data_transfer_service.row_validation import (
+    ParallelRowValidator,
+    RowValidationCache,
+    compute_context_version,
+    map_job_row,
+    validate_job_rows,
+)
+from aind_data_transfer_service.timing import (
+    annotate,
+    current_phases,
+    span,
+    timed,
+)
+from aind_data_transfer_service.tracing import current_span
+from aind_data_transfer_service.upstream import Upstream
+from aind_data_transfer_service.worker_pool import (
+    WorkerPool,
+    WorkerPoolSaturatedError,
+)
+
+# The server logs through the configured handlers from the start
+configure_logging()
 
 template_directory = os.path.abspath(
     os.path.join(os.path.dirname(__file__), "templates")
@@ -66,32 +135,355 @@ templates = Jinja2Templates(directory=template_directory)
 
 project_names_url = os.getenv("AIND_METADATA_SERVICE_PROJECT_NAMES_URL")
 
+# Limits for uploaded job sheets. Can be overridden with AIND_MAX_UPLOAD_BYTES
+# and AIND_MAX_UPLOAD_ROWS.
+DEFAULT_MAX_UPLOAD_BYTES = str(25 * 1024 * 1024)
+DEFAULT_MAX_UPLOAD_ROWS = "10000"
+DEFAULT_VALIDATE_BATCH_SIZE = "100"
+NDJSON_MEDIA_TYPE = "application/x-ndjson"
+
+# CPU-bound work, such as parsing job sheets and validating large requests,
+# runs on this pool so the event loop stays responsive
+worker_pool = WorkerPool.from_env()
+
+# Rows of large job sheets can be validated on a separate process pool
+row_validator = ParallelRowValidator.from_env()
+
+# Validation results of recently uploaded rows, so that re-uploading a sheet
+# after fixing a few rows only validates the changed rows
+row_cache = RowValidationCache.from_env()
+
+# Profiles of requests that admins asked to be profiled
+profile_store = ProfileStore.from_env()
+
+# Recent requests that took longer than AIND_SLOW_REQUEST_SECONDS
+slow_request_log = SlowRequestLog.from_env()
+
+# Allocation tracing and snapshots that admins use to find memory growth
+memory_tracer = MemoryTracer.from_env()
+
+# Always ask upstream services for compressed responses. The brotli decoder
+# is installed with the server extras.
+UPSTREAM_ACCEPT_ENCODING = "br, gzip, deflate"
+
+
+def parse_job_sheet(
+    filename: str,
+    file: Union[BinaryIO, bytes],
+    context: dict,
+    row_validator: Optional[ParallelRowValidator] = None,
+    row_cache: Optional[RowValidationCache] = None,
+) -> Tuple[List[dict], List[str]]:
+    """
+    Parse a csv or xlsx file and validate each row as an upload job. Rows are
+    streamed from the file into the row mapper. This is CPU-bound and is
+    meant to run on the worker pool.
+
+    Parameters
+    ----------
+    filename : str
+      Name of the uploaded file. Used to determine the file type.
+    file : Union[BinaryIO, bytes]
+      Uploaded file object. Bytes are accepted so the function can be sent
+      to a process pool.
+    context : dict
+      Validation context with job_types, project_names, and current_jobs.
+    row_validator : Optional[ParallelRowValidator]
+      If set, large sheets are validated in chunks on its process pool.
+    row_cache : Optional[RowValidationCache]
+      If set, rows that were validated before with the same context are
+      looked up instead of validated again.
+
+    Returns
+    -------
+    Tuple[List[dict], List[str]]
+      A list of validated jobs and a list of errors.
+
+    Raises
+    ------
+    JobSheetSizeError
+      If the sheet has more than AIND_MAX_UPLOAD_ROWS rows.
+
+    """
+    basic_jobs = []
+    errors = []
+    if isinstance(file, bytes):
+        file = io.BytesIO(file)
+    rows = read_job_sheet_rows(filename, file)
+    validate_rows = (
+        validate_job_rows if row_validator is None else row_validator.validate
+    )
+    if row_cache is not None:
+        results = row_cache.validate(rows, context, validate_rows)
+    else:
+        results = validate_rows(rows, context)
+    for job, error in results:
+        if error is None:
+            basic_jobs.append(job)
+        else:
+            errors.append(error)
+    return basic_jobs, errors
+
+
+def read_job_sheet_rows(filename: str, file: BinaryIO) -> Iterator[dict]:
+    """Stream rows from a csv or xlsx file, enforcing AIND_MAX_UPLOAD_ROWS."""
+    max_rows = int(os.getenv("AIND_MAX_UPLOAD_ROWS", DEFAULT_MAX_UPLOAD_ROWS))
+    if filename.endswith(".csv"):
+        return read_csv_rows(file, max_rows=max_rows)
+    else:
+        return read_xlsx_rows(file, max_rows=max_rows)
+
+
+def map_job_rows(
+    rows: List[dict], context: dict, first_row: int = 1
+) -> List[dict]:
+    """
+    Validate a batch of sheet rows as upload jobs. Unlike parse_job_sheet,
+    errors are returned as structured records so that they can be streamed
+    back to the client row by row. This is CPU-bound and is meant to run on
+    the worker pool.
+
+    Parameters
+    ----------
+    rows : List[dict]
+      Rows read from the sheet.
+    context : dict
+      Validation context with job_types, project_names, and current_jobs.
+    first_row : int
+      Row number of the first row in the batch. Data rows are numbered from
+      1, not counting the header or empty rows.
+
+    Returns
+    -------
+    List[dict]
+      One record per row with either a "job" or an "error".
+
+    """
+    records = []
+    row_mapper = CsvRowMapper(model_class=UploadJobConfigsV2Model)
+    with validation_context(context):
+        for row_number, row in enumerate(rows, start=first_row):
+            try:
+                job = map_job_row(row, row_mapper)
+                records.append({"row": row_number, "job": job})
+            except ValidationError as e:
+                error = {
+                    "type": "validation_error",
+                    "details": json.loads(e.json(include_url=False)),
+                }
+                records.append({"row": row_number, "error": error})
+            except Exception as e:
+                error = {"type": "error", "message": f"{str(e.args)}"}
+                records.append({"row": row_number, "error": error})
+    return records
+
+
+async def stream_job_sheet_results(
+    filename: str, file: BinaryIO, context: dict
+) -> AsyncIterator[str]:
+    """
+    Validate a csv or xlsx file in batches and yield one ndjson record per
+    row followed by a summary record. Rows are read on a worker pool thread
+    and each batch is validated on the worker pool, so both count against
+    its queue depth limit.
+
+    Parameters
+    ----------
+    filename : str
+      Name of the uploaded file. Used to determine the file type.
+    file : BinaryIO
+      Uploaded file object.
+    context : dict
+      Validation context with job_types, project_names, and current_jobs.
+
+    Yields
+    ------
+    str
+      A json record terminated by a newline.
+
+    """
+    batch_size = int(
+        os.getenv("AIND_VALIDATE_CSV_BATCH_SIZE", DEFAULT_VALIDATE_BATCH_SIZE)
+    )
+    n_rows = 0
+    n_errors = 0
+    try:
+        rows = read_job_sheet_rows(filename, file)
+        while True:
+            batch = await worker_pool.run_in_thread(
+                list, islice(rows, batch_size)
+            )
+            if not batch:
+                break
+            records = await worker_pool.run(
+                map_job_rows, batch, context, first_row=n_rows + 1
+            )
+            n_rows += len(batch)
+            UPLOAD_JOBS_VALIDATED.inc(sum("job" in r for r in records))
+            for record in records:
+                n_errors += "error" in record
+                yield json.dumps(record) + "\n"
+    except (JobSheetSizeError, WorkerPoolSaturatedError) as e:
+        logging.warning(f"Stopped validating {filename}: {e}")
+        n_errors += 1
+        error = {"type": "aborted", "message": str(e)}
+        yield json.dumps({"row": None, "error": error}) + "\n"
+    except Exception as e:
+        # The headers have already been sent, so the client can only be told
+        # about a file that can't be read in the stream itself
+        logging.exception(f"Stopped validating {filename}: {e}")
+        n_errors += 1
+        error = {"type": "aborted", "message": f"{str(e.args)}"}
+        yield json.dumps({"row": None, "error": error}) + "\n"
+    summary = {
+        "message": "There were errors" if n_errors > 0 else "Valid Data",
+        "rows": n_rows,
+        "errors": n_errors,
+    }
+    annotate(rows=n_rows, errors=n_errors)
+    logging.info(
+        f"Validated {filename}: {summary['message']}",
+        extra={"rows": n_rows, "errors": n_errors, "phases": current_phases()},
+    )
+    yield json.dumps({"summary": summary}) + "\n"
+
+
+def validate_submit_job_request(
+    content: Any, context: dict
+) -> SubmitJobRequestV2Model:
+    """Validate raw request json as a SubmitJobRequestV2 within the given
+    validation context. The plain BaseModel variant is used since it is
+    cheaper to build. This is meant to run on the worker pool."""
+    with validation_context(context):
+        return SubmitJobRequestV2Model.model_validate_json(json.dumps(content))
+
+
+def count_upload_jobs(content: Any) -> int:
+    """Number of upload jobs in raw request json, before it is validated."""
+    if not isinstance(content, dict):
+        return 0
+    upload_jobs = content.get("upload_jobs")
+    return len(upload_jobs) if isinstance(upload_jobs, list) else 0
+
+
+def get_trace_conf_fields() -> dict:
+    """Trace context of the active span to add to confs sent to Airflow.
+    Empty if there is no active span."""
+    span = current_span()
+    if span is None:
+        return dict()
+    return {
+        "trace_id": span.trace_id,
+        "traceparent": span.context.traceparent,
+    }
+
+
+def duplicate_rejection_reason(error: ValidationError) -> Optional[str]:
+    """If a submit request was rejected because of a duplicate job, whether
+    the duplicate was in the request or is already running. Otherwise,
+    None."""
+    for e in error.errors(include_url=False):
+        if "Duplicate jobs found" in e["msg"]:
+            return "in_request"
+        if "already running/queued" in e["msg"]:
+            return "already_running"
+    return None
+
+
+def worker_pool_saturated_response(
+    error: WorkerPoolSaturatedError,
+) -> JSONResponse:
+    """Response returned when the worker pool can't accept more work"""
+    logging.warning(
+        f"Rejecting request: {error}", extra={"phases": current_phases()}
+    )
+    return JSONResponse(
+        status_code=503,
+        headers={"Retry-After": "1"},
+        content={
+            "message": "Server is busy. Please try again later.",
+            "data": {"errors": [str(error)]},
+        },
+    )
+
+
+def upload_too_large_response(error: str) -> JSONResponse:
+    """Response returned when an uploaded job sheet exceeds the limits"""
+    logging.warning(
+        f"Rejecting upload: {error}", extra={"phases": current_phases()}
+    )
+    return JSONResponse(
+        status_code=413,
+        content={
+            "message": "There were errors",
+            "data": {"jobs": [], "errors": [error]},
+        },
+    )
+
+
+async def read_upload_form(request: Request, max_bytes: int) -> FormData:
+    """
+    Parse a multipart upload, rejecting it if the body is larger than
+    max_bytes. The Content-Length header is checked first if it is a number.
+    Otherwise, such as for chunked uploads, the body is counted as it is
+    received so that it is stopped before it is spooled.
+
+    Parameters
+    ----------
+    request : Request
+    max_bytes : int
+
+    Returns
+    -------
+    FormData
+
+    Raises
+    ------
+    JobSheetSizeError
+      If the body is larger than max_bytes.
+
+    """
+    error = f"File is larger than the maximum of {max_bytes} bytes"
+    request_bytes = content_length(request.headers)
+    if request_bytes is not None and request_bytes > max_bytes:
+        raise JobSheetSizeError(error)
+    received = 0
+
+    async def receive() -> Message:
+        """Receive the next message and count the body bytes."""
+        nonlocal received
+        message = await request.receive()
+        if message["type"] == "http.request":
+            received += len(message.get("body", b""))
+            if received > max_bytes:
+                raise JobSheetSizeError(error)
+        return message
+
+    return await Request(request.scope, receive=receive).form()
+
 
 async def validate_csv(request: Request):
     """Validate a csv or xlsx file. Return parsed contents as json."""
     logging.info("Received request to validate csv")
-    async with request.form() as form:
+    max_bytes = int(
+        os.getenv("AIND_MAX_UPLOAD_BYTES", DEFAULT_MAX_UPLOAD_BYTES)
+    )
+    with span("parse"):
+        try:
+            form = await read_upload_form(request, max_bytes)
+        except JobSheetSizeError as e:
+            return upload_too_large_response(str(e))
+    # The form is closed here unless the response is streamed, in which case
+    # it is closed once the whole body has been sent.
+    close_form = True
+    try:
         basic_jobs = []
         errors = []
-        if not form["file"].filename.endswith((".csv", ".xlsx")):
+        upload_file = form["file"]
+        annotate(file_bytes=upload_file.size)
+        if not upload_file.filename.endswith((".csv", ".xlsx")):
             errors.append("Invalid input file type")
         else:
-            content = await form["file"].read()
-            if form["file"].filename.endswith(".csv"):
-                # A few csv files created from excel have extra unicode
-                # byte chars. Adding "utf-8-sig" should remove them.
-                data = content.decode("utf-8-sig")
-            else:
-                xlsx_book = load_workbook(io.BytesIO(content), read_only=True)
-                xlsx_sheet = xlsx_book.active
-                csv_io = io.StringIO()
-                csv_writer = csv.writer(csv_io)
-                for r in xlsx_sheet.iter_rows(values_only=True):
-                    if any(r):
-                        csv_writer.writerow(r)
-                xlsx_book.close()
-                data = csv_io.getvalue()
-            csv_reader = csv.DictReader(io.StringIO(data))
             params = AirflowDagRunsRequestParameters(
                 dag_ids=["transform_and_upload_v2", "run_list_of_jobs"],
                 states=["running", "queued"],
@@ -104,43 +496,79 @@ async def validate_csv(request: Request):
                 "project_names": await get_project_names(),
                 "current_jobs": current_jobs,
             }
-            for row in csv_reader:
-                if not any(row.values()):
-                    continue
-                try:
-                    with validation_context(context):
-                        job = map_csv_row_to_job(row=row)
-                    # Construct hpc job setting most of the vars from the env
-                    basic_jobs.append(
-                        json.loads(
-                            job.model_dump_json(
-                                round_trip=True,
-                                exclude_none=True,
-                                warnings=False,
-                            )
-                        )
+            if NDJSON_MEDIA_TYPE in request.headers.get("accept", ""):
+                close_form = False
+                return StreamingResponse(
+                    stream_job_sheet_results(
+                        filename=upload_file.filename,
+                        file=upload_file.file,
+                        context=context,
+                    ),
+                    media_type=NDJSON_MEDIA_TYPE,
+                    background=BackgroundTask(form.close),
+                )
+            # File objects can only be shared with worker threads
+            if worker_pool.kind == "thread":
+                file = upload_file.file
+            else:
+                file = await upload_file.read()
+            try:
+                with span("validate"):
+                    basic_jobs, errors = await worker_pool.run(
+                        parse_job_sheet,
+                        filename=upload_file.filename,
+                        file=file,
+                        context=context,
+                        # A process pool or cache can't be shared with a worker
+                        # process
+                        row_validator=(
+                            row_validator
+                            if worker_pool.kind == "thread"
+                            else None
+                        ),
+                        row_cache=(
+                            row_cache if worker_pool.kind == "thread" else None
+                        ),
                     )
-                except ValidationError as e:
-                    errors.append(e.json())
-                except Exception as e:
-                    errors.append(f"{str(e.args)}")
-        message = "There were errors" if len(errors) > 0 else "Valid Data"
-        status_code = 406 if len(errors) > 0 else 200
-        content = {
-            "message": message,
-            "data": {"jobs": basic_jobs, "errors": errors},
-        }
-        return JSONResponse(
-            content=content,
-            status_code=status_code,
-        )
+            except WorkerPoolSaturatedError as e:
+                return worker_pool_saturated_response(e)
+            except JobSheetSizeError as e:
+                return upload_too_large_response(str(e))
+            UPLOAD_JOBS_VALIDATED.inc(len(basic_jobs))
+            annotate(jobs=len(basic_jobs), errors=len(errors))
+    finally:
+        if close_form:
+            await form.close()
+    message = "There were errors" if len(errors) > 0 else "Valid Data"
+    status_code = 406 if len(errors) > 0 else 200
+    logging.info(
+        f"Validated csv: {message}",
+        extra={
+            "jobs": len(basic_jobs),
+            "errors": len(errors),
+            "phases": current_phases(),
+        },
+    )
+    content = {
+        "message": message,
+        "data": {"jobs": basic_jobs, "errors": errors},
+    }
+    return JSONResponse(
+        content=content,
+        status_code=status_code,
+    )
 
 
+@timed("project_names")
 async def get_project_names() -> List[str]:
     """Get a list of project_names"""
     # TODO: Cache response for 5 minutes
-    async with AsyncClient() as async_client:
-        response = await async_client.get(project_names_url)
+    async with AsyncClient(
+        headers={"Accept-Encoding": UPSTREAM_ACCEPT_ENCODING}
+    ) as async_client:
+        response = await upstream.call_async(
+            Upstream.PROJECT_NAMES, async_client.get, project_names_url
+        )
         response.raise_for_status()
         project_names = response.json()["data"]
     return project_names
@@ -149,8 +577,10 @@ async def get_project_names() -> List[str]:
 def set_oauth() -> OAuth:
     """Set up OAuth for the service"""
     secrets_client = boto3.client("secretsmanager")
-    secret_response = secrets_client.get_secret_value(
-        SecretId=os.getenv("AIND_SSO_SECRET_NAME")
+    secret_response = upstream.call(
+        Upstream.SECRETS_MANAGER,
+        secrets_client.get_secret_value,
+        SecretId=os.getenv("AIND_SSO_SECRET_NAME"),
     )
     secret_value = json.loads(secret_response["SecretString"])
     for secrets in secret_value:
@@ -167,6 +597,7 @@ def set_oauth() -> OAuth:
     return oauth
 
 
+@timed("job_types")
 def get_job_types(version: Optional[str] = None) -> List[str]:
     """Get a list of job_types"""
     params = get_parameter_infos(version)
@@ -174,11 +605,22 @@ def get_job_types(version: Optional[str] = None) -> List[str]:
     return job_types
 
 
+def get_airflow_client() -> AsyncClient:
+    """Create an async client for the Airflow REST API"""
+    return AsyncClient(
+        auth=(
+            os.getenv("AIND_AIRFLOW_SERVICE_USER"),
+            os.getenv("AIND_AIRFLOW_SERVICE_PASSWORD"),
+        ),
+        headers={"Accept-Encoding": UPSTREAM_ACCEPT_ENCODING},
+    )
+
+
 def get_parameter_infos(version: Optional[str] = None) -> List[JobParamInfo]:
     """Get a list of job_type parameters"""
     ssm_client = boto3.client("ssm")
     paginator = ssm_client.get_paginator("describe_parameters")
-    params_iterator = paginator.paginate(
+    pages = paginator.paginate(
         ParameterFilters=[
             {
                 "Key": "Path",
@@ -189,7 +631,11 @@ def get_parameter_infos(version: Optional[str] = None) -> List[JobParamInfo]:
     )
     params = []
     param_regex = JobParamInfo.get_parameter_regex(version)
-    for page in params_iterator:
+    # Each page is fetched with a separate DescribeParameters call
+    pages = iter(pages)
+    while (
+        page := upstream.call(Upstream.SSM_DESCRIBE, next, pages, None)
+    ) is not None:
         for param in page["Parameters"]:
             if match := re.match(param_regex, param.get("Name")):
                 param_info = JobParamInfo.from_aws_describe_parameter(
@@ -208,8 +654,11 @@ def get_parameter_infos(version: Optional[str] = None) -> List[JobParamInfo]:
 def get_parameter_value(param_name: str) -> dict:
     """Get a parameter value from AWS param store based on parameter name"""
     ssm_client = boto3.client("ssm")
-    param_response = ssm_client.get_parameter(
-        Name=param_name, WithDecryption=True
+    param_response = upstream.call(
+        Upstream.SSM_GET,
+        ssm_client.get_parameter,
+        Name=param_name,
+        WithDecryption=True,
     )
     param_value = json.loads(param_response["Parameter"]["Value"])
     return param_value
@@ -219,7 +668,9 @@ def put_parameter_value(param_name: str, param_value: dict) -> Any:
     """Set a parameter value in AWS param store based on parameter name"""
     param_value_str = json.dumps(param_value)
     ssm_client = boto3.client("ssm")
-    result = ssm_client.put_parameter(
+    result = upstream.call(
+        Upstream.SSM_PUT,
+        ssm_client.put_parameter,
         Name=param_name,
         Value=param_value_str,
         Type="String",
@@ -228,25 +679,51 @@ def put_parameter_value(param_name: str, param_value: dict) -> Any:
     return result
 
 
+def record_dag_runs_page_size(response: Any) -> None:
+    """Record the wire and decoded sizes of a ListDagRuns page. The wire size
+    is taken from the Content-Length header, which is the compressed size if
+    the response was compressed. It isn't recorded if the header is missing,
+    such as for chunked responses."""
+    content_encoding = response.headers.get("content-encoding", "identity")
+    decoded_bytes = len(response.content)
+    content_length = response.headers.get("content-length", "")
+    if content_length.isdigit():
+        AIRFLOW_DAG_RUNS_PAGE_WIRE_BYTES.observe(
+            int(content_length), content_encoding=content_encoding
+        )
+    AIRFLOW_DAG_RUNS_PAGE_DECODED_BYTES.observe(
+        decoded_bytes, content_encoding=content_encoding
+    )
+
+
+@timed("airflow_jobs")
 async def get_airflow_jobs(
     params: AirflowDagRunsRequestParameters, get_confs: bool = False
 ) -> tuple[int, Union[List[JobStatus], List[dict]]]:
     """Get Airflow jobs using input query params. If get_confs is true,
-    only the job conf dictionaries are returned."""
+    only the job conf dictionaries are returned. Otherwise, only the conf
+    fields needed to render the job status are parsed from each page. The
+    ListDagRuns endpoint does not support field masks, so the full page is
+    still transferred, but it is requested compressed."""
 
     async def fetch_jobs(
         client: AsyncClient, url: str, request_body: dict
     ) -> tuple[int, Union[List[JobStatus], List[dict]]]:
         """Helper method to fetch jobs using httpx async client"""
-        response = await client.post(url, json=request_body)
-        response.raise_for_status()
-        response_jobs = response.json()
-        dag_runs = AirflowDagRunsResponse.model_validate_json(
-            json.dumps(response_jobs)
+        response = await upstream.call_async(
+            Upstream.AIRFLOW_LIST, client.post, url, json=request_body
         )
+        response.raise_for_status()
+        record_dag_runs_page_size(response)
         if get_confs:
+            dag_runs = AirflowDagRunsResponse.model_validate_json(
+                response.content
+            )
             jobs_list = [d.conf for d in dag_runs.dag_runs if d.conf]
         else:
+            dag_runs = AirflowDagRunSummariesResponse.model_validate_json(
+                response.content
+            )
             jobs_list = [
                 JobStatus.from_airflow_dag_run(d) for d in dag_runs.dag_runs
             ]
@@ -257,14 +734,9 @@ async def get_airflow_jobs(
     airflow_url = f"{airflow_url}/~/dagRuns/list"
     params_dict = json.loads(params.model_dump_json(exclude_none=True))
     # Send request to Airflow to ListDagRuns
-    async with AsyncClient(
-        auth=(
-            os.getenv("AIND_AIRFLOW_SERVICE_USER"),
-            os.getenv("AIND_AIRFLOW_SERVICE_PASSWORD"),
-        )
-    ) as async_client:
+    async with get_airflow_client() as async_client:
         # Fetch initial jobs
-        (total_entries, jobs_list) = await fetch_jobs(
+        total_entries, jobs_list = await fetch_jobs(
             client=async_client,
             url=airflow_url,
             request_body=params_dict,
@@ -292,9 +764,13 @@ async def validate_json_v2(request: Request):
     """Validate raw json against data transfer models. Returns validated
     json or errors if request is invalid."""
     logging.info("Received request to validate json v2")
-    content = await request.json()
+    with span("parse"):
+        content = await request.json()
+    annotate(jobs=count_upload_jobs(content))
     try:
-        log_submit_job_request(content=content)
+        log_submit_job_request(
+            content=content, capture_endpoint=request.url.path
+        )
         params = AirflowDagRunsRequestParameters(
             dag_ids=["transform_and_upload_v2", "run_list_of_jobs"],
             states=["running", "queued"],
@@ -305,27 +781,39 @@ async def validate_json_v2(request: Request):
             "project_names": await get_project_names(),
             "current_jobs": current_jobs,
         }
-        with validation_context(context):
-            validated_model = SubmitJobRequestV2.model_validate_json(
-                json.dumps(content)
+        with span("validate"):
+            validated_model = await worker_pool.run(
+                validate_submit_job_request, content=content, context=context
             )
-        validated_content = json.loads(
-            validated_model.model_dump_json(warnings=False, exclude_none=True)
-        )
-        logging.info("Valid model detected")
-        return JSONResponse(
-            status_code=200,
-            content={
-                "message": "Valid model",
-                "data": {
-                    "version": aind_data_transfer_service_version,
-                    "model_json": content,
-                    "validated_model_json": validated_content,
+        UPLOAD_JOBS_VALIDATED.inc(len(validated_model.upload_jobs))
+        with span("serialize"):
+            validated_content = json.loads(
+                validated_model.model_dump_json(
+                    warnings=False, exclude_none=True
+                )
+            )
+            json_response = JSONResponse(
+                status_code=200,
+                content={
+                    "message": "Valid model",
+                    "data": {
+                        "version": aind_data_transfer_service_version,
+                        "model_json": content,
+                        "validated_model_json": validated_content,
+                    },
                 },
-            },
+            )
+        logging.info(
+            "Valid model detected", extra={"phases": current_phases()}
         )
+        return json_response
+    except WorkerPoolSaturatedError as e:
+        return worker_pool_saturated_response(e)
     except ValidationError as e:
-        logging.warning(f"There were validation errors processing {content}")
+        logging.warning(
+            f"There were validation errors processing {content}",
+            extra={"phases": current_phases()},
+        )
         return JSONResponse(
             status_code=406,
             content={
@@ -338,7 +826,7 @@ async def validate_json_v2(request: Request):
             },
         )
     except Exception as e:
-        logging.exception(e, exc_info=True)
+        logging.exception(e, exc_info=True, extra={"phases": current_phases()})
         return JSONResponse(
             status_code=500,
             content={
@@ -355,10 +843,14 @@ async def validate_json_v2(request: Request):
 async def submit_jobs_v2(request: Request):
     """Post SubmitJobRequestV2 raw json to Airflow to process."""
     logging.info("Received request to submit jobs v2")
-    content = await request.json()
+    with span("parse"):
+        content = await request.json()
+    annotate(jobs=count_upload_jobs(content))
     try:
         log_submit_job_request(
-            content=content, event_type=EventType.STAGE_START
+            content=content,
+            event_type=EventType.STAGE_START,
+            capture_endpoint=request.url.path,
         )
         params = AirflowDagRunsRequestParameters(
             dag_ids=["transform_and_upload_v2", "run_list_of_jobs"],
@@ -370,11 +862,23 @@ async def submit_jobs_v2(request: Request):
             "project_names": await get_project_names(),
             "current_jobs": current_jobs,
         }
-        with validation_context(context):
-            model = SubmitJobRequestV2.model_validate_json(json.dumps(content))
-        full_content = json.loads(
-            model.model_dump_json(warnings=False, exclude_none=True)
-        )
+        with span("validate"):
+            model = await worker_pool.run(
+                validate_submit_job_request, content=content, context=context
+            )
+        UPLOAD_JOBS_VALIDATED.inc(len(model.upload_jobs))
+        with span("build_conf"):
+            full_content = json.loads(
+                model.model_dump_json(warnings=False, exclude_none=True)
+            )
+            # Stamp fingerprints so later duplicate checks don't need to
+            # hash the full conf of every running job. The trace context
+            # lets downstream DAG tasks join the trace of the request.
+            trace_fields = get_trace_conf_fields()
+            full_content.update(trace_fields)
+            for job_conf in full_content["upload_jobs"]:
+                job_conf["fingerprint"] = compute_job_fingerprint(job_conf)
+                job_conf.update(trace_fields)
         logging.info(
             f"Valid request detected. Sending list of jobs. "
             f"dag_id: {model.dag_id}"
@@ -386,33 +890,45 @@ async def submit_jobs_v2(request: Request):
                 f"{job_index} of {total_jobs}."
             )
 
-        async with AsyncClient(
-            auth=(
-                os.getenv("AIND_AIRFLOW_SERVICE_USER"),
-                os.getenv("AIND_AIRFLOW_SERVICE_PASSWORD"),
-            )
-        ) as async_client:
-            response = await async_client.post(
-                url=os.getenv("AIND_AIRFLOW_SERVICE_URL"),
-                json={"conf": full_content},
-            )
+        with span("airflow_trigger"):
+            async with get_airflow_client() as async_client:
+                response = await upstream.call_async(
+                    Upstream.AIRFLOW_TRIGGER,
+                    async_client.post,
+                    url=os.getenv("AIND_AIRFLOW_SERVICE_URL"),
+                    json={"conf": full_content},
+                )
         response.raise_for_status()
-        status_code = response.status_code
-        response_json = response.json()
+        UPLOAD_JOBS_SUBMITTED.inc(total_jobs)
+        with span("serialize"):
+            json_response = JSONResponse(
+                status_code=response.status_code,
+                content={
+                    "message": "Submitted request to airflow",
+                    "data": {"responses": [response.json()], "errors": []},
+                },
+            )
         log_submit_job_request(
-            content=content, event_type=EventType.STAGE_COMPLETE
+            content=content,
+            event_type=EventType.STAGE_COMPLETE,
+            phases=current_phases(),
         )
-        return JSONResponse(
-            status_code=status_code,
-            content={
-                "message": "Submitted request to airflow",
-                "data": {"responses": [response_json], "errors": []},
-            },
+        return json_response
+    except WorkerPoolSaturatedError as e:
+        log_submit_job_request(
+            content=content,
+            event_type=EventType.STAGE_FAILURE,
+            phases=current_phases(),
         )
+        return worker_pool_saturated_response(e)
     except ValidationError as e:
         logging.warning(f"There were validation errors processing {content}")
+        if reason := duplicate_rejection_reason(e):
+            UPLOAD_JOBS_REJECTED_DUPLICATE.inc(reason=reason)
         log_submit_job_request(
-            content=content, event_type=EventType.STAGE_FAILURE
+            content=content,
+            event_type=EventType.STAGE_FAILURE,
+            phases=current_phases(),
         )
         return JSONResponse(
             status_code=406,
@@ -424,7 +940,9 @@ async def submit_jobs_v2(request: Request):
     except Exception as e:
         logging.exception(e, exc_info=True)
         log_submit_job_request(
-            content=content, event_type=EventType.STAGE_FAILURE
+            content=content,
+            event_type=EventType.STAGE_FAILURE,
+            phases=current_phases(),
         )
         return JSONResponse(
             status_code=500,
@@ -482,13 +1000,10 @@ async def get_tasks_list(request: Request):
             request.query_params
         )
         params_dict = json.loads(params.model_dump_json())
-        async with AsyncClient(
-            auth=(
-                os.getenv("AIND_AIRFLOW_SERVICE_USER"),
-                os.getenv("AIND_AIRFLOW_SERVICE_PASSWORD"),
-            )
-        ) as async_client:
-            response_tasks = await async_client.get(
+        async with get_airflow_client() as async_client:
+            response_tasks = await upstream.call_async(
+                Upstream.AIRFLOW_TASKS,
+                async_client.get,
                 url=(
                     f"{url}/{params.dag_id}/dagRuns/{params.dag_run_id}/"
                     "taskInstances"
@@ -549,13 +1064,10 @@ async def get_task_logs(request: Request):
         )
         params_dict = json.loads(params.model_dump_json())
         params_full = dict(params)
-        async with AsyncClient(
-            auth=(
-                os.getenv("AIND_AIRFLOW_SERVICE_USER"),
-                os.getenv("AIND_AIRFLOW_SERVICE_PASSWORD"),
-            )
-        ) as async_client:
-            response_logs = await async_client.get(
+        async with get_airflow_client() as async_client:
+            response_logs = await upstream.call_async(
+                Upstream.AIRFLOW_LOGS,
+                async_client.get,
                 url=(
                     f"{url}/{params.dag_id}/dagRuns/{params.dag_run_id}"
                     f"/taskInstances/{params.task_id}/logs/{params.try_number}"
@@ -686,7 +1198,9 @@ async def download_job_template(_: Request):
     """Get job template as xlsx filestream for download"""
 
     try:
-        xl_io = JobUploadTemplate.create_excel_sheet_filestream()
+        xl_io = await worker_pool.run(
+            JobUploadTemplate.create_excel_sheet_filestream
+        )
         return StreamingResponse(
             io.BytesIO(xl_io.getvalue()),
             media_type=(
@@ -700,6 +1214,8 @@ async def download_job_template(_: Request):
             },
             status_code=200,
         )
+    except WorkerPoolSaturatedError as e:
+        return worker_pool_saturated_response(e)
     except Exception as e:
         logging.exception(e, exc_info=True)
         return JSONResponse(
@@ -711,6 +1227,50 @@ async def download_job_template(_: Request):
         )
 
 
+async def get_metrics(_: Request):
+    """Get the service metrics in the Prometheus text format"""
+    return Response(
+        content=render_prometheus(), media_type=PROMETHEUS_CONTENT_TYPE
+    )
+
+
+async def get_validation_context_snapshot() -> dict:
+    """Reference data that v2 upload jobs are validated against, except for
+    the current jobs. Lists are sorted so that the snapshot is stable."""
+    return {
+        "job_types": sorted(get_job_types("v2")),
+        "project_names": sorted(await get_project_names()),
+        "modalities": sorted(Modality.abbreviation_map.keys()),
+        "platforms": sorted(Platform.abbreviation_map.keys()),
+    }
+
+
+async def get_validation_context_v2(request: Request):
+    """Get a snapshot of the v2 validation context so that clients can
+    validate requests offline. The ETag changes whenever the snapshot does,
+    and a request with a matching If-None-Match header gets a 304."""
+    try:
+        snapshot = await get_validation_context_snapshot()
+    except Exception as e:
+        logging.exception(e, exc_info=True)
+        return JSONResponse(
+            content={
+                "message": "Error retrieving validation context",
+                "data": {"error": f"{e.__class__.__name__}{e.args}"},
+            },
+            status_code=500,
+        )
+    etag = f'"{compute_context_version(snapshot)}"'
+    if_none_match = request.headers.get("If-None-Match", "")
+    if etag in [t.strip() for t in if_none_match.split(",")]:
+        return Response(status_code=304, headers={"ETag": etag})
+    return JSONResponse(
+        content={"message": "Retrieved validation context", "data": snapshot},
+        status_code=200,
+        headers={"ETag": etag},
+    )
+
+
 def list_parameters_v2(_: Request):
     """List v2 job type parameters"""
     params = get_parameter_infos("v2")
@@ -829,12 +1389,178 @@ async def admin(request: Request):
                     "user_name": user.get("name", "unknown"),
                     "user_email": user.get("email", "unknown"),
                     "project_names_url": project_names_url,
+                    "profiles": profile_store.list(),
+                    "slow_requests": slow_request_log.records(),
+                    "slow_request_threshold": slow_request_log.threshold,
+                    "event_loop_lag_seconds": (
+                        EVENT_LOOP_LAG_LAST_SECONDS.get()
+                    ),
+                    "memory_is_tracing": memory_tracer.is_tracing(),
                 }
             ),
         )
     return RedirectResponse(url="/login")
 
 
+async def download_profile(request: Request):
+    """Download a stored request profile if authenticated, else redirect to
+    login."""
+    if not request.session.get("user"):
+        return RedirectResponse(url="/login")
+    name = request.path_params["name"]
+    path = profile_store.path(name)
+    if path is None:
+        return JSONResponse(
+            content={
+                "message": f"Profile {name} not found",
+                "data": {"error": "Profile not found"},
+            },
+            status_code=404,
+        )
+    return FileResponse(path, media_type="text/plain", filename=name)
+
+
+def not_authenticated_response() -> JSONResponse:
+    """Response returned when an admin api is called without signing in"""
+    return JSONResponse(
+        content={
+            "message": "User not authenticated",
+            "data": {"error": "User not authenticated"},
+        },
+        status_code=401,
+    )
+
+
+async def get_memory_status(request: Request):
+    """Whether allocations are being traced, the traced memory, and the
+    kept snapshots."""
+    if not request.session.get("user"):
+        return not_authenticated_response()
+    return JSONResponse(
+        content={
+            "message": "Retrieved memory tracing status",
+            "data": memory_tracer.status(),
+        },
+        status_code=200,
+    )
+
+
+async def start_memory_tracing(request: Request):
+    """Start tracing allocations. The frames query param sets how many
+    frames are kept for each allocation."""
+    user = request.session.get("user")
+    if not user:
+        return not_authenticated_response()
+    try:
+        frames = int(request.query_params.get("frames", 1))
+        if frames < 1:
+            raise ValueError("frames must be at least 1")
+    except ValueError as e:
+        return JSONResponse(
+            content={
+                "message": "Invalid frames",
+                "data": {"error": str(e)},
+            },
+            status_code=400,
+        )
+    logging.info(f"{user} started tracing allocations")
+    memory_tracer.start(frames)
+    return JSONResponse(
+        content={
+            "message": "Started tracing allocations",
+            "data": memory_tracer.status(),
+        },
+        status_code=200,
+    )
+
+
+async def stop_memory_tracing(request: Request):
+    """Stop tracing allocations. Snapshots are kept."""
+    user = request.session.get("user")
+    if not user:
+        return not_authenticated_response()
+    logging.info(f"{user} stopped tracing allocations")
+    memory_tracer.stop()
+    return JSONResponse(
+        content={
+            "message": "Stopped tracing allocations",
+            "data": memory_tracer.status(),
+        },
+        status_code=200,
+    )
+
+
+async def take_memory_snapshot(request: Request):
+    """Take a snapshot of the traced allocations."""
+    if not request.session.get("user"):
+        return not_authenticated_response()
+    try:
+        snapshot = await run_in_threadpool(memory_tracer.take_snapshot)
+    except RuntimeError as e:
+        return JSONResponse(
+            content={
+                "message": "Allocations are not being traced",
+                "data": {"error": str(e)},
+            },
+            status_code=409,
+        )
+    return JSONResponse(
+        content={"message": "Took memory snapshot", "data": snapshot},
+        status_code=201,
+    )
+
+
+async def diff_memory_snapshots(request: Request):
+    """Call sites that allocated the most memory between the old and new
+    snapshots in the query params."""
+    if not request.session.get("user"):
+        return not_authenticated_response()
+    params = request.query_params
+    try:
+        old_id = int(params["old"])
+        new_id = int(params["new"])
+        limit = int(params.get("limit", 20))
+    except (KeyError, ValueError) as e:
+        return JSONResponse(
+            content={
+                "message": "The old and new snapshot ids are required",
+                "data": {"error": f"{e.__class__.__name__}{e.args}"},
+            },
+            status_code=400,
+        )
+    try:
+        diff = await run_in_threadpool(
+            memory_tracer.diff,
+            old_id=old_id,
+            new_id=new_id,
+            limit=limit,
+            group_by=params.get("group_by", "lineno"),
+        )
+    except KeyError as e:
+        return JSONResponse(
+            content={
+                "message": "Snapshot not found",
+                "data": {"error": f"{e.__class__.__name__}{e.args}"},
+            },
+            status_code=404,
+        )
+    except ValueError as e:
+        return JSONResponse(
+            content={
+                "message": "Invalid group_by",
+                "data": {"error": str(e)},
+            },
+            status_code=400,
+        )
+    return JSONResponse(
+        content={
+            "message": "Compared memory snapshots",
+            "data": {"old": old_id, "new": new_id, "top_allocations": diff},
+        },
+        status_code=200,
+    )
+
+
 async def login(request: Request):
     """Redirect to Azure login page"""
     if os.getenv("ENV_NAME") == "local":
@@ -885,21 +1611,21 @@ async def cancel_job(request: Request):
         cancel_slurm_jobs_DAG_ID = os.getenv(
             "AIND_AIRFLOW_SERVICE_CANCEL_JOBS_DAG_ID", "cancel_slurm_jobs"
         )
-        async with AsyncClient(
-            auth=(
-                os.getenv("AIND_AIRFLOW_SERVICE_USER"),
-                os.getenv("AIND_AIRFLOW_SERVICE_PASSWORD"),
-            )
-        ) as async_client:
+        async with get_airflow_client() as async_client:
             cancel_dag_url = f"{airflow_url}/{dag_id}/dagRuns/{dag_run_id}"
-            cancel_dag_response = await async_client.patch(
-                url=cancel_dag_url, json={"state": "failed"}
+            cancel_dag_response = await upstream.call_async(
+                Upstream.AIRFLOW_PATCH,
+                async_client.patch,
+                url=cancel_dag_url,
+                json={"state": "failed"},
             )
             cancel_dag_response.raise_for_status()
             cancel_slurm_jobs_url = (
                 f"{airflow_url}/{cancel_slurm_jobs_DAG_ID}/dagRuns"
             )
-            cancel_slurm_jobs_response = await async_client.post(
+            cancel_slurm_jobs_response = await upstream.call_async(
+                Upstream.AIRFLOW_TRIGGER,
+                async_client.post,
                 url=cancel_slurm_jobs_url,
                 json={
                     "conf": {
@@ -910,6 +1636,7 @@ async def cancel_job(request: Request):
                 },
             )
             cancel_slurm_jobs_response.raise_for_status()
+            JOBS_CANCELLED.inc()
             return JSONResponse(
                 content={
                     "message": "Success",
@@ -944,6 +1671,11 @@ routes = [
     Route("/api/v2/submit_jobs", endpoint=submit_jobs_v2, methods=["POST"]),
     Route("/api/v2/cancel_job", endpoint=cancel_job, methods=["POST"]),
     Route("/api/v2/parameters", endpoint=list_parameters_v2, methods=["GET"]),
+    Route(
+        "/api/v2/validation_context",
+        endpoint=get_validation_context_v2,
+        methods=["GET"],
+    ),
     Route(
         "/api/v2/parameters/job_types/{job_type:str}/tasks/{task_id:str}",
         endpoint=get_parameter_v2,
@@ -980,7 +1712,58 @@ routes = [
     Route("/logout", logout, methods=["GET"]),
     Route("/auth", auth, methods=["GET"]),
     Route("/admin", admin, methods=["GET"]),
+    Route(
+        "/admin/profiles/{name:str}",
+        endpoint=download_profile,
+        methods=["GET"],
+    ),
+    Route("/admin/memory", endpoint=get_memory_status, methods=["GET"]),
+    Route(
+        "/admin/memory/start",
+        endpoint=start_memory_tracing,
+        methods=["POST"],
+    ),
+    Route(
+        "/admin/memory/stop", endpoint=stop_memory_tracing, methods=["POST"]
+    ),
+    Route(
+        "/admin/memory/snapshots",
+        endpoint=take_memory_snapshot,
+        methods=["POST"],
+    ),
+    Route(
+        "/admin/memory/diff",
+        endpoint=diff_memory_snapshots,
+        methods=["GET"],
+    ),
+    Route("/metrics", endpoint=get_metrics, methods=["GET"]),
 ]
 
-app = Starlette(routes=routes)
+
+@asynccontextmanager
+async def lifespan(_: Starlette):
+    """Start the event loop lag monitor and release the worker pool when the
+    app shuts down."""
+    lag_monitor = create_task(
+        monitor_event_loop_lag(
+            float(os.getenv("AIND_EVENT_LOOP_LAG_INTERVAL", "0.5"))
+        )
+    )
+    try:
+        yield
+    finally:
+        lag_monitor.cancel()
+        worker_pool.shutdown()
+        row_validator.shutdown()
+
+
+app = Starlette(routes=routes, lifespan=lifespan)
+# The profiler checks the session, so it is added before the session
+# middleware, which wraps it
+app.add_middleware(ProfilerMiddleware, store=profile_store)
 app.add_middleware(SessionMiddleware, secret_key=None)
+app.add_middleware(TracingMiddleware)
+# Runs inside ServerTimingMiddleware so slow requests include their phases
+app.add_middleware(SlowRequestMiddleware, log=slow_request_log)
+app.add_middleware(ServerTimingMiddleware)
+app.add_middleware(RequestMetricsMiddleware)
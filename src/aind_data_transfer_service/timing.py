@@ -0,0 +1,163 @@
+"""Module to break the handling of a request down into timed phases. A
+recorder is set for each request by the server middleware. Code running
+within the request, including code run on the thread worker pool, can time
+a phase with span or timed, and add details such as payload sizes with
+annotate. Upstream calls are recorded by the upstream module. These are
+no-ops if no recorder is set."""
+
+import inspect
+from contextlib import contextmanager
+from contextvars import ContextVar
+from functools import wraps
+from time import perf_counter
+from typing import Any, Callable, Dict, Iterator, List, Optional, TypeVar
+
+F = TypeVar("F", bound=Callable)
+
+# Upstream calls beyond this many are counted but not recorded one by one
+MAX_RECORDED_UPSTREAM_CALLS = 100
+
+
+class SpanRecorder:
+    """Durations of the phases of a request, in the order that they were
+    first started, along with the upstream calls it made and other details.
+    Spans with the same name are added together."""
+
+    def __init__(self) -> None:
+        """Initialize recorder with no phases."""
+        self.start = perf_counter()
+        self.phases: Dict[str, float] = dict()
+        self.upstream_calls: List[Dict[str, Any]] = list()
+        self.upstream_call_count = 0
+        self.attributes: Dict[str, Any] = dict()
+
+    def add(self, name: str, seconds: float) -> None:
+        """Add the duration of a span to a phase."""
+        self.phases[name] = self.phases.get(name, 0.0) + seconds
+
+    def add_upstream_call(
+        self, dependency: str, outcome: str, seconds: float
+    ) -> None:
+        """Record a call to an upstream service."""
+        self.upstream_call_count += 1
+        if len(self.upstream_calls) < MAX_RECORDED_UPSTREAM_CALLS:
+            self.upstream_calls.append(
+                {
+                    "dependency": dependency,
+                    "outcome": outcome,
+                    "duration_ms": round(seconds * 1000, 3),
+                }
+            )
+
+    def as_milliseconds(self) -> Dict[str, float]:
+        """Phase durations in milliseconds."""
+        return {k: round(v * 1000, 3) for k, v in self.phases.items()}
+
+    def server_timing(self) -> str:
+        """
+        Phases as a Server-Timing header value, followed by the total time
+        since the recorder was created.
+
+        Returns
+        -------
+        str
+          For example, "parse;dur=0.4, validate;dur=12.1, total;dur=13.0"
+
+        """
+        phases = {**self.phases, "total": perf_counter() - self.start}
+        return ", ".join(
+            f"{name};dur={seconds * 1000:.1f}"
+            for name, seconds in phases.items()
+        )
+
+
+_recorder: ContextVar[Optional[SpanRecorder]] = ContextVar(
+    "span_recorder", default=None
+)
+
+
+def current_recorder() -> Optional[SpanRecorder]:
+    """The recorder of the current request or None outside a request."""
+    return _recorder.get()
+
+
+def current_phases() -> Optional[Dict[str, float]]:
+    """Phase durations in milliseconds of the current request so far, or
+    None outside a request."""
+    recorder = _recorder.get()
+    return None if recorder is None else recorder.as_milliseconds()
+
+
+def annotate(**attributes: Any) -> None:
+    """Add details, such as the number of jobs, to the current request."""
+    recorder = _recorder.get()
+    if recorder is not None:
+        recorder.attributes.update(attributes)
+
+
+def record_upstream_call(dependency: str, outcome: str, seconds: float):
+    """Record a call to an upstream service made by the current request."""
+    recorder = _recorder.get()
+    if recorder is not None:
+        recorder.add_upstream_call(dependency, outcome, seconds)
+
+
+@contextmanager
+def recording() -> Iterator[SpanRecorder]:
+    """Record spans within the context into a new recorder."""
+    recorder = SpanRecorder()
+    token = _recorder.set(recorder)
+    try:
+        yield recorder
+    finally:
+        _recorder.reset(token)
+
+
+@contextmanager
+def span(name: str) -> Iterator[None]:
+    """
+    Time the code within the context as a phase of the current request.
+
+    Parameters
+    ----------
+    name : str
+      Name of the phase. Should be a token without spaces, such as
+      airflow_trigger, since it is sent in the Server-Timing header.
+
+    """
+    recorder = _recorder.get()
+    if recorder is None:
+        yield
+        return
+    start = perf_counter()
+    try:
+        yield
+    finally:
+        recorder.add(name, perf_counter() - start)
+
+
+def timed(name: str) -> Callable[[F], F]:
+    """Decorator to time every call to a function or coroutine function as
+    a phase of the current request."""
+
+    def decorator(func: F) -> F:
+        """Wrap func in a span."""
+        if inspect.iscoroutinefunction(func):
+
+            @wraps(func)
+            async def async_wrapper(*args, **kwargs):
+                """Await func within a span."""
+                with span(name):
+                    return await func(*args, **kwargs)
+
+            return async_wrapper
+
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            """Call func within a span."""
+            with span(name):
+                return func(*args, **kwargs)
+
+        return wrapper
+
+    return decorator
@@ -0,0 +1,261 @@
+"""Module for lightweight distributed tracing. Spans follow the OpenTelemetry
+data model and trace context is read and written as a W3C traceparent, so
+traces can be joined with other services. Finished spans are sent to an
+exporter, which can keep them in memory or append them to a json lines
+file, so no collector service is needed."""
+
+import json
+import logging
+import os
+import random
+import re
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Dict, Iterator, List, Optional
+
+TRACEPARENT_REGEX = re.compile(
+    r"^00-(?P<trace_id>[0-9a-f]{32})-(?P<span_id>[0-9a-f]{16})-[0-9a-f]{2}$"
+)
+_INVALID_TRACE_ID = "0" * 32
+_INVALID_SPAN_ID = "0" * 16
+
+
+class SpanContext:
+    """Ids that identify a span within a trace"""
+
+    def __init__(self, trace_id: str, span_id: str) -> None:
+        """
+        Parameters
+        ----------
+        trace_id : str
+          32 lowercase hex characters shared by every span in the trace.
+        span_id : str
+          16 lowercase hex characters unique to the span.
+        """
+        self.trace_id = trace_id
+        self.span_id = span_id
+
+    @property
+    def traceparent(self) -> str:
+        """W3C traceparent of the span, which is always sampled."""
+        return f"00-{self.trace_id}-{self.span_id}-01"
+
+    @classmethod
+    def from_traceparent(cls, value: Optional[str]) -> Optional["SpanContext"]:
+        """Parse a W3C traceparent. Returns None if it is missing or
+        invalid."""
+        match = TRACEPARENT_REGEX.match((value or "").strip().lower())
+        if (
+            match is None
+            or match.group("trace_id") == _INVALID_TRACE_ID
+            or match.group("span_id") == _INVALID_SPAN_ID
+        ):
+            return None
+        return cls(match.group("trace_id"), match.group("span_id"))
+
+
+class Span:
+    """A timed operation within a trace"""
+
+    def __init__(
+        self,
+        name: str,
+        context: SpanContext,
+        parent_span_id: Optional[str] = None,
+        attributes: Optional[Dict[str, Any]] = None,
+    ) -> None:
+        """
+        Parameters
+        ----------
+        name : str
+          Name of the operation, such as "POST /api/v2/submit_jobs".
+        context : SpanContext
+          Ids of the span.
+        parent_span_id : Optional[str]
+          Id of the parent span or None for the root span of a trace.
+        attributes : Optional[Dict[str, Any]]
+          Json serializable details about the operation.
+        """
+        self.name = name
+        self.context = context
+        self.parent_span_id = parent_span_id
+        self.attributes = dict() if attributes is None else dict(attributes)
+        self.status = "ok"
+        self.start_time_unix_nano = time.time_ns()
+        self.end_time_unix_nano: Optional[int] = None
+
+    @property
+    def trace_id(self) -> str:
+        """Id of the trace the span belongs to."""
+        return self.context.trace_id
+
+    def set_attribute(self, key: str, value: Any) -> None:
+        """Add or replace an attribute."""
+        self.attributes[key] = value
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Span as a json serializable dict."""
+        return {
+            "name": self.name,
+            "trace_id": self.context.trace_id,
+            "span_id": self.context.span_id,
+            "parent_span_id": self.parent_span_id,
+            "start_time_unix_nano": self.start_time_unix_nano,
+            "end_time_unix_nano": self.end_time_unix_nano,
+            "attributes": self.attributes,
+            "status": self.status,
+        }
+
+
+class InMemorySpanExporter:
+    """Keeps the most recently finished spans in memory"""
+
+    def __init__(self, max_spans: int = 10000) -> None:
+        """
+        Parameters
+        ----------
+        max_spans : int
+          Oldest spans are dropped once this many are kept.
+        """
+        self._spans: deque = deque(maxlen=max_spans)
+        self._lock = threading.Lock()
+
+    def export(self, span: Span) -> None:
+        """Keep a finished span."""
+        with self._lock:
+            self._spans.append(span)
+
+    def get_finished_spans(self) -> List[Span]:
+        """Spans in the order they finished."""
+        with self._lock:
+            return list(self._spans)
+
+    def clear(self) -> None:
+        """Drop every span."""
+        with self._lock:
+            self._spans.clear()
+
+
+class FileSpanExporter:
+    """Appends each finished span to a json lines file"""
+
+    def __init__(self, path: str) -> None:
+        """
+        Parameters
+        ----------
+        path : str
+          File to append spans to. Created if it doesn't exist.
+        """
+        self.path = path
+        self._lock = threading.Lock()
+
+    def export(self, span: Span) -> None:
+        """Append a finished span as a line of json."""
+        line = json.dumps(span.to_dict(), default=str) + "\n"
+        with self._lock:
+            with open(self.path, "a") as f:
+                f.write(line)
+
+
+_current_span: ContextVar[Optional[Span]] = ContextVar(
+    "current_span", default=None
+)
+
+
+def current_span() -> Optional[Span]:
+    """The active span or None if there isn't one."""
+    return _current_span.get()
+
+
+class Tracer:
+    """Creates spans and sends them to an exporter when they end. Ids are
+    always generated so that trace context can be propagated, even if no
+    exporter is set."""
+
+    def __init__(self, exporter: Any = None) -> None:
+        """
+        Parameters
+        ----------
+        exporter : Any
+          Object with an export(span) method, such as InMemorySpanExporter
+          or FileSpanExporter. Spans are discarded if None.
+        """
+        self.exporter = exporter
+
+    @classmethod
+    def from_env(cls) -> "Tracer":
+        """
+        Create a tracer configured with AIND_TRACING_EXPORTER, which can be
+        "none" (default), "memory", or "file". File spans are appended to
+        AIND_TRACING_FILE (default traces.jsonl).
+
+        Returns
+        -------
+        Tracer
+
+        """
+        kind = os.getenv("AIND_TRACING_EXPORTER", "none").lower()
+        if kind == "memory":
+            return cls(InMemorySpanExporter())
+        if kind == "file":
+            path = os.getenv("AIND_TRACING_FILE", "traces.jsonl")
+            return cls(FileSpanExporter(path))
+        if kind not in ("", "none"):
+            logging.warning(f"Unknown AIND_TRACING_EXPORTER {kind}")
+        return cls()
+
+    @contextmanager
+    def start_span(
+        self,
+        name: str,
+        parent: Optional[SpanContext] = None,
+        attributes: Optional[Dict[str, Any]] = None,
+    ) -> Iterator[Span]:
+        """
+        Run the code within the context in a new span. The span is a child
+        of parent, or else of the active span. It becomes the active span
+        until the context exits. If the code raises, the span status is
+        set to error.
+
+        Parameters
+        ----------
+        name : str
+          Name of the operation.
+        parent : Optional[SpanContext]
+          Remote parent, such as one parsed from a traceparent header.
+        attributes : Optional[Dict[str, Any]]
+          Details about the operation.
+
+        """
+        if parent is None and (active := _current_span.get()) is not None:
+            parent = active.context
+        if parent is None:
+            context = SpanContext(f"{random.getrandbits(128) or 1:032x}", "")
+            parent_span_id = None
+        else:
+            context = SpanContext(parent.trace_id, "")
+            parent_span_id = parent.span_id
+        context.span_id = f"{random.getrandbits(64) or 1:016x}"
+        span = Span(name, context, parent_span_id, attributes)
+        token = _current_span.set(span)
+        try:
+            yield span
+        except BaseException as e:
+            span.status = "error"
+            span.set_attribute("exception.type", e.__class__.__name__)
+            raise
+        finally:
+            _current_span.reset(token)
+            span.end_time_unix_nano = time.time_ns()
+            if self.exporter is not None:
+                try:
+                    self.exporter.export(span)
+                except Exception as e:
+                    logging.warning(f"Unable to export span {name}: {e}")
+
+
+# Tracer used by the server and upstream calls
+tracer = Tracer.from_env()
@@ -0,0 +1,171 @@
+"""Module for calls to the services that the server depends on. Every call
+to Airflow, SSM, Secrets Manager and the metadata service goes through
+call or call_async so that they are measured and traced in one place, and
+so that faults can be injected into them in development."""
+
+from enum import Enum
+from time import perf_counter
+from typing import Any, Awaitable, Callable, Optional, TypeVar
+
+from botocore.exceptions import (
+    ClientError,
+    ConnectTimeoutError,
+    ReadTimeoutError,
+)
+from httpx import TimeoutException
+
+from aind_data_transfer_service import faults
+from aind_data_transfer_service.metrics import UPSTREAM_REQUEST_SECONDS
+from aind_data_transfer_service.timing import record_upstream_call
+from aind_data_transfer_service.tracing import tracer
+
+T = TypeVar("T")
+
+
+class Upstream(str, Enum):
+    """Upstream calls that are measured separately"""
+
+    AIRFLOW_LIST = "airflow_list"
+    AIRFLOW_TRIGGER = "airflow_trigger"
+    AIRFLOW_PATCH = "airflow_patch"
+    AIRFLOW_TASKS = "airflow_tasks"
+    AIRFLOW_LOGS = "airflow_logs"
+    SSM_DESCRIBE = "ssm_describe"
+    SSM_GET = "ssm_get"
+    SSM_PUT = "ssm_put"
+    SECRETS_MANAGER = "secrets_manager"
+    PROJECT_NAMES = "project_names"
+
+
+def _status_outcome(status_code: Optional[int]) -> str:
+    """Outcome of a call that returned a status code."""
+    if not isinstance(status_code, int) or status_code < 400:
+        return "success"
+    return "client_error" if status_code < 500 else "server_error"
+
+
+def result_outcome(result: Any) -> str:
+    """Outcome of a call that returned, such as an httpx Response."""
+    return _status_outcome(getattr(result, "status_code", None))
+
+
+def exception_outcome(error: BaseException) -> str:
+    """Outcome of a call that raised."""
+    if isinstance(
+        error,
+        (
+            TimeoutError,
+            TimeoutException,
+            ConnectTimeoutError,
+            ReadTimeoutError,
+        ),
+    ):
+        return "timeout"
+    if isinstance(error, ClientError):
+        return _status_outcome(
+            error.response.get("ResponseMetadata", dict()).get(
+                "HTTPStatusCode"
+            )
+        )
+    return "error"
+
+
+def call(
+    dependency: Upstream, func: Callable[..., T], *args: Any, **kwargs: Any
+) -> T:
+    """
+    Call a blocking upstream client method, such as a boto3 client method,
+    and record how long it took. The call is traced as a child of the active
+    span. Faults set with AIND_UPSTREAM_FAULTS are injected into it.
+
+    Parameters
+    ----------
+    dependency : Upstream
+      Which upstream call this is.
+    func : Callable[..., T]
+      Client method to call.
+    args : Any
+      Positional arguments to pass to func.
+    kwargs : Any
+      Keyword arguments to pass to func.
+
+    Returns
+    -------
+    T
+      The return value of func.
+
+    """
+    start = perf_counter()
+    outcome = "error"
+    with tracer.start_span(
+        f"upstream {dependency.value}",
+        attributes={"upstream.dependency": dependency.value},
+    ) as span:
+        try:
+            result = faults.fault_injector.call(
+                dependency.value, func, *args, **kwargs
+            )
+            outcome = result_outcome(result)
+            return result
+        except BaseException as e:
+            outcome = exception_outcome(e)
+            raise
+        finally:
+            span.set_attribute("upstream.outcome", outcome)
+            elapsed = perf_counter() - start
+            UPSTREAM_REQUEST_SECONDS.observe(
+                elapsed, dependency=dependency.value, outcome=outcome
+            )
+            record_upstream_call(dependency.value, outcome, elapsed)
+
+
+async def call_async(
+    dependency: Upstream,
+    func: Callable[..., Awaitable[T]],
+    *args: Any,
+    **kwargs: Any,
+) -> T:
+    """
+    Await an upstream client method, such as an httpx AsyncClient method,
+    and record how long it took. The call is traced as a child of the active
+    span. Faults set with AIND_UPSTREAM_FAULTS are injected into it.
+
+    Parameters
+    ----------
+    dependency : Upstream
+      Which upstream call this is.
+    func : Callable[..., Awaitable[T]]
+      Client method to await.
+    args : Any
+      Positional arguments to pass to func.
+    kwargs : Any
+      Keyword arguments to pass to func.
+
+    Returns
+    -------
+    T
+      The result of func.
+
+    """
+    start = perf_counter()
+    outcome = "error"
+    with tracer.start_span(
+        f"upstream {dependency.value}",
+        attributes={"upstream.dependency": dependency.value},
+    ) as span:
+        try:
+            result = await faults.fault_injector.call_async(
+                dependency.value, func, *args, **kwargs
+            )
+            outcome = result_outcome(result)
+            return result
+        except BaseException as e:
+            outcome = exception_outcome(e)
+            raise
+        finally:
+            span.set_attribute("upstream.outcome", outcome)
+            elapsed = perf_counter() - start
+            UPSTREAM_REQUEST_SECONDS.observe(
+                elapsed, dependency=dependency.value, outcome=outcome
+            )
+            record_upstream_call(dependency.value, outcome, elapsed)
@@ -0,0 +1,201 @@
+"""Module to run CPU-bound work off of the event loop"""
+
+import asyncio
+import contextvars
+import multiprocessing
+import os
+from concurrent.futures import (
+    Executor,
+    ProcessPoolExecutor,
+    ThreadPoolExecutor,
+)
+from functools import partial
+from multiprocessing.context import BaseContext
+from typing import Any, Callable, Literal, Optional
+
+from aind_data_transfer_service.metrics import (
+    WORKER_POOL_PENDING_TASKS,
+    WORKER_POOL_REJECTED_TASKS,
+)
+
+
+class WorkerPoolSaturatedError(Exception):
+    """Raised when the worker pool queue is full."""
+
+
+def process_pool_context() -> BaseContext:
+    """
+    Multiprocessing context for process pools. Forking a multithreaded
+    server can copy locks held by other threads into the child, so worker
+    processes are started with forkserver where it is available and with
+    spawn otherwise.
+
+    Returns
+    -------
+    BaseContext
+
+    """
+    if "forkserver" in multiprocessing.get_all_start_methods():
+        return multiprocessing.get_context("forkserver")
+    return multiprocessing.get_context("spawn")
+
+
+class WorkerPool:
+    """Runs blocking functions on a thread or process pool. At most
+    max_workers + max_queue_depth tasks can be pending at a time. Any
+    additional task is rejected immediately instead of being queued."""
+
+    def __init__(
+        self,
+        kind: Literal["thread", "process"] = "thread",
+        max_workers: int = 4,
+        max_queue_depth: int = 16,
+    ) -> None:
+        """
+        Parameters
+        ----------
+        kind : Literal["thread", "process"]
+          Type of executor to use. Functions and arguments sent to a process
+          pool need to be picklable.
+        max_workers : int
+          Number of workers in the executor.
+        max_queue_depth : int
+          Number of tasks that may wait for a free worker.
+        """
+        if kind not in ("thread", "process"):
+            raise ValueError(f"Unknown worker pool kind: {kind}")
+        self.kind = kind
+        self.max_workers = max_workers
+        self.max_queue_depth = max_queue_depth
+        self._pending = 0
+        self._executor: Optional[Executor] = None
+        # Used by run_in_thread when the pool is a process pool
+        self._thread_executor: Optional[Executor] = None
+
+    @classmethod
+    def from_env(cls) -> "WorkerPool":
+        """Configure the pool from environment variables."""
+        return cls(
+            kind=os.getenv("AIND_WORKER_POOL_KIND", "thread"),
+            max_workers=int(os.getenv("AIND_WORKER_POOL_MAX_WORKERS", "4")),
+            max_queue_depth=int(
+                os.getenv("AIND_WORKER_POOL_MAX_QUEUE_DEPTH", "16")
+            ),
+        )
+
+    @property
+    def pending(self) -> int:
+        """Number of tasks running or waiting in the pool."""
+        return self._pending
+
+    def _get_executor(self) -> Executor:
+        """Lazily create the executor."""
+        if self._executor is None:
+            if self.kind == "process":
+                self._executor = ProcessPoolExecutor(
+                    max_workers=self.max_workers,
+                    mp_context=process_pool_context(),
+                )
+            else:
+                self._executor = ThreadPoolExecutor(
+                    max_workers=self.max_workers,
+                    thread_name_prefix="aind-worker",
+                )
+        return self._executor
+
+    def _get_thread_executor(self) -> Executor:
+        """Lazily create a thread executor, reusing the main executor if it
+        is one."""
+        if self.kind == "thread":
+            return self._get_executor()
+        if self._thread_executor is None:
+            self._thread_executor = ThreadPoolExecutor(
+                max_workers=self.max_workers,
+                thread_name_prefix="aind-worker",
+            )
+        return self._thread_executor
+
+    async def run(self, func: Callable[..., Any], *args, **kwargs) -> Any:
+        """
+        Run func(*args, **kwargs) on the pool and wait for the result.
+
+        Parameters
+        ----------
+        func : Callable[..., Any]
+        args : Any
+        kwargs : Any
+
+        Returns
+        -------
+        Any
+          The return value of func.
+
+        Raises
+        ------
+        WorkerPoolSaturatedError
+          If the pool already has the maximum number of pending tasks.
+
+        """
+        if self.kind == "thread":
+            return await self.run_in_thread(func, *args, **kwargs)
+        return await self._submit(
+            self._get_executor, partial(func, *args, **kwargs)
+        )
+
+    async def run_in_thread(
+        self, func: Callable[..., Any], *args, **kwargs
+    ) -> Any:
+        """
+        Run func(*args, **kwargs) on a thread, even if the pool is a process
+        pool, and wait for the result. This is for work that can't be
+        pickled, such as reading rows from a generator. It counts against the
+        same limit of pending tasks as run.
+
+        Parameters
+        ----------
+        func : Callable[..., Any]
+        args : Any
+        kwargs : Any
+
+        Returns
+        -------
+        Any
+          The return value of func.
+
+        Raises
+        ------
+        WorkerPoolSaturatedError
+          If the pool already has the maximum number of pending tasks.
+
+        """
+        # Keep context variables, such as the validation context
+        call = partial(
+            contextvars.copy_context().run, partial(func, *args, **kwargs)
+        )
+        return await self._submit(self._get_thread_executor, call)
+
+    async def _submit(
+        self, get_executor: Callable[[], Executor], call: Callable[[], Any]
+    ) -> Any:
+        """Run call on an executor if the pool isn't saturated."""
+        if self._pending >= self.max_workers + self.max_queue_depth:
+            WORKER_POOL_REJECTED_TASKS.inc()
+            raise WorkerPoolSaturatedError(
+                f"Worker pool is saturated with {self._pending} tasks"
+            )
+        self._pending += 1
+        WORKER_POOL_PENDING_TASKS.set(self._pending)
+        try:
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(get_executor(), call)
+        finally:
+            self._pending -= 1
+            WORKER_POOL_PENDING_TASKS.set(self._pending)
+
+    def shutdown(self) -> None:
+        """Shut down the executors. They are recreated on the next run."""
+        for name in ("_executor", "_thread_executor"):
+            executor = getattr(self, name)
+            if executor is not None:
+                executor.shutdown(wait=True)
+                setattr(self, name, None)
@@ -0,0 +1,204 @@
+"""Tests bulk_builder module"""
+
+import json
+import unittest
+from datetime import datetime
+
+from aind_data_schema_models.modalities import Modality
+from pydantic import ValidationError
+
+from aind_data_transfer_service.bulk_builder import (
+    UploadJobRowsError,
+    UploadJobsBuilder,
+    iter_records,
+)
+from aind_data_transfer_service.configs.platforms_v1 import Platform
+from aind_data_transfer_service.models.core import (
+    SubmitJobRequestV2,
+    SubmitJobRequestV2Model,
+    Task,
+    UploadJobConfigsV2,
+    UploadJobConfigsV2Model,
+    validation_context,
+)
+
+
+class TestUploadJobsBuilder(unittest.TestCase):
+    """Tests UploadJobsBuilder class"""
+
+    @classmethod
+    def setUpClass(cls) -> None:
+        """Set up test class"""
+        cls.shared_fields = {
+            "job_type": "default",
+            "project_name": "Behavior Platform",
+            "platform": Platform.BEHAVIOR,
+            "modalities": [Modality.BEHAVIOR_VIDEOS, Modality.ECEPHYS],
+            "tasks": {
+                "modality_transformation_settings": {
+                    "ecephys": Task(job_settings={"compress": True}),
+                }
+            },
+        }
+        cls.columns = {
+            "subject_id": ["123456", "654321"],
+            "acq_datetime": ["2020-10-13T13:10:10", datetime(2021, 1, 2)],
+            "input_source": [
+                "dir/data_set_1",
+                {"behavior-videos": "dir/videos_2"},
+            ],
+        }
+
+    def test_iter_records(self):
+        """Tests that columns and records are iterated as records"""
+        records = [
+            {"subject_id": "1", "acq_datetime": "2020-10-13T13:10:10"},
+            {"subject_id": "2", "acq_datetime": "2020-10-14T13:10:10"},
+        ]
+        columns = {
+            "subject_id": ("1", "2"),
+            "acq_datetime": iter(
+                ["2020-10-13T13:10:10", "2020-10-14T13:10:10"]
+            ),
+        }
+        self.assertEqual(records, list(iter_records(records)))
+        self.assertEqual(records, list(iter_records(columns)))
+        with self.assertRaises(ValueError):
+            iter_records({"subject_id": ["1", "2"], "acq_datetime": []})
+
+    def test_build_jobs(self):
+        """Tests that built jobs match jobs validated from all of their
+        fields"""
+        jobs = UploadJobsBuilder(**self.shared_fields).build_jobs(self.columns)
+        self.assertEqual(2, len(jobs))
+        for job in jobs:
+            self.assertIsInstance(job, UploadJobConfigsV2)
+            self.assertEqual(
+                UploadJobConfigsV2(
+                    **job.model_dump(exclude={"s3_prefix": True})
+                ),
+                job,
+            )
+        self.assertEqual(
+            "behavior_123456_2020-10-13_13-10-10", jobs[0].s3_prefix
+        )
+        self.assertEqual(
+            {
+                "behavior-videos": {"input_source": "dir/data_set_1"},
+                "ecephys": {
+                    "compress": True,
+                    "input_source": "dir/data_set_1",
+                },
+            },
+            {
+                k: v.job_settings
+                for k, v in jobs[0]
+                .tasks["modality_transformation_settings"]
+                .items()
+            },
+        )
+        self.assertEqual(
+            {"compress": True},
+            jobs[1]
+            .tasks["modality_transformation_settings"]["ecephys"]
+            .job_settings,
+        )
+
+    def test_build_jobs_without_input_source(self):
+        """Tests that jobs without an input_source keep the template tasks"""
+        builder = UploadJobsBuilder(
+            model_class=UploadJobConfigsV2Model, **self.shared_fields
+        )
+        jobs = builder.build_jobs(
+            [{"subject_id": "123456", "acq_datetime": "2020-10-13T13:10:10"}]
+        )
+        self.assertIs(UploadJobConfigsV2Model, type(jobs[0]))
+        self.assertEqual(builder.template.tasks, jobs[0].tasks)
+
+    def test_build_jobs_errors(self):
+        """Tests that the errors of every invalid row are raised together"""
+        builder = UploadJobsBuilder(**self.shared_fields)
+        with self.assertRaises(UploadJobRowsError) as err:
+            builder.build_jobs(
+                [
+                    {"subject_id": "123456", "acq_datetime": "not a date"},
+                    {"subject_id": "123456", "acq_datetime": "2020-10-13"},
+                    {
+                        "subject_id": "123456",
+                        "acq_datetime": "2020-10-13",
+                        "project_name": "Other",
+                    },
+                    {
+                        "subject_id": "123456",
+                        "acq_datetime": "2020-10-13",
+                        "input_source": {"smartspim": "dir"},
+                    },
+                ]
+            )
+        errors = err.exception.errors
+        self.assertEqual([0, 2, 3], sorted(errors.keys()))
+        self.assertEqual(["acq_datetime"], json.loads(errors[0])[0]["loc"])
+        self.assertIn("Unexpected columns ['project_name']", errors[2])
+        self.assertIn("input_source modalities ['smartspim']", errors[3])
+
+    def test_build_jobs_skipped_transformation(self):
+        """Tests that a template with a skipped modality transformation
+        keeps its skip task, and rejects rows with an input_source"""
+        builder = UploadJobsBuilder(
+            **{
+                **self.shared_fields,
+                "tasks": {
+                    "modality_transformation_settings": Task(skip_task=True)
+                },
+            }
+        )
+        jobs = builder.build_jobs(
+            [{"subject_id": "123456", "acq_datetime": "2020-10-13T13:10:10"}]
+        )
+        self.assertEqual(
+            Task(skip_task=True),
+            jobs[0].tasks["modality_transformation_settings"],
+        )
+        with self.assertRaises(UploadJobRowsError) as err:
+            builder.build_jobs(self.columns)
+        self.assertEqual([0, 1], sorted(err.exception.errors.keys()))
+        self.assertIn(
+            "modality_transformation_settings is skipped",
+            err.exception.errors[0],
+        )
+
+    def test_shared_fields_validated_once(self):
+        """Tests that shared fields are validated in the current context"""
+        with self.assertRaises(ValidationError):
+            with validation_context({"job_types": ["ecephys"]}):
+                UploadJobsBuilder(**self.shared_fields)
+        with self.assertRaises(ValueError):
+            UploadJobsBuilder(subject_id="123456", **self.shared_fields)
+
+    def test_build_requests(self):
+        """Tests that jobs are bundled into requests of chunk_size jobs"""
+        data = {
+            "subject_id": [str(i) for i in range(120)],
+            "acq_datetime": ["2020-10-13T13:10:10"] * 120,
+        }
+        requests = UploadJobsBuilder(**self.shared_fields).build_requests(
+            data, user_email="test@example.com"
+        )
+        self.assertEqual([50, 50, 20], [len(r.upload_jobs) for r in requests])
+        self.assertIsInstance(requests[0], SubmitJobRequestV2)
+        self.assertEqual(
+            "test@example.com", requests[2].upload_jobs[-1].user_email
+        )
+        model_requests = UploadJobsBuilder(
+            model_class=UploadJobConfigsV2Model, **self.shared_fields
+        ).build_requests(data, chunk_size=40, user_email="test@example.com")
+        self.assertEqual(3, len(model_requests))
+        self.assertIs(SubmitJobRequestV2Model, type(model_requests[0]))
+        with self.assertRaises(ValueError):
+            UploadJobsBuilder(**self.shared_fields).build_requests(
+                data, chunk_size=51
+            )
+
+
+if __name__ == "__main__":
+    unittest.main()
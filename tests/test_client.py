@@ -0,0 +1,359 @@
+"""Tests client module"""
+
+import asyncio
+import json
+import unittest
+from datetime import datetime, timedelta, timezone
+from typing import Dict, List
+
+import httpx
+
+from aind_data_transfer_service.client import (
+    AsyncDataTransferServiceClient,
+    DataTransferServiceClient,
+    SubmitResponse,
+    chunk_upload_jobs,
+)
+
+JOB_STATES = ["queued", "running", "success"]
+
+
+def example_jobs(n_jobs: int) -> List[dict]:
+    """Upload jobs as dicts"""
+    return [
+        {"job_type": "default", "s3_prefix": f"behavior_{i}"}
+        for i in range(n_jobs)
+    ]
+
+
+class StandInServer:
+    """Stand-in for the service. Submitted dag runs move from queued to
+    running to success on each status poll. The first busy_responses
+    requests are rejected with a 503 and a Retry-After header."""
+
+    def __init__(self, busy_responses: int = 0, delay: float = 0.0) -> None:
+        """
+        Parameters
+        ----------
+        busy_responses : int
+          Number of requests to reject as busy.
+        delay : float
+          Seconds to take to process a request.
+        """
+        self.busy_responses = busy_responses
+        self.delay = delay
+        self.requests: List[httpx.Request] = []
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self.dag_runs: Dict[str, int] = dict()
+        self.submit_time = datetime.now(timezone.utc)
+
+    @property
+    def transport(self) -> httpx.MockTransport:
+        """Transport that sends requests to this server"""
+        return httpx.MockTransport(self.handle)
+
+    async def handle(self, request: httpx.Request) -> httpx.Response:
+        """Route a request"""
+        self.requests.append(request)
+        self.in_flight += 1
+        self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        try:
+            await asyncio.sleep(self.delay)
+            if self.busy_responses > 0:
+                self.busy_responses -= 1
+                return httpx.Response(
+                    503,
+                    headers={"Retry-After": "0"},
+                    json={
+                        "message": "Server is busy. Please try again later."
+                    },
+                )
+            if request.url.path == "/api/v1/get_job_status_list":
+                return self.get_job_status_list(request)
+            return self.post_jobs(request)
+        finally:
+            self.in_flight -= 1
+
+    def post_jobs(self, request: httpx.Request) -> httpx.Response:
+        """Validate or submit jobs"""
+        content = json.loads(request.content)
+        if any(j["job_type"] == "invalid" for j in content["upload_jobs"]):
+            return httpx.Response(
+                406,
+                json={
+                    "message": "There were validation errors",
+                    "data": {"responses": [], "errors": "invalid job_type"},
+                },
+            )
+        if request.url.path == "/api/v2/validate_json":
+            return httpx.Response(
+                200, json={"message": "Valid model", "data": {"errors": []}}
+            )
+        dag_run_id = f"manual__{len(self.dag_runs)}"
+        execution_date = self.submit_time + timedelta(
+            seconds=len(self.dag_runs)
+        )
+        self.dag_runs[dag_run_id] = 0
+        return httpx.Response(
+            200,
+            json={
+                "message": "Submitted request to airflow",
+                "data": {
+                    "responses": [
+                        {
+                            "dag_run_id": dag_run_id,
+                            "execution_date": execution_date.isoformat(),
+                        }
+                    ],
+                    "errors": [],
+                },
+            },
+        )
+
+    def get_job_status_list(self, request: httpx.Request) -> httpx.Response:
+        """Return the status of every dag run, along with a run that was not
+        submitted by the client, and advance each one"""
+        job_status_list = [{"job_id": "manual__other", "job_state": "running"}]
+        for dag_run_id, state in self.dag_runs.items():
+            job_status_list.append(
+                {"job_id": dag_run_id, "job_state": JOB_STATES[state]}
+            )
+            self.dag_runs[dag_run_id] = min(state + 1, len(JOB_STATES) - 1)
+        return httpx.Response(
+            200,
+            json={
+                "message": "Retrieved job status list from airflow",
+                "data": {
+                    "params": dict(request.url.params),
+                    "total_entries": len(job_status_list),
+                    "job_status_list": job_status_list,
+                },
+            },
+        )
+
+
+class TestChunkUploadJobs(unittest.TestCase):
+    """Tests chunk_upload_jobs"""
+
+    def test_chunk_upload_jobs(self):
+        """Tests that jobs are split into chunks of at most chunk_size"""
+        chunks = list(chunk_upload_jobs(example_jobs(120)))
+        self.assertEqual([50, 50, 20], [len(c) for c in chunks])
+        self.assertEqual(example_jobs(120), sum(chunks, []))
+        self.assertEqual(
+            [7, 3], [len(c) for c in chunk_upload_jobs(example_jobs(10), 7)]
+        )
+        with self.assertRaises(ValueError):
+            chunk_upload_jobs(example_jobs(10), 51)
+
+
+class TestAsyncDataTransferServiceClient(unittest.TestCase):
+    """Tests AsyncDataTransferServiceClient"""
+
+    def test_submit_jobs(self):
+        """Tests that chunks are submitted concurrently with at most
+        max_concurrency requests in flight"""
+        server = StandInServer(delay=0.01)
+
+        async def run():
+            """Submit jobs"""
+            async with AsyncDataTransferServiceClient(
+                max_concurrency=2, transport=server.transport
+            ) as client:
+                return await client.submit_jobs(
+                    example_jobs(120),
+                    user_email="test@example.com",
+                    email_notification_types={"fail", "end"},
+                )
+
+        responses = asyncio.run(run())
+        self.assertEqual(3, len(responses))
+        self.assertTrue(all(r.ok for r in responses))
+        self.assertEqual(3, len({r.dag_run_id for r in responses}))
+        self.assertEqual(
+            [f"behavior_{i}" for i in range(50)], responses[0].s3_prefixes
+        )
+        self.assertEqual(2, server.max_in_flight)
+        body = json.loads(server.requests[0].content)
+        self.assertEqual("test@example.com", body["user_email"])
+        self.assertEqual(["end", "fail"], body["email_notification_types"])
+
+    def test_validate_jobs(self):
+        """Tests that each chunk is validated on its own"""
+        server = StandInServer()
+
+        async def run():
+            """Validate jobs"""
+            async with AsyncDataTransferServiceClient(
+                transport=server.transport
+            ) as client:
+                return await client.validate_jobs(
+                    example_jobs(3) + [{"job_type": "invalid"}], chunk_size=2
+                )
+
+        responses = asyncio.run(run())
+        self.assertEqual([200, 406], [r.status_code for r in responses])
+        self.assertEqual("invalid job_type", responses[1].errors)
+        self.assertEqual("/api/v2/validate_json", server.requests[0].url.path)
+
+    def test_retries(self):
+        """Tests that busy responses are retried until max_retries"""
+
+        async def run(client_server: StandInServer, max_retries: int):
+            """Submit jobs"""
+            async with AsyncDataTransferServiceClient(
+                max_retries=max_retries,
+                backoff=0,
+                transport=client_server.transport,
+            ) as client:
+                return await client.submit_jobs(example_jobs(1))
+
+        server = StandInServer(busy_responses=2)
+        responses = asyncio.run(run(server, max_retries=2))
+        self.assertTrue(responses[0].ok)
+        self.assertEqual(3, len(server.requests))
+        server = StandInServer(busy_responses=2)
+        responses = asyncio.run(run(server, max_retries=1))
+        self.assertEqual(503, responses[0].status_code)
+        self.assertEqual(2, len(server.requests))
+
+    def test_transport_errors(self):
+        """Tests that connection errors are retried, but that a submit that
+        may have been processed is not"""
+        errors = [httpx.ConnectError("refused"), httpx.ReadTimeout("slow")]
+        server = StandInServer()
+
+        async def handle(request: httpx.Request) -> httpx.Response:
+            """Raise the next error, then forward to the stand-in server"""
+            if errors:
+                raise errors.pop(0)
+            return await server.handle(request)
+
+        async def run():
+            """Submit and then validate jobs"""
+            async with AsyncDataTransferServiceClient(
+                backoff=0, transport=httpx.MockTransport(handle)
+            ) as client:
+                submitted = await client.submit_jobs(example_jobs(1))
+                validated = await client.validate_jobs(example_jobs(1))
+                return submitted + validated
+
+        submitted, validated = asyncio.run(run())
+        self.assertIsNone(submitted.status_code)
+        self.assertEqual("ReadTimeout('slow',)", submitted.errors)
+        self.assertTrue(validated.ok)
+
+    def test_non_json_response(self):
+        """Tests that a chunk with a non-json error page is reported without
+        losing the results of the other chunks"""
+        server = StandInServer()
+        html = "<html><body>502 Bad Gateway</body></html>"
+
+        async def handle(request: httpx.Request) -> httpx.Response:
+            """Fail the second chunk with an html page"""
+            body = json.loads(request.content)
+            if body["upload_jobs"][0]["s3_prefix"] == "behavior_50":
+                return httpx.Response(502, text=html)
+            return await server.handle(request)
+
+        async def run():
+            """Submit jobs"""
+            async with AsyncDataTransferServiceClient(
+                max_retries=0, transport=httpx.MockTransport(handle)
+            ) as client:
+                return await client.submit_jobs(example_jobs(120))
+
+        responses = asyncio.run(run())
+        self.assertEqual([200, 502, 200], [r.status_code for r in responses])
+        self.assertEqual(html, responses[1].errors)
+        self.assertIsNone(responses[1].dag_run_id)
+        self.assertEqual("behavior_50", responses[1].s3_prefixes[0])
+
+    def test_wait_for_completion(self):
+        """Tests that job status is streamed until every submitted job has
+        finished"""
+        server = StandInServer()
+
+        async def run():
+            """Submit jobs and wait for them"""
+            async with AsyncDataTransferServiceClient(
+                transport=server.transport
+            ) as client:
+                responses = await client.submit_jobs(example_jobs(60))
+                streamed = [
+                    (j.job_id, j.job_state)
+                    async for j in client.stream_job_status(
+                        responses[:1], poll_interval=0
+                    )
+                ]
+                final = await client.wait_for_completion(
+                    responses, poll_interval=0
+                )
+                return responses, streamed, final
+
+        responses, streamed, final = asyncio.run(run())
+        self.assertEqual(
+            [("manual__0", state) for state in JOB_STATES], streamed
+        )
+        self.assertEqual(
+            {"manual__0": "success", "manual__1": "success"},
+            {k: v.job_state for k, v in final.items()},
+        )
+        status_request = server.requests[2]
+        self.assertEqual(
+            responses[0].execution_date,
+            status_request.url.params["execution_date_gte"],
+        )
+
+    def test_wait_for_completion_timeout(self):
+        """Tests that a TimeoutError is raised if jobs don't finish"""
+        server = StandInServer()
+
+        async def run():
+            """Wait for a job that is never submitted"""
+            async with AsyncDataTransferServiceClient(
+                transport=server.transport
+            ) as client:
+                await client.wait_for_completion(
+                    [SubmitResponse(s3_prefixes=[], dag_run_id="manual__x")],
+                    poll_interval=0.01,
+                    timeout=0.05,
+                )
+
+        with self.assertRaises(asyncio.TimeoutError):
+            asyncio.run(run())
+
+
+class TestDataTransferServiceClient(unittest.TestCase):
+    """Tests DataTransferServiceClient"""
+
+    def test_sync_client(self):
+        """Tests the blocking client submits, streams, and waits"""
+        server = StandInServer()
+        with DataTransferServiceClient(
+            max_concurrency=2, transport=server.transport
+        ) as client:
+            responses = client.submit_jobs(example_jobs(60))
+            self.assertTrue(all(r.ok for r in responses))
+            validated = client.validate_jobs(example_jobs(1))
+            self.assertTrue(validated[0].ok)
+            streamed = [
+                j.job_state
+                for j in client.stream_job_status(
+                    responses[:1], poll_interval=0
+                )
+            ]
+            self.assertEqual(JOB_STATES, streamed)
+            final = client.wait_for_completion(responses, poll_interval=0)
+            self.assertEqual(2, len(final))
+            statuses = client.get_job_status_list(states=["running"])
+        self.assertEqual(3, len(statuses))
+        self.assertEqual(
+            "['running']", server.requests[-1].url.params["states"]
+        )
+        client.close()
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -3,17 +3,22 @@
 import json
 import unittest
 from copy import deepcopy
-from datetime import datetime
-from unittest.mock import MagicMock
+from datetime import datetime, timedelta, timezone
+from unittest.mock import MagicMock, patch
 
+from aind_data_schema_models.data_name_patterns import build_data_name
 from aind_data_schema_models.modalities import Modality
 from pydantic import ValidationError
 
 from aind_data_transfer_service.configs.platforms_v1 import Platform
 from aind_data_transfer_service.models.core import (
     SubmitJobRequestV2,
+    SubmitJobRequestV2Model,
     Task,
     UploadJobConfigsV2,
+    UploadJobConfigsV2Model,
+    _build_s3_prefix,
+    compute_job_fingerprint,
     validation_context,
 )
 
@@ -116,6 +121,99 @@ class TestUploadJobConfigsV2(unittest.TestCase):
             self.example_configs.s3_prefix,
         )
 
+    @patch(
+        "aind_data_transfer_service.models.core.build_data_name",
+        wraps=build_data_name,
+    )
+    def test_s3_prefix_memoized(self, mock_build_data_name: MagicMock):
+        """Tests s3_prefix is only rebuilt when the fields it depends on
+        change"""
+        _build_s3_prefix.cache_clear()
+        configs = self.example_configs.model_copy(deep=True)
+        for _ in range(3):
+            self.assertEqual(
+                "behavior_123456_2020-10-13_13-10-10", configs.s3_prefix
+            )
+        configs.model_dump()
+        self.assertEqual(1, mock_build_data_name.call_count)
+        configs.subject_id = "654321"
+        self.assertEqual(
+            "behavior_654321_2020-10-13_13-10-10", configs.s3_prefix
+        )
+        configs.platform = None
+        self.assertEqual("654321_2020-10-13_13-10-10", configs.s3_prefix)
+        configs.acq_datetime = datetime(2021, 1, 1, 1, 1, 1)
+        self.assertEqual("654321_2021-01-01_01-01-01", configs.s3_prefix)
+        self.assertEqual(4, mock_build_data_name.call_count)
+
+    def test_s3_prefix_timezones(self):
+        """Tests equal datetimes in different timezones keep their own
+        s3_prefix"""
+        utc_datetime = datetime(2020, 10, 13, 13, 10, 10, tzinfo=timezone.utc)
+        local_datetime = utc_datetime.astimezone(timezone(timedelta(hours=-7)))
+        self.assertEqual(utc_datetime, local_datetime)
+        utc_configs = self.example_configs.model_copy(
+            update={"acq_datetime": utc_datetime}
+        )
+        local_configs = self.example_configs.model_copy(
+            update={"acq_datetime": local_datetime}
+        )
+        self.assertEqual(
+            "behavior_123456_2020-10-13_13-10-10", utc_configs.s3_prefix
+        )
+        self.assertEqual(
+            "behavior_123456_2020-10-13_06-10-10", local_configs.s3_prefix
+        )
+
+    def test_fingerprint(self):
+        """Tests fingerprint is stable and ignores volatile fields"""
+        job_conf = self.example_configs.model_dump(
+            mode="json", exclude_none=True
+        )
+        fingerprint = self.example_configs.fingerprint
+        self.assertEqual(64, len(fingerprint))
+        self.assertEqual(fingerprint, compute_job_fingerprint(job_conf))
+        self.assertEqual(
+            fingerprint,
+            compute_job_fingerprint({**job_conf, "fingerprint": "abc"}),
+        )
+        self.assertEqual(
+            fingerprint,
+            UploadJobConfigsV2.model_validate(
+                {**job_conf, "fingerprint": "abc"}
+            ).fingerprint,
+        )
+        other_job = self.example_configs.model_copy(
+            update={"subject_id": "654321"}
+        )
+        self.assertNotEqual(fingerprint, other_job.fingerprint)
+
+    def test_fingerprint_set_order(self):
+        """Tests fingerprint doesn't depend on the order set fields are
+        dumped in"""
+        types = ["begin", "end", "fail", "retry"]
+        job = self.example_configs.model_copy(
+            update={"email_notification_types": set(types)}
+        )
+        job_conf = job.model_dump(mode="json", exclude_none=True)
+        for order in (
+            types,
+            list(reversed(types)),
+            ["fail", "begin"] + types[1::2],
+        ):
+            self.assertEqual(
+                job.fingerprint,
+                compute_job_fingerprint(
+                    {**job_conf, "email_notification_types": order}
+                ),
+            )
+        self.assertNotEqual(
+            job.fingerprint,
+            compute_job_fingerprint(
+                {**job_conf, "email_notification_types": ["fail"]}
+            ),
+        )
+
     def test_platform_backward_compatibility(self):
         """
         Tests that aind_data_schema_models.platforms will be coerced correctly.
@@ -132,6 +230,93 @@ class TestUploadJobConfigsV2(unittest.TestCase):
         configs = UploadJobConfigsV2.model_validate(base_configs)
         self.assertEqual(Platform.ECEPHYS, configs.platform)
 
+    def test_interned_platform_and_modalities(self):
+        """Tests that known platforms and modalities are resolved to shared
+        instances from abbreviations, tagged dicts and other models"""
+        base_configs = self.example_configs.model_dump(
+            mode="json", exclude={"s3_bucket": True, "s3_prefix": True}
+        )
+        foreign_platform = MagicMock()
+        foreign_platform.name = Platform.BEHAVIOR.name
+        foreign_platform.abbreviation = Platform.BEHAVIOR.abbreviation
+        foreign_platform.__class__.__module__ = (
+            "aind_data_schema_models.platforms"
+        )
+        inputs = [
+            (Platform.BEHAVIOR, Modality.BEHAVIOR_VIDEOS),
+            ("behavior", "behavior-videos"),
+            (
+                Platform.BEHAVIOR.model_dump(),
+                Modality.BEHAVIOR_VIDEOS.model_dump(),
+            ),
+            (foreign_platform, Modality.BEHAVIOR_VIDEOS),
+        ]
+        jobs = [
+            UploadJobConfigsV2(
+                **{
+                    **base_configs,
+                    "platform": platform,
+                    "modalities": [modality],
+                }
+            )
+            for platform, modality in inputs
+        ]
+        for job in jobs:
+            self.assertIs(Platform.abbreviation_map["behavior"], job.platform)
+            self.assertIs(
+                Modality.abbreviation_map["behavior-videos"],
+                job.modalities[0],
+            )
+            self.assertEqual(
+                self.example_configs.model_dump_json(), job.model_dump_json()
+            )
+        foreign_platform.model_dump.assert_not_called()
+
+    def test_interning_keeps_validation_errors(self):
+        """Tests that unknown or mismatched values still fail validation"""
+        base_configs = self.example_configs.model_dump(
+            exclude={"s3_bucket": True, "s3_prefix": True}
+        )
+        for platform, modality in [
+            ("not_a_platform", Modality.BEHAVIOR_VIDEOS),
+            (
+                {"name": Platform.ECEPHYS.name, "abbreviation": "behavior"},
+                Modality.BEHAVIOR_VIDEOS,
+            ),
+            (Platform.BEHAVIOR, "not_a_modality"),
+            (Platform.BEHAVIOR, Platform.BEHAVIOR),
+        ]:
+            with self.assertRaises(ValidationError):
+                UploadJobConfigsV2(
+                    **{
+                        **base_configs,
+                        "platform": platform,
+                        "modalities": [modality],
+                    }
+                )
+
+    def test_interning_unhashable_tags(self):
+        """Tests that a name or abbreviation that is a list or a dict fails
+        validation instead of raising a TypeError"""
+        base_configs = self.example_configs.model_dump(
+            exclude={"s3_bucket": True, "s3_prefix": True}
+        )
+        for platform, modality in [
+            ({"name": ["x"], "abbreviation": "behavior"}, "behavior-videos"),
+            ({"name": "x", "abbreviation": {"a": 1}}, "behavior-videos"),
+            ("behavior", {"name": ["x"], "abbreviation": "ecephys"}),
+            ("behavior", {"name": "x", "abbreviation": {"a": 1}}),
+        ]:
+            for model_class in (UploadJobConfigsV2, UploadJobConfigsV2Model):
+                with self.assertRaises(ValidationError):
+                    model_class(
+                        **{
+                            **base_configs,
+                            "platform": platform,
+                            "modalities": [modality],
+                        }
+                    )
+
     def test_job_type_default(self):
         """Tests default, valid, and invalid job_type property"""
         self.assertEqual("default", self.example_configs.job_type)
@@ -169,6 +354,30 @@ class TestUploadJobConfigsV2(unittest.TestCase):
             err_msg,
         )
 
+    def test_abbreviation_validation(self):
+        """Test platform and modalities are validated against lists of
+        abbreviations in the context provided."""
+        with validation_context(
+            {"platforms": ["behavior"], "modalities": ["behavior-videos"]}
+        ):
+            model = UploadJobConfigsV2(**self.base_configs)
+        self.assertEqual(self.example_configs, model)
+        for context, expected_msg in [
+            (
+                {"platforms": ["ecephys"]},
+                "Value error, behavior must be one of ['ecephys']",
+            ),
+            (
+                {"modalities": ["ecephys"]},
+                "Value error, behavior-videos must be one of ['ecephys']",
+            ),
+        ]:
+            with self.assertRaises(ValidationError) as err:
+                with validation_context(context):
+                    UploadJobConfigsV2(**self.base_configs)
+            err_msg = json.loads(err.exception.json())[0]["msg"]
+            self.assertEqual(expected_msg, err_msg)
+
     def test_project_name_validation(self):
         """Test project_name is validated against list context provided."""
         model = json.loads(self.example_configs.model_dump_json())
@@ -588,6 +797,156 @@ class TestSubmitJobRequestV2(unittest.TestCase):
                 err_msg,
             )
 
+    def test_current_jobs_validation_fingerprint(self):
+        """Tests job validation against current_jobs that carry a
+        fingerprint."""
+        job_configs = self.example_upload_config.model_dump(
+            mode="json", exclude={"subject_id"}
+        )
+        submitted_job_request = SubmitJobRequestV2(
+            upload_jobs=[
+                UploadJobConfigsV2(**job_configs, subject_id=subject_id)
+                for subject_id in ["123456", "123457"]
+            ],
+            user_email="abc@example.com",
+        )
+        # only the fingerprint is needed to detect the duplicate
+        current_jobs = [
+            {"upload_jobs": [{"fingerprint": j.fingerprint}]}
+            for j in submitted_job_request.upload_jobs
+        ]
+        # legacy conf with the same s3_prefix but different configs
+        legacy_job = submitted_job_request.upload_jobs[0].model_dump(
+            mode="json", exclude_none=True
+        )
+        legacy_job["s3_bucket"] = "open"
+        current_jobs.append(legacy_job)
+        with validation_context({"current_jobs": current_jobs}):
+            submit_job_request = SubmitJobRequestV2(
+                upload_jobs=[
+                    UploadJobConfigsV2(**job_configs, subject_id="123458")
+                ],
+                user_email="abc@example.com",
+            )
+        self.assertEqual(1, len(submit_job_request.upload_jobs))
+        with self.assertRaises(ValidationError) as err:
+            with validation_context({"current_jobs": current_jobs}):
+                SubmitJobRequestV2(
+                    upload_jobs=[
+                        UploadJobConfigsV2(**job_configs, subject_id="123457")
+                    ],
+                    user_email="abc@example.com",
+                )
+        err_msg = json.loads(err.exception.json())[0]["msg"]
+        self.assertEqual(
+            (
+                "Value error, Job is already running/queued for "
+                "behavior_123457_2020-10-13_13-10-10"
+            ),
+            err_msg,
+        )
+
+
+class TestBaseModelVariants(unittest.TestCase):
+    """Tests UploadJobConfigsV2Model and SubmitJobRequestV2Model classes
+    match the settings based classes"""
+
+    @classmethod
+    def setUpClass(cls) -> None:
+        """Set up example request json"""
+        job = UploadJobConfigsV2(
+            job_type="default",
+            project_name="Behavior Platform",
+            platform=Platform.BEHAVIOR,
+            modalities=[Modality.BEHAVIOR_VIDEOS],
+            subject_id="123456",
+            acq_datetime=datetime(2020, 10, 13, 13, 10, 10),
+            tasks={
+                "modality_transformation_settings": {
+                    "behavior-videos": Task(
+                        job_settings={"input_source": "dir/data_set_1"},
+                    ),
+                }
+            },
+        ).model_dump(mode="json", exclude_none=True)
+        cls.example_job = job
+        cls.example_request = {
+            "user_email": "abc@example.com",
+            "upload_jobs": [
+                {**job, "subject_id": subject_id}
+                for subject_id in ["123456", "123457"]
+            ],
+        }
+
+    def test_subclasses(self):
+        """Tests settings classes extend the BaseModel variants"""
+        self.assertTrue(
+            issubclass(UploadJobConfigsV2, UploadJobConfigsV2Model)
+        )
+        self.assertTrue(
+            issubclass(SubmitJobRequestV2, SubmitJobRequestV2Model)
+        )
+        self.assertEqual(
+            UploadJobConfigsV2.model_fields.keys(),
+            UploadJobConfigsV2Model.model_fields.keys(),
+        )
+        self.assertEqual(
+            SubmitJobRequestV2.model_fields.keys(),
+            SubmitJobRequestV2Model.model_fields.keys(),
+        )
+
+    def test_same_json(self):
+        """Tests both variants produce the same json"""
+        request_json = json.dumps(self.example_request)
+        settings_model = SubmitJobRequestV2.model_validate_json(request_json)
+        base_model = SubmitJobRequestV2Model.model_validate_json(request_json)
+        self.assertIsInstance(
+            base_model.upload_jobs[0], UploadJobConfigsV2Model
+        )
+        self.assertEqual(
+            settings_model.model_dump_json(), base_model.model_dump_json()
+        )
+        self.assertEqual(
+            settings_model.upload_jobs[0].fingerprint,
+            base_model.upload_jobs[0].fingerprint,
+        )
+        self.assertEqual(
+            UploadJobConfigsV2(**self.example_job).model_dump_json(),
+            UploadJobConfigsV2Model(**self.example_job).model_dump_json(),
+        )
+
+    def test_same_errors(self):
+        """Tests both variants raise the same errors with the same context"""
+        request = deepcopy(self.example_request)
+        request["upload_jobs"][1]["subject_id"] = "123456"
+        request["upload_jobs"].append(
+            {**self.example_job, "job_type": "unknown"}
+        )
+        errors = []
+        for model in [SubmitJobRequestV2, SubmitJobRequestV2Model]:
+            with self.assertRaises(ValidationError) as err:
+                with validation_context({"job_types": ["default"]}):
+                    model(**request)
+            errors.append(err.exception.json(include_url=False))
+        self.assertEqual(errors[0], errors[1])
+        current_job = (
+            SubmitJobRequestV2(**self.example_request)
+            .upload_jobs[0]
+            .model_dump(mode="json", exclude_none=True)
+        )
+        with self.assertRaises(ValidationError):
+            with validation_context({"current_jobs": [current_job]}):
+                SubmitJobRequestV2Model(**self.example_request)
+
+    def test_accepts_settings_jobs(self):
+        """Tests the BaseModel request accepts settings based jobs"""
+        job = UploadJobConfigsV2(**self.example_job)
+        request = SubmitJobRequestV2Model(
+            upload_jobs=[job], user_email="abc@example.com"
+        )
+        self.assertEqual("abc@example.com", request.upload_jobs[0].user_email)
+        self.assertEqual({"fail"}, request.email_notification_types)
+
 
 if __name__ == "__main__":
     unittest.main()
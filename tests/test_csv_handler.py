@@ -1,26 +1,42 @@
 """Tests methods in csv_handler module"""
 
 import csv
+import io
 import os
 import unittest
 from datetime import datetime
 from pathlib import Path
+from unittest.mock import patch
 
 from aind_data_schema_models.modalities import Modality
+from openpyxl import load_workbook
 
 from aind_data_transfer_service.configs.csv_handler import (
+    CsvRowMapper,
+    JobSheetSizeError,
+    compile_column_plan,
     create_nested_dict,
     map_csv_row_to_job,
     nested_update,
+    read_csv_rows,
+    read_xlsx_rows,
 )
 from aind_data_transfer_service.configs.platforms_v1 import Platform
-from aind_data_transfer_service.models.core import Task, UploadJobConfigsV2
+from aind_data_transfer_service.models.core import (
+    Task,
+    UploadJobConfigsV2,
+    UploadJobConfigsV2Model,
+)
 
 RESOURCES_DIR = Path(os.path.dirname(os.path.realpath(__file__))) / "resources"
 SAMPLE_FILE = RESOURCES_DIR / "new_sample.csv"
 NESTED_SAMPLE_FILE = RESOURCES_DIR / "nested_sample.csv"
 LEGACY_FILE = RESOURCES_DIR / "legacy_sample.csv"
 LEGACY_FILE_2 = RESOURCES_DIR / "legacy_sample2.csv"
+SAMPLE_CSV_EMPTY_ROWS = RESOURCES_DIR / "sample_empty_rows.csv"
+SAMPLE_XLSX = RESOURCES_DIR / "sample.xlsx"
+SAMPLE_XLSX_EMPTY_ROWS = RESOURCES_DIR / "sample_empty_rows.xlsx"
+JOB_TEMPLATE_XLSX = RESOURCES_DIR / "job_upload_template.xlsx"
 
 
 class TestCsvHandler(unittest.TestCase):
@@ -46,6 +62,132 @@ class TestCsvHandler(unittest.TestCase):
         expected_dict = {"abc": {"def": {"ghi": "my_val", "jkl": 123}}}
         self.assertEqual(expected_dict, current_dict)
 
+    def test_read_csv_rows(self):
+        """Tests read_csv_rows matches reading the decoded file"""
+        for file_path in [SAMPLE_FILE, SAMPLE_CSV_EMPTY_ROWS]:
+            with open(file_path, "r", encoding="utf-8-sig") as f:
+                expected_rows = [
+                    row for row in csv.DictReader(f) if any(row.values())
+                ]
+            with open(file_path, "rb") as f:
+                rows = list(read_csv_rows(f))
+            self.assertEqual(expected_rows, rows)
+
+    def test_read_csv_rows_byte_order_mark(self):
+        """Tests read_csv_rows removes the utf-8 byte order mark"""
+        file = io.BytesIO(
+            "\ufeffsubject_id,modality0\n123456,ecephys\n".encode("utf-8")
+        )
+        rows = list(read_csv_rows(file))
+        self.assertEqual(
+            [{"subject_id": "123456", "modality0": "ecephys"}], rows
+        )
+
+    def test_read_xlsx_rows(self):
+        """Tests read_xlsx_rows matches converting the sheet to csv text"""
+        for file_path in [
+            SAMPLE_XLSX,
+            SAMPLE_XLSX_EMPTY_ROWS,
+            JOB_TEMPLATE_XLSX,
+        ]:
+            xlsx_book = load_workbook(file_path, read_only=True)
+            csv_io = io.StringIO()
+            csv_writer = csv.writer(csv_io)
+            for r in xlsx_book.active.iter_rows(values_only=True):
+                if any(r):
+                    csv_writer.writerow(r)
+            xlsx_book.close()
+            expected_rows = [
+                row
+                for row in csv.DictReader(io.StringIO(csv_io.getvalue()))
+                if any(row.values())
+            ]
+            with open(file_path, "rb") as f:
+                rows = list(read_xlsx_rows(f))
+            self.assertEqual(expected_rows, rows)
+
+    def test_read_rows_max_rows(self):
+        """Tests that an error is raised if a sheet has too many rows"""
+        with open(SAMPLE_FILE, "rb") as f:
+            self.assertEqual(3, len(list(read_csv_rows(f, max_rows=3))))
+        with open(SAMPLE_FILE, "rb") as f:
+            with self.assertRaises(JobSheetSizeError) as e:
+                list(read_csv_rows(f, max_rows=2))
+        self.assertEqual(
+            "Job sheet has more than the maximum of 2 rows", str(e.exception)
+        )
+        with open(JOB_TEMPLATE_XLSX, "rb") as f:
+            with self.assertRaises(JobSheetSizeError):
+                list(read_xlsx_rows(f, max_rows=2))
+
+    def test_compile_column_plan(self):
+        """Tests headers are parsed into the expected plans"""
+        self.assertEqual(
+            ("JOB_CONFIG", "s3_bucket", ()),
+            self._plan_tuple(compile_column_plan(" s3-bucket ")),
+        )
+        self.assertEqual(
+            ("MODALITY_CONFIG", "modality0", ("modality",)),
+            self._plan_tuple(compile_column_plan("modality0")),
+        )
+        self.assertEqual(
+            ("MODALITY_CONFIG", "modality1", ("input_source",)),
+            self._plan_tuple(compile_column_plan("modality1.source")),
+        )
+        self.assertEqual(
+            ("MODALITY_CONFIG", "modality0", ("a", "b", "c")),
+            self._plan_tuple(compile_column_plan("modality0.a.b.c")),
+        )
+        self.assertEqual(
+            ("CODEOCEAN_RUN_PARAM", "modality0", ("capsule_id",)),
+            self._plan_tuple(
+                compile_column_plan("modality0.process_capsule_id")
+            ),
+        )
+        self.assertEqual(
+            ("CODEOCEAN_RUN_PARAM", "modality2", ("pipeline_id",)),
+            self._plan_tuple(compile_column_plan("modality2.pipeline_id")),
+        )
+        self.assertEqual(
+            ("FORCE_CLOUD_SYNC", "force_cloud_sync", ()),
+            self._plan_tuple(compile_column_plan("force_cloud_sync")),
+        )
+
+    @staticmethod
+    def _plan_tuple(plan) -> tuple:
+        """Convert a plan to a tuple that is easy to compare"""
+        return plan.kind.name, plan.key, plan.path
+
+    def test_csv_row_mapper(self):
+        """Tests a shared CsvRowMapper maps rows the same as
+        map_csv_row_to_job and only parses each header once"""
+        for file_path in [
+            SAMPLE_FILE,
+            NESTED_SAMPLE_FILE,
+            LEGACY_FILE,
+            LEGACY_FILE_2,
+        ]:
+            with open(file_path, newline="") as csvfile:
+                rows = list(csv.DictReader(csvfile, skipinitialspace=True))
+            expected_jobs = [map_csv_row_to_job(row) for row in rows]
+            with patch(
+                "aind_data_transfer_service.configs.csv_handler."
+                "compile_column_plan",
+                wraps=compile_column_plan,
+            ) as mock_compile:
+                row_mapper = CsvRowMapper(headers=rows[0].keys())
+                jobs = [row_mapper.map_row(row) for row in rows]
+            self.assertEqual(expected_jobs, jobs)
+            self.assertEqual(len(rows[0]), mock_compile.call_count)
+            base_model_jobs = [
+                CsvRowMapper(model_class=UploadJobConfigsV2Model).map_row(row)
+                for row in rows
+            ]
+            self.assertEqual(
+                [j.model_dump_json() for j in expected_jobs],
+                [j.model_dump_json() for j in base_model_jobs],
+            )
+
     def test_map_csv_row_to_job(self):
         """Tests map_csv_row_to_job method"""
 
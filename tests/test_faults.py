@@ -0,0 +1,188 @@
+"""Tests faults module"""
+
+import asyncio
+import json
+import os
+import random
+import tempfile
+import unittest
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import httpx
+from botocore.exceptions import ClientError, ReadTimeoutError
+
+from aind_data_transfer_service.faults import FaultInjector, FaultRule
+
+
+class TestFaultRule(unittest.TestCase):
+    """Tests FaultRule class"""
+
+    def test_invalid_settings(self):
+        """Tests that bad settings are rejected"""
+        with self.assertRaises(ValueError):
+            FaultRule(latency_ms={"distribution": "pareto"})
+        with self.assertRaises(ValueError):
+            FaultRule(error_rate=1.5)
+        with self.assertRaises(ValueError):
+            FaultRule.from_dict({"latency": 10})
+
+    def test_sample_latency(self):
+        """Tests that latencies are drawn from each distribution"""
+        rng = random.Random(0)
+        self.assertEqual(0.25, FaultRule(latency_ms=250).sample_latency(rng))
+        uniform = FaultRule(
+            latency_ms={"distribution": "uniform", "min_ms": 10, "max_ms": 20}
+        )
+        for _ in range(100):
+            self.assertTrue(0.01 <= uniform.sample_latency(rng) <= 0.02)
+        for spec in (
+            {"distribution": "normal", "mean_ms": 5, "stddev_ms": 50},
+            {"distribution": "lognormal", "median_ms": 50, "sigma": 1},
+            {"distribution": "exponential", "mean_ms": 50},
+        ):
+            rule = FaultRule(latency_ms=spec)
+            latencies = [rule.sample_latency(rng) for _ in range(100)]
+            self.assertGreaterEqual(min(latencies), 0)
+            self.assertGreater(len(set(latencies)), 1)
+
+    def test_choose(self):
+        """Tests that faults are drawn at their rates"""
+        rng = random.Random(0)
+        self.assertEqual(
+            (0.0, "timeout"), FaultRule(timeout_rate=1).choose(rng)
+        )
+        self.assertEqual(
+            (1.5, "timeout"),
+            FaultRule(timeout_rate=1, timeout_after_ms=1500).choose(rng),
+        )
+        self.assertEqual((0.0, "error"), FaultRule(error_rate=1).choose(rng))
+        self.assertEqual(
+            (0.0, "truncate"), FaultRule(truncate_rate=1).choose(rng)
+        )
+        self.assertEqual((0.0, None), FaultRule().choose(rng))
+        rule = FaultRule(error_rate=0.25)
+        faults = [rule.choose(rng)[1] for _ in range(1000)]
+        self.assertTrue(150 < faults.count("error") < 350)
+
+    def test_truncate(self):
+        """Tests that the first list of a page is cut short"""
+        rule = FaultRule(truncate_fraction=0.5)
+        page = {"Parameters": [1, 2, 3, 4], "NextToken": "abc"}
+        self.assertEqual(
+            {"Parameters": [1, 2], "NextToken": "abc"}, rule.truncate(page)
+        )
+        self.assertIsNone(rule.truncate(None))
+        request = httpx.Request("POST", "http://airflow/dagRuns/list")
+        response = httpx.Response(
+            200,
+            json={"dag_runs": [{"i": 0}, {"i": 1}], "total_entries": 2},
+            headers={"x-request-id": "1"},
+            request=request,
+        )
+        truncated = rule.truncate(response)
+        self.assertEqual(
+            {"dag_runs": [{"i": 0}], "total_entries": 2}, truncated.json()
+        )
+        self.assertEqual("1", truncated.headers["x-request-id"])
+        self.assertEqual(
+            str(len(truncated.content)), truncated.headers["content-length"]
+        )
+        self.assertIs(request, truncated.request)
+        text = httpx.Response(200, text="logs")
+        self.assertIs(text, rule.truncate(text))
+
+
+class TestFaultInjector(unittest.TestCase):
+    """Tests FaultInjector class"""
+
+    def test_rule(self):
+        """Tests that the most specific rule is used"""
+        exact, prefix, default = FaultRule(), FaultRule(), FaultRule()
+        injector = FaultInjector(
+            {"ssm_get": exact, "ssm": prefix, "*": default}
+        )
+        self.assertIs(exact, injector.rule("ssm_get"))
+        self.assertIs(prefix, injector.rule("ssm_describe"))
+        self.assertIs(default, injector.rule("airflow_list"))
+        self.assertIsNone(FaultInjector({"ssm": prefix}).rule("airflow_list"))
+        self.assertIsNone(FaultInjector().rule("ssm_get"))
+
+    def test_call(self):
+        """Tests faults injected into blocking boto3 calls"""
+        func = MagicMock(return_value={"Parameters": [1, 2]})
+        self.assertEqual(
+            {"Parameters": [1, 2]}, FaultInjector().call("ssm", func)
+        )
+        func.reset_mock()
+        injector = FaultInjector({"ssm": FaultRule(error_rate=1)})
+        with self.assertRaises(ClientError) as e:
+            injector.call("ssm_describe", func)
+        self.assertEqual(
+            503, e.exception.response["ResponseMetadata"]["HTTPStatusCode"]
+        )
+        injector = FaultInjector({"ssm": FaultRule(timeout_rate=1)})
+        with self.assertRaises(ReadTimeoutError):
+            injector.call("ssm_describe", func)
+        func.assert_not_called()
+        injector = FaultInjector({"ssm": FaultRule(truncate_rate=1)})
+        self.assertEqual(
+            {"Parameters": [1]},
+            injector.call("ssm_describe", func, "arg", key="value"),
+        )
+        func.assert_called_once_with("arg", key="value")
+
+    @patch("asyncio.sleep", new_callable=AsyncMock)
+    def test_call_async(self, mock_sleep: AsyncMock):
+        """Tests faults injected into httpx calls"""
+
+        async def get(url: str) -> httpx.Response:
+            """Stand-in for AsyncClient.get"""
+            return httpx.Response(200, json={"data": ["a", "b"]})
+
+        injector = FaultInjector(
+            {"project_names": FaultRule(latency_ms=100, error_rate=1)}
+        )
+        response = asyncio.run(
+            injector.call_async("project_names", get, url="http://metadata")
+        )
+        mock_sleep.assert_awaited_once_with(0.1)
+        self.assertEqual(503, response.status_code)
+        self.assertEqual("GET", response.request.method)
+        self.assertEqual("http://metadata", str(response.request.url))
+        with self.assertRaises(httpx.HTTPStatusError):
+            response.raise_for_status()
+        injector = FaultInjector({"*": FaultRule(timeout_rate=1)})
+        with self.assertRaises(httpx.ReadTimeout):
+            asyncio.run(injector.call_async("project_names", get, "url"))
+        injector = FaultInjector({"*": FaultRule(truncate_rate=1)})
+        response = asyncio.run(injector.call_async("project_names", get, ""))
+        self.assertEqual({"data": ["a"]}, response.json())
+
+    def test_from_env(self):
+        """Tests that faults are read from json or a json file"""
+        config = {"seed": 1, "airflow": {"latency_ms": 20, "error_rate": 0.5}}
+        with patch.dict(os.environ, {"AIND_UPSTREAM_FAULTS": ""}):
+            self.assertEqual(dict(), FaultInjector.from_env().rules)
+        with patch.dict(
+            os.environ, {"AIND_UPSTREAM_FAULTS": json.dumps(config)}
+        ):
+            with self.assertLogs(level="WARNING"):
+                injector = FaultInjector.from_env()
+        self.assertEqual(0.5, injector.rule("airflow_list").error_rate)
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            path = os.path.join(tmp_dir, "faults.json")
+            with open(path, "w") as f:
+                json.dump({"ssm": {"truncate_rate": 0.1}}, f)
+            with patch.dict(os.environ, {"AIND_UPSTREAM_FAULTS": path}):
+                with self.assertLogs(level="WARNING"):
+                    injector = FaultInjector.from_env()
+        self.assertEqual(0.1, injector.rule("ssm_get").truncate_rate)
+        with patch.dict(
+            os.environ, {"AIND_UPSTREAM_FAULTS": '{"ssm": {"rate": 1}}'}
+        ):
+            with self.assertRaises(ValueError):
+                FaultInjector.from_env()
+
+
+if __name__ == "__main__":
+    unittest.main()
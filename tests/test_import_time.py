@@ -0,0 +1,42 @@
+"""Tests the import time of the client models against a budget"""
+
+import json
+import os
+import subprocess
+import sys
+import unittest
+from pathlib import Path
+
+REPO_DIR = Path(os.path.dirname(os.path.realpath(__file__))).parent
+
+# Fastest of three imports on a developer laptop is about 170 ms. The budget
+# leaves room for slower CI machines and can be raised with an env var.
+IMPORT_TIME_BUDGET_MS = float(os.getenv("AIND_IMPORT_TIME_BUDGET_MS", "500"))
+
+
+class TestImportTime(unittest.TestCase):
+    """Tests import time of aind_data_transfer_service.models.core"""
+
+    def test_models_import_time(self):
+        """Tests that importing the models stays under the budget and does
+        not import the modules that are deferred until first use"""
+        output = subprocess.run(
+            [
+                sys.executable,
+                "-m",
+                "benchmarks.bench_import_time",
+                "--runs",
+                "3",
+            ],
+            cwd=REPO_DIR,
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout
+        results = json.loads(output)
+        self.assertEqual([], results["deferred_modules_imported"])
+        self.assertLess(results["min_ms"], IMPORT_TIME_BUDGET_MS)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -8,6 +8,7 @@ from pathlib import Path
 
 from aind_data_transfer_service.models.internal import (
     AirflowDagRunsResponse,
+    AirflowDagRunSummariesResponse,
     JobStatus,
 )
 
@@ -38,6 +39,67 @@ class TestJobStatus(unittest.TestCase):
             "manual__2024-05-18T22:08:52.286765+00:00", job_status_0.job_id
         )
 
+    def test_from_airflow_dag_run_summary(self):
+        """Tests from_airflow_dag_run method with conf summaries matches the
+        full conf"""
+        dag_response = AirflowDagRunsResponse.model_validate_json(
+            json.dumps(self.dag_run_response)
+        )
+        summary_response = AirflowDagRunSummariesResponse.model_validate_json(
+            json.dumps(self.dag_run_response)
+        )
+        self.assertEqual(
+            [JobStatus.from_airflow_dag_run(d) for d in dag_response.dag_runs],
+            [
+                JobStatus.from_airflow_dag_run(d)
+                for d in summary_response.dag_runs
+            ],
+        )
+        self.assertEqual(
+            {"s3_prefix": "ecephys_655019_2000-10-10_01-00-24"},
+            summary_response.dag_runs[4].conf.model_dump(exclude_none=True),
+        )
+
+    def test_from_airflow_dag_run_summary_v1_job_type(self):
+        """Tests that v1 job_type is read from the codeocean_configs
+        summary"""
+        dag_run = dict(self.dag_run_response["dag_runs"][0])
+        dag_run["conf"] = {
+            "s3_prefix": "ecephys_123456_2000-01-01_01-00-00",
+            "codeocean_configs": {"job_type": "ecephys", "other": [1, 2]},
+            "modalities": [{"source": "dir"}],
+        }
+        summary_response = AirflowDagRunSummariesResponse.model_validate_json(
+            json.dumps({"dag_runs": [dag_run], "total_entries": 1})
+        )
+        job_status = JobStatus.from_airflow_dag_run(
+            summary_response.dag_runs[0]
+        )
+        self.assertEqual("ecephys", job_status.job_type)
+        self.assertEqual("ecephys_123456_2000-01-01_01-00-00", job_status.name)
+
+    def test_from_airflow_dag_run_summary_null_job_type(self):
+        """Tests that a null job_type in the conf is kept as None, like with
+        the full conf"""
+        dag_run = dict(self.dag_run_response["dag_runs"][0])
+        dag_run["conf"] = {
+            "s3_prefix": "ecephys_123456_2000-01-01_01-00-00",
+            "job_type": None,
+        }
+        response_json = json.dumps({"dag_runs": [dag_run], "total_entries": 1})
+        job_status = JobStatus.from_airflow_dag_run(
+            AirflowDagRunsResponse.model_validate_json(response_json).dag_runs[
+                0
+            ]
+        )
+        summary_job_status = JobStatus.from_airflow_dag_run(
+            AirflowDagRunSummariesResponse.model_validate_json(
+                response_json
+            ).dag_runs[0]
+        )
+        self.assertIsNone(job_status.job_type)
+        self.assertEqual(job_status, summary_job_status)
+
     def test_jinja_dict(self):
         """Tests jinja_dict property"""
         dag_response = AirflowDagRunsResponse.model_validate_json(
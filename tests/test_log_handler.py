@@ -1,6 +1,7 @@
 """Tests methods in log_handler module and logging functions in init module"""
 
 import importlib
+import os
 import unittest
 from logging import LogRecord
 from unittest.mock import MagicMock, mock_open, patch
@@ -8,8 +9,12 @@ from unittest.mock import MagicMock, mock_open, patch
 import aind_data_transfer_service
 from aind_data_transfer_service import CustomJsonFormatter
 from aind_data_transfer_service.log_handler import (
+    PAYLOAD_CAPTURE_MESSAGE,
+    REDACTED,
     EventType,
     log_submit_job_request,
+    pseudonymize_email,
+    sanitize_payload,
 )
 
 
@@ -35,6 +40,86 @@ class TestLogHandler(unittest.TestCase):
                 "acquisition_name": "123456_2026-10-10_00-01-02",
             },
         )
+        mock_log.reset_mock()
+        log_submit_job_request(
+            content=content,
+            event_type=EventType.STAGE_COMPLETE,
+            phases={"parse": 0.5, "airflow_trigger": 20.25},
+        )
+        mock_log.assert_called_once_with(
+            "Handling request",
+            extra={
+                "event_type": EventType.STAGE_COMPLETE,
+                "subject_id": "123456",
+                "acquisition_name": "123456_2026-10-10_00-01-02",
+                "phases": {"parse": 0.5, "airflow_trigger": 20.25},
+            },
+        )
+
+    def test_sanitize_payload(self):
+        """Tests that credentials are redacted and emails pseudonymized"""
+        content = {
+            "user_email": "Someone@Example.org",
+            "email_notification_types": ["fail"],
+            "upload_jobs": [
+                {
+                    "user_email": "someone@example.org",
+                    "s3_bucket": "private",
+                    "job_settings": {"api_key": "abc", "aws_token": 1},
+                }
+            ],
+            "password": ["x"],
+        }
+        sanitized = sanitize_payload(content)
+        pseudonym = pseudonymize_email("someone@example.org")
+        self.assertRegex(pseudonym, r"^user-[0-9a-f]{12}@example\.com$")
+        self.assertEqual(
+            {
+                "user_email": pseudonym,
+                "email_notification_types": ["fail"],
+                "upload_jobs": [
+                    {
+                        "user_email": pseudonym,
+                        "s3_bucket": "private",
+                        "job_settings": {
+                            "api_key": REDACTED,
+                            "aws_token": REDACTED,
+                        },
+                    }
+                ],
+                "password": [REDACTED],
+            },
+            sanitized,
+        )
+        # The request itself is not modified
+        self.assertEqual("Someone@Example.org", content["user_email"])
+
+    @patch("logging.info")
+    def test_log_submit_job_request_capture(self, mock_log: MagicMock):
+        """Tests that payloads are only captured when sampled"""
+        content = {"upload_jobs": [], "user_email": "someone@example.org"}
+        with patch.dict(os.environ, {"AIND_PAYLOAD_CAPTURE_RATE": "0"}):
+            log_submit_job_request(
+                content=content, capture_endpoint="/api/v2/submit_jobs"
+            )
+        mock_log.assert_not_called()
+        with patch.dict(os.environ, {"AIND_PAYLOAD_CAPTURE_RATE": "1"}):
+            log_submit_job_request(content=content)
+            mock_log.assert_not_called()
+            log_submit_job_request(
+                content=content, capture_endpoint="/api/v2/submit_jobs"
+            )
+        mock_log.assert_called_once_with(
+            PAYLOAD_CAPTURE_MESSAGE,
+            extra={
+                "event_type": EventType.PAYLOAD_CAPTURED,
+                "endpoint": "/api/v2/submit_jobs",
+                "payload": {
+                    "upload_jobs": [],
+                    "user_email": pseudonymize_email("someone@example.org"),
+                },
+            },
+        )
 
 
 class TestCustomJsonFormatter(unittest.TestCase):
@@ -69,7 +154,8 @@ class TestCustomJsonFormatter(unittest.TestCase):
         mock_file: MagicMock,
         mock_logging_config: MagicMock,
     ):
-        """Tests that logging is configured on package init"""
+        """Tests that logging is configured once, on the first call of
+        configure_logging instead of on package init"""
         example_yaml = """
         key: value
         list_items:
@@ -81,11 +167,22 @@ class TestCustomJsonFormatter(unittest.TestCase):
             example_yaml
         )
         importlib.reload(aind_data_transfer_service)
+        mock_logging_config.assert_not_called()
+        aind_data_transfer_service.configure_logging()
+        aind_data_transfer_service.configure_logging()
         mock_logging_config.assert_called_once_with(
             {"key": "value", "list_items": ["item1", "item2"]}
         )
         mock_log_info.assert_called_once()
 
+    def test_lazy_attributes(self):
+        """Tests that the formatter is loaded on first access"""
+        self.assertIs(
+            CustomJsonFormatter, aind_data_transfer_service.CustomJsonFormatter
+        )
+        with self.assertRaises(AttributeError):
+            getattr(aind_data_transfer_service, "NotAnAttribute")
+
 
 if __name__ == "__main__":
     unittest.main()
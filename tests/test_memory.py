@@ -0,0 +1,69 @@
+"""Tests memory module"""
+
+import os
+import tracemalloc
+import unittest
+from unittest.mock import patch
+
+from aind_data_transfer_service.memory import MemoryTracer
+
+# Keep allocations alive so they show up in the diff
+_retained = []
+
+
+def allocate(n: int) -> None:
+    """Allocate and keep n byte strings"""
+    _retained.extend(bytes(1000) for _ in range(n))
+
+
+class TestMemoryTracer(unittest.TestCase):
+    """Tests MemoryTracer class"""
+
+    def tearDown(self) -> None:
+        """Stop tracing and release allocations"""
+        tracemalloc.stop()
+        _retained.clear()
+
+    def test_diff(self):
+        """Tests that the call site that allocated between snapshots is at
+        the top of the diff"""
+        tracer = MemoryTracer()
+        with self.assertRaises(RuntimeError):
+            tracer.take_snapshot()
+        tracer.start()
+        self.assertTrue(tracer.status()["is_tracing"])
+        old = tracer.take_snapshot()
+        allocate(1000)
+        new = tracer.take_snapshot()
+        tracer.stop()
+        diff = tracer.diff(old["id"], new["id"], limit=1)
+        self.assertEqual(1, len(diff))
+        self.assertIn("test_memory.py", diff[0]["site"][0])
+        self.assertGreaterEqual(diff[0]["size_diff_bytes"], 1000 * 1000)
+        self.assertGreaterEqual(diff[0]["count_diff"], 1000)
+        self.assertGreater(new["traced_bytes"], old["traced_bytes"])
+        status = tracer.status()
+        self.assertFalse(status["is_tracing"])
+        self.assertEqual([old, new], status["snapshots"])
+        with self.assertRaises(ValueError):
+            tracer.diff(old["id"], new["id"], group_by="function")
+
+    def test_max_snapshots(self):
+        """Tests that only the newest snapshots are kept"""
+        tracer = MemoryTracer(max_snapshots=2)
+        tracer.start()
+        ids = [tracer.take_snapshot()["id"] for _ in range(3)]
+        self.assertEqual(ids[1:], [s["id"] for s in tracer.snapshots()])
+        with self.assertRaises(KeyError):
+            tracer.diff(ids[0], ids[2])
+        tracer.clear()
+        self.assertEqual([], tracer.snapshots())
+
+    def test_from_env(self):
+        """Tests that the tracer is configured from env vars"""
+        with patch.dict(os.environ, {"AIND_MEMORY_MAX_SNAPSHOTS": "3"}):
+            self.assertEqual(3, MemoryTracer.from_env().max_snapshots)
+
+
+if __name__ == "__main__":
+    unittest.main()
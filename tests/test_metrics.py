@@ -0,0 +1,105 @@
+"""Tests methods in metrics module"""
+
+import unittest
+
+from aind_data_transfer_service.metrics import (
+    Counter,
+    Gauge,
+    Histogram,
+    MetricsRegistry,
+    render_prometheus,
+)
+
+
+class TestMetrics(unittest.TestCase):
+    """Tests metric classes"""
+
+    def test_counter(self):
+        """Tests counter increments per label set"""
+        counter = Counter("jobs_total", "Jobs", label_names=("outcome",))
+        counter.inc(outcome="ok")
+        counter.inc(2, outcome="ok")
+        counter.inc(outcome="error")
+        self.assertEqual(3, counter.get(outcome="ok"))
+        self.assertEqual(1, counter.get(outcome="error"))
+        self.assertEqual(0, counter.get(outcome="other"))
+        with self.assertRaises(ValueError):
+            counter.inc(-1, outcome="ok")
+
+    def test_labels_mismatch(self):
+        """Tests that labels must match the declared label names"""
+        counter = Counter("jobs_total", "Jobs", label_names=("outcome",))
+        with self.assertRaises(ValueError) as e:
+            counter.inc(route="/")
+        self.assertIn("jobs_total expects labels", str(e.exception))
+
+    def test_gauge(self):
+        """Tests gauge set and get"""
+        gauge = Gauge("lag_seconds", "Lag")
+        self.assertIsNone(gauge.get())
+        gauge.set(0.5)
+        gauge.set(0.25)
+        self.assertEqual(0.25, gauge.get())
+
+    def test_histogram(self):
+        """Tests histogram counts and sums"""
+        histogram = Histogram("size_bytes", "Size", buckets=(10, 1, 100))
+        self.assertEqual((1, 10, 100), histogram.buckets)
+        for value in [0.5, 1, 5, 50, 500]:
+            histogram.observe(value)
+        self.assertEqual(5, histogram.get_count())
+        self.assertEqual(556.5, histogram.get_sum())
+        counts, _ = histogram._values[()]
+        self.assertEqual([2, 1, 1, 1], counts)
+
+    def test_registry(self):
+        """Tests registry lookup and duplicate names"""
+        registry = MetricsRegistry()
+        gauge = registry.register(Gauge("b_metric", "B"))
+        counter = registry.register(Counter("a_metric", "A"))
+        self.assertIs(gauge, registry.get("b_metric"))
+        self.assertEqual([counter, gauge], registry.metrics())
+        with self.assertRaises(ValueError):
+            registry.register(Counter("a_metric", "A"))
+
+    def test_render_prometheus(self):
+        """Tests metrics are rendered in the Prometheus text format"""
+        registry = MetricsRegistry()
+        counter = registry.register(
+            Counter("jobs_total", "Jobs", label_names=("outcome",))
+        )
+        histogram = registry.register(
+            Histogram(
+                "latency_seconds",
+                "Latency",
+                label_names=("route",),
+                buckets=(0.1, 1),
+            )
+        )
+        registry.register(Gauge("unset", "Never set"))
+        counter.inc(2, outcome='say "hi"\n')
+        histogram.observe(0.05, route="/")
+        histogram.observe(0.5, route="/")
+        histogram.observe(5, route="/")
+        expected = "\n".join(
+            [
+                "# HELP jobs_total Jobs",
+                "# TYPE jobs_total counter",
+                'jobs_total{outcome="say \\"hi\\"\\n"} 2',
+                "# HELP latency_seconds Latency",
+                "# TYPE latency_seconds histogram",
+                'latency_seconds_bucket{route="/",le="0.1"} 1',
+                'latency_seconds_bucket{route="/",le="1"} 2',
+                'latency_seconds_bucket{route="/",le="+Inf"} 3',
+                'latency_seconds_sum{route="/"} 5.55',
+                'latency_seconds_count{route="/"} 3',
+                "# HELP unset Never set",
+                "# TYPE unset gauge",
+                "",
+            ]
+        )
+        self.assertEqual(expected, render_prometheus(registry))
+
+
+if __name__ == "__main__":
+    unittest.main()
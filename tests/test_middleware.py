@@ -0,0 +1,155 @@
+"""Tests middleware module"""
+
+import os
+import time
+import unittest
+from unittest.mock import patch
+
+from starlette.applications import Starlette
+from starlette.datastructures import Headers
+from starlette.responses import PlainTextResponse
+from starlette.routing import Route
+from starlette.testclient import TestClient
+
+from aind_data_transfer_service.metrics import HTTP_REQUEST_SECONDS
+from aind_data_transfer_service.middleware import (
+    RequestMetricsMiddleware,
+    ServerTimingMiddleware,
+    SlowRequestLog,
+    SlowRequestMiddleware,
+    content_length,
+)
+from aind_data_transfer_service.timing import annotate, span
+
+
+async def hello(request):
+    """Respond with the path param"""
+    with span("greet"):
+        return PlainTextResponse(request.path_params["name"])
+
+
+async def sleepy(request):
+    """Sleep for the seconds in the query params"""
+    annotate(jobs=3)
+    with span("sleep"):
+        time.sleep(float(request.query_params["seconds"]))
+    return PlainTextResponse("awake")
+
+
+async def fail(_):
+    """Raise an error"""
+    raise RuntimeError("Something went wrong")
+
+
+class TestContentLength(unittest.TestCase):
+    """Tests content_length"""
+
+    def test_content_length(self):
+        """Tests that missing or non-numeric headers are ignored"""
+        self.assertEqual(12, content_length(Headers({"content-length": "12"})))
+        self.assertIsNone(content_length(Headers()))
+        self.assertIsNone(content_length(Headers({"content-length": "abc"})))
+        self.assertIsNone(content_length(Headers({"content-length": "-1"})))
+
+
+class TestRequestMetricsMiddleware(unittest.TestCase):
+    """Tests RequestMetricsMiddleware"""
+
+    @classmethod
+    def setUpClass(cls) -> None:
+        """Set up an app with the middleware"""
+        app = Starlette(
+            routes=[
+                Route("/hello/{name:str}", endpoint=hello, methods=["GET"]),
+                Route("/fail", endpoint=fail, methods=["GET"]),
+            ]
+        )
+        app.add_middleware(RequestMetricsMiddleware)
+        cls.client = TestClient(app, raise_server_exceptions=False)
+
+    def assert_recorded(self, method: str, path: str, route: str, status):
+        """Assert that a request is recorded with the expected labels"""
+        labels = {"method": method, "route": route, "status": str(status)}
+        count = HTTP_REQUEST_SECONDS.get_count(**labels)
+        response = self.client.request(method, path)
+        self.assertEqual(status, response.status_code)
+        self.assertEqual(count + 1, HTTP_REQUEST_SECONDS.get_count(**labels))
+
+    def test_route_templates(self):
+        """Tests requests are labelled by route template and status"""
+        self.assert_recorded("GET", "/hello/abc", "/hello/{name:str}", 200)
+        self.assert_recorded("POST", "/hello/abc", "/hello/{name:str}", 405)
+        self.assert_recorded("GET", "/nowhere/abc", "unmatched", 404)
+
+    def test_errors(self):
+        """Tests requests that raise are recorded as 500s"""
+        self.assert_recorded("GET", "/fail", "/fail", 500)
+
+
+class TestServerTimingMiddleware(unittest.TestCase):
+    """Tests ServerTimingMiddleware"""
+
+    def test_server_timing_header(self):
+        """Tests that spans recorded by the endpoint are sent in the
+        Server-Timing header"""
+        app = Starlette(
+            routes=[Route("/hello/{name:str}", endpoint=hello)],
+        )
+        app.add_middleware(ServerTimingMiddleware)
+        with TestClient(app) as client:
+            response = client.get("/hello/abc")
+            not_found = client.get("/nowhere")
+        self.assertEqual("abc", response.text)
+        self.assertRegex(
+            response.headers["Server-Timing"],
+            r"^greet;dur=[0-9.]+, total;dur=[0-9.]+$",
+        )
+        self.assertRegex(
+            not_found.headers["Server-Timing"], r"^total;dur=[0-9.]+$"
+        )
+
+
+class TestSlowRequestMiddleware(unittest.TestCase):
+    """Tests SlowRequestMiddleware and SlowRequestLog"""
+
+    def test_slow_requests(self):
+        """Tests that only requests slower than the threshold are recorded
+        with their phases and annotations"""
+        log = SlowRequestLog(threshold=0.05)
+        app = Starlette(
+            routes=[Route("/sleep", endpoint=sleepy, methods=["POST"])],
+        )
+        app.add_middleware(SlowRequestMiddleware, log=log)
+        app.add_middleware(ServerTimingMiddleware)
+        with TestClient(app) as client:
+            client.post("/sleep?seconds=0", content=b"{}")
+            client.post("/sleep?seconds=0.06", content=b"{}")
+        (record,) = log.records()
+        self.assertEqual("POST", record["method"])
+        self.assertEqual("/sleep", record["route"])
+        self.assertEqual(200, record["status"])
+        self.assertGreaterEqual(record["duration_ms"], 60)
+        self.assertEqual(2, record["request_bytes"])
+        self.assertEqual(["sleep"], list(record["phases"]))
+        self.assertEqual({"jobs": 3}, record["attributes"])
+        self.assertEqual(0, record["upstream_call_count"])
+        self.assertIsNone(record["trace_id"])
+
+    def test_slow_request_log(self):
+        """Tests that only the newest records are kept"""
+        log = SlowRequestLog(max_records=2)
+        for i in range(3):
+            log.add({"path": f"/{i}"})
+        self.assertEqual(["/2", "/1"], [r["path"] for r in log.records()])
+        env = {
+            "AIND_SLOW_REQUEST_SECONDS": "0.5",
+            "AIND_SLOW_REQUEST_LOG_SIZE": "5",
+        }
+        with patch.dict(os.environ, env):
+            log = SlowRequestLog.from_env()
+        self.assertEqual(0.5, log.threshold)
+        self.assertEqual(5, log._records.maxlen)
+
+
+if __name__ == "__main__":
+    unittest.main()
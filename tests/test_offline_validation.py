@@ -0,0 +1,170 @@
+"""Tests offline_validation module"""
+
+import json
+import os
+import tempfile
+import unittest
+from datetime import datetime
+from email.message import Message
+from io import BytesIO
+from unittest.mock import MagicMock, patch
+from urllib.error import HTTPError, URLError
+
+from aind_data_schema_models.modalities import Modality
+from pydantic import ValidationError
+
+from aind_data_transfer_service.configs.platforms_v1 import Platform
+from aind_data_transfer_service.models.core import (
+    SubmitJobRequestV2,
+    Task,
+    UploadJobConfigsV2,
+)
+from aind_data_transfer_service.offline_validation import OfflineValidator
+
+SNAPSHOT = {
+    "job_types": ["default", "ecephys"],
+    "project_names": ["Behavior Platform"],
+    "modalities": ["behavior-videos", "ecephys"],
+    "platforms": ["behavior", "ecephys"],
+}
+
+
+def snapshot_response(data: dict, etag: str) -> MagicMock:
+    """Mock response returned by urlopen"""
+    response = MagicMock()
+    response.__enter__.return_value = response
+    response.headers = {"ETag": etag}
+    response.read.return_value = json.dumps(
+        {"message": "Retrieved validation context", "data": data}
+    ).encode("utf-8")
+    return response
+
+
+def not_modified_error() -> HTTPError:
+    """Error raised by urlopen for a 304 response"""
+    return HTTPError("url", 304, "Not Modified", Message(), BytesIO())
+
+
+class TestOfflineValidator(unittest.TestCase):
+    """Tests OfflineValidator class"""
+
+    @classmethod
+    def setUpClass(cls) -> None:
+        """Set up test class"""
+        job = UploadJobConfigsV2(
+            job_type="default",
+            project_name="Behavior Platform",
+            platform=Platform.BEHAVIOR,
+            modalities=[Modality.BEHAVIOR_VIDEOS],
+            subject_id="123456",
+            acq_datetime=datetime(2020, 10, 13, 13, 10, 10),
+            tasks={
+                "modality_transformation_settings": {
+                    "behavior-videos": Task(
+                        job_settings={"input_source": "dir/data_set_1"},
+                    ),
+                }
+            },
+        )
+        cls.example_request = {
+            "user_email": "test@example.com",
+            "upload_jobs": [
+                job.model_dump(
+                    mode="json", exclude={"s3_bucket": True, "s3_prefix": True}
+                )
+            ],
+        }
+
+    def setUp(self) -> None:
+        """Use a temporary cache file"""
+        temp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(temp_dir.cleanup)
+        self.cache_path = os.path.join(temp_dir.name, "cache", "context.json")
+
+    @patch("aind_data_transfer_service.offline_validation.time.time")
+    @patch("aind_data_transfer_service.offline_validation.urlopen")
+    def test_get_context_cached(
+        self, mock_urlopen: MagicMock, mock_time: MagicMock
+    ):
+        """Tests that the snapshot is downloaded once and then only checked
+        for changes with the ETag after the ttl expires"""
+        mock_time.return_value = 1000.0
+        mock_urlopen.return_value = snapshot_response(SNAPSHOT, '"v1"')
+        validator = OfflineValidator(cache_path=self.cache_path, ttl=60)
+        self.assertEqual(SNAPSHOT, validator.get_context())
+        mock_time.return_value = 1059.0
+        # A new validator reads the cache file
+        self.assertEqual(
+            SNAPSHOT,
+            OfflineValidator(cache_path=self.cache_path, ttl=60).get_context(),
+        )
+        self.assertEqual(1, mock_urlopen.call_count)
+        mock_time.return_value = 1061.0
+        mock_urlopen.side_effect = not_modified_error()
+        self.assertEqual(SNAPSHOT, validator.get_context())
+        request = mock_urlopen.call_args.args[0]
+        self.assertEqual('"v1"', request.get_header("If-none-match"))
+        with open(self.cache_path) as f:
+            self.assertEqual(1061.0, json.load(f)["fetched_at"])
+
+    @patch("aind_data_transfer_service.offline_validation.time.time")
+    @patch("aind_data_transfer_service.offline_validation.urlopen")
+    def test_get_context_changed(
+        self, mock_urlopen: MagicMock, mock_time: MagicMock
+    ):
+        """Tests that a changed snapshot replaces the cached one"""
+        mock_time.return_value = 1000.0
+        mock_urlopen.return_value = snapshot_response(SNAPSHOT, '"v1"')
+        validator = OfflineValidator(cache_path=None, ttl=60)
+        validator.get_context()
+        mock_time.return_value = 2000.0
+        new_snapshot = dict(SNAPSHOT, job_types=["default"])
+        mock_urlopen.return_value = snapshot_response(new_snapshot, '"v2"')
+        self.assertEqual(new_snapshot, validator.get_context())
+        self.assertFalse(os.path.exists(self.cache_path))
+
+    @patch("aind_data_transfer_service.offline_validation.time.time")
+    @patch("aind_data_transfer_service.offline_validation.urlopen")
+    def test_get_context_unreachable(
+        self, mock_urlopen: MagicMock, mock_time: MagicMock
+    ):
+        """Tests that an expired snapshot is used if the service can't be
+        reached and that an error is raised if there is no snapshot"""
+        mock_time.return_value = 1000.0
+        mock_urlopen.side_effect = URLError("Connection refused")
+        with self.assertRaises(URLError):
+            OfflineValidator(cache_path=self.cache_path).get_context()
+        mock_urlopen.side_effect = None
+        mock_urlopen.return_value = snapshot_response(SNAPSHOT, '"v1"')
+        OfflineValidator(cache_path=self.cache_path, ttl=60).get_context()
+        mock_time.return_value = 2000.0
+        mock_urlopen.side_effect = URLError("Connection refused")
+        with self.assertLogs(level="WARNING") as captured:
+            context = OfflineValidator(
+                cache_path=self.cache_path, ttl=60
+            ).get_context()
+        self.assertEqual(SNAPSHOT, context)
+        self.assertIn("Using expired validation context", captured.output[0])
+
+    @patch("aind_data_transfer_service.offline_validation.urlopen")
+    def test_validate(self, mock_urlopen: MagicMock):
+        """Tests that requests are validated against the snapshot"""
+        mock_urlopen.return_value = snapshot_response(SNAPSHOT, '"v1"')
+        validator = OfflineValidator(cache_path=self.cache_path)
+        model = validator.validate(self.example_request)
+        self.assertIsInstance(model, SubmitJobRequestV2)
+        self.assertEqual(
+            model, validator.validate(json.dumps(self.example_request))
+        )
+        invalid_request = json.loads(json.dumps(self.example_request))
+        invalid_request["upload_jobs"][0]["job_type"] = "typo"
+        with self.assertRaises(ValidationError) as err:
+            validator.validate(invalid_request)
+        self.assertIn(
+            "typo must be one of ['default', 'ecephys']", str(err.exception)
+        )
+        self.assertEqual(1, mock_urlopen.call_count)
+
+
+if __name__ == "__main__":
+    unittest.main()
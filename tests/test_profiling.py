@@ -0,0 +1,82 @@
+"""Tests profiling module"""
+
+import os
+import tempfile
+import threading
+import time
+import unittest
+from unittest.mock import patch
+
+from aind_data_transfer_service.profiling import (
+    ProfileStore,
+    SamplingProfiler,
+)
+
+
+def busy_loop(stop: threading.Event) -> None:
+    """Spin until stopped"""
+    while not stop.is_set():
+        sum(range(100))
+
+
+class TestSamplingProfiler(unittest.TestCase):
+    """Tests SamplingProfiler class"""
+
+    def test_samples_other_threads(self):
+        """Tests that stacks of other threads are sampled and collapsed"""
+        stop = threading.Event()
+        worker = threading.Thread(
+            target=busy_loop, args=(stop,), name="worker-1"
+        )
+        profiler = SamplingProfiler(interval=0.001)
+        worker.start()
+        profiler.start()
+        time.sleep(0.05)
+        profiler.stop()
+        stop.set()
+        worker.join()
+        lines = profiler.collapsed().splitlines()
+        worker_lines = [line for line in lines if line.startswith("worker-1;")]
+        self.assertTrue(worker_lines)
+        stack, count = worker_lines[0].rsplit(" ", 1)
+        self.assertIn("busy_loop (test_profiling.py:", stack)
+        self.assertGreater(int(count), 0)
+        self.assertFalse(any("sampling-profiler" in line for line in lines))
+
+
+class TestProfileStore(unittest.TestCase):
+    """Tests ProfileStore class"""
+
+    def test_ring_buffer(self):
+        """Tests that only the newest max_profiles profiles are kept"""
+        with tempfile.TemporaryDirectory() as tmp:
+            store = ProfileStore(os.path.join(tmp, "profiles"), max_profiles=2)
+            self.assertEqual([], store.list())
+            names = []
+            for i in range(3):
+                name = store.new_name(f"POST /api/v2/validate_csv?i={i}")
+                store.save(name, f"stack {i}\n")
+                names.append(name)
+            profiles = store.list()
+            self.assertEqual(names[:0:-1], [p["name"] for p in profiles])
+            self.assertEqual(8, profiles[0]["size_bytes"])
+            self.assertRegex(profiles[0]["created"], r" UTC$")
+            self.assertIsNone(store.path(names[0]))
+            with open(store.path(names[2])) as f:
+                self.assertEqual("stack 2\n", f.read())
+            self.assertIsNone(store.path("../secrets.folded"))
+            with self.assertRaises(ValueError):
+                store.save("../secrets.folded", "")
+        self.assertRegex(names[0], r"^[0-9]+-POST_api_v2_validate_csv_i_0")
+
+    def test_from_env(self):
+        """Tests that the store is configured from env vars"""
+        env = {"AIND_PROFILE_DIR": "profiles", "AIND_PROFILE_MAX_FILES": "5"}
+        with patch.dict(os.environ, env):
+            store = ProfileStore.from_env()
+        self.assertEqual("profiles", store.directory)
+        self.assertEqual(5, store.max_profiles)
+
+
+if __name__ == "__main__":
+    unittest.main()
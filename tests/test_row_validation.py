@@ -0,0 +1,264 @@
+"""Tests methods in row_validation module"""
+
+import csv
+import json
+import os
+import pickle
+import tempfile
+import unittest
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from unittest.mock import MagicMock, patch
+
+from aind_data_transfer_service import row_validation
+from aind_data_transfer_service.metrics import (
+    ROW_VALIDATION_CACHE_HITS,
+    ROW_VALIDATION_CACHE_MISSES,
+)
+from aind_data_transfer_service.row_validation import (
+    ParallelRowValidator,
+    RowValidationCache,
+    _get_worker_context,
+    compute_context_version,
+    compute_row_hash,
+    validate_job_rows,
+)
+
+RESOURCES_DIR = Path(os.path.dirname(os.path.realpath(__file__))) / "resources"
+SAMPLE_FILE = RESOURCES_DIR / "new_sample.csv"
+MALFORMED_FILE = RESOURCES_DIR / "sample_malformed.csv"
+
+CONTEXT = {
+    "job_types": ["default", "ecephys", "custom"],
+    "project_names": ["Ephys Platform", "Behavior Platform"],
+    "current_jobs": [],
+}
+
+
+def read_rows(file_path: Path) -> list:
+    """Read rows from a csv file"""
+    with open(file_path, newline="") as csvfile:
+        return list(csv.DictReader(csvfile, skipinitialspace=True))
+
+
+class TestValidateJobRows(unittest.TestCase):
+    """Tests validate_job_rows method"""
+
+    def test_validate_job_rows(self):
+        """Tests that jobs and errors are returned in row order"""
+        rows = (
+            read_rows(SAMPLE_FILE)
+            + read_rows(MALFORMED_FILE)
+            + [{"modality0.capsule_id": "abc"}]
+        )
+        results = validate_job_rows(rows, CONTEXT)
+        self.assertEqual(len(rows), len(results))
+        self.assertTrue(all(job is not None for job, _ in results[:3]))
+        self.assertEqual("Ephys Platform", results[0][0]["project_name"])
+        errors = [error for _, error in results if error is not None]
+        self.assertEqual(len(rows) - 3, len(errors))
+        # Errors are formatted the same way validate_csv always has
+        for error in errors[:-1]:
+            self.assertIsInstance(json.loads(error), list)
+        self.assertEqual("('modality',)", errors[-1])
+
+
+class TestParallelRowValidator(unittest.TestCase):
+    """Tests ParallelRowValidator class"""
+
+    def test_validate_parallel(self):
+        """Tests that results from the process pool match validating the
+        rows one after another"""
+        rows = (
+            read_rows(SAMPLE_FILE)
+            + read_rows(MALFORMED_FILE)
+            + [{"modality0.capsule_id": "abc"}]
+        )
+        validator = ParallelRowValidator(max_workers=2, chunk_size=2)
+        try:
+            results = validator.validate(iter(rows), CONTEXT)
+        finally:
+            validator.shutdown()
+        self.assertEqual(validate_job_rows(rows, CONTEXT), results)
+
+    def test_validate_small_sheet(self):
+        """Tests that sheets that fit in one chunk skip the process pool"""
+        rows = read_rows(SAMPLE_FILE)
+        validator = ParallelRowValidator(max_workers=2, chunk_size=10)
+        results = validator.validate(rows, CONTEXT)
+        self.assertIsNone(validator._executor)
+        self.assertEqual(validate_job_rows(rows, CONTEXT), results)
+
+    def test_validate_disabled(self):
+        """Tests that rows are validated in the calling thread by default"""
+        rows = read_rows(SAMPLE_FILE)
+        validator = ParallelRowValidator(chunk_size=1)
+        self.assertFalse(validator.enabled)
+        results = validator.validate(rows, CONTEXT)
+        self.assertIsNone(validator._executor)
+        self.assertEqual(validate_job_rows(rows, CONTEXT), results)
+
+    def test_invalid_chunk_size(self):
+        """Tests that chunk_size must be positive"""
+        with self.assertRaises(ValueError):
+            ParallelRowValidator(chunk_size=0)
+
+    @patch.dict(
+        os.environ,
+        {
+            "AIND_PARALLEL_VALIDATION_WORKERS": "3",
+            "AIND_PARALLEL_VALIDATION_CHUNK_SIZE": "50",
+        },
+    )
+    def test_from_env(self):
+        """Tests that the validator is configured from env vars"""
+        validator = ParallelRowValidator.from_env()
+        self.assertTrue(validator.enabled)
+        self.assertEqual(3, validator.max_workers)
+        self.assertEqual(50, validator.chunk_size)
+
+    @patch.dict(row_validation._worker_contexts, clear=True)
+    def test_get_worker_context(self):
+        """Tests that each context version is loaded once and that only
+        the most recent versions are kept"""
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            path = os.path.join(tmp_dir, "context.pkl")
+            with open(path, "wb") as f:
+                pickle.dump(CONTEXT, f)
+            context = _get_worker_context("version-0", path)
+            for i in range(1, row_validation._MAX_WORKER_CONTEXTS):
+                _get_worker_context(f"version-{i}", path)
+        self.assertEqual(CONTEXT, context)
+        # Cached versions are not read from the file again
+        self.assertIs(context, _get_worker_context("version-0", path))
+        with self.assertRaises(FileNotFoundError):
+            _get_worker_context("version-new", path)
+        self.assertEqual(
+            row_validation._MAX_WORKER_CONTEXTS,
+            len(row_validation._worker_contexts),
+        )
+
+    @patch.dict(row_validation._worker_contexts, clear=True)
+    def test_context_sent_once(self):
+        """Tests that chunks are sent the context version and the path of
+        the context file instead of the context itself"""
+        rows = read_rows(SAMPLE_FILE) * 3
+        context = {
+            **CONTEXT,
+            "current_jobs": [{"upload_jobs": [{"s3_prefix": "a"}]}] * 100,
+        }
+        validator = ParallelRowValidator(max_workers=2, chunk_size=2)
+        calls = []
+        validate_chunk = row_validation._validate_chunk
+
+        def record_chunk(version: str, path: str, chunk: list) -> list:
+            """Record the arguments sent with the chunk"""
+            calls.append((version, path))
+            return validate_chunk(version, path, chunk)
+
+        with (
+            ThreadPoolExecutor(max_workers=2) as executor,
+            patch.object(validator, "_get_executor", return_value=executor),
+            patch.object(row_validation, "_validate_chunk", record_chunk),
+        ):
+            results = validator.validate(rows, context)
+        self.assertEqual(validate_job_rows(rows, context), results)
+        self.assertEqual(5, len(calls))
+        self.assertEqual(
+            {(compute_context_version(context), calls[0][1])}, set(calls)
+        )
+        self.assertFalse(os.path.exists(calls[0][1]))
+        self.assertEqual(1, len(row_validation._worker_contexts))
+
+
+class TestRowValidationCache(unittest.TestCase):
+    """Tests RowValidationCache class"""
+
+    def test_compute_row_hash(self):
+        """Tests that row hashes depend on content and column order"""
+        self.assertEqual(
+            compute_row_hash({"a": "1", "b": "2"}),
+            compute_row_hash({"a": "1", "b": "2"}),
+        )
+        self.assertNotEqual(
+            compute_row_hash({"a": "1", "b": "2"}),
+            compute_row_hash({"b": "2", "a": "1"}),
+        )
+        self.assertNotEqual(
+            compute_row_hash({"a": "1", "b": "2"}),
+            compute_row_hash({"a": "1", "b": "3"}),
+        )
+
+    def test_compute_context_version(self):
+        """Tests that the version changes with the context content"""
+        self.assertEqual(
+            compute_context_version(CONTEXT),
+            compute_context_version(dict(reversed(CONTEXT.items()))),
+        )
+        self.assertNotEqual(
+            compute_context_version(CONTEXT),
+            compute_context_version(
+                {**CONTEXT, "current_jobs": [{"s3_prefix": "abc"}]}
+            ),
+        )
+
+    def test_validate(self):
+        """Tests that only changed rows are validated again"""
+        rows = read_rows(SAMPLE_FILE) + read_rows(MALFORMED_FILE)
+        cache = RowValidationCache(max_size=100)
+        mock_validate = MagicMock(wraps=validate_job_rows)
+        hits = ROW_VALIDATION_CACHE_HITS.get()
+        misses = ROW_VALIDATION_CACHE_MISSES.get()
+        expected_results = validate_job_rows(rows, CONTEXT)
+        self.assertEqual(
+            expected_results, cache.validate(rows, CONTEXT, mock_validate)
+        )
+        self.assertEqual(len(rows), len(cache))
+        edited_rows = [dict(row) for row in rows]
+        edited_rows[4]["subject-id"] = "654321"
+        results = cache.validate(edited_rows, CONTEXT, mock_validate)
+        self.assertEqual(expected_results[:4], results[:4])
+        self.assertEqual(expected_results[5:], results[5:])
+        self.assertEqual(
+            validate_job_rows(edited_rows[4:5], CONTEXT)[0], results[4]
+        )
+        self.assertEqual([edited_rows[4]], mock_validate.call_args.args[0])
+        self.assertEqual(len(rows) - 1, ROW_VALIDATION_CACHE_HITS.get() - hits)
+        self.assertEqual(
+            len(rows) + 1, ROW_VALIDATION_CACHE_MISSES.get() - misses
+        )
+        # A new context version invalidates every row
+        new_context = {**CONTEXT, "project_names": ["Ephys Platform"]}
+        cache.validate(rows, new_context, mock_validate)
+        self.assertEqual(rows, mock_validate.call_args.args[0])
+
+    def test_lru_eviction(self):
+        """Tests that the least recently used results are evicted"""
+        cache = RowValidationCache(max_size=2)
+        cache.put(("a", "v"), ({"a": 1}, None))
+        cache.put(("b", "v"), ({"b": 1}, None))
+        self.assertIsNotNone(cache.get(("a", "v")))
+        cache.put(("c", "v"), ({"c": 1}, None))
+        self.assertIsNone(cache.get(("b", "v")))
+        self.assertIsNotNone(cache.get(("a", "v")))
+        self.assertIsNotNone(cache.get(("c", "v")))
+        cache.clear()
+        self.assertEqual(0, len(cache))
+
+    def test_disabled(self):
+        """Tests that nothing is cached if max_size is 0"""
+        cache = RowValidationCache(max_size=0)
+        rows = read_rows(SAMPLE_FILE)
+        self.assertEqual(
+            validate_job_rows(rows, CONTEXT), cache.validate(rows, CONTEXT)
+        )
+        self.assertEqual(0, len(cache))
+
+    @patch.dict(os.environ, {"AIND_ROW_VALIDATION_CACHE_SIZE": "10"})
+    def test_from_env(self):
+        """Tests that the cache is configured from env vars"""
+        self.assertEqual(10, RowValidationCache.from_env().max_size)
+
+
+if __name__ == "__main__":
+    unittest.main()
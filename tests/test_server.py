@@ -3,6 +3,7 @@
 import asyncio
 import json
 import os
+import tempfile
 import unittest
 from datetime import datetime, timedelta, timezone
 from io import BytesIO
@@ -23,20 +24,41 @@ from aind_data_transfer_service.configs.job_upload_template import (
     JobUploadTemplate,
 )
 from aind_data_transfer_service.configs.platforms_v1 import Platform
+from aind_data_transfer_service.metrics import (
+    AIRFLOW_DAG_RUNS_PAGE_DECODED_BYTES,
+    AIRFLOW_DAG_RUNS_PAGE_WIRE_BYTES,
+    JOBS_CANCELLED,
+    ROW_VALIDATION_CACHE_HITS,
+    UPLOAD_JOBS_REJECTED_DUPLICATE,
+    UPLOAD_JOBS_SUBMITTED,
+    UPSTREAM_REQUEST_SECONDS,
+)
 from aind_data_transfer_service.models.core import (
     SubmitJobRequestV2,
     Task,
     UploadJobConfigsV2,
+    compute_job_fingerprint,
 )
 from aind_data_transfer_service.models.internal import (
     AirflowDagRunsRequestParameters,
     JobParamInfo,
 )
+from aind_data_transfer_service.row_validation import (
+    ParallelRowValidator,
+    RowValidationCache,
+)
 from aind_data_transfer_service.server import (
     app,
+    get_airflow_client,
     get_job_types,
     get_project_names,
+    memory_tracer,
+    profile_store,
+    row_cache,
+    slow_request_log,
 )
+from aind_data_transfer_service.tracing import InMemorySpanExporter, tracer
+from aind_data_transfer_service.worker_pool import WorkerPool
 
 TEST_DIRECTORY = Path(os.path.dirname(os.path.realpath(__file__)))
 SAMPLE_INVALID_EXT = TEST_DIRECTORY / "resources" / "sample_invalid_ext.txt"
@@ -144,6 +166,10 @@ class TestServer(unittest.TestCase):
         )
         cls.example_configs_v2 = example_configs_v2
 
+    def setUp(self) -> None:
+        """Clear cached row validation results so tests are independent"""
+        row_cache.clear()
+
     @patch("httpx.AsyncClient.get")
     def test_get_project_names(self, mock_get: MagicMock):
         """Tests get_project_names method"""
@@ -419,6 +445,97 @@ class TestServer(unittest.TestCase):
             "airflow_jobs_url/~/dagRuns/list",
         )
 
+    @patch.dict(os.environ, EXAMPLE_ENV_VAR1, clear=True)
+    @patch("httpx.AsyncClient.post")
+    def test_get_job_status_list_page_size_metrics(
+        self,
+        mock_post: MagicMock,
+    ):
+        """Tests that wire and decoded bytes are recorded per page."""
+        mock_dag_runs_response = Response()
+        mock_dag_runs_response.status_code = 200
+        mock_dag_runs_response._content = json.dumps(
+            self.list_dag_runs_response
+        ).encode("utf-8")
+        mock_dag_runs_response.headers["Content-Encoding"] = "gzip"
+        mock_dag_runs_response.headers["Content-Length"] = "1000"
+        mock_post.return_value = mock_dag_runs_response
+        wire_count = AIRFLOW_DAG_RUNS_PAGE_WIRE_BYTES.get_count(
+            content_encoding="gzip"
+        )
+        wire_sum = AIRFLOW_DAG_RUNS_PAGE_WIRE_BYTES.get_sum(
+            content_encoding="gzip"
+        )
+        decoded_sum = AIRFLOW_DAG_RUNS_PAGE_DECODED_BYTES.get_sum(
+            content_encoding="gzip"
+        )
+        with TestClient(app) as client:
+            response = client.get("/api/v1/get_job_status_list")
+        self.assertEqual(200, response.status_code)
+        self.assertEqual(
+            wire_count + 1,
+            AIRFLOW_DAG_RUNS_PAGE_WIRE_BYTES.get_count(
+                content_encoding="gzip"
+            ),
+        )
+        self.assertEqual(
+            wire_sum + 1000,
+            AIRFLOW_DAG_RUNS_PAGE_WIRE_BYTES.get_sum(content_encoding="gzip"),
+        )
+        self.assertEqual(
+            decoded_sum + len(mock_dag_runs_response.content),
+            AIRFLOW_DAG_RUNS_PAGE_DECODED_BYTES.get_sum(
+                content_encoding="gzip"
+            ),
+        )
+
+    @patch.dict(os.environ, EXAMPLE_ENV_VAR1, clear=True)
+    @patch("httpx.AsyncClient.post")
+    def test_get_job_status_list_page_size_metrics_chunked(
+        self,
+        mock_post: MagicMock,
+    ):
+        """Tests that the wire size isn't recorded without a Content-Length
+        header."""
+        mock_dag_runs_response = Response()
+        mock_dag_runs_response.status_code = 200
+        mock_dag_runs_response._content = json.dumps(
+            self.list_dag_runs_response
+        ).encode("utf-8")
+        mock_dag_runs_response.headers["Content-Encoding"] = "deflate"
+        mock_dag_runs_response.headers["Transfer-Encoding"] = "chunked"
+        mock_post.return_value = mock_dag_runs_response
+        wire_count = AIRFLOW_DAG_RUNS_PAGE_WIRE_BYTES.get_count(
+            content_encoding="deflate"
+        )
+        decoded_count = AIRFLOW_DAG_RUNS_PAGE_DECODED_BYTES.get_count(
+            content_encoding="deflate"
+        )
+        with TestClient(app) as client:
+            response = client.get("/api/v1/get_job_status_list")
+        self.assertEqual(200, response.status_code)
+        self.assertEqual(
+            wire_count,
+            AIRFLOW_DAG_RUNS_PAGE_WIRE_BYTES.get_count(
+                content_encoding="deflate"
+            ),
+        )
+        self.assertEqual(
+            decoded_count + 1,
+            AIRFLOW_DAG_RUNS_PAGE_DECODED_BYTES.get_count(
+                content_encoding="deflate"
+            ),
+        )
+
+    @patch.dict(os.environ, EXAMPLE_ENV_VAR1, clear=True)
+    def test_get_airflow_client(self):
+        """Tests that the airflow client asks for compressed responses."""
+        client = get_airflow_client()
+        self.assertEqual(
+            "br, gzip, deflate", client.headers["Accept-Encoding"]
+        )
+        self.assertIsNotNone(client.auth)
+
     @patch.dict(os.environ, EXAMPLE_ENV_VAR1, clear=True)
     @patch("httpx.AsyncClient.get")
     def test_get_tasks_list_query_params(
@@ -815,6 +932,62 @@ class TestServer(unittest.TestCase):
         )
         self.assertEqual(1, len(captured.output))
 
+    @patch.dict(os.environ, EXAMPLE_ENV_VAR1, clear=True)
+    @patch("aind_data_transfer_service.server.get_job_types")
+    @patch("aind_data_transfer_service.server.get_project_names")
+    def test_get_validation_context(
+        self,
+        mock_get_project_names: MagicMock,
+        mock_get_job_types: MagicMock,
+    ):
+        """Tests that the validation context snapshot has an ETag and that a
+        matching If-None-Match gets a 304."""
+        mock_get_job_types.return_value = ["ecephys", "default"]
+        mock_get_project_names.return_value = ["Ephys Platform"]
+        with TestClient(app) as client:
+            response = client.get("/api/v2/validation_context")
+            etag = response.headers["ETag"]
+            not_modified = client.get(
+                "/api/v2/validation_context",
+                headers={"If-None-Match": f'"other", {etag}'},
+            )
+            mock_get_project_names.return_value = ["Ephys Platform", "MSMA"]
+            modified = client.get(
+                "/api/v2/validation_context",
+                headers={"If-None-Match": etag},
+            )
+        self.assertEqual(200, response.status_code)
+        data = response.json()["data"]
+        self.assertEqual(["default", "ecephys"], data["job_types"])
+        self.assertEqual(["Ephys Platform"], data["project_names"])
+        self.assertIn("ecephys", data["modalities"])
+        self.assertIn("behavior", data["platforms"])
+        self.assertEqual(304, not_modified.status_code)
+        self.assertEqual(etag, not_modified.headers["ETag"])
+        self.assertEqual(b"", not_modified.content)
+        self.assertEqual(200, modified.status_code)
+        self.assertNotEqual(etag, modified.headers["ETag"])
+
+    @patch.dict(os.environ, EXAMPLE_ENV_VAR1, clear=True)
+    @patch("aind_data_transfer_service.server.get_job_types")
+    @patch("aind_data_transfer_service.server.get_project_names")
+    def test_get_validation_context_error(
+        self,
+        mock_get_project_names: MagicMock,
+        mock_get_job_types: MagicMock,
+    ):
+        """Tests that an error is returned if the project names can't be
+        retrieved."""
+        mock_get_job_types.return_value = ["default"]
+        mock_get_project_names.side_effect = Exception("Unable to connect")
+        with self.assertLogs(level="ERROR"):
+            with TestClient(app) as client:
+                response = client.get("/api/v2/validation_context")
+        self.assertEqual(500, response.status_code)
+        self.assertEqual(
+            "Error retrieving validation context", response.json()["message"]
+        )
+
     @patch.dict(os.environ, EXAMPLE_ENV_VAR1, clear=True)
     @patch("boto3.client")
     def test_list_parameters(
@@ -1288,7 +1461,10 @@ class TestServer(unittest.TestCase):
 
         self.assertEqual(
             expected_streaming_response.headers.items(),
-            list(response.headers.items()),
+            [h for h in response.headers.items() if h[0] != "server-timing"],
+        )
+        self.assertRegex(
+            response.headers["server-timing"], r"^total;dur=[0-9.]+$"
         )
         self.assertEqual(200, response.status_code)
 
@@ -1330,6 +1506,106 @@ class TestServer(unittest.TestCase):
         self.assertIn("Admin", response.text)
         self.assertIn("local user", response.text)
 
+    @patch.dict(
+        os.environ, {**EXAMPLE_ENV_VAR1, "ENV_NAME": "local"}, clear=True
+    )
+    def test_profile_request(self):
+        """Tests that signed in users can profile a request and download the
+        profile from the admin page."""
+        with tempfile.TemporaryDirectory() as tmp:
+            with patch.object(profile_store, "directory", tmp):
+                with TestClient(app) as client:
+                    anonymous = client.get("/jobs?profile=1")
+                    client.get("/login")
+                    profiled = client.get("/jobs", headers={"X-Profile": "1"})
+                    name = profiled.headers["X-Profile-Id"]
+                    admin_page = client.get("/admin")
+                    download = client.get(f"/admin/profiles/{name}")
+                    with open(os.path.join(tmp, name)) as f:
+                        profile = f.read()
+                    missing = client.get("/admin/profiles/1-missing.folded")
+                    client.get("/logout")
+                    signed_out = client.get(
+                        f"/admin/profiles/{name}", follow_redirects=False
+                    )
+        self.assertEqual(200, anonymous.status_code)
+        self.assertNotIn("X-Profile-Id", anonymous.headers)
+        self.assertEqual(200, profiled.status_code)
+        self.assertIn(f'href="/admin/profiles/{name}"', admin_page.text)
+        self.assertEqual(200, download.status_code)
+        self.assertIn(
+            f'filename="{name}"', download.headers["content-disposition"]
+        )
+        self.assertEqual(profile, download.text)
+        self.assertEqual(404, missing.status_code)
+        self.assertEqual(307, signed_out.status_code)
+
+    @patch.dict(
+        os.environ, {**EXAMPLE_ENV_VAR1, "ENV_NAME": "local"}, clear=True
+    )
+    @patch.object(slow_request_log, "threshold", 0)
+    def test_slow_requests(self):
+        """Tests that slow requests are shown on the admin page."""
+        with TestClient(app) as client:
+            client.get("/jobs")
+            client.get("/login")
+            admin_page = client.get("/admin")
+        record = next(
+            r for r in slow_request_log.records() if r["path"] == "/jobs"
+        )
+        self.assertEqual("GET", record["method"])
+        self.assertEqual(200, record["status"])
+        self.assertIn("Slow Requests", admin_page.text)
+        self.assertIn("GET /jobs", admin_page.text)
+
+    @patch.dict(
+        os.environ, {**EXAMPLE_ENV_VAR1, "ENV_NAME": "local"}, clear=True
+    )
+    def test_memory_tracing(self):
+        """Tests that signed in users can trace allocations and compare
+        snapshots."""
+        try:
+            with TestClient(app) as client:
+                anonymous = client.post("/admin/memory/start")
+                client.get("/login")
+                not_tracing = client.post("/admin/memory/snapshots")
+                started = client.post("/admin/memory/start?frames=2")
+                old = client.post("/admin/memory/snapshots").json()["data"]
+                client.get("/jobs")
+                new = client.post("/admin/memory/snapshots").json()["data"]
+                stopped = client.post("/admin/memory/stop")
+                diff = client.get(
+                    "/admin/memory/diff",
+                    params={"old": old["id"], "new": new["id"], "limit": 5},
+                )
+                missing = client.get(
+                    "/admin/memory/diff", params={"old": 0, "new": new["id"]}
+                )
+                invalid = client.get("/admin/memory/diff?old=x")
+                status = client.get("/admin/memory")
+        finally:
+            memory_tracer.stop()
+            memory_tracer.clear()
+        self.assertEqual(401, anonymous.status_code)
+        self.assertEqual(409, not_tracing.status_code)
+        self.assertEqual(200, started.status_code)
+        self.assertTrue(started.json()["data"]["is_tracing"])
+        self.assertEqual(2, started.json()["data"]["traceback_limit"])
+        self.assertFalse(stopped.json()["data"]["is_tracing"])
+        self.assertEqual(200, diff.status_code)
+        top_allocations = diff.json()["data"]["top_allocations"]
+        self.assertLessEqual(len(top_allocations), 5)
+        self.assertEqual(
+            {"site", "size_diff_bytes", "size_bytes", "count_diff", "count"},
+            set(top_allocations[0].keys()),
+        )
+        self.assertEqual(404, missing.status_code)
+        self.assertEqual(400, invalid.status_code)
+        self.assertEqual(
+            [old["id"], new["id"]],
+            [s["id"] for s in status.json()["data"]["snapshots"]],
+        )
+
     @patch.dict(os.environ, EXAMPLE_ENV_VAR1, clear=True)
     @patch("fastapi.Request.session")
     @patch("aind_data_transfer_service.server.RedirectResponse")
@@ -1406,7 +1682,422 @@ class TestServer(unittest.TestCase):
             params=expected_airflow_params, get_confs=True
         )
         self.assertEqual(200, response.status_code)
-        self.assertEqual(2, len(captured.output))
+        self.assertEqual(3, len(captured.output))
+        completed = next(
+            r
+            for r in captured.records
+            if r.getMessage() == "Validated csv: Valid Data"
+        )
+        self.assertEqual(3, completed.jobs)
+        self.assertIn("parse", completed.phases)
+        self.assertIn("validate", completed.phases)
+
+    @patch.dict(
+        os.environ,
+        {**EXAMPLE_ENV_VAR1, "AIND_VALIDATE_CSV_BATCH_SIZE": "1"},
+        clear=True,
+    )
+    @patch("aind_data_transfer_service.server.get_airflow_jobs")
+    @patch("aind_data_transfer_service.server.get_job_types")
+    @patch("aind_data_transfer_service.server.get_project_names")
+    def test_validate_v2_csv_ndjson(
+        self,
+        mock_get_project_names: MagicMock,
+        mock_get_job_types: MagicMock,
+        mock_get_airflow_jobs: MagicMock,
+    ):
+        """Tests that validation results are streamed as ndjson and match
+        the regular json response."""
+        mock_get_project_names.return_value = [
+            "Ephys Platform",
+            "Behavior Platform",
+        ]
+        mock_get_job_types.return_value = ["default", "ecephys", "custom"]
+        mock_get_airflow_jobs.return_value = (0, list())
+        with TestClient(app) as client:
+            with open(NEW_SAMPLE_CSV, "rb") as f:
+                content = f.read()
+            json_response = client.post(
+                url="/api/v2/validate_csv",
+                files={"file": ("new_sample.csv", content)},
+            )
+            with self.assertLogs(level="INFO") as captured:
+                ndjson_response = client.post(
+                    url="/api/v2/validate_csv",
+                    files={"file": ("new_sample.csv", content)},
+                    headers={"Accept": "application/x-ndjson"},
+                )
+        completed = next(
+            r
+            for r in captured.records
+            if r.getMessage() == "Validated new_sample.csv: Valid Data"
+        )
+        self.assertEqual(3, completed.rows)
+        self.assertIn("parse", completed.phases)
+        self.assertEqual(200, ndjson_response.status_code)
+        self.assertEqual(
+            "application/x-ndjson", ndjson_response.headers["content-type"]
+        )
+        records = [json.loads(r) for r in ndjson_response.iter_lines()]
+        self.assertEqual(
+            {"summary": {"message": "Valid Data", "rows": 3, "errors": 0}},
+            records[-1],
+        )
+        self.assertEqual([1, 2, 3], [r["row"] for r in records[:-1]])
+        self.assertEqual(
+            json_response.json()["data"]["jobs"],
+            [r["job"] for r in records[:-1]],
+        )
+
+    @patch.dict(os.environ, EXAMPLE_ENV_VAR1, clear=True)
+    @patch("aind_data_transfer_service.server.get_airflow_jobs")
+    @patch("aind_data_transfer_service.server.get_job_types")
+    @patch("aind_data_transfer_service.server.get_project_names")
+    @patch(
+        "aind_data_transfer_service.server.worker_pool",
+        WorkerPool(kind="process", max_workers=1),
+    )
+    def test_validate_v2_xlsx_ndjson_errors(
+        self,
+        mock_get_project_names: MagicMock,
+        mock_get_job_types: MagicMock,
+        mock_get_airflow_jobs: MagicMock,
+    ):
+        """Tests that row errors are streamed as structured records."""
+        mock_get_project_names.return_value = ["Ephys Platform"]
+        mock_get_job_types.return_value = ["default", "ecephys", "custom"]
+        mock_get_airflow_jobs.return_value = (0, list())
+        with TestClient(app) as client:
+            with open(SAMPLE_XLSX_EMPTY_ROWS, "rb") as f:
+                response = client.post(
+                    url="/api/v2/validate_csv",
+                    files={"file": f},
+                    headers={"Accept": "application/x-ndjson"},
+                )
+        self.assertEqual(200, response.status_code)
+        records = [json.loads(r) for r in response.iter_lines()]
+        summary = records[-1]["summary"]
+        self.assertEqual("There were errors", summary["message"])
+        self.assertEqual(len(records) - 1, summary["rows"])
+        errors = [r["error"] for r in records[:-1] if "error" in r]
+        self.assertEqual(summary["errors"], len(errors))
+        self.assertEqual(
+            {"validation_error"}, {error["type"] for error in errors}
+        )
+        self.assertIn("msg", errors[0]["details"][0])
+        self.assertNotIn("url", errors[0]["details"][0])
+
+    @patch.dict(os.environ, EXAMPLE_ENV_VAR1, clear=True)
+    @patch("aind_data_transfer_service.server.get_airflow_jobs")
+    @patch("aind_data_transfer_service.server.get_job_types")
+    @patch("aind_data_transfer_service.server.get_project_names")
+    def test_validate_v2_xlsx_ndjson_saturated(
+        self,
+        mock_get_project_names: MagicMock,
+        mock_get_job_types: MagicMock,
+        mock_get_airflow_jobs: MagicMock,
+    ):
+        """Tests that reading rows of a streamed job sheet goes through the
+        worker pool and stops when it is saturated."""
+        mock_get_project_names.return_value = ["Ephys Platform"]
+        mock_get_job_types.return_value = ["default"]
+        mock_get_airflow_jobs.return_value = (0, list())
+        pool = WorkerPool(max_workers=0, max_queue_depth=0)
+        with (
+            patch("aind_data_transfer_service.server.worker_pool", pool),
+            patch.object(
+                pool, "run_in_thread", wraps=pool.run_in_thread
+            ) as mock_run_in_thread,
+        ):
+            with self.assertLogs(level="WARNING") as captured:
+                with TestClient(app) as client:
+                    with open(SAMPLE_XLSX, "rb") as f:
+                        response = client.post(
+                            url="/api/v2/validate_csv",
+                            files={"file": f},
+                            headers={"Accept": "application/x-ndjson"},
+                        )
+        records = [json.loads(r) for r in response.iter_lines()]
+        self.assertEqual(200, response.status_code)
+        self.assertEqual("aborted", records[0]["error"]["type"])
+        self.assertIn("saturated", records[0]["error"]["message"])
+        self.assertEqual(
+            {"message": "There were errors", "rows": 0, "errors": 1},
+            records[-1]["summary"],
+        )
+        mock_run_in_thread.assert_called_once()
+        self.assertEqual(1, len(captured.output))
+
+    @patch.dict(os.environ, EXAMPLE_ENV_VAR1, clear=True)
+    @patch("aind_data_transfer_service.server.get_airflow_jobs")
+    @patch("aind_data_transfer_service.server.get_job_types")
+    @patch("aind_data_transfer_service.server.get_project_names")
+    def test_validate_v2_ndjson_unreadable_file(
+        self,
+        mock_get_project_names: MagicMock,
+        mock_get_job_types: MagicMock,
+        mock_get_airflow_jobs: MagicMock,
+    ):
+        """Tests that a sheet that can't be decoded or opened stops the
+        stream with an aborted record and a summary."""
+        mock_get_project_names.return_value = ["Ephys Platform"]
+        mock_get_job_types.return_value = ["default"]
+        mock_get_airflow_jobs.return_value = (0, list())
+        for filename, content in [
+            ("a.csv", b"project_name,subject_id\nabc,\xff\xfe\n"),
+            ("a.xlsx", b"notazip"),
+        ]:
+            with self.subTest(filename=filename):
+                with self.assertLogs(level="ERROR") as captured:
+                    with TestClient(app) as client:
+                        response = client.post(
+                            url="/api/v2/validate_csv",
+                            files={"file": (filename, content)},
+                            headers={"Accept": "application/x-ndjson"},
+                        )
+                records = [json.loads(r) for r in response.iter_lines()]
+                self.assertEqual(200, response.status_code)
+                self.assertEqual(2, len(records))
+                self.assertIsNone(records[0]["row"])
+                self.assertEqual("aborted", records[0]["error"]["type"])
+                self.assertEqual(
+                    {"message": "There were errors", "rows": 0, "errors": 1},
+                    records[1]["summary"],
+                )
+                self.assertEqual(1, len(captured.output))
+
+    @patch.dict(
+        os.environ,
+        {**EXAMPLE_ENV_VAR1, "AIND_MAX_UPLOAD_ROWS": "2"},
+        clear=True,
+    )
+    @patch("aind_data_transfer_service.server.get_airflow_jobs")
+    @patch("aind_data_transfer_service.server.get_job_types")
+    @patch("aind_data_transfer_service.server.get_project_names")
+    def test_validate_v2_csv_ndjson_too_many_rows(
+        self,
+        mock_get_project_names: MagicMock,
+        mock_get_job_types: MagicMock,
+        mock_get_airflow_jobs: MagicMock,
+    ):
+        """Tests that the stream is stopped when the row limit is hit."""
+        mock_get_project_names.return_value = ["Ephys Platform"]
+        mock_get_job_types.return_value = ["default"]
+        mock_get_airflow_jobs.return_value = (0, list())
+        with self.assertLogs(level="WARNING") as captured:
+            with TestClient(app) as client:
+                with open(NEW_SAMPLE_CSV, "rb") as f:
+                    response = client.post(
+                        url="/api/v2/validate_csv",
+                        files={"file": f},
+                        headers={"Accept": "application/x-ndjson"},
+                    )
+        records = [json.loads(r) for r in response.iter_lines()]
+        self.assertEqual(
+            [
+                {
+                    "row": None,
+                    "error": {
+                        "type": "aborted",
+                        "message": (
+                            "Job sheet has more than the maximum of 2 rows"
+                        ),
+                    },
+                },
+                {
+                    "summary": {
+                        "message": "There were errors",
+                        "rows": 0,
+                        "errors": 1,
+                    }
+                },
+            ],
+            records,
+        )
+        self.assertEqual(1, len(captured.output))
+
+    @patch.dict(os.environ, EXAMPLE_ENV_VAR1, clear=True)
+    @patch("aind_data_transfer_service.server.get_airflow_jobs")
+    @patch("aind_data_transfer_service.server.get_job_types")
+    @patch("aind_data_transfer_service.server.get_project_names")
+    @patch(
+        "aind_data_transfer_service.server.worker_pool",
+        WorkerPool(kind="process", max_workers=1),
+    )
+    def test_validate_v2_xlsx_process_pool(
+        self,
+        mock_get_project_names: MagicMock,
+        mock_get_job_types: MagicMock,
+        mock_get_airflow_jobs: MagicMock,
+    ):
+        """Tests that sheets can be validated on a process pool."""
+        mock_get_project_names.return_value = [
+            "Ephys Platform",
+            "Behavior Platform",
+        ]
+        mock_get_job_types.return_value = ["default", "ecephys", "custom"]
+        mock_get_airflow_jobs.return_value = (0, list())
+        with TestClient(app) as client:
+            with open(SAMPLE_XLSX_EMPTY_ROWS, "rb") as f:
+                response = client.post(
+                    url="/api/v2/validate_csv", files={"file": f}
+                )
+        self.assertEqual(406, response.status_code)
+        self.assertEqual(3, len(response.json()["data"]["errors"]))
+
+    @patch.dict(os.environ, EXAMPLE_ENV_VAR1, clear=True)
+    @patch("aind_data_transfer_service.server.get_airflow_jobs")
+    @patch("aind_data_transfer_service.server.get_job_types")
+    @patch("aind_data_transfer_service.server.get_project_names")
+    @patch(
+        "aind_data_transfer_service.server.row_cache",
+        RowValidationCache(max_size=0),
+    )
+    def test_validate_v2_xlsx_parallel_rows(
+        self,
+        mock_get_project_names: MagicMock,
+        mock_get_job_types: MagicMock,
+        mock_get_airflow_jobs: MagicMock,
+    ):
+        """Tests that validating rows on a process pool returns the same
+        response as validating them one after another."""
+        mock_get_project_names.return_value = [
+            "Ephys Platform",
+            "Behavior Platform",
+        ]
+        mock_get_job_types.return_value = ["default", "ecephys", "custom"]
+        mock_get_airflow_jobs.return_value = (0, list())
+        responses = []
+        for validator in [
+            ParallelRowValidator(),
+            ParallelRowValidator(max_workers=1, chunk_size=1),
+        ]:
+            with patch(
+                "aind_data_transfer_service.server.row_validator", validator
+            ):
+                with TestClient(app) as client:
+                    with open(SAMPLE_XLSX_EMPTY_ROWS, "rb") as f:
+                        responses.append(
+                            client.post(
+                                url="/api/v2/validate_csv", files={"file": f}
+                            )
+                        )
+        self.assertEqual(406, responses[1].status_code)
+        self.assertEqual(responses[0].json(), responses[1].json())
+
+    @patch.dict(os.environ, EXAMPLE_ENV_VAR1, clear=True)
+    @patch("aind_data_transfer_service.server.get_airflow_jobs")
+    @patch("aind_data_transfer_service.server.get_job_types")
+    @patch("aind_data_transfer_service.server.get_project_names")
+    def test_validate_v2_csv_cached_rows(
+        self,
+        mock_get_project_names: MagicMock,
+        mock_get_job_types: MagicMock,
+        mock_get_airflow_jobs: MagicMock,
+    ):
+        """Tests that rows of a re-uploaded sheet are looked up in the row
+        validation cache."""
+        mock_get_project_names.return_value = [
+            "Ephys Platform",
+            "Behavior Platform",
+        ]
+        mock_get_job_types.return_value = ["default", "ecephys", "custom"]
+        mock_get_airflow_jobs.return_value = (0, list())
+        hits = ROW_VALIDATION_CACHE_HITS.get()
+        responses = []
+        with TestClient(app) as client:
+            for _ in range(2):
+                with open(NEW_SAMPLE_CSV, "rb") as f:
+                    responses.append(
+                        client.post(
+                            url="/api/v2/validate_csv", files={"file": f}
+                        )
+                    )
+        self.assertEqual(200, responses[1].status_code)
+        self.assertEqual(responses[0].json(), responses[1].json())
+        self.assertEqual(3, ROW_VALIDATION_CACHE_HITS.get() - hits)
+
+    @patch.dict(
+        os.environ,
+        {**EXAMPLE_ENV_VAR1, "AIND_MAX_UPLOAD_BYTES": "100"},
+        clear=True,
+    )
+    @patch("aind_data_transfer_service.server.get_airflow_jobs")
+    def test_validate_v2_csv_too_large(
+        self,
+        mock_get_airflow_jobs: MagicMock,
+    ):
+        """Tests that files larger than the limit are rejected."""
+        with self.assertLogs(level="WARNING") as captured:
+            with TestClient(app) as client:
+                with open(NEW_SAMPLE_CSV, "rb") as f:
+                    response = client.post(
+                        url="/api/v2/validate_csv", files={"file": f}
+                    )
+        self.assertEqual(413, response.status_code)
+        self.assertEqual(
+            ["File is larger than the maximum of 100 bytes"],
+            response.json()["data"]["errors"],
+        )
+        self.assertEqual(1, len(captured.output))
+        mock_get_airflow_jobs.assert_not_called()
+
+    @patch.dict(os.environ, EXAMPLE_ENV_VAR1, clear=True)
+    @patch("aind_data_transfer_service.server.get_airflow_jobs")
+    def test_validate_v2_csv_file_size_too_large(
+        self,
+        mock_get_airflow_jobs: MagicMock,
+    ):
+        """Tests that the body size is checked while it is received if the
+        request has no usable content-length."""
+        with open(NEW_SAMPLE_CSV, "rb") as f:
+            content = f.read()
+        for header in ["0", "abc"]:
+            with (
+                self.subTest(header=header),
+                patch.dict(os.environ, {"AIND_MAX_UPLOAD_BYTES": "600"}),
+            ):
+                with TestClient(app) as client:
+                    response = client.post(
+                        url="/api/v2/validate_csv",
+                        files={"file": ("new_sample.csv", content * 2)},
+                        headers={"content-length": header},
+                    )
+                self.assertEqual(413, response.status_code)
+                self.assertEqual(
+                    ["File is larger than the maximum of 600 bytes"],
+                    response.json()["data"]["errors"],
+                )
+        mock_get_airflow_jobs.assert_not_called()
+
+    @patch.dict(
+        os.environ,
+        {**EXAMPLE_ENV_VAR1, "AIND_MAX_UPLOAD_ROWS": "2"},
+        clear=True,
+    )
+    @patch("aind_data_transfer_service.server.get_airflow_jobs")
+    @patch("aind_data_transfer_service.server.get_job_types")
+    @patch("aind_data_transfer_service.server.get_project_names")
+    def test_validate_v2_csv_too_many_rows(
+        self,
+        mock_get_project_names: MagicMock,
+        mock_get_job_types: MagicMock,
+        mock_get_airflow_jobs: MagicMock,
+    ):
+        """Tests that sheets with more rows than the limit are rejected."""
+        mock_get_project_names.return_value = ["Ephys Platform"]
+        mock_get_job_types.return_value = ["default"]
+        mock_get_airflow_jobs.return_value = (0, list())
+        with TestClient(app) as client:
+            with open(NEW_SAMPLE_CSV, "rb") as f:
+                response = client.post(
+                    url="/api/v2/validate_csv", files={"file": f}
+                )
+        self.assertEqual(413, response.status_code)
+        self.assertEqual(
+            ["Job sheet has more than the maximum of 2 rows"],
+            response.json()["data"]["errors"],
+        )
 
     @patch.dict(os.environ, EXAMPLE_ENV_VAR1, clear=True)
     @patch("aind_data_transfer_service.server.get_project_names")
@@ -1430,7 +2121,13 @@ class TestServer(unittest.TestCase):
             ["Invalid input file type"],
             response.json()["data"]["errors"],
         )
-        self.assertEqual(2, len(captured.output))
+        self.assertEqual(3, len(captured.output))
+        completed = next(
+            r
+            for r in captured.records
+            if r.getMessage() == "Validated csv: There were errors"
+        )
+        self.assertIn("parse", completed.phases)
 
     @patch.dict(os.environ, EXAMPLE_ENV_VAR1, clear=True)
     @patch("aind_data_transfer_service.server.get_airflow_jobs")
@@ -1458,7 +2155,7 @@ class TestServer(unittest.TestCase):
                     response = client.post(
                         url="/api/v2/validate_csv", files=files
                     )
-        self.assertEqual(2, len(captured.output))
+        self.assertEqual(3, len(captured.output))
         self.assertEqual(response.status_code, 406)
         self.assertEqual(3, len(response.json()["data"]["errors"]))
 
@@ -1488,7 +2185,7 @@ class TestServer(unittest.TestCase):
                     response = client.post(
                         url="/api/v2/validate_csv", files=files
                     )
-        self.assertEqual(2, len(captured.output))
+        self.assertEqual(3, len(captured.output))
         self.assertEqual(200, response.status_code)
 
     @patch.dict(os.environ, EXAMPLE_ENV_VAR1, clear=True)
@@ -1515,13 +2212,13 @@ class TestServer(unittest.TestCase):
                         url="/api/v2/validate_csv", files=files
                     )
         self.assertEqual(response.status_code, 406)
-        self.assertEqual(2, len(captured.output))
+        self.assertEqual(3, len(captured.output))
 
     @patch.dict(os.environ, EXAMPLE_ENV_VAR1, clear=True)
     @patch("aind_data_transfer_service.server.get_airflow_jobs")
     @patch("aind_data_transfer_service.server.get_job_types")
     @patch("aind_data_transfer_service.server.get_project_names")
-    @patch("aind_data_transfer_service.server.map_csv_row_to_job")
+    @patch("aind_data_transfer_service.server.CsvRowMapper.map_row")
     def test_validate_v2_malformed_csv2_with_exception(
         self,
         mock_map_row_to_job: MagicMock,
@@ -1544,7 +2241,60 @@ class TestServer(unittest.TestCase):
                         url="/api/v2/validate_csv", files=files
                     )
         self.assertEqual(response.status_code, 406)
-        self.assertEqual(2, len(captured.output))
+        self.assertEqual(3, len(captured.output))
+
+    @patch.dict(os.environ, EXAMPLE_ENV_VAR1, clear=True)
+    @patch("httpx.AsyncClient.post")
+    @patch("aind_data_transfer_service.server.get_airflow_jobs")
+    @patch("aind_data_transfer_service.server.get_job_types")
+    @patch("aind_data_transfer_service.server.get_project_names")
+    @patch(
+        "aind_data_transfer_service.server.worker_pool",
+        WorkerPool(max_workers=0, max_queue_depth=0),
+    )
+    def test_worker_pool_saturated(
+        self,
+        mock_get_project_names: MagicMock,
+        mock_get_job_types: MagicMock,
+        mock_get_airflow_jobs: MagicMock,
+        mock_post: MagicMock,
+    ):
+        """Tests that CPU-bound endpoints return 503 when the worker pool is
+        saturated."""
+        mock_get_project_names.return_value = ["Ephys Platform"]
+        mock_get_job_types.return_value = ["ecephys"]
+        mock_get_airflow_jobs.return_value = (0, list())
+        request_json = SubmitJobRequestV2(
+            upload_jobs=[self.example_configs_v2],
+            user_email="abc@example.com",
+        ).model_dump(mode="json")
+        with self.assertLogs(level="WARNING") as captured:
+            with TestClient(app) as client:
+                with open(NEW_SAMPLE_CSV, "rb") as f:
+                    csv_response = client.post(
+                        url="/api/v2/validate_csv", files={"file": f}
+                    )
+                validate_response = client.post(
+                    url="/api/v2/validate_json", json=request_json
+                )
+                submit_response = client.post(
+                    url="/api/v2/submit_jobs", json=request_json
+                )
+                template_response = client.get("/api/job_upload_template")
+        for response in [
+            csv_response,
+            validate_response,
+            submit_response,
+            template_response,
+        ]:
+            self.assertEqual(503, response.status_code)
+            self.assertEqual("1", response.headers["Retry-After"])
+            self.assertEqual(
+                "Server is busy. Please try again later.",
+                response.json()["message"],
+            )
+        self.assertEqual(4, len(captured.output))
+        mock_post.assert_not_called()
 
     @patch.dict(os.environ, EXAMPLE_ENV_VAR1, clear=True)
     @patch("httpx.AsyncClient.post")
@@ -1602,12 +2352,29 @@ class TestServer(unittest.TestCase):
             upload_jobs=[self.example_configs_v2], user_email="abc@example.com"
         )
         request_json_v2 = job_request_v2.model_dump(mode="json")
+        submitted = UPLOAD_JOBS_SUBMITTED.get()
         with self.assertLogs(level="INFO") as captured:
             with TestClient(app) as client:
                 submit_job_response = client.post(
                     url="/api/v2/submit_jobs", json=request_json_v2
                 )
         self.assertEqual(200, submit_job_response.status_code)
+        self.assertEqual(submitted + 1, UPLOAD_JOBS_SUBMITTED.get())
+        phases = [
+            p.split(";")[0]
+            for p in submit_job_response.headers["Server-Timing"].split(", ")
+        ]
+        self.assertEqual(
+            [
+                "parse",
+                "validate",
+                "build_conf",
+                "airflow_trigger",
+                "serialize",
+                "total",
+            ],
+            phases,
+        )
         mock_get_job_types.assert_called_once_with("v2")
         expected_airflow_params = AirflowDagRunsRequestParameters(
             dag_ids=["transform_and_upload_v2", "run_list_of_jobs"],
@@ -1764,6 +2531,104 @@ class TestServer(unittest.TestCase):
         mock_get_airflow_jobs.assert_called_once()
         self.assertEqual(1, mock_get_project_names.call_count)
 
+    @patch.dict(os.environ, EXAMPLE_ENV_VAR1, clear=True)
+    @patch("httpx.AsyncClient.post")
+    @patch("aind_data_transfer_service.server.get_airflow_jobs")
+    @patch("aind_data_transfer_service.server.get_project_names")
+    @patch("aind_data_transfer_service.server.get_job_types")
+    def test_submit_v2_jobs_stamps_fingerprints(
+        self,
+        mock_get_job_types: MagicMock,
+        mock_get_project_names: MagicMock,
+        mock_get_airflow_jobs: MagicMock,
+        mock_post: MagicMock,
+    ):
+        """Tests that each upload job sent to airflow has a fingerprint."""
+        mock_get_project_names.return_value = ["Ephys Platform"]
+        mock_get_job_types.return_value = ["ecephys"]
+        mock_get_airflow_jobs.return_value = (0, list())
+        mock_response = Response()
+        mock_response.status_code = 200
+        mock_response._content = json.dumps({"message": "sent"}).encode(
+            "utf-8"
+        )
+        mock_post.return_value = mock_response
+        job_request_v2 = SubmitJobRequestV2(
+            upload_jobs=[self.example_configs_v2],
+            user_email="abc@example.com",
+        )
+        with TestClient(app) as client:
+            submit_job_response = client.post(
+                url="/api/v2/submit_jobs",
+                json=job_request_v2.model_dump(mode="json"),
+            )
+        self.assertEqual(200, submit_job_response.status_code)
+        conf = mock_post.call_args.kwargs["json"]["conf"]
+        self.assertEqual(
+            [job_request_v2.upload_jobs[0].fingerprint],
+            [j["fingerprint"] for j in conf["upload_jobs"]],
+        )
+
+    @patch.dict(os.environ, EXAMPLE_ENV_VAR1, clear=True)
+    @patch("httpx.AsyncClient.post")
+    @patch("aind_data_transfer_service.server.get_airflow_jobs")
+    @patch("aind_data_transfer_service.server.get_project_names")
+    @patch("aind_data_transfer_service.server.get_job_types")
+    def test_submit_v2_jobs_trace_context(
+        self,
+        mock_get_job_types: MagicMock,
+        mock_get_project_names: MagicMock,
+        mock_get_airflow_jobs: MagicMock,
+        mock_post: MagicMock,
+    ):
+        """Tests that the request and the airflow trigger are traced, and
+        that the trace context is added to the conf."""
+        mock_get_project_names.return_value = ["Ephys Platform"]
+        mock_get_job_types.return_value = ["ecephys"]
+        mock_get_airflow_jobs.return_value = (0, list())
+        mock_response = Response()
+        mock_response.status_code = 200
+        mock_response._content = json.dumps({"message": "sent"}).encode(
+            "utf-8"
+        )
+        mock_post.return_value = mock_response
+        job_request_v2 = SubmitJobRequestV2(
+            upload_jobs=[self.example_configs_v2],
+            user_email="abc@example.com",
+        )
+        trace_id = "0af7651916cd43dd8448eb211c80319c"
+        exporter = InMemorySpanExporter()
+        with patch.object(tracer, "exporter", exporter):
+            with TestClient(app) as client:
+                submit_job_response = client.post(
+                    url="/api/v2/submit_jobs",
+                    json=job_request_v2.model_dump(mode="json"),
+                    headers={
+                        "traceparent": f"00-{trace_id}-b7ad6b7169203331-01"
+                    },
+                )
+        self.assertEqual(200, submit_job_response.status_code)
+        trigger_span, request_span = exporter.get_finished_spans()
+        self.assertEqual("POST /api/v2/submit_jobs", request_span.name)
+        self.assertEqual(200, request_span.attributes["http.status_code"])
+        self.assertEqual("b7ad6b7169203331", request_span.parent_span_id)
+        self.assertEqual("upstream airflow_trigger", trigger_span.name)
+        self.assertEqual(
+            request_span.context.span_id, trigger_span.parent_span_id
+        )
+        conf = mock_post.call_args.kwargs["json"]["conf"]
+        traceparent = request_span.context.traceparent
+        self.assertEqual(trace_id, conf["trace_id"])
+        self.assertEqual(traceparent, conf["traceparent"])
+        self.assertEqual(
+            [(trace_id, traceparent)],
+            [(j["trace_id"], j["traceparent"]) for j in conf["upload_jobs"]],
+        )
+        self.assertEqual(
+            job_request_v2.upload_jobs[0].fingerprint,
+            compute_job_fingerprint(conf["upload_jobs"][0]),
+        )
+
     @patch("aind_data_transfer_service.server.get_airflow_jobs")
     @patch("aind_data_transfer_service.server.get_job_types")
     @patch("aind_data_transfer_service.server.get_project_names")
@@ -1812,6 +2677,15 @@ class TestServer(unittest.TestCase):
         mock_get_job_types.assert_called_once_with("v2")
         self.assertEqual(1, mock_get_project_names.call_count)
         self.assertEqual(4, len(captured.output))
+        completed = next(
+            r
+            for r in captured.records
+            if r.getMessage() == "Valid model detected"
+        )
+        self.assertEqual(
+            {"parse", "validate", "serialize"},
+            {"parse", "validate", "serialize"} & set(completed.phases),
+        )
 
     @patch("aind_data_transfer_service.server.get_airflow_jobs")
     @patch("aind_data_transfer_service.server.get_project_names")
@@ -1844,6 +2718,7 @@ class TestServer(unittest.TestCase):
             f"There were validation errors processing {content}",
             captured.output[0],
         )
+        self.assertIn("validate", captured.records[0].phases)
         mock_get_airflow_jobs.assert_called_once()
         mock_get_job_types.assert_called_once_with("v2")
         self.assertEqual(1, mock_get_project_names.call_count)
@@ -1894,6 +2769,58 @@ class TestServer(unittest.TestCase):
             captured.output[0],
         )
 
+    @patch.dict(os.environ, EXAMPLE_ENV_VAR1, clear=True)
+    @patch("httpx.AsyncClient.post")
+    @patch("aind_data_transfer_service.server.get_project_names")
+    @patch("aind_data_transfer_service.server.get_job_types")
+    def test_submit_v2_jobs_duplicate_current(
+        self,
+        mock_get_job_types: MagicMock,
+        mock_get_project_names: MagicMock,
+        mock_post: MagicMock,
+    ):
+        """Tests that submitting a job that is already running is counted
+        as a duplicate rejection and is not sent to airflow."""
+        mock_get_project_names.return_value = ["Ephys Platform"]
+        mock_get_job_types.return_value = ["ecephys"]
+        job_request = SubmitJobRequestV2(
+            upload_jobs=[self.example_configs_v2], user_email="abc@example.com"
+        ).model_dump(mode="json", exclude_none=True)
+        airflow_response = {
+            "dag_runs": [
+                {
+                    **self.get_dag_run_response,
+                    "conf": job_request["upload_jobs"][0],
+                }
+            ],
+            "total_entries": 1,
+        }
+        mock_dag_runs_response = Response()
+        mock_dag_runs_response.status_code = 200
+        mock_dag_runs_response._content = json.dumps(airflow_response).encode(
+            "utf-8"
+        )
+        mock_post.return_value = mock_dag_runs_response
+        rejected = UPLOAD_JOBS_REJECTED_DUPLICATE.get(reason="already_running")
+        list_calls = UPSTREAM_REQUEST_SECONDS.get_count(
+            dependency="airflow_list", outcome="success"
+        )
+        with self.assertLogs(level="WARNING"):
+            with TestClient(app) as client:
+                resp = client.post("/api/v2/submit_jobs", json=job_request)
+        self.assertEqual(406, resp.status_code)
+        self.assertEqual(
+            rejected + 1,
+            UPLOAD_JOBS_REJECTED_DUPLICATE.get(reason="already_running"),
+        )
+        self.assertEqual(
+            list_calls + 1,
+            UPSTREAM_REQUEST_SECONDS.get_count(
+                dependency="airflow_list", outcome="success"
+            ),
+        )
+        mock_post.assert_called_once()
+
     @patch("pydantic.BaseModel.model_validate_json")
     @patch("aind_data_transfer_service.server.get_airflow_jobs")
     @patch("aind_data_transfer_service.server.get_project_names")
@@ -1930,6 +2857,7 @@ class TestServer(unittest.TestCase):
         )
         mock_model_validate_json.assert_called()
         self.assertIn("Unknown error", captured.output[0])
+        self.assertIn("validate", captured.records[0].phases)
         mock_get_airflow_jobs.assert_called_once()
         mock_get_job_types.assert_called_once_with("v2")
         self.assertEqual(1, mock_get_project_names.call_count)
@@ -2107,6 +3035,54 @@ class TestServer(unittest.TestCase):
         )
         self.assertEqual(2, len(captured.output))
 
+    @patch.dict(os.environ, EXAMPLE_ENV_VAR1, clear=True)
+    @patch("httpx.AsyncClient.patch")
+    @patch("httpx.AsyncClient.post")
+    def test_metrics(
+        self,
+        mock_post: MagicMock,
+        mock_patch: MagicMock,
+    ):
+        """Tests that request, upstream and job metrics are exposed in the
+        Prometheus text format."""
+        mock_patch_response = Response()
+        mock_patch_response.status_code = 200
+        mock_patch.return_value = mock_patch_response
+        mock_post_response = Response()
+        mock_post_response.status_code = 200
+        mock_post.return_value = mock_post_response
+        cancelled = JOBS_CANCELLED.get()
+        with self.assertLogs(level="INFO"):
+            with TestClient(app) as client:
+                client.post(
+                    url="/api/v2/cancel_job",
+                    json={
+                        "s3_prefix": "abc_123",
+                        "dag_id": "transform_and_upload_v2",
+                        "dag_run_id": "manual__1",
+                    },
+                )
+                response = client.get("/metrics")
+        self.assertEqual(200, response.status_code)
+        self.assertEqual(
+            "text/plain; version=0.0.4; charset=utf-8",
+            response.headers["content-type"],
+        )
+        self.assertEqual(cancelled + 1, JOBS_CANCELLED.get())
+        lines = response.text.splitlines()
+        self.assertIn(f"jobs_cancelled_total {int(cancelled + 1)}", lines)
+        self.assertIn("# TYPE http_request_duration_seconds histogram", lines)
+        samples = [line.split(" ")[0] for line in lines]
+        for sample in [
+            'http_request_duration_seconds_count{method="POST",'
+            'route="/api/v2/cancel_job",status="200"}',
+            "upstream_request_duration_seconds_count{"
+            'dependency="airflow_patch",outcome="success"}',
+            "upstream_request_duration_seconds_count{"
+            'dependency="airflow_trigger",outcome="success"}',
+        ]:
+            self.assertIn(sample, samples)
+
     @patch.dict(os.environ, EXAMPLE_ENV_VAR1, clear=True)
     @patch("httpx.AsyncClient.patch")
     @patch("httpx.AsyncClient.post")
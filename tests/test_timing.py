@@ -0,0 +1,126 @@
+"""Tests timing module"""
+
+import asyncio
+import contextvars
+import time
+import unittest
+from concurrent.futures import ThreadPoolExecutor
+
+from aind_data_transfer_service.timing import (
+    MAX_RECORDED_UPSTREAM_CALLS,
+    SpanRecorder,
+    annotate,
+    current_phases,
+    current_recorder,
+    record_upstream_call,
+    recording,
+    span,
+    timed,
+)
+
+
+@timed("blocking")
+def blocking_call(seconds: float) -> float:
+    """Sleep and return the seconds slept"""
+    time.sleep(seconds)
+    return seconds
+
+
+@timed("awaited")
+async def awaited_call(seconds: float) -> float:
+    """Sleep on the event loop and return the seconds slept"""
+    await asyncio.sleep(seconds)
+    return seconds
+
+
+class TestTiming(unittest.TestCase):
+    """Tests span recording"""
+
+    def test_span_without_recorder(self):
+        """Tests that spans outside a request are no-ops"""
+        self.assertIsNone(current_recorder())
+        with span("parse"):
+            pass
+        self.assertEqual(0.01, blocking_call(0.01))
+        self.assertIsNone(current_phases())
+
+    def test_recording(self):
+        """Tests that spans with the same name are added together in the
+        order they were first started"""
+        with recording() as recorder:
+            self.assertIs(recorder, current_recorder())
+            with span("parse"):
+                time.sleep(0.01)
+            self.assertEqual(0.01, blocking_call(0.01))
+            with span("parse"):
+                time.sleep(0.01)
+            phases = current_phases()
+        self.assertIsNone(current_recorder())
+        self.assertEqual(["parse", "blocking"], list(phases.keys()))
+        self.assertGreaterEqual(phases["parse"], 20)
+        self.assertGreaterEqual(phases["blocking"], 10)
+
+    def test_recording_async_and_threads(self):
+        """Tests that coroutines and threads with a copy of the context
+        record into the request's recorder"""
+
+        async def handle() -> SpanRecorder:
+            """Await a timed coroutine and run a timed call on a thread"""
+            with recording() as recorder:
+                await awaited_call(0.01)
+                loop = asyncio.get_running_loop()
+                with ThreadPoolExecutor(1) as executor:
+                    await loop.run_in_executor(
+                        executor,
+                        contextvars.copy_context().run,
+                        blocking_call,
+                        0.01,
+                    )
+            return recorder
+
+        recorder = asyncio.run(handle())
+        self.assertEqual(["awaited", "blocking"], list(recorder.phases))
+
+    def test_server_timing(self):
+        """Tests the Server-Timing header value"""
+        recorder = SpanRecorder()
+        recorder.add("parse", 0.0004)
+        recorder.add("airflow_trigger", 0.0123)
+        self.assertRegex(
+            recorder.server_timing(),
+            r"^parse;dur=0\.4, airflow_trigger;dur=12\.3, total;dur=[0-9.]+$",
+        )
+        self.assertEqual(
+            {"parse": 0.4, "airflow_trigger": 12.3},
+            recorder.as_milliseconds(),
+        )
+
+    def test_annotate_and_upstream_calls(self):
+        """Tests that request details and upstream calls are recorded, and
+        that only the first upstream calls are kept"""
+        annotate(jobs=1)
+        record_upstream_call("ssm_get", "success", 0.1)
+        with recording() as recorder:
+            annotate(jobs=2)
+            annotate(errors=0)
+            for _ in range(MAX_RECORDED_UPSTREAM_CALLS + 1):
+                record_upstream_call("airflow_list", "timeout", 0.0123)
+        self.assertEqual({"jobs": 2, "errors": 0}, recorder.attributes)
+        self.assertEqual(
+            MAX_RECORDED_UPSTREAM_CALLS + 1, recorder.upstream_call_count
+        )
+        self.assertEqual(
+            MAX_RECORDED_UPSTREAM_CALLS, len(recorder.upstream_calls)
+        )
+        self.assertEqual(
+            {
+                "dependency": "airflow_list",
+                "outcome": "timeout",
+                "duration_ms": 12.3,
+            },
+            recorder.upstream_calls[0],
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,127 @@
+"""Tests tracing module"""
+
+import json
+import os
+import tempfile
+import unittest
+from unittest.mock import patch
+
+from aind_data_transfer_service.tracing import (
+    FileSpanExporter,
+    InMemorySpanExporter,
+    SpanContext,
+    Tracer,
+    current_span,
+)
+
+TRACEPARENT = "00-0af7651916cd43dd8448eb211c80319c-b7ad6b7169203331-01"
+
+
+class TestSpanContext(unittest.TestCase):
+    """Tests SpanContext class"""
+
+    def test_traceparent(self):
+        """Tests that traceparents are parsed and formatted"""
+        context = SpanContext.from_traceparent(TRACEPARENT)
+        self.assertEqual("0af7651916cd43dd8448eb211c80319c", context.trace_id)
+        self.assertEqual("b7ad6b7169203331", context.span_id)
+        self.assertEqual(TRACEPARENT, context.traceparent)
+        for invalid in [
+            None,
+            "",
+            "not a traceparent",
+            "00-00000000000000000000000000000000-b7ad6b7169203331-01",
+            "00-0af7651916cd43dd8448eb211c80319c-0000000000000000-01",
+        ]:
+            self.assertIsNone(SpanContext.from_traceparent(invalid))
+
+
+class TestTracer(unittest.TestCase):
+    """Tests Tracer class"""
+
+    def test_start_span(self):
+        """Tests that nested spans share a trace and are exported when they
+        end"""
+        exporter = InMemorySpanExporter()
+        tracer = Tracer(exporter)
+        with tracer.start_span("request", attributes={"a": 1}) as root:
+            self.assertIs(root, current_span())
+            with tracer.start_span("upstream") as child:
+                child.set_attribute("b", 2)
+            self.assertIs(root, current_span())
+        self.assertIsNone(current_span())
+        spans = exporter.get_finished_spans()
+        self.assertEqual([child, root], spans)
+        self.assertEqual(root.trace_id, child.trace_id)
+        self.assertEqual(root.context.span_id, child.parent_span_id)
+        self.assertIsNone(root.parent_span_id)
+        self.assertRegex(root.trace_id, "^[0-9a-f]{32}$")
+        self.assertRegex(root.context.span_id, "^[0-9a-f]{16}$")
+        self.assertEqual({"a": 1}, root.attributes)
+        self.assertLessEqual(
+            root.start_time_unix_nano, child.start_time_unix_nano
+        )
+        self.assertLessEqual(child.end_time_unix_nano, root.end_time_unix_nano)
+
+    def test_start_span_remote_parent(self):
+        """Tests that a span can join a trace from a traceparent"""
+        exporter = InMemorySpanExporter()
+        parent = SpanContext.from_traceparent(TRACEPARENT)
+        with Tracer(exporter).start_span("request", parent=parent) as span:
+            pass
+        self.assertEqual(parent.trace_id, span.trace_id)
+        self.assertEqual(parent.span_id, span.parent_span_id)
+
+    def test_start_span_error(self):
+        """Tests that spans that raise are marked as errors"""
+        exporter = InMemorySpanExporter(max_spans=1)
+        tracer = Tracer(exporter)
+        with tracer.start_span("ok"):
+            pass
+        with self.assertRaises(ValueError):
+            with tracer.start_span("fails"):
+                raise ValueError("bad")
+        (span,) = exporter.get_finished_spans()
+        self.assertEqual("fails", span.name)
+        self.assertEqual("error", span.status)
+        self.assertEqual("ValueError", span.attributes["exception.type"])
+        exporter.clear()
+        self.assertEqual([], exporter.get_finished_spans())
+
+    def test_file_exporter(self):
+        """Tests that spans are appended to a json lines file and that
+        export errors don't fail the traced code"""
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "traces.jsonl")
+            tracer = Tracer(FileSpanExporter(path))
+            with tracer.start_span("request"):
+                with tracer.start_span("upstream"):
+                    pass
+            with open(path) as f:
+                spans = [json.loads(line) for line in f]
+            tracer.exporter = FileSpanExporter(os.path.join(tmp, "missing/x"))
+            with self.assertLogs(level="WARNING") as captured:
+                with tracer.start_span("request"):
+                    pass
+        self.assertEqual(["upstream", "request"], [s["name"] for s in spans])
+        self.assertEqual(spans[1]["span_id"], spans[0]["parent_span_id"])
+        self.assertIn("Unable to export span request", captured.output[0])
+
+    def test_from_env(self):
+        """Tests that the exporter is configured from env vars"""
+        with patch.dict(os.environ, {}, clear=True):
+            self.assertIsNone(Tracer.from_env().exporter)
+        with patch.dict(os.environ, {"AIND_TRACING_EXPORTER": "memory"}):
+            self.assertIsInstance(
+                Tracer.from_env().exporter, InMemorySpanExporter
+            )
+        env = {"AIND_TRACING_EXPORTER": "file", "AIND_TRACING_FILE": "t.json"}
+        with patch.dict(os.environ, env):
+            self.assertEqual("t.json", Tracer.from_env().exporter.path)
+        with patch.dict(os.environ, {"AIND_TRACING_EXPORTER": "zipkin"}):
+            with self.assertLogs(level="WARNING"):
+                self.assertIsNone(Tracer.from_env().exporter)
+
+
+if __name__ == "__main__":
+    unittest.main()
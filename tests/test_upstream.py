@@ -0,0 +1,140 @@
+"""Tests upstream module"""
+
+import asyncio
+import unittest
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import httpx
+from botocore.exceptions import ClientError, ReadTimeoutError
+
+from aind_data_transfer_service.faults import FaultInjector, FaultRule
+from aind_data_transfer_service.metrics import UPSTREAM_REQUEST_SECONDS
+from aind_data_transfer_service.timing import recording
+from aind_data_transfer_service.upstream import (
+    Upstream,
+    call,
+    call_async,
+    exception_outcome,
+    result_outcome,
+)
+
+
+class TestUpstream(unittest.TestCase):
+    """Tests upstream calls are measured"""
+
+    def test_result_outcome(self):
+        """Tests outcomes of calls that returned"""
+        self.assertEqual("success", result_outcome(httpx.Response(200)))
+        self.assertEqual("success", result_outcome({"Parameter": {}}))
+        self.assertEqual("client_error", result_outcome(httpx.Response(404)))
+        self.assertEqual("server_error", result_outcome(httpx.Response(502)))
+        self.assertEqual("success", result_outcome(MagicMock()))
+
+    def test_exception_outcome(self):
+        """Tests outcomes of calls that raised"""
+        self.assertEqual(
+            "timeout", exception_outcome(httpx.ReadTimeout("slow"))
+        )
+        self.assertEqual(
+            "timeout", exception_outcome(ReadTimeoutError(endpoint_url="x"))
+        )
+        throttled = ClientError(
+            {
+                "Error": {"Code": "ThrottlingException"},
+                "ResponseMetadata": {"HTTPStatusCode": 400},
+            },
+            "GetParameter",
+        )
+        self.assertEqual("client_error", exception_outcome(throttled))
+        self.assertEqual(
+            "error", exception_outcome(httpx.ConnectError("refused"))
+        )
+
+    def test_call(self):
+        """Tests that blocking calls are recorded with their outcome"""
+        labels = {"dependency": "ssm_get", "outcome": "success"}
+        error_labels = {"dependency": "ssm_get", "outcome": "error"}
+        count = UPSTREAM_REQUEST_SECONDS.get_count(**labels)
+        error_count = UPSTREAM_REQUEST_SECONDS.get_count(**error_labels)
+        func = MagicMock(return_value={"Parameter": {"Value": "{}"}})
+        with recording() as recorder:
+            result = call(Upstream.SSM_GET, func, Name="param")
+        self.assertEqual(1, recorder.upstream_call_count)
+        self.assertEqual(
+            ("ssm_get", "success"),
+            (
+                recorder.upstream_calls[0]["dependency"],
+                recorder.upstream_calls[0]["outcome"],
+            ),
+        )
+        self.assertEqual({"Parameter": {"Value": "{}"}}, result)
+        func.assert_called_once_with(Name="param")
+        func.side_effect = ValueError("bad")
+        with self.assertRaises(ValueError):
+            call(Upstream.SSM_GET, func)
+        self.assertEqual(
+            count + 1, UPSTREAM_REQUEST_SECONDS.get_count(**labels)
+        )
+        self.assertEqual(
+            error_count + 1, UPSTREAM_REQUEST_SECONDS.get_count(**error_labels)
+        )
+
+    def test_call_async(self):
+        """Tests that awaited calls are recorded with their outcome"""
+        labels = {"dependency": "airflow_trigger", "outcome": "server_error"}
+        timeout_labels = {
+            "dependency": "airflow_trigger",
+            "outcome": "timeout",
+        }
+        count = UPSTREAM_REQUEST_SECONDS.get_count(**labels)
+        timeout_count = UPSTREAM_REQUEST_SECONDS.get_count(**timeout_labels)
+        func = AsyncMock(return_value=httpx.Response(500))
+        response = asyncio.run(
+            call_async(Upstream.AIRFLOW_TRIGGER, func, "url", json={})
+        )
+        self.assertEqual(500, response.status_code)
+        func.assert_awaited_once_with("url", json={})
+        func.side_effect = httpx.ReadTimeout("slow")
+        with self.assertRaises(httpx.ReadTimeout):
+            asyncio.run(call_async(Upstream.AIRFLOW_TRIGGER, func, "url"))
+        self.assertEqual(
+            count + 1, UPSTREAM_REQUEST_SECONDS.get_count(**labels)
+        )
+        self.assertEqual(
+            timeout_count + 1,
+            UPSTREAM_REQUEST_SECONDS.get_count(**timeout_labels),
+        )
+
+    def test_injected_faults(self):
+        """Tests that injected faults are measured like real ones"""
+        injector = FaultInjector(
+            {
+                "ssm": FaultRule(timeout_rate=1),
+                "airflow": FaultRule(error_rate=1, error_status=502),
+            }
+        )
+        func = MagicMock()
+        async_func = AsyncMock()
+        with (
+            patch(
+                "aind_data_transfer_service.faults.fault_injector", injector
+            ),
+            recording() as recorder,
+        ):
+            with self.assertRaises(ReadTimeoutError):
+                call(Upstream.SSM_DESCRIBE, func)
+            response = asyncio.run(
+                call_async(Upstream.AIRFLOW_LIST, async_func, url="url")
+            )
+            call(Upstream.SECRETS_MANAGER, func)
+        self.assertEqual(502, response.status_code)
+        func.assert_called_once_with()
+        async_func.assert_not_awaited()
+        self.assertEqual(
+            ["timeout", "server_error", "success"],
+            [c["outcome"] for c in recorder.upstream_calls],
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
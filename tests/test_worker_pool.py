@@ -0,0 +1,192 @@
+"""Tests methods in worker_pool module"""
+
+import asyncio
+import os
+import threading
+import time
+import unittest
+from contextvars import ContextVar
+from math import factorial
+from unittest.mock import patch
+
+from aind_data_transfer_service.metrics import (
+    EVENT_LOOP_LAG_LAST_SECONDS,
+    EVENT_LOOP_LAG_SECONDS,
+    WORKER_POOL_REJECTED_TASKS,
+    monitor_event_loop_lag,
+)
+from aind_data_transfer_service.worker_pool import (
+    WorkerPool,
+    WorkerPoolSaturatedError,
+)
+
+_example_var: ContextVar[str] = ContextVar("_example_var", default="unset")
+
+
+class TestWorkerPool(unittest.TestCase):
+    """Tests WorkerPool class"""
+
+    def test_run_thread(self):
+        """Tests that functions run on a worker thread"""
+        pool = WorkerPool(kind="thread", max_workers=1)
+
+        async def run():
+            """Run a function that returns its thread name."""
+            return await pool.run(lambda: threading.current_thread().name)
+
+        thread_name = asyncio.run(run())
+        pool.shutdown()
+        self.assertTrue(thread_name.startswith("aind-worker"))
+        self.assertEqual(0, pool.pending)
+
+    def test_run_thread_keeps_context(self):
+        """Tests that context variables are visible on worker threads"""
+        pool = WorkerPool(kind="thread", max_workers=1)
+
+        async def run():
+            """Set a context variable and read it on the pool."""
+            _example_var.set("set")
+            return await pool.run(_example_var.get)
+
+        self.assertEqual("set", asyncio.run(run()))
+        pool.shutdown()
+
+    def test_run_process(self):
+        """Tests that functions run on a process pool"""
+        pool = WorkerPool(kind="process", max_workers=1)
+
+        async def run():
+            """Compute a factorial on the pool."""
+            return await pool.run(factorial, 10)
+
+        self.assertEqual(3628800, asyncio.run(run()))
+        self.assertNotEqual(
+            "fork", pool._executor._mp_context.get_start_method()
+        )
+        pool.shutdown()
+        self.assertIsNone(pool._executor)
+
+    def test_saturated(self):
+        """Tests that work is rejected when the pool is saturated"""
+        pool = WorkerPool(kind="thread", max_workers=1, max_queue_depth=1)
+        release = threading.Event()
+        rejected_count = WORKER_POOL_REJECTED_TASKS.get()
+
+        async def run():
+            """Submit three blocking tasks to a pool that accepts two."""
+            tasks = [
+                asyncio.create_task(pool.run(release.wait)) for _ in range(2)
+            ]
+            await asyncio.sleep(0.05)
+            self.assertEqual(2, pool.pending)
+            with self.assertRaises(WorkerPoolSaturatedError):
+                await pool.run(release.wait)
+            release.set()
+            return await asyncio.gather(*tasks)
+
+        self.assertEqual([True, True], asyncio.run(run()))
+        pool.shutdown()
+        self.assertEqual(rejected_count + 1, WORKER_POOL_REJECTED_TASKS.get())
+
+    def test_run_in_thread(self):
+        """Tests that unpicklable work runs on a thread of a process pool
+        and counts against the same limit"""
+        pool = WorkerPool(kind="process", max_workers=1, max_queue_depth=0)
+        rows = (i for i in range(5))
+        release = threading.Event()
+
+        async def run():
+            """Read from a generator, then fill the pool."""
+            batch = await pool.run_in_thread(list, rows)
+            task = asyncio.create_task(pool.run_in_thread(release.wait))
+            await asyncio.sleep(0.05)
+            with self.assertRaises(WorkerPoolSaturatedError):
+                await pool.run(factorial, 10)
+            with self.assertRaises(WorkerPoolSaturatedError):
+                await pool.run_in_thread(list, rows)
+            release.set()
+            return batch, await task
+
+        self.assertEqual(([0, 1, 2, 3, 4], True), asyncio.run(run()))
+        self.assertIsNone(pool._executor)
+        pool.shutdown()
+        self.assertIsNone(pool._thread_executor)
+
+    def test_invalid_kind(self):
+        """Tests that an unknown kind raises an error"""
+        with self.assertRaises(ValueError):
+            WorkerPool(kind="fiber")
+
+    @patch.dict(
+        os.environ,
+        {
+            "AIND_WORKER_POOL_KIND": "process",
+            "AIND_WORKER_POOL_MAX_WORKERS": "2",
+            "AIND_WORKER_POOL_MAX_QUEUE_DEPTH": "3",
+        },
+        clear=True,
+    )
+    def test_from_env(self):
+        """Tests that the pool can be configured with env vars"""
+        pool = WorkerPool.from_env()
+        self.assertEqual("process", pool.kind)
+        self.assertEqual(2, pool.max_workers)
+        self.assertEqual(3, pool.max_queue_depth)
+
+
+class TestEventLoopLag(unittest.TestCase):
+    """Tests event loop lag monitor"""
+
+    @staticmethod
+    def _max_lag_while(blocking_call) -> float:
+        """Run the lag monitor while awaiting blocking_call and return the
+        largest lag that was measured."""
+
+        async def run():
+            """Run monitor alongside the blocking call."""
+            monitor = asyncio.create_task(monitor_event_loop_lag(0.01))
+            lags = []
+
+            async def sample():
+                """Keep track of the last measured lag."""
+                while True:
+                    await asyncio.sleep(0.005)
+                    lags.append(EVENT_LOOP_LAG_LAST_SECONDS.get() or 0.0)
+
+            sampler = asyncio.create_task(sample())
+            await asyncio.sleep(0.05)
+            await blocking_call()
+            await asyncio.sleep(0.05)
+            monitor.cancel()
+            sampler.cancel()
+            return max(lags)
+
+        return asyncio.run(run())
+
+    def test_lag_recorded_when_loop_blocked(self):
+        """Tests that blocking the loop is measured as lag"""
+        count = EVENT_LOOP_LAG_SECONDS.get_count()
+
+        async def block_loop():
+            """Sleep on the loop thread."""
+            time.sleep(0.3)
+
+        max_lag = self._max_lag_while(block_loop)
+        self.assertGreater(EVENT_LOOP_LAG_SECONDS.get_count(), count)
+        self.assertGreaterEqual(max_lag, 0.2)
+
+    def test_loop_responsive_with_worker_pool(self):
+        """Tests that work on the pool doesn't block the loop"""
+        pool = WorkerPool(kind="thread", max_workers=1)
+
+        async def block_worker():
+            """Sleep on a worker thread."""
+            await pool.run(time.sleep, 0.3)
+
+        max_lag = self._max_lag_while(block_worker)
+        pool.shutdown()
+        self.assertLess(max_lag, 0.2)
+
+
+if __name__ == "__main__":
+    unittest.main()